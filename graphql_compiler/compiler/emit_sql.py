@@ -7,6 +7,7 @@ import six
 import sqlalchemy
 from sqlalchemy import select
 from sqlalchemy.dialects.mssql.base import MSDialect
+from sqlalchemy.dialects.mysql.base import MySQLDialect
 from sqlalchemy.dialects.postgresql.base import PGDialect
 from sqlalchemy.engine.default import DefaultDialect
 from sqlalchemy.ext.compiler import compiles
@@ -16,7 +17,7 @@ from sqlalchemy.sql.elements import Label
 from sqlalchemy.sql.expression import Alias, BinaryExpression
 from sqlalchemy.sql.functions import func
 from sqlalchemy.sql.schema import Column
-from sqlalchemy.sql.selectable import FromClause, Join, Select
+from sqlalchemy.sql.selectable import Exists, FromClause, Join, Select
 
 from . import blocks
 from ..global_utils import VertexPath
@@ -45,6 +46,16 @@ CTE_KEY_NAME = "__cte_key"
 FOLD_OUTPUT_FORMAT_STRING = "fold_output_{}"
 FOLD_SUBQUERY_FORMAT_STRING = "folded_subquery_{}"
 
+# Key of each folded value in the JSON objects produced by FOR JSON PATH aggregation in MSSQL.
+# Kept short since it is repeated for every element of every folded list.
+MSSQL_FOLD_JSON_VALUE_KEY = "v"
+
+# The first MSSQL major version supporting FOR JSON PATH, i.e. SQL Server 2016.
+_MSSQL_FOR_JSON_MIN_MAJOR_VERSION = 13
+
+# The first MSSQL major version supporting STRING_AGG, i.e. SQL Server 2017.
+_MSSQL_STRING_AGG_MIN_MAJOR_VERSION = 14
+
 
 def _traverse_and_validate_blocks(ir: IrAndMetadata) -> Iterator[BasicBlock]:
     """Yield all blocks, while validating consistency."""
@@ -134,7 +145,7 @@ def _find_used_columns(
     # Columns used in the base case of CTE recursions should be made available from parent scope
     # TODO(bojanserafimov): Some of these are no longer needed, since we don't select from
     #                       the base cte, but only semijoin to its primary key now.
-    for location, _ in ir.query_metadata_table.registered_locations:
+    for location, location_info in ir.query_metadata_table.registered_locations:
         for recurse_info in ir.query_metadata_table.get_recurse_infos(location):
             traversal = f"{recurse_info.edge_direction}_{recurse_info.edge_name}"
             used_columns[get_vertex_path(location)] = used_columns.get(
@@ -142,9 +153,61 @@ def _find_used_columns(
             ).union(used_columns[get_vertex_path(location) + (traversal,)])
             used_columns[get_vertex_path(location)].add(edge.from_column)
 
+            # The recursion is joined to its parent scope on the primary key
+            table = sql_schema_info.vertex_name_to_table[location_info.type.name]
+            used_columns[get_vertex_path(location)].update(
+                column.name for column in table.primary_key
+            )
+
     return used_columns
 
 
+def _find_output_free_traversal_roots(ir: IrAndMetadata) -> Set[VertexPath]:
+    """Find the vertex paths at which traversals only used to filter results begin.
+
+    A traversal only filters results if it is mandatory, and none of the vertices in the subtree
+    of the query it leads to have outputs or tags, or are part of a fold, an optional scope or a
+    recursion. Such a traversal can be emitted as a correlated EXISTS subquery rather than a join.
+
+    Args:
+        ir: internal representation and metadata of a query
+
+    Returns:
+        set of vertex paths of the first vertex visited by each such traversal. If the subtree of
+        one of the returned vertex paths contains other returned vertex paths, they are also
+        returned.
+    """
+    query_metadata_table = ir.query_metadata_table
+
+    # Vertex paths whose subtrees are not only used to filter results.
+    unavailable_paths: Set[VertexPath] = set()
+    for _, output_info in query_metadata_table.outputs:
+        unavailable_paths.add(get_vertex_path(output_info.location))
+    for _, tag_info in query_metadata_table.tags:
+        unavailable_paths.add(get_vertex_path(tag_info.location))
+
+    candidate_paths: Set[VertexPath] = set()
+    for location, location_info in query_metadata_table.registered_locations:
+        vertex_path = get_vertex_path(location)
+        if (
+            isinstance(location, FoldScopeLocation)
+            or location_info.optional_scopes_depth > 0
+            or location_info.recursive_scopes_depth > 0
+        ):
+            unavailable_paths.add(vertex_path)
+        elif location_info.parent_location is not None:
+            candidate_paths.add(vertex_path)
+
+    return {
+        candidate_path
+        for candidate_path in candidate_paths
+        if not any(
+            unavailable_path[: len(candidate_path)] == candidate_path
+            for unavailable_path in unavailable_paths
+        )
+    }
+
+
 def _find_tagged_parameters(expression_from_filter: Expression) -> bool:
     """Return True if the expression contains a ContextField (i.e. a tagged parameter)."""
     has_context_fields = False
@@ -285,6 +348,37 @@ def _get_array_agg_column(output_column: Column, intermediate_fold_output_name:
     return sqlalchemy.func.array_agg(output_column).label(intermediate_fold_output_name)
 
 
+def _get_json_array_agg_column(output_column: Column, intermediate_fold_output_name: str) -> Label:
+    """Select a JSON_ARRAYAGG of the fold output field, labeled as requested.
+
+    MySQL (5.7.22 and later) and MariaDB (10.5 and later) have no array types, so the aggregated
+    values are produced as a JSON array that is decoded during post-processing. See
+    post_process_mysql_folds in graphql_compiler/post_processing/sql_post_processing.py.
+    """
+    return sqlalchemy.func.json_arrayagg(output_column).label(intermediate_fold_output_name)
+
+
+def _get_mssql_encoded_fold_element(output_column: Column) -> BinaryExpression:
+    """Return the delimited, encoded string representing the fold output field as a list element.
+
+    See _get_mssql_xml_path_column for a description of the encoding.
+    """
+    delimiter = expression.literal_column("'|'")
+    null = expression.literal_column("'~'")
+    encoded_column = func.REPLACE(  # Replace all occurrences of '^' in the original with '^e'.
+        output_column, expression.literal_column("'^'"), expression.literal_column("'^e'")
+    )
+    encoded_column = func.REPLACE(  # Replace all occurrences of '~' in the original with '^n'.
+        encoded_column, null, expression.literal_column("'^n'")
+    )
+    encoded_column = func.REPLACE(  # Replace all occurrences of '|' in the original with '^d'.
+        encoded_column, delimiter, expression.literal_column("'^d'")
+    )
+
+    # Delimit elements in the array using '|'and replace nulls in the original with `~`.
+    return delimiter + func.COALESCE(encoded_column, null)
+
+
 def _get_mssql_xml_path_column(
     output_column: Column,
     intermediate_fold_output_name: str,
@@ -339,20 +433,7 @@ def _get_mssql_xml_path_column(
     Returns:
         Selectable for XML PATH aggregation subquery.
     """
-    delimiter = expression.literal_column("'|'")
-    null = expression.literal_column("'~'")
-    encoded_column = func.REPLACE(  # Replace all occurrences of '^' in the original with '^e'.
-        output_column, expression.literal_column("'^'"), expression.literal_column("'^e'")
-    )
-    encoded_column = func.REPLACE(  # Replace all occurrences of '~' in the original with '^n'.
-        encoded_column, null, expression.literal_column("'^n'")
-    )
-    encoded_column = func.REPLACE(  # Replace all occurrences of '|' in the original with '^d'.
-        encoded_column, delimiter, expression.literal_column("'^d'")
-    )
-
-    # Delimit elements in the array using '|'and replace nulls in the original with `~`.
-    xml_column = delimiter + func.COALESCE(encoded_column, null)
+    xml_column = _get_mssql_encoded_fold_element(output_column)
 
     # Use constructor because it is not possible to directly construct an XMLPathBinaryExpression
     # from plain text.
@@ -383,6 +464,149 @@ def _get_mssql_xml_path_column(
     ).label(intermediate_fold_output_name)
 
 
+def _mssql_supports_for_json(dialect: DefaultDialect) -> bool:
+    """Return True if the dialect is known to target a version of MSSQL supporting FOR JSON.
+
+    The server version is only known if the dialect was obtained from an engine that has connected
+    to the database. Otherwise, the XML PATH aggregation supported by all versions is used.
+    """
+    server_version_info = getattr(dialect, "server_version_info", None)
+    if not server_version_info:
+        return False
+    return server_version_info[0] >= _MSSQL_FOR_JSON_MIN_MAJOR_VERSION
+
+
+def _get_mssql_json_path_column(
+    output_column: Column,
+    intermediate_fold_output_name: str,
+    traversals: List[SQLFoldTraversalDescriptor],
+    filters: List[BinaryExpression],
+) -> Label:
+    """Select the MSSQL FOR JSON PATH aggregation of the fold output field, labeled as requested.
+
+    On SQL Server 2016 and later, array aggregation is performed using a FOR JSON PATH subquery
+    that has the basic structure outlined below.
+
+    SELECT
+        OutputVertex.output_field AS v
+    FROM
+        OutputVertex
+    JOIN ... ON ...
+    WHERE
+        FirstTraversedVertex.primary_key = SecondTraversedVertex.foreign_key
+    AND ...
+    FOR JSON PATH, INCLUDE_NULL_VALUES
+
+    The traversals and filters are performed exactly as in the XML PATH subquery described in
+    _get_mssql_xml_path_column. The subquery produces a JSON array of objects, one per element,
+    e.g. [{"v": "a"}, {"v": null}]. Unlike XML PATH, JSON escaping is unambiguous and null values
+    are preserved, so no custom encoding is necessary and the result can be decoded with a JSON
+    parser. See post_process_mssql_folds in graphql_compiler/post_processing/sql_post_processing.py
+    for more information on post-processing the results.
+
+    STRING_AGG is not used because it discards null values, so it would require the same custom
+    encoding as XML PATH.
+
+    Args:
+        output_column: SQLAlchemy Column to be aggregated with FOR JSON PATH.
+        intermediate_fold_output_name: string label to give to the resulting aggregated output.
+        traversals: traversals performed within the fold. The earliest (first in the list) traversal
+                    is performed as a part of the WHERE clause. All other traversals will be JOINed
+                    to the FROM clause.
+        filters: filters performed within the fold, which will be applied in the WHERE clause.
+
+    Returns:
+        Selectable for FOR JSON PATH aggregation subquery.
+    """
+    select_statement = select([output_column.label(MSSQL_FOLD_JSON_VALUE_KEY)])
+
+    # Construct traversals. The earliest traversal (the first in the list of traversals) is
+    # performed as a part of the WHERE statement.
+    edge, from_alias, to_alias = traversals[0]
+    predicate_expression = from_alias.c[edge.from_column] == to_alias.c[edge.to_column]
+
+    # Any other traversals are performed as JOINs to the FROM statement.
+    traversals = traversals[1:]
+    if traversals:
+        join_clause = _construct_traversal_joins(traversals)
+        select_statement = select_statement.select_from(join_clause)
+
+    # Combine all predicates used in WHERE statement (earliest traversal and any filters).
+    all_filters = [predicate_expression] + filters
+
+    # FOR JSON PATH produces NULL rather than an empty array if there are no elements, so
+    # coalesce to represent empty arrays as '[]'.
+    return func.COALESCE(
+        select_statement.where(sqlalchemy.and_(*all_filters))
+        .suffix_with("FOR JSON PATH, INCLUDE_NULL_VALUES")
+        .as_scalar(),
+        expression.literal_column("'[]'"),
+    ).label(intermediate_fold_output_name)
+
+
+def _mssql_supports_string_agg(dialect: DefaultDialect) -> bool:
+    """Return True if the dialect is known to target a version of MSSQL supporting STRING_AGG.
+
+    As in _mssql_supports_for_json, the server version is only known if the dialect was obtained
+    from an engine that has connected to the database. Folds aggregated with STRING_AGG cannot be
+    compiled for MSSQL in any other way, so they are rejected at compile time unless the server is
+    known to support it.
+    """
+    server_version_info = getattr(dialect, "server_version_info", None)
+    if not server_version_info:
+        return False
+    return server_version_info[0] >= _MSSQL_STRING_AGG_MIN_MAJOR_VERSION
+
+
+def _get_mssql_string_agg_column(
+    output_column: Column, intermediate_fold_output_name: str, order_by: List[Column]
+) -> Label:
+    """Select the MSSQL STRING_AGG aggregation of the fold output field, labeled as requested.
+
+    On SQL Server 2017 and later, folds with multiple outputs or an _x_count are grouped and
+    aggregated in a single subquery, as described in FoldSubqueryBuilder. Each output is then
+    aggregated with the following expression:
+
+    STRING_AGG(
+        CAST('|' + COALESCE(ENCODE(REPLACE(OutputVertex.output_field, '&', '&amp;')), '~')
+             AS NVARCHAR(max)),
+        ''
+    ) WITHIN GROUP (ORDER BY ...)
+
+    - ENCODE and the delimiting of elements are the same as in the XML PATH subquery described
+    in _get_mssql_xml_path_column. XML PATH additionally escapes '&', among other characters, as
+    an XML reference entity. Escaping '&' as well ensures that the XML reference entity decoding
+    performed during post-processing leaves the elements unchanged, so the result is decoded
+    exactly like an XML PATH result. See post_process_mssql_folds in
+    graphql_compiler/post_processing/sql_post_processing.py.
+
+    - The elements are cast to NVARCHAR(max), since STRING_AGG otherwise fails if the aggregated
+    string is longer than 4000 characters.
+
+    - If any order_by columns are passed, the elements are ordered by them. This ensures that
+    the elements of all outputs of the fold are aligned with each other.
+
+    Args:
+        output_column: SQLAlchemy Column to be aggregated with STRING_AGG.
+        intermediate_fold_output_name: string label to give to the resulting aggregated output.
+        order_by: columns by which to order the aggregated elements. May be empty, in which case
+                  the order of the elements is unspecified.
+
+    Returns:
+        Label for the STRING_AGG aggregation.
+    """
+    escaped_column = func.REPLACE(
+        output_column, expression.literal_column("'&'"), expression.literal_column("'&amp;'")
+    )
+    encoded_element = sqlalchemy.cast(
+        _get_mssql_encoded_fold_element(escaped_column), sqlalchemy.NVARCHAR()
+    )
+    string_agg = func.string_agg(encoded_element, expression.literal_column("''"))
+    if order_by:
+        string_agg = string_agg.within_group(*order_by)
+    return string_agg.label(intermediate_fold_output_name)
+
+
 class FoldSubqueryBuilder(object):
     """Builder that emits a subquery for a fold scope."""
 
@@ -401,7 +625,9 @@ class FoldSubqueryBuilder(object):
     # only supports non-composite primary keys.
     #
     # SELECT will also contain an ARRAY_AGG for each column labeled for output inside the fold if
-    # compiling to PostgreSQL. For compilation to MSSQL an XML PATH-based aggregation is performed.
+    # compiling to PostgreSQL, or a JSON_ARRAYAGG if compiling to MySQL. For compilation to MSSQL
+    # an XML PATH-based aggregation is performed, or a FOR JSON PATH-based aggregation if the
+    # server version is known to support it.
     #
     # SELECT will also contain a COUNT(*) if _x_count is referred to by the query.
     #
@@ -412,7 +638,8 @@ class FoldSubqueryBuilder(object):
     # The FROM and JOIN clauses are constructed during end_fold using info from the
     # add_traversal function.
     #
-    # The full subquery will look as follows for PostgreSQL:
+    # The full subquery will look as follows for PostgreSQL, and identically for MySQL except with
+    # JSON_ARRAYAGG instead of ARRAY_AGG:
     #
     # SELECT
     #   OuterVertex.SOME_COLUMN <- this value is the primary key
@@ -426,7 +653,7 @@ class FoldSubqueryBuilder(object):
     # WHERE ... <- only for filters, which can be added with add_filter
     # GROUP BY OuterVertex.SOME_COLUMN
     #
-    # and as follows for MSSQL:
+    # and as follows for MSSQL, if the fold has a single output and no _x_count:
     #
     # SELECT
     #   OuterVertex.SOME_COLUMN <- this value is the primary key
@@ -437,6 +664,29 @@ class FoldSubqueryBuilder(object):
     #          ...
     # JOIN VertexPrecedingOutput
     # ON ...
+    #
+    # MSSQL folds with multiple outputs or an _x_count are instead aggregated all at once, by a
+    # single subquery grouping the folded vertices by the column they are joined on. Each output
+    # uses a STRING_AGG aggregation, ordering its elements by the primary keys of the vertices
+    # traversed in the fold so that the elements of all outputs are aligned:
+    #
+    # SELECT
+    #   OuterVertex.SOME_COLUMN <- this value is the primary key
+    #   COALESCE(aggregated_subquery.fold_output, '') AS fold_output
+    #   COALESCE(aggregated_subquery.fold_output__x_count, 0) AS fold_output__x_count
+    # FROM OuterVertex
+    # LEFT OUTER JOIN (
+    #   SELECT
+    #     FirstFoldedVertex.JOIN_COLUMN
+    #     STRING_AGG(...) WITHIN GROUP (ORDER BY ...) AS fold_output
+    #     COUNT(*) AS fold_output__x_count
+    #   FROM FirstFoldedVertex
+    #   JOIN ...
+    #   ON ...
+    #   WHERE ... <- only for filters, which can be added with add_filter
+    #   GROUP BY FirstFoldedVertex.JOIN_COLUMN
+    # ) AS aggregated_subquery
+    # ON OuterVertex.JOIN_COLUMN = aggregated_subquery.JOIN_COLUMN
     def __init__(self, dialect: DefaultDialect, outer_vertex_table: Alias, primary_key_name: str):
         """Create a FoldSubqueryBuilder with table, type, and join information supplied by the IR.
 
@@ -495,11 +745,11 @@ class FoldSubqueryBuilder(object):
             # from_table of the first traversal descriptor, which is the vertex immediately
             # preceding the fold.
             return self._traversal_descriptors[0].from_table
-        elif isinstance(self._dialect, PGDialect):
+        elif isinstance(self._dialect, (PGDialect, MySQLDialect)):
             return _construct_traversal_joins(self._traversal_descriptors)
         else:
             raise NotImplementedError(
-                "Fold only supported for MSSQL and PostgreSQL, "
+                "Fold only supported for MSSQL, PostgreSQL and MySQL, "
                 f"dialect was set to {self._dialect.name}."
             )
 
@@ -510,15 +760,55 @@ class FoldSubqueryBuilder(object):
         if isinstance(self._dialect, MSDialect):
             # MSSQL doesn't rely on a GROUP BY or WHERE.
             return select_statement
-        elif isinstance(self._dialect, PGDialect):
+        elif isinstance(self._dialect, (PGDialect, MySQLDialect)):
             return select_statement.where(sqlalchemy.and_(*self._filters)).group_by(
                 self._outer_vertex_alias.c[self._outer_vertex_primary_key]
             )
         else:
             raise NotImplementedError(
-                "Fold only supported for MSSQL and "
-                f"PostgreSQL, dialect was set to {self._dialect.name}."
+                "Fold only supported for MSSQL, PostgreSQL and MySQL, "
+                f"dialect was set to {self._dialect.name}."
+            )
+
+    def _get_mssql_fold_order_by(self) -> List[Column]:
+        """Return the columns by which to order the elements of each MSSQL fold output.
+
+        Each folded output is aggregated by its own STRING_AGG for MSSQL. If there are multiple
+        such outputs, their elements are ordered by the primary keys of all vertices traversed
+        within the fold, so that the i-th element of each output comes from the same result of the
+        fold. Elements tied on all of these keys come from the same vertices, and are therefore
+        identical in every output.
+        """
+        if self._output_fields is None:
+            raise AssertionError(
+                "Attempted to get fold ordering while self._output_fields was set to "
+                f"None during fold {self}."
             )
+        aggregated_fields = self._output_fields - {COUNT_META_FIELD_NAME}
+        if len(aggregated_fields) <= 1:
+            return []
+
+        order_by: List[Column] = []
+        for traversal_descriptor in self._traversal_descriptors:
+            primary_key_columns = list(traversal_descriptor.to_table.primary_key)
+            if not primary_key_columns:
+                raise NotImplementedError(
+                    "Folds containing multiple outputs are only implemented in MSSQL if all "
+                    f"vertices within the fold have a primary key. Fold: {self}."
+                )
+            order_by.extend(primary_key_columns)
+        return order_by
+
+    def _uses_mssql_string_agg(self) -> bool:
+        """Return True if the fold is compiled to MSSQL and aggregated with STRING_AGG."""
+        if self._output_fields is None:
+            raise AssertionError(
+                "Attempted to get the fold aggregation method while self._output_fields was set to "
+                f"None during fold {self}."
+            )
+        if not isinstance(self._dialect, MSDialect):
+            return False
+        return COUNT_META_FIELD_NAME in self._output_fields or len(self._output_fields) > 1
 
     def _get_fold_outputs(self) -> List[Label]:
         """Generate outputs for _output_fields and a key to join the subquery to the main query."""
@@ -534,17 +824,22 @@ class FoldSubqueryBuilder(object):
             )
 
         outputs: List[Label] = []
+        uses_mssql_string_agg = self._uses_mssql_string_agg()
+        mssql_order_by = self._get_mssql_fold_order_by() if uses_mssql_string_agg else []
         # Collect an output for each field in self._output_fields, adding to the output list.
         for fold_output_field in self._output_fields:
 
             # _x_count uses the SQL COUNT function.
             if fold_output_field == COUNT_META_FIELD_NAME:
-                if isinstance(self._dialect, MSDialect):
-                    raise NotImplementedError("_x_count is not implemented for MSSQL.")
+                x_count_output_name = FOLD_OUTPUT_FORMAT_STRING.format(COUNT_META_FIELD_NAME)
+                if uses_mssql_string_agg:
+                    # Coalesced when joining the aggregated outputs, see
+                    # _construct_mssql_string_agg_fold_subquery.
+                    outputs.append(sqlalchemy.func.count().label(x_count_output_name))
                 else:
                     x_count_column_clause = sqlalchemy.func.coalesce(
                         sqlalchemy.func.count(), sqlalchemy.literal_column("0")
-                    ).label(FOLD_OUTPUT_FORMAT_STRING.format(COUNT_META_FIELD_NAME))
+                    ).label(x_count_output_name)
                     outputs.append(x_count_column_clause)
 
             # All non-_x_count fields use aggregation.
@@ -557,8 +852,27 @@ class FoldSubqueryBuilder(object):
 
                 # Perform aggregation appropriate for the _dialect and add aggregated output column
                 # to outputs.
-                if isinstance(self._dialect, MSDialect):
-                    # MSSQL uses XML PATH aggregation.
+                if uses_mssql_string_agg:
+                    # MSSQL folds with multiple outputs or an _x_count use STRING_AGG aggregation.
+                    outputs.append(
+                        _get_mssql_string_agg_column(
+                            output_column, intermediate_fold_output_name, mssql_order_by
+                        )
+                    )
+                elif isinstance(self._dialect, MSDialect) and _mssql_supports_for_json(
+                    self._dialect
+                ):
+                    # MSSQL 2016 and later use FOR JSON PATH aggregation.
+                    outputs.append(
+                        _get_mssql_json_path_column(
+                            output_column,
+                            intermediate_fold_output_name,
+                            self._traversal_descriptors,
+                            self._filters,
+                        )
+                    )
+                elif isinstance(self._dialect, MSDialect):
+                    # Older versions of MSSQL use XML PATH aggregation.
                     outputs.append(
                         _get_mssql_xml_path_column(
                             output_column,
@@ -572,19 +886,76 @@ class FoldSubqueryBuilder(object):
                     outputs.append(
                         _get_array_agg_column(output_column, intermediate_fold_output_name)
                     )
+                elif isinstance(self._dialect, MySQLDialect):
+                    # MySQL uses JSON_ARRAYAGG.
+                    outputs.append(
+                        _get_json_array_agg_column(output_column, intermediate_fold_output_name)
+                    )
                 else:
                     raise NotImplementedError(
-                        "Fold only supported for MSSQL and PostgreSQL, "
+                        "Fold only supported for MSSQL, PostgreSQL and MySQL, "
                         f"dialect set to {self._dialect.name}."
                     )
 
-        # Add the primary key field to the output list, which will be used to join the folded
-        # subquery to the main Selectable.
-        outputs.append(self._outer_vertex_alias.c[self._outer_vertex_primary_key])
+        if uses_mssql_string_agg:
+            # Add the column by which the folded vertices are grouped, which will be used to join
+            # the aggregated outputs to the vertex immediately outside the fold.
+            first_traversal = self._traversal_descriptors[0]
+            outputs.append(first_traversal.to_table.c[first_traversal.join_descriptor.to_column])
+        else:
+            # Add the primary key field to the output list, which will be used to join the folded
+            # subquery to the main Selectable.
+            outputs.append(self._outer_vertex_alias.c[self._outer_vertex_primary_key])
 
         # Sort to make select order deterministic.
         return sorted(outputs, key=lambda column: column.name, reverse=True)
 
+    def _construct_mssql_string_agg_fold_subquery(self) -> Select:
+        """Produce the MSSQL subquery aggregating all fold outputs at once with STRING_AGG."""
+        if not _mssql_supports_string_agg(self._dialect):
+            raise NotImplementedError(
+                "Folds containing multiple outputs or _x_count are only implemented in MSSQL for "
+                f"SQL Server 2017 and later, which support STRING_AGG. Fold: {self}."
+            )
+
+        # Group the folded vertices by the column joining them to the vertex outside the fold.
+        # The first traversal is performed by the outer join below, and any other traversals are
+        # performed as JOINs within the aggregated subquery.
+        first_traversal = self._traversal_descriptors[0]
+        group_by_column = first_traversal.to_table.c[first_traversal.join_descriptor.to_column]
+        aggregated_from_clause: FromClause = first_traversal.to_table
+        if len(self._traversal_descriptors) > 1:
+            aggregated_from_clause = _construct_traversal_joins(self._traversal_descriptors[1:])
+        aggregated_subquery = (
+            sqlalchemy.select(self._outputs)
+            .select_from(aggregated_from_clause)
+            .where(sqlalchemy.and_(*self._filters))
+            .group_by(group_by_column)
+            .alias()
+        )
+
+        # Vertices outside the fold without any folded vertices have no group in the aggregated
+        # subquery, so their outputs are coalesced to those of an empty fold.
+        count_output_name = FOLD_OUTPUT_FORMAT_STRING.format(COUNT_META_FIELD_NAME)
+        outputs: List[Label] = [self._outer_vertex_alias.c[self._outer_vertex_primary_key]]
+        for output in self._outputs:
+            if output.name == group_by_column.name:
+                continue
+            empty_value = "0" if output.name == count_output_name else "''"
+            outputs.append(
+                func.COALESCE(
+                    aggregated_subquery.c[output.name], expression.literal_column(empty_value)
+                ).label(output.name)
+            )
+
+        return sqlalchemy.select(outputs).select_from(
+            self._outer_vertex_alias.outerjoin(
+                aggregated_subquery,
+                self._outer_vertex_alias.c[first_traversal.join_descriptor.from_column]
+                == aggregated_subquery.c[group_by_column.name],
+            )
+        )
+
     def add_traversal(
         self, join_descriptor: DirectJoinDescriptor, from_table: Alias, to_table: Alias,
     ) -> None:
@@ -658,23 +1029,15 @@ class FoldSubqueryBuilder(object):
         # Collect the outputs for the output vertex.
         self._outputs = self._get_fold_outputs()
 
-        # For now, folds with multiple outputs are not implemented in MSSQL. Each output comes
-        # from its own selectable within the XML PATH statement so it is not guaranteed result order
-        # would be preserved across multiple outputs from the same FoldScopeLocation.
-        # Note: _outputs includes 1 output used for joining the folded subquery to the main
-        # selectable and at least 1 other folded output. Since MSSQL only supports 1 output of a
-        # field (_x_counts are not implemented), ensure that len(self.outputs) == 2.
-        if len(self._outputs) != 2 and isinstance(self._dialect, MSDialect):
-            raise NotImplementedError(
-                "Folds containing multiple outputs are not implemented in MSSQL."
-            )
-
         # End the fold, preventing any more functions from being called on this fold.
         self._ended = True
 
         # Produce the subquery.
-        subquery_from_clause = self._construct_fold_joins()
-        fold_subquery = self._construct_fold_subquery(subquery_from_clause)
+        if self._uses_mssql_string_agg():
+            fold_subquery = self._construct_mssql_string_agg_fold_subquery()
+        else:
+            subquery_from_clause = self._construct_fold_joins()
+            fold_subquery = self._construct_fold_subquery(subquery_from_clause)
         return fold_subquery, self._output_vertex_location
 
 
@@ -708,6 +1071,77 @@ class ColumnRouter:
     c: Dict[str, sqlalchemy.Column]
 
 
+class ExistsSubqueryBuilder(object):
+    """Builder that emits a correlated EXISTS subquery for a traversal only used for filtering."""
+
+    # The life cycle for the ExistsSubqueryBuilder is:
+    #   1. initialize at the first vertex of the traversal, i.e. the root of its subtree
+    #   2. visit all locations in the subtree, adding traversals and filters
+    #   3. end the subquery when leaving the subtree, producing the resulting EXISTS clause
+    #
+    # The subquery will look as follows:
+    #
+    # EXISTS (
+    #   SELECT 1
+    #   FROM RootVertex
+    #   JOIN ... <- INNER JOINs for each traversal within the subtree
+    #   ON ...
+    #   WHERE OuterVertex.from_column = RootVertex.to_column <- correlated with the outer query
+    #   AND ... <- filters within the subtree
+    # )
+    def __init__(
+        self,
+        root_vertex_path: VertexPath,
+        join_descriptor: DirectJoinDescriptor,
+        outer_vertex_alias: Union[Alias, ColumnRouter],
+        root_vertex_alias: Alias,
+    ):
+        """Create an ExistsSubqueryBuilder for the traversal to the given root vertex.
+
+        Args:
+            root_vertex_path: vertex path of the first vertex visited by the traversal.
+            join_descriptor: DirectJoinDescriptor of the edge from the vertex immediately outside
+                             the subquery to the root vertex.
+            outer_vertex_alias: table alias for the vertex immediately outside the subquery.
+            root_vertex_alias: table alias for the root vertex.
+        """
+        self._root_vertex_path: VertexPath = root_vertex_path
+        self._from_clause: FromClause = root_vertex_alias
+        # SQLAlchemy Expressions to be used in the WHERE clause, starting with the correlation
+        # with the outer query.
+        self._filters: List[BinaryExpression] = [
+            outer_vertex_alias.c[join_descriptor.from_column]
+            == root_vertex_alias.c[join_descriptor.to_column]
+        ]
+
+    def contains(self, vertex_path: VertexPath) -> bool:
+        """Return True if the vertex path is within the subtree of this subquery."""
+        return vertex_path[: len(self._root_vertex_path)] == self._root_vertex_path
+
+    def add_traversal(
+        self, join_descriptor: DirectJoinDescriptor, from_alias: Alias, to_alias: Alias
+    ) -> None:
+        """Join the table alias of a vertex within the subtree of this subquery."""
+        self._from_clause = self._from_clause.join(
+            to_alias,
+            onclause=(
+                from_alias.c[join_descriptor.from_column] == to_alias.c[join_descriptor.to_column]
+            ),
+        )
+
+    def add_filter(self, sql_expression: BinaryExpression) -> None:
+        """Add a filter applied to a vertex within the subtree of this subquery."""
+        self._filters.append(sql_expression)
+
+    def end_subquery(self) -> Exists:
+        """Return the EXISTS clause, to be used as a filter in the outer query."""
+        return sqlalchemy.exists(
+            sqlalchemy.select([expression.literal_column("1")])
+            .select_from(self._from_clause)
+            .where(sqlalchemy.and_(*self._filters))
+        )
+
+
 class CompilationState(object):
     """Mutable class used to keep track of state while emitting a sql query."""
 
@@ -719,6 +1153,12 @@ class CompilationState(object):
         self._used_columns: Dict[VertexPath, Set[str]] = _find_used_columns(sql_schema_info, ir)
         # Mapping FoldScopeLocations (without field information) to output fields at that location.
         self._all_folded_fields: Dict[FoldScopeLocation, Set[str]] = _find_folded_fields(ir)
+        # Vertex paths at which traversals to be emitted as EXISTS subqueries begin.
+        self._output_free_traversal_roots: Set[VertexPath] = (
+            _find_output_free_traversal_roots(ir)
+            if sql_schema_info.use_exists_for_output_free_traversals
+            else set()
+        )
 
         # Current query location state. Only mutable by calling _relocate.
         self._current_location: Optional[
@@ -733,6 +1173,11 @@ class CompilationState(object):
             FoldSubqueryBuilder
         ] = None  # FoldSubqueryBuilder to collect fold info and create folded subqueries.
 
+        # Current EXISTS subquery state.
+        self._current_exists_subquery: Optional[
+            ExistsSubqueryBuilder
+        ] = None  # ExistsSubqueryBuilder for the output-free traversal being visited.
+
         # Dict mapping (some_location.query_path, fold_scope_location.fold_path) tuples to
         # corresponding table Aliases. some_location is either self._current_location
         # or the base location of an open FoldScopeLocation. For Locations, the second argument of
@@ -872,8 +1317,28 @@ class CompilationState(object):
             return False
         return self._current_location_info.optional_scopes_depth > 0
 
+    def _end_exists_subquery(self) -> None:
+        """Add the current EXISTS subquery to the filters of the query, and clear it."""
+        if self._current_exists_subquery is None:
+            raise AssertionError("Attempted to end an EXISTS subquery when there was none.")
+
+        self._filters.append(self._current_exists_subquery.end_subquery())
+
+        # The vertices within the subquery are not visible from the rest of the query.
+        self._aliases = {
+            alias_key: alias
+            for alias_key, alias in self._aliases.items()
+            if not self._current_exists_subquery.contains(alias_key[0])
+        }
+        self._current_exists_subquery = None
+
     def backtrack(self, previous_location: BaseLocation) -> None:
         """Execute a Backtrack Block."""
+        if (
+            self._current_exists_subquery is not None
+            and not self._current_exists_subquery.contains(get_vertex_path(previous_location))
+        ):
+            self._end_exists_subquery()
         self._relocate(previous_location)
 
     def traverse(self, vertex_field: str, optional: bool) -> None:
@@ -897,6 +1362,12 @@ class CompilationState(object):
                     f"FoldScopeLocation. _current_location was set to {self._current_location}."
                 )
             self._current_fold.add_traversal(edge, previous_alias, self._current_alias)
+        elif self._current_exists_subquery is not None:
+            self._current_exists_subquery.add_traversal(edge, previous_alias, self._current_alias)
+        elif get_vertex_path(self._current_location) in self._output_free_traversal_roots:
+            self._current_exists_subquery = ExistsSubqueryBuilder(
+                get_vertex_path(self._current_location), edge, previous_alias, self._current_alias,
+            )
         else:
             self._join_to_parent_location(
                 previous_alias, edge.from_column, edge.to_column, optional
@@ -1014,8 +1485,17 @@ class CompilationState(object):
 
         # Find which columns should be selected
         used_columns = sorted(self._used_columns[self._current_location.query_path])
+        deduplicate = self._sql_schema_info.deduplicate_recursive_traversals
+        if deduplicate:
+            if isinstance(self._sql_schema_info.dialect, MSDialect):
+                raise NotImplementedError(
+                    "Deduplicating @recurse traversals requires UNION within a recursive CTE, "
+                    "which MSSQL does not support."
+                )
+            # Vertices are deduplicated by their primary key, which must therefore be selected.
+            used_columns = sorted(set(used_columns) | {primary_key})
 
-        # The base of the recursive CTE selects all needed columns and sets the depth to 0
+        # The base of the recursion selects all needed columns and sets the depth to 0
         base_alias = self._current_alias.alias()
         base = sqlalchemy.select(
             [base_alias.c[col].label(col) for col in used_columns]
@@ -1036,7 +1516,7 @@ class CompilationState(object):
 
         # The recursive step selects all needed columns, increments the depth, and joins to the base
         step = self._current_alias.alias()
-        self._current_alias = base.union_all(
+        recursive_step = (
             sqlalchemy.select(
                 [step.c[col] for col in used_columns]
                 + [
@@ -1050,6 +1530,22 @@ class CompilationState(object):
             .where(base.c[CTE_DEPTH_NAME] < literal_depth)
         )
 
+        if deduplicate:
+            # With UNION, each level of the recursion only contains the distinct vertices reached
+            # at that depth from each starting vertex, so the work done grows linearly with the
+            # depth rather than with the number of paths. Vertices reachable at multiple depths
+            # are then deduplicated outside of the recursion.
+            recursion = base.union(recursive_step)
+            self._current_alias = (
+                sqlalchemy.select(
+                    [recursion.c[col] for col in used_columns] + [recursion.c[CTE_KEY_NAME]]
+                )
+                .distinct()
+                .cte()
+            )
+        else:
+            self._current_alias = base.union_all(recursive_step)
+
         # TODO(bojanserafimov): This creates an unused alias if there's no tags or outputs so far
         self._join_to_parent_location(previous_alias, primary_key, CTE_KEY_NAME, False)
 
@@ -1057,6 +1553,8 @@ class CompilationState(object):
         """Execute a GlobalOperationsStart block."""
         if self._current_location is None:
             raise AssertionError("CompilationState is already in global scope.")
+        if self._current_exists_subquery is not None:
+            self._end_exists_subquery()
         self._current_location = None
 
     def filter(self, predicate: Expression) -> None:
@@ -1079,6 +1577,11 @@ class CompilationState(object):
             sql_expression = predicate.to_sql(
                 self._sql_schema_info.dialect, self._aliases, self._current_alias
             )
+            if self._current_exists_subquery is not None:
+                # Filters inside the subtree of an EXISTS subquery are part of that subquery.
+                # Such subtrees are never within an optional scope.
+                self._current_exists_subquery.add_filter(sql_expression)
+                return
             if self._is_in_optional_scope():
                 sql_expression = sqlalchemy.or_(
                     sql_expression, self._came_from[self._current_alias].is_(None)
@@ -28,6 +28,7 @@ import six
 import sqlalchemy
 from sqlalchemy import bindparam, sql
 from sqlalchemy.dialects.mssql.base import MSDialect
+from sqlalchemy.dialects.mysql.base import MySQLDialect
 from sqlalchemy.dialects.postgresql.base import PGDialect
 
 from . import cypher_helpers, sqlalchemy_extensions
@@ -969,10 +970,14 @@ class FoldedContextField(Expression):
             return sqlalchemy.func.coalesce(
                 fold_output_column, sqlalchemy.literal_column(empty_array)
             )
+        elif isinstance(dialect, MySQLDialect):
+            # MySQL
+            # Coalesce to an empty JSON array, which is decoded to a list during post-processing.
+            return sqlalchemy.func.coalesce(fold_output_column, sqlalchemy.func.json_array())
         else:
             raise NotImplementedError(
-                "Fold only supported for MSSQL and "
-                "PostgreSQL, dialect was set to {}".format(dialect.name)
+                "Fold only supported for MSSQL, PostgreSQL and "
+                "MySQL, dialect was set to {}".format(dialect.name)
             )
 
     def __eq__(self, other: Any) -> bool:
@@ -69,10 +69,18 @@ Approach Details:
     handle type casting, as well as optional, fold, recurse, and some filter directives. Additional
     statistics can be recorded to improve the coverage and accuracy of these adjustments.
 
+Estimating Execution Cost
+=========================
+
+The *execution cost* of a query is a rough measure of the work the database does to compute its
+result, and depends on the backend executing the query. We estimate it by following the same
+expansion model, one traversal after the other in the order of the query, and counting the edges
+and vertices each traversal reads as well as the rows it produces. Each backend is described by an
+ExecutionCostModel, which weighs these counts and describes how the backend executes directives,
+e.g. whether @recurse enumerates every path to the vertices it reaches.
+
 TODOs
 =====
-    - Estimate execution cost by augmenting the cardinality calculation.
-    - Add recurse handling.
     - Add additional statistics to improve directive coverage (e.g. histograms
       to better model more filter operations).
 """
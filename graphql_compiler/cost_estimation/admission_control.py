@@ -0,0 +1,188 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Decide whether to execute a query, based on its estimated cost and the caller's budget.
+
+A query whose result is much larger than expected can overload the database executing it. The
+cost of a query can be estimated from its QueryPlanningAnalysis without compiling it for any
+backend, so a gateway can use admission control to reject such queries, or to require that they
+are paginated with paginate_query, before they reach the database. Whether the query can actually
+be split into the pages it needs is up to the pagination planner, so gateways that paginate queries
+should use get_admission_decision_with_pagination from the query_pagination package, which also
+checks that.
+"""
+from dataclasses import dataclass
+from enum import Enum, auto, unique
+import math
+from typing import Optional
+
+from .analysis import QueryPlanningAnalysis
+
+
+@unique
+class AdmissionDecision(Enum):
+    """Specifies what to do with a query submitted for execution."""
+
+    # Execute the query as-is.
+    Accept = auto()
+
+    # Execute the query one page at a time, see AdmissionResult.page_size.
+    Paginate = auto()
+
+    # Do not execute the query.
+    Reject = auto()
+
+
+@dataclass(frozen=True)
+class AdmissionPolicy:
+    """The budget of a caller, limiting the estimated cost of the queries it may execute."""
+
+    # The maximum estimated number of result rows of queries executed as-is.
+    max_cardinality: float
+
+    # The maximum estimated number of result rows of queries executed one page at a time, with
+    # pages of at most max_cardinality rows. If None, queries larger than max_cardinality are
+    # rejected instead of paginated.
+    max_paginated_cardinality: Optional[float] = None
+
+    # The maximum estimated number of distinct vertices at any location of the query, which
+    # bounds the number of rows read from each table even when the result of the query is small.
+    # If None, there is no such limit.
+    max_distinct_vertices_per_location: Optional[float] = None
+
+    # The maximum estimated cost of executing a query on the backend of its execution cost model.
+    # Unlike the cardinality, this accounts for the rows read to compute the result of the query,
+    # and is summed over all pages of paginated queries. If None, there is no such limit.
+    max_execution_cost: Optional[float] = None
+
+    # Whether queries are accepted when the statistics needed to estimate their cost are missing.
+    accept_without_statistics: bool = False
+
+    # Whether to compare the upper bound on the cardinality of queries to the limits, rather than
+    # the estimated cardinality. This is more pessimistic, but protects against the estimates that
+    # are off the most.
+    use_cardinality_upper_bound: bool = False
+
+    def __post_init__(self) -> None:
+        """Validate the budget."""
+        if self.max_cardinality < 1:
+            raise AssertionError(
+                f"Expected max_cardinality to be at least 1, but got {self.max_cardinality}."
+            )
+        if (
+            self.max_paginated_cardinality is not None
+            and self.max_paginated_cardinality < self.max_cardinality
+        ):
+            raise AssertionError(
+                f"Expected max_paginated_cardinality {self.max_paginated_cardinality} to be at "
+                f"least max_cardinality {self.max_cardinality}."
+            )
+
+
+@dataclass(frozen=True)
+class AdmissionResult:
+    """The decision made for a query, with a human-readable explanation of the reason for it."""
+
+    decision: AdmissionDecision
+    explanation: str
+
+    # The estimated number of result rows of the query compared to the limits, or None if it could
+    # not be estimated. This is the upper bound on the number of rows if the policy uses it.
+    cardinality_estimate: Optional[float] = None
+
+    # The page size to pass to paginate_query, if the decision is to paginate the query. This is
+    # smaller than the policy's max_cardinality if the policy uses the upper bound on the
+    # cardinality, since paginate_query splits queries by their estimated cardinality.
+    page_size: Optional[int] = None
+
+
+def get_admission_decision(
+    query_analysis: QueryPlanningAnalysis, policy: AdmissionPolicy
+) -> AdmissionResult:
+    """Decide whether to accept, paginate or reject a query, given the budget of its caller.
+
+    Queries over the budget are paginated if their pages would be within it. This doesn't check
+    that the pagination planner can split the query into that many pages, see
+    get_admission_decision_with_pagination in the query_pagination package.
+
+    Args:
+        query_analysis: the query with any query analysis needed for estimating its cost
+        policy: the budget of the caller submitting the query
+
+    Returns:
+        AdmissionResult with the decision for the query
+    """
+    classes_with_missing_counts = query_analysis.classes_with_missing_counts
+    if classes_with_missing_counts:
+        explanation = (
+            f"The cost of the query can't be estimated, since classes "
+            f"{sorted(classes_with_missing_counts)} have no count statistics."
+        )
+        if policy.accept_without_statistics:
+            return AdmissionResult(AdmissionDecision.Accept, explanation)
+        return AdmissionResult(AdmissionDecision.Reject, explanation)
+
+    if policy.use_cardinality_upper_bound:
+        cardinality_estimate = query_analysis.cardinality_estimate_with_bounds.upper_bound
+    else:
+        cardinality_estimate = query_analysis.cardinality_estimate
+
+    if policy.max_execution_cost is not None:
+        execution_cost = query_analysis.execution_cost_estimate.cost
+        if execution_cost > policy.max_execution_cost:
+            return AdmissionResult(
+                AdmissionDecision.Reject,
+                f"The query is estimated to cost {execution_cost} to execute on "
+                f"{query_analysis.execution_cost_model.language}, above the limit of "
+                f"{policy.max_execution_cost}.",
+                cardinality_estimate,
+            )
+
+    if policy.max_distinct_vertices_per_location is not None:
+        distinct_result_set_estimates = query_analysis.distinct_result_set_estimates
+        for vertex_path in sorted(distinct_result_set_estimates):
+            distinct_vertices = distinct_result_set_estimates[vertex_path]
+            if distinct_vertices > policy.max_distinct_vertices_per_location:
+                return AdmissionResult(
+                    AdmissionDecision.Reject,
+                    f"The query is estimated to visit {distinct_vertices} distinct vertices at "
+                    f"{vertex_path}, above the limit of "
+                    f"{policy.max_distinct_vertices_per_location} vertices.",
+                    cardinality_estimate,
+                )
+
+    if cardinality_estimate <= policy.max_cardinality:
+        return AdmissionResult(
+            AdmissionDecision.Accept,
+            f"The query is estimated to return {cardinality_estimate} rows, within the limit of "
+            f"{policy.max_cardinality} rows.",
+            cardinality_estimate,
+        )
+
+    if policy.max_paginated_cardinality is None:
+        return AdmissionResult(
+            AdmissionDecision.Reject,
+            f"The query is estimated to return {cardinality_estimate} rows, above the limit of "
+            f"{policy.max_cardinality} rows, and pagination is not allowed.",
+            cardinality_estimate,
+        )
+    if cardinality_estimate > policy.max_paginated_cardinality:
+        return AdmissionResult(
+            AdmissionDecision.Reject,
+            f"The query is estimated to return {cardinality_estimate} rows, above the limit of "
+            f"{policy.max_paginated_cardinality} rows for paginated queries.",
+            cardinality_estimate,
+        )
+
+    # paginate_query splits queries into pages by their estimated cardinality. When the limits are
+    # compared to the upper bound on the cardinality instead, the page size is scaled down by the
+    # same ratio, so that the pages are within the budget by that upper bound as well.
+    page_size = policy.max_cardinality
+    if policy.use_cardinality_upper_bound:
+        page_size *= query_analysis.cardinality_estimate / cardinality_estimate
+    number_of_pages = math.ceil(cardinality_estimate / policy.max_cardinality)
+    return AdmissionResult(
+        AdmissionDecision.Paginate,
+        f"The query is estimated to return {cardinality_estimate} rows, above the limit of "
+        f"{policy.max_cardinality} rows, so it should be split into {number_of_pages} pages.",
+        cardinality_estimate,
+        max(1, int(page_size)),
+    )
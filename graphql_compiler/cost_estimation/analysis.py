@@ -1,11 +1,13 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 import bisect
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, Set, Union
+from threading import Lock
+from typing import Any, Dict, Optional, Set, Union, cast
 
-from graphql import GraphQLInterfaceType, GraphQLObjectType
+from graphql import DocumentNode, GraphQLInterfaceType, GraphQLObjectType, print_ast
 
-from ..compiler.compiler_frontend import ast_to_ir
+from ..compiler.compiler_frontend import IrAndMetadata, ast_to_ir
 from ..compiler.helpers import (
     BaseLocation,
     FoldScopeLocation,
@@ -13,11 +15,17 @@ from ..compiler.helpers import (
     get_edge_direction_and_name,
 )
 from ..compiler.metadata import FilterInfo, QueryMetadataTable
-from ..cost_estimation.cardinality_estimator import estimate_query_result_cardinality
-from ..cost_estimation.int_value_conversion import (
-    convert_int_to_field_value,
-    field_supports_range_reasoning,
+from ..cost_estimation.cardinality_estimator import (
+    CardinalityEstimate,
+    estimate_query_result_cardinality_with_bounds,
 )
+from ..cost_estimation.execution_cost import (
+    SQL_EXECUTION_COST_MODEL,
+    ExecutionCostEstimate,
+    ExecutionCostModel,
+    estimate_query_execution_cost,
+)
+from ..cost_estimation.int_value_conversion import field_supports_range_reasoning
 from ..cost_estimation.interval import Interval
 from ..global_utils import (
     ASTWithParameters,
@@ -29,43 +37,17 @@ from ..global_utils import (
 from ..query_formatting.common import validate_arguments
 from ..schema import is_meta_field
 from ..schema.schema_info import EdgeConstraint, QueryPlanningSchemaInfo
+from ..typedefs import QueryArgumentGraphQLType
 from .filter_selectivity_utils import (
     Selectivity,
     adjust_counts_with_selectivity,
     filter_uses_only_runtime_parameters,
-    get_integer_interval_for_filters_on_field,
+    get_field_value_interval_for_filters_on_field,
     get_selectivity_of_filters_at_vertex,
 )
 from .helpers import is_uuid4_type
 
 
-def _convert_int_interval_to_field_value_interval(
-    schema_info: QueryPlanningSchemaInfo, vertex_type: str, field: str, interval: Interval[int]
-) -> Interval[Any]:
-    """Convert the integer interval endpoints to a type appropriate for the field.
-
-    Args:
-        schema_info: QueryPlanningSchemaInfo
-        vertex_type: name of a vertex type
-        field: name of a field on the vertex_type
-        interval: interval to convert
-
-    Returns:
-        Interval with endpoints appropriate for the field on the vertex_type.
-    """
-    lower_bound = None
-    upper_bound = None
-    if interval.lower_bound is not None:
-        lower_bound = convert_int_to_field_value(
-            schema_info, vertex_type, field, interval.lower_bound
-        )
-    if interval.upper_bound is not None:
-        upper_bound = convert_int_to_field_value(
-            schema_info, vertex_type, field, interval.upper_bound
-        )
-    return Interval(lower_bound, upper_bound)
-
-
 def _get_location_vertex_path(location: BaseLocation) -> VertexPath:
     """Get the VertexPath for a BaseLocation pointing at a vertex."""
     if location.field is not None:
@@ -215,12 +197,9 @@ def get_field_value_intervals(
                 continue
 
             if field_supports_range_reasoning(schema_info, vertex_type_name, field_name):
-                integer_interval = get_integer_interval_for_filters_on_field(
+                field_value_interval = get_field_value_interval_for_filters_on_field(
                     schema_info, filters_on_field, vertex_type_name, field_name, parameters
                 )
-                field_value_interval = _convert_int_interval_to_field_value_interval(
-                    schema_info, vertex_type_name, field_name, integer_interval
-                )
                 property_path = PropertyPath(vertex_path, field_name)
                 field_value_intervals[property_path] = field_value_interval
     return field_value_intervals
@@ -380,6 +359,108 @@ def get_pagination_capacities(
     return pagination_capacities
 
 
+@dataclass
+class QueryShapeAnalysis:
+    """A cache for analysis passes over a fixed query and schema_info that ignore parameters.
+
+    Queries that only differ in their parameter values share these passes, see
+    QueryShapeAnalysisCache. The values they return are shared too, so they must not be mutated.
+    """
+
+    schema_info: QueryPlanningSchemaInfo
+    query_ast: DocumentNode
+
+    @cached_property
+    def ir_and_metadata(self) -> IrAndMetadata:
+        """Return the IR and metadata for this query."""
+        return ast_to_ir(
+            self.schema_info.schema,
+            self.query_ast,
+            type_equivalence_hints=self.schema_info.type_equivalence_hints,
+        )
+
+    @cached_property
+    def input_metadata(self) -> Dict[str, QueryArgumentGraphQLType]:
+        """Return the expected type of each parameter of this query."""
+        # The compiler only infers types that are valid for query arguments.
+        return cast(Dict[str, QueryArgumentGraphQLType], self.ir_and_metadata.input_metadata)
+
+    @cached_property
+    def metadata_table(self) -> QueryMetadataTable:
+        """Return the metadata table for this query."""
+        return self.ir_and_metadata.query_metadata_table
+
+    @cached_property
+    def types(self) -> Dict[VertexPath, Union[GraphQLObjectType, GraphQLInterfaceType]]:
+        """Find the type at each VertexPath."""
+        return get_types(self.metadata_table)
+
+    @cached_property
+    def filters(self) -> Dict[VertexPath, Set[FilterInfo]]:
+        """Get the filters at each VertexPath."""
+        return get_filters(self.metadata_table)
+
+    @cached_property
+    def fold_scope_roots(self) -> Dict[VertexPath, VertexPath]:
+        """Map each VertexPath in the query that's inside a fold to the VertexPath of the fold."""
+        return get_fold_scope_roots(self.metadata_table)
+
+    @cached_property
+    def single_field_filters(self) -> Dict[PropertyPath, Set[FilterInfo]]:
+        """Find the single field filters for each field. Filters like name_or_alias are excluded."""
+        return get_single_field_filters(self.filters)
+
+    @cached_property
+    def fields_eligible_for_pagination(self) -> Set[PropertyPath]:
+        """Return all the fields we can consider for pagination."""
+        return get_fields_eligible_for_pagination(
+            self.schema_info, self.types, self.single_field_filters, self.fold_scope_roots,
+        )
+
+
+class QueryShapeAnalysisCache:
+    """A bounded cache of QueryShapeAnalysis objects for a fixed schema_info, keyed by query.
+
+    Analyzing a query with a cache reuses the analysis passes that ignore parameters from the
+    previous analyses of the same query, which are often the most expensive ones. The cache is
+    safe to share between threads, and evicts the least recently used queries once it is full.
+    """
+
+    def __init__(self, schema_info: QueryPlanningSchemaInfo, max_size: int = 1000) -> None:
+        """Create an empty cache for queries analyzed with the given schema_info.
+
+        Args:
+            schema_info: QueryPlanningSchemaInfo of all queries analyzed with the cache
+            max_size: the maximum number of queries whose analysis is cached
+        """
+        if max_size < 1:
+            raise AssertionError(f"Expected max_size to be at least 1, got {max_size}.")
+
+        self.schema_info = schema_info
+        self._max_size = max_size
+        self._shape_analyses: "OrderedDict[str, QueryShapeAnalysis]" = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        """Return the number of queries whose analysis is cached."""
+        return len(self._shape_analyses)
+
+    def get_shape_analysis(self, query_ast: DocumentNode) -> QueryShapeAnalysis:
+        """Return the QueryShapeAnalysis of the query, creating it if it is not cached."""
+        # Printing the AST is much faster than converting it to IR, and ignores its formatting.
+        query_key = print_ast(query_ast)
+        with self._lock:
+            shape_analysis = self._shape_analyses.get(query_key)
+            if shape_analysis is None:
+                shape_analysis = QueryShapeAnalysis(self.schema_info, query_ast)
+                self._shape_analyses[query_key] = shape_analysis
+                if len(self._shape_analyses) > self._max_size:
+                    self._shape_analyses.popitem(last=False)
+            else:
+                self._shape_analyses.move_to_end(query_key)
+        return shape_analysis
+
+
 @dataclass
 class QueryPlanningAnalysis:
     """A cache for analysis passes over a fixed query and fixed schema_info."""
@@ -387,26 +468,42 @@ class QueryPlanningAnalysis:
     schema_info: QueryPlanningSchemaInfo
     ast_with_parameters: ASTWithParameters
 
+    # Optional cache of the analysis passes that ignore parameters, shared with other analyses.
+    shape_analysis_cache: Optional[QueryShapeAnalysisCache] = None
+
+    # The costs of the operators of the backend the query is executed on.
+    execution_cost_model: ExecutionCostModel = SQL_EXECUTION_COST_MODEL
+
     @cached_property
     def query_string_with_parameters(self) -> QueryStringWithParameters:
         """Return the query in string form."""
         return QueryStringWithParameters.from_ast_with_parameters(self.ast_with_parameters)
 
+    @cached_property
+    def shape_analysis(self) -> QueryShapeAnalysis:
+        """Return the analysis passes for this query that ignore parameters."""
+        query_ast = self.ast_with_parameters.query_ast
+        if self.shape_analysis_cache is None:
+            shape_analysis = QueryShapeAnalysis(self.schema_info, query_ast)
+        elif self.shape_analysis_cache.schema_info is not self.schema_info:
+            raise AssertionError(
+                "Expected the shape analysis cache to be used for queries analyzed with the "
+                "schema_info it was created with."
+            )
+        else:
+            shape_analysis = self.shape_analysis_cache.get_shape_analysis(query_ast)
+        validate_arguments(shape_analysis.input_metadata, self.ast_with_parameters.parameters)
+        return shape_analysis
+
     @cached_property
     def metadata_table(self) -> QueryMetadataTable:
         """Return the metadata table for this query."""
-        ir_and_metadata = ast_to_ir(
-            self.schema_info.schema,
-            self.ast_with_parameters.query_ast,
-            type_equivalence_hints=self.schema_info.type_equivalence_hints,
-        )
-        validate_arguments(ir_and_metadata.input_metadata, self.ast_with_parameters.parameters)
-        return ir_and_metadata.query_metadata_table
+        return self.shape_analysis.metadata_table
 
     @cached_property
     def types(self) -> Dict[VertexPath, Union[GraphQLObjectType, GraphQLInterfaceType]]:
         """Find the type at each VertexPath."""
-        return get_types(self.metadata_table)
+        return self.shape_analysis.types
 
     @cached_property
     def classes_with_missing_counts(self) -> Set[str]:
@@ -422,34 +519,47 @@ class QueryPlanningAnalysis:
         return classes_with_missing_counts
 
     @cached_property
-    def cardinality_estimate(self) -> float:
-        """Return the cardinality estimate for this query."""
+    def cardinality_estimate_with_bounds(self) -> CardinalityEstimate:
+        """Return the cardinality estimate for this query, with bounds on the actual cardinality."""
         # TODO use selectivity analysis pass instead of recomputing it
-        return estimate_query_result_cardinality(
+        return estimate_query_result_cardinality_with_bounds(
             self.schema_info, self.metadata_table, self.ast_with_parameters.parameters
         )
 
+    @cached_property
+    def cardinality_estimate(self) -> float:
+        """Return the cardinality estimate for this query."""
+        return self.cardinality_estimate_with_bounds.value
+
+    @cached_property
+    def execution_cost_estimate(self) -> ExecutionCostEstimate:
+        """Return the estimated cost of executing this query on the backend of the cost model."""
+        return estimate_query_execution_cost(
+            self.schema_info,
+            self.shape_analysis.ir_and_metadata,
+            self.ast_with_parameters.parameters,
+            self.execution_cost_model,
+        )
+
     @cached_property
     def filters(self) -> Dict[VertexPath, Set[FilterInfo]]:
         """Get the filters at each VertexPath."""
-        return get_filters(self.metadata_table)
+        return self.shape_analysis.filters
 
     @cached_property
     def fold_scope_roots(self) -> Dict[VertexPath, VertexPath]:
         """Map each VertexPath in the query that's inside a fold to the VertexPath of the fold."""
-        return get_fold_scope_roots(self.metadata_table)
+        return self.shape_analysis.fold_scope_roots
 
     @cached_property
     def single_field_filters(self) -> Dict[PropertyPath, Set[FilterInfo]]:
         """Find the single field filters for each field. Filters like name_or_alias are excluded."""
-        return get_single_field_filters(self.filters)
+        return self.shape_analysis.single_field_filters
 
     @cached_property
     def fields_eligible_for_pagination(self) -> Set[PropertyPath]:
         """Return all the fields we can consider for pagination."""
-        return get_fields_eligible_for_pagination(
-            self.schema_info, self.types, self.single_field_filters, self.fold_scope_roots,
-        )
+        return self.shape_analysis.fields_eligible_for_pagination
 
     @cached_property
     def field_value_intervals(self) -> Dict[PropertyPath, Interval[Any]]:
@@ -488,15 +598,23 @@ class QueryPlanningAnalysis:
 
 
 def analyze_query_string(
-    schema_info: QueryPlanningSchemaInfo, query_with_params: QueryStringWithParameters
+    schema_info: QueryPlanningSchemaInfo,
+    query_with_params: QueryStringWithParameters,
+    shape_analysis_cache: Optional[QueryShapeAnalysisCache] = None,
+    execution_cost_model: ExecutionCostModel = SQL_EXECUTION_COST_MODEL,
 ) -> QueryPlanningAnalysis:
     """Create a QueryPlanningAnalysis object for the given query string and parameters."""
     ast_with_params = ASTWithParameters.from_query_string_with_parameters(query_with_params)
-    return analyze_query_ast(schema_info, ast_with_params)
+    return analyze_query_ast(
+        schema_info, ast_with_params, shape_analysis_cache, execution_cost_model
+    )
 
 
 def analyze_query_ast(
-    schema_info: QueryPlanningSchemaInfo, ast_with_params: ASTWithParameters
+    schema_info: QueryPlanningSchemaInfo,
+    ast_with_params: ASTWithParameters,
+    shape_analysis_cache: Optional[QueryShapeAnalysisCache] = None,
+    execution_cost_model: ExecutionCostModel = SQL_EXECUTION_COST_MODEL,
 ) -> QueryPlanningAnalysis:
     """Create a QueryPlanningAnalysis object for the given query AST and parameters."""
     # This function exists for the sake of parity with "analyze_query_string()" as
@@ -505,4 +623,6 @@ def analyze_query_ast(
     # this is not something that would be obvious to the reader. What we are trying to avoid
     # is a situation where someone doesn't realize QueryPlanningAnalysis can be made from an AST,
     # so they print the AST into a query string, only to parse it again with analyze_query_string().
-    return QueryPlanningAnalysis(schema_info, ast_with_params)
+    return QueryPlanningAnalysis(
+        schema_info, ast_with_params, shape_analysis_cache, execution_cost_model
+    )
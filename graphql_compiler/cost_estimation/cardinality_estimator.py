@@ -1,17 +1,91 @@
 # Copyright 2019-present Kensho Technologies, LLC.
+from dataclasses import dataclass
 from itertools import chain
-from typing import Any, Dict
+from typing import Any, Dict, Iterable
+
+import six
 
 from ..compiler.helpers import (
     INBOUND_EDGE_DIRECTION,
     OUTBOUND_EDGE_DIRECTION,
+    BaseLocation,
     FoldScopeLocation,
     Location,
     get_edge_direction_and_name,
 )
-from ..compiler.metadata import QueryMetadataTable
+from ..compiler.metadata import FilterInfo, QueryMetadataTable
 from ..schema.schema_info import QueryPlanningSchemaInfo
-from .filter_selectivity_utils import adjust_counts_for_filters
+from .filter_selectivity_utils import (
+    adjust_counts_with_selectivity,
+    get_selectivity_and_bounds_of_filters_at_vertex,
+)
+
+
+# The operators of the filters on pagination keys with which paginate_query splits a query into
+# pages, see graphql_compiler/query_pagination/query_parameterizer.py.
+_PAGINATION_FILTER_OPERATORS = frozenset({"<", ">="})
+
+
+@dataclass(frozen=True)
+class CardinalityEstimate:
+    """The estimated cardinality of a query or a part of it, with bounds on the actual cardinality.
+
+    The bounds account for the uncertainty of the statistics the estimate is based on, such as
+    sampled value counts and quantiles, and for the statistics missing from it. They rely on the
+    same independence assumptions as the estimate, e.g. between filters on different fields and
+    between the filters and edges of different vertices, so they can be off when these don't hold.
+    """
+
+    value: float
+    lower_bound: float
+    upper_bound: float
+
+
+def _get_exact_cardinality_estimate(value):
+    """Return the CardinalityEstimate of a cardinality that is known exactly."""
+    return CardinalityEstimate(value=value, lower_bound=value, upper_bound=value)
+
+
+def _multiply_cardinality_estimates(first_estimate, second_estimate):
+    """Return the CardinalityEstimate of the product of two non-negative cardinalities."""
+    return CardinalityEstimate(
+        value=first_estimate.value * second_estimate.value,
+        lower_bound=first_estimate.lower_bound * second_estimate.lower_bound,
+        upper_bound=first_estimate.upper_bound * second_estimate.upper_bound,
+    )
+
+
+def _adjust_cardinality_estimate_for_filters(
+    schema_info: QueryPlanningSchemaInfo,
+    filter_infos: Iterable[FilterInfo],
+    parameters: Dict[str, Any],
+    location_name: str,
+    counts: CardinalityEstimate,
+) -> CardinalityEstimate:
+    """Adjust result counts and their bounds for filters on a given location.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        filter_infos: filters on the location being filtered
+        parameters: parameters with which query will be executed
+        location_name: type of the location being filtered
+        counts: result count that we're adjusting for filters
+
+    Returns:
+        counts updated for filter selectivities.
+    """
+    selectivity, selectivity_bounds = get_selectivity_and_bounds_of_filters_at_vertex(
+        schema_info, filter_infos, parameters, location_name
+    )
+    return CardinalityEstimate(
+        value=adjust_counts_with_selectivity(counts.value, selectivity),
+        lower_bound=adjust_counts_with_selectivity(
+            counts.lower_bound, selectivity_bounds.lower_bound
+        ),
+        upper_bound=adjust_counts_with_selectivity(
+            counts.upper_bound, selectivity_bounds.upper_bound
+        ),
+    )
 
 
 def _is_subexpansion_optional(query_metadata, parent_location, child_location):
@@ -26,13 +100,19 @@ def _is_subexpansion_folded(location):
     return isinstance(location, FoldScopeLocation) and len(location.fold_path) == 1
 
 
-def _is_subexpansion_recursive(query_metadata, parent_location, child_location):
-    """Return True if child_location is the root of a recursive subexpansion."""
+def _get_subexpansion_recursion_depth(query_metadata, parent_location, child_location):
+    """Return the @recurse depth if child_location is the root of a recursive subexpansion."""
     edge_direction, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
     for recurse_info in query_metadata.get_recurse_infos(parent_location):
         if recurse_info.edge_direction == edge_direction and recurse_info.edge_name == edge_name:
-            return True
-    return False
+            return recurse_info.depth
+    return None
+
+
+def _is_subexpansion_recursive(query_metadata, parent_location, child_location):
+    """Return True if child_location is the root of a recursive subexpansion."""
+    depth = _get_subexpansion_recursion_depth(query_metadata, parent_location, child_location)
+    return depth is not None
 
 
 def _get_all_original_child_locations(query_metadata, start_location):
@@ -91,6 +171,38 @@ def _get_base_class_names_of_parent_and_child_from_edge(schema_graph, current_lo
     return parent_base_class_name, child_base_class_name
 
 
+def _get_outbound_and_inbound_vertex_names(query_metadata, parent_location, child_location):
+    """Return the class names of the vertices the edge to child_location starts and ends at.
+
+    Since we need to provide the source vertex class and target vertex class in the same order
+    regardless of the direction of edge traversal, we first provide the class of the outbound
+    vertex (i.e. the vertex the edge starts from), then the class of the inbound vertex(i.e. the
+    vertex the edge ends at).
+
+    Args:
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the location the
+                        edge traversal ends at.
+
+    Returns:
+        tuple (str, str), the class names of the outbound and inbound vertices respectively.
+    """
+    edge_direction, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
+    parent_name_from_location = query_metadata.get_location_info(parent_location).type.name
+    child_name_from_location = query_metadata.get_location_info(child_location).type.name
+
+    if edge_direction == INBOUND_EDGE_DIRECTION:
+        return child_name_from_location, parent_name_from_location
+    elif edge_direction == OUTBOUND_EDGE_DIRECTION:
+        return parent_name_from_location, child_name_from_location
+    else:
+        raise AssertionError(
+            "Expected edge direction to be either inbound or outbound."
+            "Found: edge {} with direction {}".format(edge_name, edge_direction)
+        )
+
+
 def _query_statistics_for_vertex_edge_vertex_count(
     statistics, query_metadata, parent_location, child_location
 ):
@@ -115,32 +227,100 @@ def _query_statistics_for_vertex_edge_vertex_count(
         - int, count of edges connecting parent and child_location vertices if the statistic exists.
         - None otherwise.
     """
+    _, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
+    outbound_vertex_name, inbound_vertex_name = _get_outbound_and_inbound_vertex_names(
+        query_metadata, parent_location, child_location
+    )
+    query_result = statistics.get_vertex_edge_vertex_count(
+        outbound_vertex_name, edge_name, inbound_vertex_name
+    )
+    return query_result
+
+
+def _query_statistics_for_edge_degree_histogram(
+    statistics, query_metadata, parent_location, child_location
+):
+    """Query statistics for the degrees of parent_location vertices along the edge to children.
+
+    The degree of a parent_location vertex is the number of edges connecting it to child_location
+    vertices, under the same three constraints as in
+    _query_statistics_for_vertex_edge_vertex_count.
+
+    Args:
+        statistics: Statistics object, used for querying over get_edge_degree_histogram().
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the location the
+                        edge traversal ends at.
+
+    Returns:
+        - dict, int -> int, mapping degree to the number of parent_location vertices with that
+          degree if the statistic exists.
+        - None otherwise.
+    """
     edge_direction, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
-    parent_name_from_location = query_metadata.get_location_info(parent_location).type.name
-    child_name_from_location = query_metadata.get_location_info(child_location).type.name
+    outbound_vertex_name, inbound_vertex_name = _get_outbound_and_inbound_vertex_names(
+        query_metadata, parent_location, child_location
+    )
+    # The parent is the outbound vertex if the edge is traversed in the outbound direction, so
+    # the degrees of the parent vertices are in the direction of the traversal.
+    query_result = statistics.get_edge_degree_histogram(
+        outbound_vertex_name, edge_name, inbound_vertex_name, edge_direction
+    )
+    return query_result
 
-    # Since we need to provide the source vertex class and target vertex class in the same order
-    # regardless of the direction of edge traversal, we first provide the class of the outbound
-    # vertex (i.e. the vertex the edge starts from), then the class of the inbound vertex(i.e. the
-    # vertex the edge ends at).
-    if edge_direction == INBOUND_EDGE_DIRECTION:
-        outbound_vertex_name = child_name_from_location
-        inbound_vertex_name = parent_name_from_location
-    elif edge_direction == OUTBOUND_EDGE_DIRECTION:
-        outbound_vertex_name = parent_name_from_location
-        inbound_vertex_name = child_name_from_location
-    else:
-        raise AssertionError(
-            "Expected edge direction to be either inbound or outbound."
-            "Found: edge {} with direction {}".format(edge_name, edge_direction)
-        )
 
-    query_result = statistics.get_vertex_edge_vertex_count(
-        outbound_vertex_name, edge_name, inbound_vertex_name
+def _query_statistics_for_recursive_branching_factor(
+    statistics, query_metadata, parent_location, child_location
+):
+    """Query statistics for the branching factor of recursion over the edge to child_location.
+
+    Args:
+        statistics: Statistics object, used for querying over get_recursive_branching_factor().
+        query_metadata: QueryMetadataTable object.
+        parent_location: BaseLocation, corresponding to the location the recursion begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the root of the
+                        recursive subexpansion.
+
+    Returns:
+        - float, the branching factor of the recursion if the statistic exists.
+        - None otherwise.
+    """
+    edge_direction, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
+    outbound_vertex_name, inbound_vertex_name = _get_outbound_and_inbound_vertex_names(
+        query_metadata, parent_location, child_location
+    )
+    query_result = statistics.get_recursive_branching_factor(
+        outbound_vertex_name, edge_name, inbound_vertex_name, edge_direction
     )
     return query_result
 
 
+def _estimate_vertices_reached_by_recursion(branching_factor, depth, max_vertices_per_level):
+    """Estimate the number of vertices @recurse reaches from a single vertex, including itself.
+
+    The recursion reaches the vertex itself at depth 0, and the number of vertices reached grows
+    geometrically by the branching factor at each level of depth, up to the given maximum.
+
+    Args:
+        branching_factor: float, expected number of children of each vertex reached.
+        depth: int, the depth of the @recurse directive.
+        max_vertices_per_level: float, the maximum number of vertices reached at any depth greater
+                                than 0, e.g. the number of vertices of the recursed type.
+
+    Returns:
+        float, expected number of vertices reached at depths 0 through depth.
+    """
+    vertices_reached = 1.0
+    vertices_at_level = 1.0
+    for _ in six.moves.range(depth):
+        vertices_at_level = min(vertices_at_level * branching_factor, max_vertices_per_level)
+        if vertices_at_level == 0:
+            break
+        vertices_reached += vertices_at_level
+    return vertices_reached
+
+
 def _estimate_vertex_edge_vertex_count_using_class_count(
     schema_info, query_metadata, parent_location, child_location
 ):
@@ -163,10 +343,13 @@ def _estimate_vertex_edge_vertex_count_using_class_count(
                         edge traversal ends at.
 
     Returns:
-        float, estimate for number of edges connecting parent_location and child_location.
+        CardinalityEstimate, estimate for number of edges connecting parent_location and
+        child_location. Without the independence assumption, anything between none and all CD
+        edges may be AB edges.
     """
     _, edge_name = _get_last_edge_direction_and_name_to_location(child_location)
-    edge_counts = schema_info.statistics.get_class_count(edge_name)
+    all_edge_counts = schema_info.statistics.get_class_count(edge_name)
+    edge_counts = all_edge_counts
 
     parent_name_from_location = query_metadata.get_location_info(parent_location).type.name
     child_name_from_location = query_metadata.get_location_info(child_location).type.name
@@ -192,38 +375,53 @@ def _estimate_vertex_edge_vertex_count_using_class_count(
         ) / schema_info.statistics.get_class_count(parent_base_class_name)
     # pylint: enable=old-division
 
-    return edge_counts
+    if edge_counts == all_edge_counts:
+        return _get_exact_cardinality_estimate(edge_counts)
+    return CardinalityEstimate(
+        value=edge_counts, lower_bound=0.0, upper_bound=max(edge_counts, all_edge_counts)
+    )
 
 
-def _estimate_edges_to_children_per_parent(
-    schema_info, query_metadata, parameters, parent_location, child_location
-):
-    """Estimate the count of edges per parent_location that connect to child_location vertices.
+def estimate_children_per_parent_ignoring_filters(
+    schema_info: QueryPlanningSchemaInfo,
+    query_metadata: QueryMetadataTable,
+    parent_location: BaseLocation,
+    child_location: BaseLocation,
+    *,
+    count_recursion_paths: bool = False,
+) -> CardinalityEstimate:
+    """Estimate the count of child_location vertices reached per parent_location vertex.
 
     Given a parent location of type A and child location of type B, assume all AB edges are
     distributed evenly over A vertices, so the expected number of child edges per parent vertex is
-    (number of AB edges) / (number of A vertices).
+    (number of AB edges) / (number of A vertices). If child_location is reached with @recurse, the
+    vertices reached at every level of depth are counted. The filters at child_location are not
+    taken into account.
 
     Args:
         schema_info: QueryPlanningSchemaInfo
-        query_metadata: QueryMetadataTable object.
-        parameters: dict, parameters with which query will be executed.
-        parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
-        child_location: BaseLocation, child of parent_location corresponding to the location the
-                        edge traversal ends at.
+        query_metadata: info on locations, inputs, outputs, and tags in the query
+        parent_location: the location the edge traversal begins from
+        child_location: child of parent_location corresponding to the location the edge traversal
+                        ends at
+        count_recursion_paths: whether vertices reached with @recurse are counted once per path
+                               leading to them, rather than once per level of depth. The number of
+                               paths is not bounded by the number of vertices of the child type.
 
     Returns:
-        float, expected number of edges per parent_location vertex that connect to child_location
-        vertices.
+        CardinalityEstimate, expected number of child_location vertices per parent_location vertex,
+        before the filters at child_location are applied.
     """
     edge_counts = _query_statistics_for_vertex_edge_vertex_count(
         schema_info.statistics, query_metadata, parent_location, child_location
     )
 
     if edge_counts is None:
-        edge_counts = _estimate_vertex_edge_vertex_count_using_class_count(
+        edge_count_estimate = _estimate_vertex_edge_vertex_count_using_class_count(
             schema_info, query_metadata, parent_location, child_location
         )
+    else:
+        edge_count_estimate = _get_exact_cardinality_estimate(edge_counts)
 
     parent_name_from_location = query_metadata.get_location_info(parent_location).type.name
     # Count the number of parents, over which we assume the edges are uniformly distributed.
@@ -233,32 +431,173 @@ def _estimate_edges_to_children_per_parent(
     if parent_location_counts == 0:
         # This implies that edge_counts is also 0. However, asserting that edge_counts is 0 is
         # too aggressive because we can't expect all statistics to be collected at the same time.
-        return 0.0
+        return _get_exact_cardinality_estimate(0.0)
 
     # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
     # pylint: disable=old-division
     #
-    # TODO(evan): edges are not necessarily uniformly distributed, so record more statistics
-    child_counts_per_parent = float(edge_counts) / parent_location_counts
+    # Edges are not necessarily uniformly distributed. If they are skewed, the edge degree
+    # histogram statistic should be provided, see _estimate_subexpansion_cardinality.
+    child_counts_per_parent = CardinalityEstimate(
+        value=float(edge_count_estimate.value) / parent_location_counts,
+        lower_bound=float(edge_count_estimate.lower_bound) / parent_location_counts,
+        upper_bound=float(edge_count_estimate.upper_bound) / parent_location_counts,
+    )
     # pylint: enable=old-division
 
-    # TODO(evan): If edge is recursed over, we need a more detailed statistic
     # Recursion always starts with depth = 0, so we should treat the parent result set itself as a
-    # child result set to be expanded (so add 1 to child_counts).
-    is_recursive = _is_subexpansion_recursive(query_metadata, parent_location, child_location)
-    if is_recursive:
-        child_counts_per_parent += 1
+    # child result set to be expanded. Each following level of depth expands the children of the
+    # previous level over the same edge.
+    recursion_depth = _get_subexpansion_recursion_depth(
+        query_metadata, parent_location, child_location
+    )
+    if recursion_depth is not None:
+        branching_factor = _query_statistics_for_recursive_branching_factor(
+            schema_info.statistics, query_metadata, parent_location, child_location
+        )
+        if branching_factor is None:
+            branching_factor_estimate = child_counts_per_parent
+        else:
+            branching_factor_estimate = _get_exact_cardinality_estimate(branching_factor)
+        child_name_from_location = query_metadata.get_location_info(child_location).type.name
+        max_vertices_per_level = schema_info.statistics.get_class_count(child_name_from_location)
+        if max_vertices_per_level is None or count_recursion_paths:
+            max_vertices_per_level = float("inf")
+        # The number of vertices reached grows with the branching factor, so bounds on the
+        # branching factor bound it as well.
+        child_counts_per_parent = CardinalityEstimate(
+            value=_estimate_vertices_reached_by_recursion(
+                branching_factor_estimate.value, recursion_depth, max_vertices_per_level
+            ),
+            lower_bound=_estimate_vertices_reached_by_recursion(
+                branching_factor_estimate.lower_bound, recursion_depth, max_vertices_per_level
+            ),
+            upper_bound=_estimate_vertices_reached_by_recursion(
+                branching_factor_estimate.upper_bound, recursion_depth, max_vertices_per_level
+            ),
+        )
+
+    return child_counts_per_parent
+
+
+def _estimate_edges_to_children_per_parent(
+    schema_info, query_metadata, parameters, parent_location, child_location
+):
+    """Estimate the count of edges per parent_location that connect to child_location vertices.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object.
+        parameters: dict, parameters with which query will be executed.
+        parent_location: BaseLocation, corresponding to the location the edge traversal begins from.
+        child_location: BaseLocation, child of parent_location corresponding to the location the
+                        edge traversal ends at.
+
+    Returns:
+        CardinalityEstimate, expected number of edges per parent_location vertex that connect to
+        child_location vertices passing the filters at child_location.
+    """
+    child_counts_per_parent = estimate_children_per_parent_ignoring_filters(
+        schema_info, query_metadata, parent_location, child_location
+    )
 
     # Adjust the counts for filters at child_location.
     child_name_from_location = query_metadata.get_location_info(child_location).type.name
     child_filters = query_metadata.get_filter_infos(child_location)
-    child_counts_per_parent = adjust_counts_for_filters(
+    child_counts_per_parent = _adjust_cardinality_estimate_for_filters(
         schema_info, child_filters, parameters, child_name_from_location, child_counts_per_parent
     )
 
     return child_counts_per_parent
 
 
+def _estimate_fraction_of_children_passing_filters(
+    schema_info, query_metadata, parameters, child_location
+):
+    """Estimate the fraction of child_location vertices that pass the filters at child_location.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: QueryMetadataTable object.
+        parameters: dict, parameters with which query will be executed.
+        child_location: BaseLocation, whose filters are being estimated.
+
+    Returns:
+        - CardinalityEstimate between 0 and 1, the fraction of child_location vertices that pass
+          its filters.
+        - None if it can't be estimated, since there are no child_location vertices.
+    """
+    child_name_from_location = query_metadata.get_location_info(child_location).type.name
+    child_location_counts = schema_info.statistics.get_class_count(child_name_from_location)
+    if not child_location_counts:
+        return None
+
+    child_filters = query_metadata.get_filter_infos(child_location)
+    filtered_child_location_counts = _adjust_cardinality_estimate_for_filters(
+        schema_info,
+        child_filters,
+        parameters,
+        child_name_from_location,
+        _get_exact_cardinality_estimate(child_location_counts),
+    )
+    return CardinalityEstimate(
+        value=min(1.0, float(filtered_child_location_counts.value) / child_location_counts),
+        lower_bound=min(
+            1.0, float(filtered_child_location_counts.lower_bound) / child_location_counts
+        ),
+        upper_bound=min(
+            1.0, float(filtered_child_location_counts.upper_bound) / child_location_counts
+        ),
+    )
+
+
+def _estimate_subexpansion_cardinality_using_degree_histogram(
+    degree_histogram, fraction_of_children_passing_filters, results_per_child, is_at_least_one
+):
+    """Estimate the subexpansion cardinality per parent vertex, accounting for skewed degrees.
+
+    We assume each of the d edges of a parent vertex leads to a child passing the child filters
+    independently with probability p, so the number of such children is binomially distributed.
+    When all result sets of a subexpansion are counted, the expected cardinality is
+    d * p * (results per child), whose average over the parents only depends on the mean degree.
+    However, optional and folded subexpansions yield a result set even for parents without any
+    children passing the filters, which happens with probability (1 - p) ** d. If a few parents
+    have most of the edges, most parents are in this case, and using the mean degree for all of
+    them underestimates the cardinality.
+
+    Args:
+        degree_histogram: dict, int -> int, mapping degree to the number of parent vertices with
+                          that degree.
+        fraction_of_children_passing_filters: float, the probability p defined above.
+        results_per_child: float, expected cardinality of the full expansion of one child vertex.
+        is_at_least_one: bool, whether the subexpansion yields at least one result set, i.e.
+                         whether it is optional or folded.
+
+    Returns:
+        float, expected number of result sets found when a parent vertex is expanded.
+    """
+    parent_location_counts = sum(six.itervalues(degree_histogram))
+    if parent_location_counts == 0:
+        return 1.0 if is_at_least_one else 0.0
+
+    total_subexpansion_cardinality = 0.0
+    for degree, vertex_counts in six.iteritems(degree_histogram):
+        subexpansion_cardinality = degree * fraction_of_children_passing_filters * results_per_child
+        if is_at_least_one:
+            probability_of_no_children = (1.0 - fraction_of_children_passing_filters) ** degree
+            # Parents with no children yield exactly one result set. We assume parents with
+            # children yield their expected number of result sets, but at least one.
+            subexpansion_cardinality = probability_of_no_children + max(
+                subexpansion_cardinality, 1.0 - probability_of_no_children
+            )
+        total_subexpansion_cardinality += vertex_counts * subexpansion_cardinality
+
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    return total_subexpansion_cardinality / parent_location_counts
+    # pylint: enable=old-division
+
+
 def _estimate_subexpansion_cardinality(
     schema_info, query_metadata, parameters, parent_location, child_location
 ):
@@ -273,30 +612,75 @@ def _estimate_subexpansion_cardinality(
                         subexpansion root
 
     Returns:
-        float, number of expected result sets found when a vertex corresponding to parent_location
-        is expanded via child_location. For example, if parent_location (type A) has children (types
-        B and C), the subexpansion results associated with the B-location are the result sets found
-        when we expand an A-vertex over AB-edges and each subsequent B-vertex is fully expanded. We
-        estimate this recursively as:
+        CardinalityEstimate, number of expected result sets found when a vertex corresponding to
+        parent_location is expanded via child_location. For example, if parent_location (type A)
+        has children (types B and C), the subexpansion results associated with the B-location are
+        the result sets found when we expand an A-vertex over AB-edges and each subsequent
+        B-vertex is fully expanded. We estimate this recursively as:
         (expected number of B-vertices) * (expected number of result sets per B-vertex).
     """
-    child_counts_per_parent = _estimate_edges_to_children_per_parent(
-        schema_info, query_metadata, parameters, parent_location, child_location
-    )
-
     results_per_child = _estimate_expansion_cardinality(
         schema_info, query_metadata, parameters, child_location
     )
 
-    subexpansion_cardinality = child_counts_per_parent * results_per_child
-
     # If child_location is the root of an optional or folded subexpansion, the empty result set will
     # be returned if no other result sets exist, so return at least 1.
     # TODO(evan): @filters on _x_count inside @folds can reduce result size.
     is_optional = _is_subexpansion_optional(query_metadata, parent_location, child_location)
     is_folded = _is_subexpansion_folded(child_location)
+
+    # Prefer the distribution of parent vertex degrees over their mean degree, when available.
+    # Recursion expands the children of children over the same edge, so the degrees of the
+    # parent vertices don't describe it.
+    degree_histogram = None
+    fraction_of_children_passing_filters = None
+    if not _is_subexpansion_recursive(query_metadata, parent_location, child_location):
+        degree_histogram = _query_statistics_for_edge_degree_histogram(
+            schema_info.statistics, query_metadata, parent_location, child_location
+        )
+    if degree_histogram is not None:
+        fraction_of_children_passing_filters = _estimate_fraction_of_children_passing_filters(
+            schema_info, query_metadata, parameters, child_location
+        )
+    if degree_histogram is not None and fraction_of_children_passing_filters is not None:
+        subexpansion_cardinality = _estimate_subexpansion_cardinality_using_degree_histogram(
+            degree_histogram,
+            fraction_of_children_passing_filters.value,
+            results_per_child.value,
+            is_optional or is_folded,
+        )
+        # The cardinality mostly grows with the fraction of children passing the filters, but
+        # not always, so make sure the bounds contain the estimate.
+        lower_bound = _estimate_subexpansion_cardinality_using_degree_histogram(
+            degree_histogram,
+            fraction_of_children_passing_filters.lower_bound,
+            results_per_child.lower_bound,
+            is_optional or is_folded,
+        )
+        upper_bound = _estimate_subexpansion_cardinality_using_degree_histogram(
+            degree_histogram,
+            fraction_of_children_passing_filters.upper_bound,
+            results_per_child.upper_bound,
+            is_optional or is_folded,
+        )
+        return CardinalityEstimate(
+            value=subexpansion_cardinality,
+            lower_bound=min(lower_bound, subexpansion_cardinality),
+            upper_bound=max(upper_bound, subexpansion_cardinality),
+        )
+
+    child_counts_per_parent = _estimate_edges_to_children_per_parent(
+        schema_info, query_metadata, parameters, parent_location, child_location
+    )
+    subexpansion_cardinality = _multiply_cardinality_estimates(
+        child_counts_per_parent, results_per_child
+    )
     if is_optional or is_folded:
-        subexpansion_cardinality = max(subexpansion_cardinality, 1)
+        subexpansion_cardinality = CardinalityEstimate(
+            value=max(subexpansion_cardinality.value, 1),
+            lower_bound=max(subexpansion_cardinality.lower_bound, 1),
+            upper_bound=max(subexpansion_cardinality.upper_bound, 1),
+        )
 
     return subexpansion_cardinality
 
@@ -311,9 +695,10 @@ def _estimate_expansion_cardinality(schema_info, query_metadata, parameters, cur
         current_location: BaseLocation object, corresponding to the vertex we're expanding
 
     Returns:
-        float, expected cardinality associated with the full expansion of one current vertex.
+        CardinalityEstimate, expected cardinality associated with the full expansion of one
+        current vertex.
     """
-    expansion_cardinality = 1
+    expansion_cardinality = _get_exact_cardinality_estimate(1)
     child_locations = _get_all_original_child_locations(query_metadata, current_location)
     for child_location in child_locations:
         # The expected cardinality per current vertex is the product of the expected cardinality for
@@ -322,37 +707,106 @@ def _estimate_expansion_cardinality(schema_info, query_metadata, parameters, cur
         subexpansion_cardinality = _estimate_subexpansion_cardinality(
             schema_info, query_metadata, parameters, current_location, child_location
         )
-        expansion_cardinality *= subexpansion_cardinality
+        expansion_cardinality = _multiply_cardinality_estimates(
+            expansion_cardinality, subexpansion_cardinality
+        )
     return expansion_cardinality
 
 
-def estimate_query_result_cardinality(
+def get_query_shape(
+    schema_info: QueryPlanningSchemaInfo, query_metadata: QueryMetadataTable
+) -> str:
+    """Return the shape of the query, which is shared by queries estimated the same way.
+
+    The shape of a query consists of the path, type, optional and fold scopes, recursion depths
+    and filter operators and fields of each of its locations. Queries that only differ in their
+    parameter values or outputs have the same shape.
+
+    Filters with the < and >= operators on the pagination key of a location are not part of its
+    shape, since paginate_query splits a query into pages by adding such filters. The pages of a
+    query, and the query itself, therefore have the same shape. Pagination assumes the values of
+    pagination keys are uniformly distributed, so the cardinality of each page is estimated as a
+    fraction of the cardinality of the query, and the actual result counts of the pages are
+    expected to be off from their estimates by the same factor as that of the query.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: info on locations, inputs, outputs, and tags in the query
+
+    Returns:
+        str, a canonical representation of the shape of the query
+    """
+    location_shapes = set()
+    for location, location_info in query_metadata.registered_locations:
+        if isinstance(location, FoldScopeLocation):
+            location_path = location.base_location.query_path + tuple(
+                "fold_{}_{}".format(edge_direction, edge_name)
+                for edge_direction, edge_name in location.fold_path
+            )
+        elif isinstance(location, Location):
+            location_path = location.query_path
+        else:
+            raise AssertionError("Unexpected location encountered: {}".format(location))
+        pagination_key = schema_info.pagination_keys.get(location_info.type.name)
+        filter_shapes = tuple(
+            sorted(
+                (filter_info.op_name, filter_info.fields)
+                for filter_info in query_metadata.get_filter_infos(location)
+                if not (
+                    filter_info.op_name in _PAGINATION_FILTER_OPERATORS
+                    and filter_info.fields == (pagination_key,)
+                )
+            )
+        )
+        recurse_shapes = tuple(
+            sorted(
+                (recurse_info.edge_direction, recurse_info.edge_name, recurse_info.depth)
+                for recurse_info in query_metadata.get_recurse_infos(location)
+            )
+        )
+        location_shapes.add(
+            (
+                location_path,
+                location_info.type.name,
+                location_info.optional_scopes_depth,
+                filter_shapes,
+                recurse_shapes,
+            )
+        )
+    return repr(tuple(sorted(location_shapes)))
+
+
+def estimate_query_result_cardinality_with_bounds(
     schema_info: QueryPlanningSchemaInfo,
     query_metadata: QueryMetadataTable,
     parameters: Dict[str, Any],
-) -> float:
-    """Estimate the cardinality of a GraphQL query's result using database statistics.
+    *,
+    apply_correction: bool = True,
+) -> CardinalityEstimate:
+    """Estimate the cardinality of a GraphQL query's result and bound it using database statistics.
 
     Args:
         schema_info: QueryPlanningSchemaInfo
         query_metadata: info on locations, inputs, outputs, and tags in the query
         parameters: dict, parameters with which query will be executed.
+        apply_correction: whether to apply the cardinality correction factor of the shape of the
+                          query, if the statistics have one. See get_cardinality_correction_factor.
 
     Returns:
-        float, expected query result cardinality. Equal to the number of root vertices multiplied by
-        the expected number of result sets per full expansion of a root vertex.
+        CardinalityEstimate, expected query result cardinality and bounds on it. Equal to the
+        number of root vertices multiplied by the expected number of result sets per full
+        expansion of a root vertex.
     """
     root_location = query_metadata.root_location
 
     # First, count the vertices corresponding to the root location that pass relevant filters
     root_name = query_metadata.get_location_info(root_location).type.name
-    root_counts = schema_info.statistics.get_class_count(root_name)
-    root_counts = adjust_counts_for_filters(
+    root_counts = _adjust_cardinality_estimate_for_filters(
         schema_info,
         query_metadata.get_filter_infos(root_location),
         parameters,
         root_name,
-        root_counts,
+        _get_exact_cardinality_estimate(schema_info.statistics.get_class_count(root_name)),
     )
 
     # Next, find the number of expected result sets per root vertex when fully expanded
@@ -360,6 +814,52 @@ def estimate_query_result_cardinality(
         schema_info, query_metadata, parameters, root_location
     )
 
-    expected_query_result_cardinality = root_counts * results_per_root
+    expected_query_result_cardinality = _multiply_cardinality_estimates(
+        root_counts, results_per_root
+    )
+
+    # Finally, correct the estimate by how far off estimates of similar queries have been.
+    # The bounds are only widened to contain the corrected estimate, since the correction is
+    # learned for the shape of the query rather than for its parameters.
+    if apply_correction:
+        correction_factor = schema_info.statistics.get_cardinality_correction_factor(
+            get_query_shape(schema_info, query_metadata)
+        )
+        if correction_factor is not None:
+            corrected_cardinality = expected_query_result_cardinality.value * correction_factor
+            expected_query_result_cardinality = CardinalityEstimate(
+                value=corrected_cardinality,
+                lower_bound=min(
+                    expected_query_result_cardinality.lower_bound, corrected_cardinality
+                ),
+                upper_bound=max(
+                    expected_query_result_cardinality.upper_bound, corrected_cardinality
+                ),
+            )
 
     return expected_query_result_cardinality
+
+
+def estimate_query_result_cardinality(
+    schema_info: QueryPlanningSchemaInfo,
+    query_metadata: QueryMetadataTable,
+    parameters: Dict[str, Any],
+    *,
+    apply_correction: bool = True,
+) -> float:
+    """Estimate the cardinality of a GraphQL query's result using database statistics.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        query_metadata: info on locations, inputs, outputs, and tags in the query
+        parameters: dict, parameters with which query will be executed.
+        apply_correction: whether to apply the cardinality correction factor of the shape of the
+                          query, if the statistics have one. See get_cardinality_correction_factor.
+
+    Returns:
+        float, expected query result cardinality. Equal to the number of root vertices multiplied by
+        the expected number of result sets per full expansion of a root vertex.
+    """
+    return estimate_query_result_cardinality_with_bounds(
+        schema_info, query_metadata, parameters, apply_correction=apply_correction
+    ).value
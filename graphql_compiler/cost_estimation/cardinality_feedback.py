@@ -0,0 +1,235 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Correct cardinality estimates using the result counts of previously executed queries.
+
+Cardinality estimates rely on assumptions like the independence of filters and the uniform
+distribution of edges, so they may be off by orders of magnitude for some queries. However, the
+same queries are often executed over and over with different parameters. AdaptiveStatistics
+learns a correction factor for the shape of each such query from the result counts reported by
+its callers, and applies it to subsequent estimates of queries with the same shape. The pages of
+a paginated query have the same shape as the query, so the result counts of its pages also
+correct the estimates used to paginate it, see get_query_shape.
+"""
+from dataclasses import dataclass
+import json
+import math
+from threading import Lock
+from typing import Any, Collection, Dict, List, Optional, Tuple
+
+from .analysis import QueryPlanningAnalysis
+from .cardinality_estimator import estimate_query_result_cardinality, get_query_shape
+from .statistics import Statistics
+
+
+@dataclass(frozen=True)
+class CardinalityCorrection:
+    """The correction of the cardinality estimates of queries of some shape."""
+
+    # The factor by which to multiply the estimated cardinality.
+    factor: float
+
+    # The number of result counts the factor was learned from.
+    observation_count: int
+
+
+class AdaptiveStatistics(Statistics):
+    """Statistics that learn to correct cardinality estimates from observed result counts."""
+
+    def __init__(
+        self,
+        statistics: Statistics,
+        *,
+        corrections: Optional[Dict[str, CardinalityCorrection]] = None,
+        learning_rate: float = 0.2,
+    ) -> None:
+        """Wrap the given statistics, adding cardinality corrections to them.
+
+        Args:
+            statistics: the statistics used for all other estimates
+            corrections: optional dict, str -> CardinalityCorrection, mapping query shape to its
+                         correction, e.g. as returned by read_cardinality_corrections
+            learning_rate: the minimum weight of each new result count in the correction factor,
+                           between 0 and 1. The factor is the geometric mean of the observed
+                           ratios of result count to estimate, until it is learned from enough
+                           result counts. After that, higher learning rates adapt to changes in
+                           the data faster, while lower learning rates average out more noise.
+        """
+        if not 0 < learning_rate <= 1:
+            raise AssertionError(f"Expected learning_rate to be in (0, 1], got {learning_rate}.")
+
+        self._statistics = statistics
+        self._corrections = dict() if corrections is None else dict(corrections)
+        self._learning_rate = learning_rate
+        self._lock = Lock()
+
+    def __str__(self) -> str:
+        """Return a human-readable representation of the AdaptiveStatistics object."""
+        return f"AdaptiveStatistics({self._statistics}, {len(self._corrections)} corrections)"
+
+    @property
+    def corrections(self) -> Dict[str, CardinalityCorrection]:
+        """Return a copy of the cardinality corrections learned so far, e.g. to persist them."""
+        with self._lock:
+            return dict(self._corrections)
+
+    def record_result_count(self, query_analysis: QueryPlanningAnalysis, result_count: int) -> None:
+        """Update the correction factor of the query's shape with its actual result count.
+
+        Args:
+            query_analysis: analysis of the executed query, using these statistics
+            result_count: the number of result rows the query returned
+        """
+        if result_count < 0:
+            raise AssertionError(f"Expected a non-negative result count, got {result_count}.")
+
+        # The correction applies to the uncorrected estimate, so learn from it rather than from
+        # query_analysis.cardinality_estimate, which may have been corrected with an older factor.
+        uncorrected_estimate = estimate_query_result_cardinality(
+            query_analysis.schema_info,
+            query_analysis.metadata_table,
+            query_analysis.ast_with_parameters.parameters,
+            apply_correction=False,
+        )
+        query_shape = get_query_shape(query_analysis.schema_info, query_analysis.metadata_table)
+
+        # Smooth the ratio, so that estimates and result counts of 0 are handled gracefully.
+        log_ratio = math.log((result_count + 1.0) / (uncorrected_estimate + 1.0))
+        with self._lock:
+            correction = self._corrections.get(query_shape)
+            if correction is None:
+                self._corrections[query_shape] = CardinalityCorrection(math.exp(log_ratio), 1)
+            else:
+                observation_count = correction.observation_count + 1
+                weight = max(1.0 / observation_count, self._learning_rate)
+                log_factor = (1.0 - weight) * math.log(correction.factor) + weight * log_ratio
+                self._corrections[query_shape] = CardinalityCorrection(
+                    math.exp(log_factor), observation_count
+                )
+
+    def get_cardinality_correction_factor(self, query_shape: str) -> Optional[float]:
+        """See base class."""
+        with self._lock:
+            correction = self._corrections.get(query_shape)
+        if correction is None:
+            return self._statistics.get_cardinality_correction_factor(query_shape)
+        return correction.factor
+
+    def get_class_count(self, class_name: str) -> Optional[int]:
+        """See base class."""
+        return self._statistics.get_class_count(class_name)
+
+    def get_vertex_edge_vertex_count(
+        self, vertex_source_class_name: str, edge_class_name: str, vertex_target_class_name: str
+    ) -> Optional[int]:
+        """See base class."""
+        return self._statistics.get_vertex_edge_vertex_count(
+            vertex_source_class_name, edge_class_name, vertex_target_class_name
+        )
+
+    def get_edge_degree_histogram(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[Dict[int, int]]:
+        """See base class."""
+        return self._statistics.get_edge_degree_histogram(
+            vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction
+        )
+
+    def get_recursive_branching_factor(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[float]:
+        """See base class."""
+        return self._statistics.get_recursive_branching_factor(
+            vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction
+        )
+
+    def get_distinct_field_values_count(self, vertex_name: str, field_name: str) -> Optional[int]:
+        """See base class."""
+        return self._statistics.get_distinct_field_values_count(vertex_name, field_name)
+
+    def get_joint_distinct_field_values_count(
+        self, vertex_name: str, field_names: Tuple[str, ...]
+    ) -> Optional[int]:
+        """See base class."""
+        return self._statistics.get_joint_distinct_field_values_count(vertex_name, field_names)
+
+    def get_field_quantiles(self, vertex_name: str, field_name: str) -> Optional[List[Any]]:
+        """See base class."""
+        return self._statistics.get_field_quantiles(vertex_name, field_name)
+
+    def get_value_count(self, vertex_name: str, field_name: str, value: Any) -> Optional[float]:
+        """See base class."""
+        return self._statistics.get_value_count(vertex_name, field_name, value)
+
+    def get_value_counts(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[List[float]]:
+        """See base class."""
+        return self._statistics.get_value_counts(vertex_name, field_name, values)
+
+    def get_value_counts_with_bounds(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[Tuple[List[float], Optional[List[Tuple[float, float]]]]]:
+        """See base class."""
+        return self._statistics.get_value_counts_with_bounds(vertex_name, field_name, values)
+
+    def get_joint_value_count(
+        self, vertex_name: str, field_names: Tuple[str, ...], values: Tuple[Any, ...]
+    ) -> Optional[float]:
+        """See base class."""
+        return self._statistics.get_joint_value_count(vertex_name, field_names, values)
+
+    def get_joint_value_counts(
+        self,
+        vertex_name: str,
+        field_names: Tuple[str, ...],
+        values_list: Collection[Tuple[Any, ...]],
+    ) -> Optional[List[float]]:
+        """See base class."""
+        return self._statistics.get_joint_value_counts(vertex_name, field_names, values_list)
+
+
+def write_cardinality_corrections(
+    file_path: str, corrections: Dict[str, CardinalityCorrection]
+) -> None:
+    """Write the cardinality corrections to a JSON file, to be read with read_cardinality_corrections.
+
+    Args:
+        file_path: path of the file to write, overwritten if it exists
+        corrections: dict mapping query shape to its correction, e.g. AdaptiveStatistics.corrections
+    """
+    corrections_data = [
+        {
+            "query_shape": query_shape,
+            "factor": correction.factor,
+            "observation_count": correction.observation_count,
+        }
+        for query_shape, correction in sorted(corrections.items())
+    ]
+    with open(file_path, "w") as corrections_file:
+        json.dump(corrections_data, corrections_file, indent=2)
+
+
+def read_cardinality_corrections(file_path: str) -> Dict[str, CardinalityCorrection]:
+    """Read cardinality corrections written with write_cardinality_corrections.
+
+    Args:
+        file_path: path of the file to read
+
+    Returns:
+        dict mapping query shape to its correction
+    """
+    with open(file_path, "r") as corrections_file:
+        corrections_data = json.load(corrections_file)
+    return {
+        correction_data["query_shape"]: CardinalityCorrection(
+            correction_data["factor"], correction_data["observation_count"]
+        )
+        for correction_data in corrections_data
+    }
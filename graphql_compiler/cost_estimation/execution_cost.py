@@ -0,0 +1,335 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Estimate the cost of executing a query on a given backend, beyond the size of its result.
+
+The cardinality of a query doesn't account for the work needed to compute its result. For
+example, a traversal with a selective filter and no outputs may read billions of edges to return
+a few rows, and the backends execute @recurse, @fold and @optional very differently: SQL computes
+recursions with recursive CTEs and folds with subqueries aggregating the folded vertices of every
+vertex of the type preceding the fold, while MATCH splits queries with @optional traversals into
+a compound query with one query per subset of the traversals that are followed.
+
+The execution cost model estimates the intermediate result sizes of a query as the backend
+computes them, one traversal after the other in the order of the query: the number of edges and
+vertices read by each traversal, and the number of rows it produces. The cost of a traversal is
+the number of rows it reads and produces, weighed by the per-row costs of the backend's operators.
+The filters at the root of the query are assumed to be answered using indexes, while the filters
+at all other locations are applied to each vertex reached by the traversal to that location.
+"""
+from dataclasses import dataclass
+from enum import Enum, auto, unique
+from typing import Any, Dict, List, Set, Tuple
+
+from ..compiler.compiler_frontend import IrAndMetadata
+from ..compiler.helpers import BaseLocation, FoldScopeLocation, Location, get_vertex_path
+from ..compiler.ir_lowering_common.common import extract_optional_location_root_info
+from ..compiler.ir_lowering_match.utils import construct_optional_traversal_tree
+from ..global_utils import VertexPath
+from ..schema.schema_info import QueryPlanningSchemaInfo
+from .cardinality_estimator import estimate_children_per_parent_ignoring_filters
+from .filter_selectivity_utils import (
+    adjust_counts_with_selectivity,
+    get_selectivity_of_filters_at_vertex,
+)
+
+
+@unique
+class TraversalOperator(Enum):
+    """The operator a backend uses to reach the vertices at some location of a query."""
+
+    # Read the vertices at the root of the query.
+    Scan = auto()
+
+    # Follow a mandatory edge.
+    Expand = auto()
+
+    # Follow an @optional edge, keeping the rows without such an edge.
+    OptionalExpand = auto()
+
+    # Follow an edge within a @fold, aggregating the vertices reached for each row.
+    Fold = auto()
+
+    # Follow an edge repeatedly, up to the depth of a @recurse.
+    Recurse = auto()
+
+
+@dataclass(frozen=True)
+class ExecutionCostModel:
+    """The costs of the operators of a backend, and the way it executes directives.
+
+    The costs are relative to the cost of reading a vertex at the root of the query, and can be
+    calibrated for a particular database by replacing them, e.g. with dataclasses.replace.
+    """
+
+    # The name of the language the backend executes, as in Backend.language.
+    language: str
+
+    # The cost of reading one vertex at the root of the query.
+    scan_row_cost: float = 1.0
+
+    # The cost of reading one edge and the vertex it leads to, for mandatory and @optional edges.
+    traversal_row_cost: float = 1.0
+
+    # The cost of reading one edge and the vertex it leads to at any level of a @recurse.
+    recursion_row_cost: float = 1.0
+
+    # The cost of reading one edge and the vertex it leads to within a @fold, and aggregating it.
+    fold_row_cost: float = 1.0
+
+    # The cost of producing one row of an intermediate result, e.g. of a join.
+    intermediate_row_cost: float = 1.0
+
+    # Whether @recurse produces a vertex once for every path that reaches it, rather than once.
+    recursion_enumerates_paths: bool = False
+
+    # Whether a @fold aggregates the folded vertices of every vertex of the type preceding it,
+    # rather than only those of the vertices in the intermediate result.
+    fold_aggregates_all_vertices: bool = False
+
+    # Whether @optional traversals that expand vertex fields split the query into one query per
+    # subset of them that is followed, each of which repeats the traversals outside of them.
+    optional_traversals_split_query: bool = False
+
+
+# SQL joins each traversed table, and wraps @recurse into a recursive CTE producing a row for each
+# path of the recursion, unless SQLAlchemySchemaInfo.deduplicate_recursive_traversals is set. The
+# base of the CTE is restricted to the primary keys of the rows preceding the @recurse.
+SQL_EXECUTION_COST_MODEL = ExecutionCostModel(
+    language="SQL", recursion_enumerates_paths=True, fold_aggregates_all_vertices=True
+)
+
+# MATCH follows the edges of each vertex, and compiles @optional traversals into compound queries.
+MATCH_EXECUTION_COST_MODEL = ExecutionCostModel(
+    language="MATCH", optional_traversals_split_query=True
+)
+
+# Cypher expands the edges of each vertex, and matches @recurse with variable-length patterns,
+# producing a row for each path of the recursion.
+CYPHER_EXECUTION_COST_MODEL = ExecutionCostModel(language="Cypher", recursion_enumerates_paths=True)
+
+# Gremlin follows the edges of each vertex, and copies the pipeline for each level of @recurse,
+# producing a row for each path of the recursion.
+GREMLIN_EXECUTION_COST_MODEL = ExecutionCostModel(
+    language="Gremlin", recursion_enumerates_paths=True
+)
+
+
+@dataclass(frozen=True)
+class TraversalCostEstimate:
+    """The estimated cost of reaching the vertices at some location of a query."""
+
+    # The location whose vertices are reached.
+    vertex_path: VertexPath
+
+    # The operator used to reach them.
+    operator: TraversalOperator
+
+    # The estimated number of rows of the intermediate result the traversal starts from.
+    input_row_count: float
+
+    # The estimated number of edges followed or vertices scanned by each execution of the
+    # traversal, before the filters at the location are applied.
+    rows_read: float
+
+    # The estimated number of rows produced by each execution of the traversal. Within a @fold,
+    # these are the rows aggregated into the values of the folded outputs.
+    output_row_count: float
+
+    # The number of times the traversal is executed, e.g. once per query of a compound query.
+    execution_count: int
+
+    # The estimated cost of all executions of the traversal.
+    cost: float
+
+
+@dataclass(frozen=True)
+class ExecutionCostEstimate:
+    """The estimated cost of executing a query, with the cost of each of its traversals."""
+
+    # The estimated cost of the query, the sum of the costs of its traversals.
+    cost: float
+
+    # The estimated costs of the traversals of the query, in the order they are executed.
+    traversal_costs: Tuple[TraversalCostEstimate, ...]
+
+
+def _get_class_count(
+    schema_info: QueryPlanningSchemaInfo, class_name: str, default: float
+) -> float:
+    """Return the number of instances of the class, or the default if the statistics lack it."""
+    class_count = schema_info.statistics.get_class_count(class_name)
+    if class_count is None:
+        return default
+    return float(class_count)
+
+
+def _get_compound_query_execution_counts(
+    ir_and_metadata: IrAndMetadata,
+) -> Tuple[int, Dict[BaseLocation, int]]:
+    """Count the queries of the compound query that traverse to each location within @optional.
+
+    Args:
+        ir_and_metadata: internal representation and metadata of the query
+
+    Returns:
+        tuple (query_count, execution_counts):
+        query_count: the number of queries the @optional traversals split the query into
+        execution_counts: dict mapping each location within @optional to the number of queries
+                          that traverse to it
+    """
+    complex_optional_roots, location_to_optional_roots = extract_optional_location_root_info(
+        ir_and_metadata.ir_blocks
+    )
+    tree = construct_optional_traversal_tree(
+        complex_optional_roots,
+        {location: list(roots) for location, roots in location_to_optional_roots.items()},
+    )
+    followed_optional_root_subsets: List[Set[Location]] = [
+        set(subset) for subset in tree.get_all_rooted_subtrees_as_lists()
+    ]
+
+    # Each query omits the traversals within the complex @optional scopes it does not follow.
+    # Simple @optional traversals are followed by every query.
+    complex_optional_root_set = set(complex_optional_roots)
+    execution_counts: Dict[BaseLocation, int] = {}
+    for location, optional_roots in location_to_optional_roots.items():
+        complex_optional_roots_of_location = complex_optional_root_set.intersection(optional_roots)
+        execution_counts[location] = sum(
+            1
+            for followed_optional_roots in followed_optional_root_subsets
+            if complex_optional_roots_of_location <= followed_optional_roots
+        )
+    return len(followed_optional_root_subsets), execution_counts
+
+
+def estimate_query_execution_cost(
+    schema_info: QueryPlanningSchemaInfo,
+    ir_and_metadata: IrAndMetadata,
+    parameters: Dict[str, Any],
+    execution_cost_model: ExecutionCostModel,
+) -> ExecutionCostEstimate:
+    """Estimate the cost of executing a query on the backend described by the cost model.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        ir_and_metadata: internal representation and metadata of the query
+        parameters: parameters with which the query will be executed
+        execution_cost_model: the costs of the operators of the backend executing the query
+
+    Returns:
+        ExecutionCostEstimate, the estimated cost of the query and each of its traversals
+    """
+    query_metadata = ir_and_metadata.query_metadata_table
+
+    query_count = 1
+    execution_counts: Dict[BaseLocation, int] = {}
+    if execution_cost_model.optional_traversals_split_query:
+        query_count, execution_counts = _get_compound_query_execution_counts(ir_and_metadata)
+
+    # The root vertices passing the filters at the root are read first.
+    root_location = query_metadata.root_location
+    root_name = query_metadata.get_location_info(root_location).type.name
+    root_selectivity = get_selectivity_of_filters_at_vertex(
+        schema_info, query_metadata.get_filter_infos(root_location), parameters, root_name
+    )
+    # Without the count of the root class, only filters with an absolute selectivity, e.g. on a
+    # uniquely indexed field, tell how many root vertices are read.
+    row_count = adjust_counts_with_selectivity(
+        _get_class_count(schema_info, root_name, 0.0), root_selectivity
+    )
+    traversal_costs = [
+        TraversalCostEstimate(
+            vertex_path=get_vertex_path(root_location),
+            operator=TraversalOperator.Scan,
+            input_row_count=0.0,
+            rows_read=row_count,
+            output_row_count=row_count,
+            execution_count=query_count,
+            cost=query_count
+            * row_count
+            * (execution_cost_model.scan_row_cost + execution_cost_model.intermediate_row_cost),
+        )
+    ]
+
+    # Each traversal reads the edges of every row of the intermediate result so far, except for
+    # traversals within @fold, which read the edges of the rows aggregated within the fold. Models
+    # folding every vertex of the parent's type fall back to the rows of the intermediate result
+    # when the statistics lack its count.
+    fold_row_counts: Dict[BaseLocation, float] = {}
+    for location, location_info in query_metadata.registered_locations:
+        parent_location = location_info.parent_location
+        if parent_location is None:
+            continue
+        if isinstance(location, Location):
+            if query_metadata.get_revisit_origin(location) != location:
+                continue
+        if isinstance(parent_location, Location):
+            parent_location = query_metadata.get_revisit_origin(parent_location)
+        parent_location_info = query_metadata.get_location_info(parent_location)
+        parent_name = parent_location_info.type.name
+        child_name = location_info.type.name
+
+        children_per_parent = estimate_children_per_parent_ignoring_filters(
+            schema_info,
+            query_metadata,
+            parent_location,
+            location,
+            count_recursion_paths=execution_cost_model.recursion_enumerates_paths,
+        ).value
+        selectivity = get_selectivity_of_filters_at_vertex(
+            schema_info, query_metadata.get_filter_infos(location), parameters, child_name
+        )
+
+        if isinstance(location, FoldScopeLocation):
+            operator = TraversalOperator.Fold
+            row_cost = execution_cost_model.fold_row_cost
+            if isinstance(parent_location, FoldScopeLocation):
+                input_row_count = fold_row_counts[parent_location]
+                rows_to_expand = input_row_count
+            else:
+                input_row_count = row_count
+                rows_to_expand = input_row_count
+                if execution_cost_model.fold_aggregates_all_vertices:
+                    rows_to_expand = _get_class_count(schema_info, parent_name, input_row_count)
+            rows_read = rows_to_expand * children_per_parent
+            output_row_count = adjust_counts_with_selectivity(rows_read, selectivity)
+            fold_row_counts[location] = output_row_count
+            execution_count = execution_counts.get(location.base_location, query_count)
+        else:
+            input_row_count = row_count
+            if location_info.recursive_scopes_depth > parent_location_info.recursive_scopes_depth:
+                operator = TraversalOperator.Recurse
+                row_cost = execution_cost_model.recursion_row_cost
+            elif location_info.optional_scopes_depth > parent_location_info.optional_scopes_depth:
+                operator = TraversalOperator.OptionalExpand
+                row_cost = execution_cost_model.traversal_row_cost
+            else:
+                operator = TraversalOperator.Expand
+                row_cost = execution_cost_model.traversal_row_cost
+            rows_read = input_row_count * children_per_parent
+            output_row_count = adjust_counts_with_selectivity(rows_read, selectivity)
+            # Within @optional scopes, rows without the edge are kept.
+            if location_info.optional_scopes_depth > 0:
+                output_row_count = max(output_row_count, input_row_count)
+            row_count = output_row_count
+            execution_count = execution_counts.get(location, query_count)
+
+        traversal_costs.append(
+            TraversalCostEstimate(
+                vertex_path=get_vertex_path(location),
+                operator=operator,
+                input_row_count=input_row_count,
+                rows_read=rows_read,
+                output_row_count=output_row_count,
+                execution_count=execution_count,
+                cost=execution_count
+                * (
+                    rows_read * row_cost
+                    + output_row_count * execution_cost_model.intermediate_row_cost
+                ),
+            )
+        )
+
+    return ExecutionCostEstimate(
+        cost=sum(traversal_cost.cost for traversal_cost in traversal_costs),
+        traversal_costs=tuple(traversal_costs),
+    )
@@ -3,8 +3,9 @@ from __future__ import division
 
 import bisect
 from collections import namedtuple
+import itertools
 import sys
-from typing import Any, Dict, Iterable, List, Optional, Set
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 import six
 
@@ -15,15 +16,24 @@ from ..compiler.helpers import (
 )
 from ..compiler.metadata import FilterInfo
 from ..schema.schema_info import QueryPlanningSchemaInfo
-from .helpers import is_uuid4_type
+from .helpers import is_float_field_type, is_nan_value, is_uuid4_type
 from .int_value_conversion import (
+    MAX_FLOAT_INT,
     MAX_UUID_INT,
+    MIN_FLOAT_INT,
     MIN_UUID_INT,
     convert_field_value_to_int,
     convert_int_to_field_value,
+    field_supports_int_conversion,
     field_supports_range_reasoning,
 )
-from .interval import Interval, IntervalDomain, intersect_int_intervals, measure_int_interval
+from .interval import (
+    Interval,
+    IntervalDomain,
+    intersect_int_intervals,
+    intersect_intervals,
+    measure_int_interval,
+)
 
 
 # The Selectivity represents the selectivity of a filter or a set of filters
@@ -36,11 +46,26 @@ Selectivity = namedtuple(
     ),
 )
 
+# The SelectivityBounds bound the actual selectivity of a filter or a set of filters. Both bounds
+# have the same kind as the estimated Selectivity of the filters, so they can be combined and
+# applied to result counts the same way as the estimate.
+SelectivityBounds = namedtuple(
+    "SelectivityBounds",
+    (
+        "lower_bound",  # Selectivity, at most as selective as the estimate
+        "upper_bound",  # Selectivity, at least as selective as the estimate
+    ),
+)
+
 ABSOLUTE_SELECTIVITY = "absolute"
 FRACTIONAL_SELECTIVITY = "fractional"
 
 INEQUALITY_OPERATORS = frozenset(["<", "<=", ">", ">=", "between"])
 
+# The maximum number of combinations of values of correlated fields whose joint value counts are
+# looked up when estimating the selectivity of equality filters on the fields.
+_MAX_JOINT_VALUE_COMBINATIONS = 10000
+
 
 def _is_absolute(selectivity):
     """Return True if selectivity has kind absolute."""
@@ -60,6 +85,69 @@ def _has_any_absolute(selectivities):
     return False
 
 
+def _get_exact_selectivity_bounds(selectivity):
+    """Return the SelectivityBounds of a selectivity that is known exactly."""
+    return SelectivityBounds(lower_bound=selectivity, upper_bound=selectivity)
+
+
+def _get_unknown_selectivity_bounds():
+    """Return the SelectivityBounds of filters whose selectivity is not estimated."""
+    return SelectivityBounds(
+        lower_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=0.0),
+        upper_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0),
+    )
+
+
+def _get_trivial_absolute_selectivity_bounds(schema_info, location_name, selectivity):
+    """Return the SelectivityBounds of an absolute selectivity, knowing only the class count.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: type name of the location being filtered
+        selectivity: Selectivity object with kind absolute, the estimated selectivity
+
+    Returns:
+        SelectivityBounds object, allowing anything between no results and all vertices of the
+        location's type to pass the filters.
+    """
+    class_count = schema_info.statistics.get_class_count(location_name)
+    upper_bound_value = float("inf") if class_count is None else class_count
+    return SelectivityBounds(
+        lower_bound=Selectivity(kind=ABSOLUTE_SELECTIVITY, value=0.0),
+        upper_bound=Selectivity(
+            kind=ABSOLUTE_SELECTIVITY, value=max(selectivity.value, upper_bound_value)
+        ),
+    )
+
+
+def _get_upper_bound_of_equality_selectivity_fraction(
+    schema_info, location_name, selectivity_fraction, num_entries, distinct_values_count
+):
+    """Return the largest fraction of vertices whose values can equal one of a few given values.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: type name of the location being filtered
+        selectivity_fraction: float, the estimated fraction of vertices with one of the values
+        num_entries: int, the number of values
+        distinct_values_count: int, the number of distinct values across all vertices
+
+    Returns:
+        float, upper bound on the fraction of vertices with one of the values, at least
+        selectivity_fraction.
+    """
+    # Every other distinct value appears at least once, so the given values appear at most
+    # (# of vertices) - (# of other distinct values) times.
+    class_count = schema_info.statistics.get_class_count(location_name)
+    if not class_count:
+        return 1.0
+    # False-positive bug in pylint: https://github.com/PyCQA/pylint/issues/3039
+    # pylint: disable=old-division
+    upper_bound_fraction = float(class_count - distinct_values_count + num_entries) / class_count
+    # pylint: enable=old-division
+    return max(selectivity_fraction, min(1.0, upper_bound_fraction))
+
+
 # TODO(bojanserafimov): The class name should be checked against the class name of the index.
 # TODO(bojanserafimov): This is not correct for len(filter_fields) > 1.
 def _are_filter_fields_uniquely_indexed(filter_fields, unique_indexes):
@@ -167,12 +255,41 @@ def _get_query_interval_of_integer_inequality_filter(
     return query_interval
 
 
+def _get_query_interval_of_inequality_filter_on_values(
+    parameter_values: List[Any], filter_operator: str
+) -> Interval[Any]:
+    """Return interval of values passing through a given inequality filter, up to its endpoints.
+
+    Values of types that can't be represented as ints, like strings, have no successor or
+    predecessor value, so strict inequalities are treated as non-strict ones: the endpoints of the
+    returned interval are included in it even if the filter excludes them.
+
+    Args:
+        parameter_values: the parameters for the inequality filter.
+        filter_operator: the inequality filter operation being performed.
+
+    Returns:
+        interval of values that pass through the filter, together with its endpoints.
+    """
+    if filter_operator in (">", ">=") and len(parameter_values) == 1:
+        return Interval[Any](parameter_values[0], None)
+    elif filter_operator in ("<", "<=") and len(parameter_values) == 1:
+        return Interval[Any](None, parameter_values[0])
+    elif filter_operator == "between" and len(parameter_values) == 2:
+        return Interval[Any](parameter_values[0], parameter_values[1])
+    else:
+        raise AssertionError(
+            "Cost estimator found unsupported inequality operator {} with parameter "
+            "values {}.".format(filter_operator, parameter_values)
+        )
+
+
 def _estimate_filter_selectivity_of_in_collection(
     schema_info: QueryPlanningSchemaInfo,
     location_name: str,
     filter_field: str,
-    collection: Optional[Set[Any]],
-) -> Selectivity:
+    collection: Optional[Collection[Any]],
+) -> Tuple[Selectivity, SelectivityBounds]:
     """Calculate the selectivity of in_collection filter.
 
     Args:
@@ -183,24 +300,33 @@ def _estimate_filter_selectivity_of_in_collection(
                     is not known at compile time.
 
     Returns:
-        Selectivity object, the selectivity of an specific equality filter at a given location.
+        tuple (Selectivity, SelectivityBounds), the selectivity of an specific equality filter at
+        a given location, and the bounds on it.
     """
     # If the field is uniquely indexed, value count statistics are unnecessary
     unique_indexes = schema_info.schema_graph.get_unique_indexes_for_class(location_name)
     if _are_filter_fields_uniquely_indexed((filter_field,), unique_indexes):
         # TODO(evan): don't return a higher absolute selectivity than class counts.
         num_entries = 1 if collection is None else len(collection)
-        return Selectivity(kind=ABSOLUTE_SELECTIVITY, value=num_entries)
+        selectivity = Selectivity(kind=ABSOLUTE_SELECTIVITY, value=num_entries)
+        # Each value matches at most one vertex, but it need not match any.
+        return (
+            selectivity,
+            SelectivityBounds(
+                lower_bound=Selectivity(kind=ABSOLUTE_SELECTIVITY, value=0.0),
+                upper_bound=selectivity,
+            ),
+        )
 
     # Get all relevant statistics
     collection_value_counts = None
+    collection_value_count_bounds = None
     if collection is not None:
-        collection_value_counts = [
-            schema_info.statistics.get_value_count(location_name, filter_field, collection_value)
-            for collection_value in collection
-        ]
-        if any(count is None for count in collection_value_counts):
-            collection_value_counts = None
+        value_counts_with_bounds = schema_info.statistics.get_value_counts_with_bounds(
+            location_name, filter_field, collection
+        )
+        if value_counts_with_bounds is not None:
+            collection_value_counts, collection_value_count_bounds = value_counts_with_bounds
     distinct_field_values_count = schema_info.statistics.get_distinct_field_values_count(
         location_name, filter_field
     )
@@ -211,16 +337,127 @@ def _estimate_filter_selectivity_of_in_collection(
         #                       that this is not one of the common values, we use the rule of 3
         #                       (see statistics.get_value_count). The distinct_value_count stats
         #                       could provide additional precision if available.
-        return Selectivity(kind=ABSOLUTE_SELECTIVITY, value=sum(collection_value_counts))
+        selectivity = Selectivity(kind=ABSOLUTE_SELECTIVITY, value=sum(collection_value_counts))
+        if collection_value_count_bounds is None:
+            return (
+                selectivity,
+                _get_trivial_absolute_selectivity_bounds(schema_info, location_name, selectivity),
+            )
+        return (
+            selectivity,
+            SelectivityBounds(
+                lower_bound=Selectivity(
+                    kind=ABSOLUTE_SELECTIVITY,
+                    value=sum(lower_bound for lower_bound, _ in collection_value_count_bounds),
+                ),
+                upper_bound=Selectivity(
+                    kind=ABSOLUTE_SELECTIVITY,
+                    value=sum(upper_bound for _, upper_bound in collection_value_count_bounds),
+                ),
+            ),
+        )
     elif distinct_field_values_count is not None:
         # Assumption: all distinct field values are distributed evenly among vertex instances,
         # so each distinct value occurs
         # (# of current location vertex instances) / (# of distinct field values) times.
         num_entries = 1 if collection is None else len(collection)
         selectivity_fraction = min(1.0, float(num_entries) / distinct_field_values_count)
-        return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=selectivity_fraction)
+        # Without the assumption, the values may not appear at all, or may be the most common ones.
+        upper_bound_fraction = _get_upper_bound_of_equality_selectivity_fraction(
+            schema_info,
+            location_name,
+            selectivity_fraction,
+            num_entries,
+            distinct_field_values_count,
+        )
+        return (
+            Selectivity(kind=FRACTIONAL_SELECTIVITY, value=selectivity_fraction),
+            SelectivityBounds(
+                lower_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=0.0),
+                upper_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=upper_bound_fraction),
+            ),
+        )
     else:
-        return Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
+        return (
+            Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0),
+            _get_unknown_selectivity_bounds(),
+        )
+
+
+def _estimate_joint_filter_selectivity_of_in_collections(
+    schema_info: QueryPlanningSchemaInfo,
+    location_name: str,
+    filter_fields: Tuple[str, ...],
+    collections: Sequence[Sequence[Any]],
+    individual_selectivities: Sequence[Selectivity],
+    individual_selectivity_bounds: Sequence[SelectivityBounds],
+) -> Optional[Tuple[Selectivity, SelectivityBounds]]:
+    """Calculate the selectivity of in_collection filters on a group of correlated fields.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        location_name: type name of the location being filtered
+        filter_fields: sorted names of at least two fields affected by the filters
+        collections: the values each of the filters allows, in the same order as filter_fields
+        individual_selectivities: the selectivity of each of the filters, estimated as if the
+                                  fields were independent
+        individual_selectivity_bounds: the bounds on the selectivity of each of the filters
+
+    Returns:
+        tuple (Selectivity, SelectivityBounds), the combined selectivity of the filters and the
+        bounds on it, or None if there are no joint statistics for the group of fields.
+    """
+    statistics = schema_info.statistics
+
+    combination_count = 1
+    for collection in collections:
+        combination_count *= len(collection)
+    if combination_count <= _MAX_JOINT_VALUE_COMBINATIONS:
+        joint_value_counts = statistics.get_joint_value_counts(
+            location_name, filter_fields, list(itertools.product(*collections))
+        )
+        if joint_value_counts is not None:
+            selectivity = Selectivity(kind=ABSOLUTE_SELECTIVITY, value=sum(joint_value_counts))
+            return (
+                selectivity,
+                _get_trivial_absolute_selectivity_bounds(schema_info, location_name, selectivity),
+            )
+
+    # Absolute selectivities are never improved by combining them with fractional ones.
+    if _has_any_absolute(individual_selectivities):
+        return None
+    joint_distinct_field_values_count = statistics.get_joint_distinct_field_values_count(
+        location_name, filter_fields
+    )
+    if joint_distinct_field_values_count is None:
+        return None
+
+    # Assumption: all distinct combinations of field values are distributed evenly among vertex
+    # instances. The filters can't be more selective than the most selective of them on its own.
+    selectivity_fraction = min(
+        [1.0, float(combination_count) / joint_distinct_field_values_count]
+        + [selectivity.value for selectivity in individual_selectivities]
+    )
+    # Likewise, the filters can't pass more vertices than any of them passes on its own.
+    upper_bound_fraction = min(
+        [
+            _get_upper_bound_of_equality_selectivity_fraction(
+                schema_info,
+                location_name,
+                selectivity_fraction,
+                combination_count,
+                joint_distinct_field_values_count,
+            )
+        ]
+        + [bounds.upper_bound.value for bounds in individual_selectivity_bounds]
+    )
+    return (
+        Selectivity(kind=FRACTIONAL_SELECTIVITY, value=selectivity_fraction),
+        SelectivityBounds(
+            lower_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=0.0),
+            upper_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=upper_bound_fraction),
+        ),
+    )
 
 
 def _combine_filter_selectivities(selectivities):
@@ -251,6 +488,27 @@ def _combine_filter_selectivities(selectivities):
     return Selectivity(kind=combined_selectivity_kind, value=combined_selectivity_value)
 
 
+def _combine_filter_selectivity_bounds(selectivity_bounds):
+    """Calculate the bounds on the combined selectivity given the bounds on a set of selectivities.
+
+    Args:
+        selectivity_bounds: list of SelectivityBounds, generated from a set of filters on a
+                            location.
+
+    Returns:
+        SelectivityBounds object, the bounds on the combined selectivity. Since the bounds have the
+        same kinds as the selectivities, they are combined the same way as the selectivities.
+    """
+    return SelectivityBounds(
+        lower_bound=_combine_filter_selectivities(
+            [bounds.lower_bound for bounds in selectivity_bounds]
+        ),
+        upper_bound=_combine_filter_selectivities(
+            [bounds.upper_bound for bounds in selectivity_bounds]
+        ),
+    )
+
+
 def _get_selectivity_fraction_of_interval(
     interval: Interval[IntervalDomain], quantiles: List[IntervalDomain]
 ) -> float:
@@ -283,11 +541,12 @@ def _get_selectivity_fraction_of_interval(
     # maximum observed values from the quantile list.
     proper_quantiles = quantiles[1:-1]
     domain_interval_size = float(len(proper_quantiles) + 1)
-    if interval.lower_bound is None and interval.upper_bound is None:
-        interval_size = domain_interval_size
-    elif interval.lower_bound is None:
-        upper_bound_quantile = bisect.bisect_left(proper_quantiles, interval.upper_bound)
-        interval_size = 0.5 + float(upper_bound_quantile)
+    if interval.lower_bound is None:
+        if interval.upper_bound is None:
+            interval_size = domain_interval_size
+        else:
+            upper_bound_quantile = bisect.bisect_left(proper_quantiles, interval.upper_bound)
+            interval_size = 0.5 + float(upper_bound_quantile)
     elif interval.upper_bound is None:
         lower_bound_quantile = bisect.bisect_left(proper_quantiles, interval.lower_bound)
         interval_size = 0.5 + float(len(proper_quantiles) - lower_bound_quantile)
@@ -303,6 +562,52 @@ def _get_selectivity_fraction_of_interval(
     return float(interval_size) / domain_interval_size
 
 
+def _get_selectivity_fraction_bounds_of_interval(
+    interval: Interval[IntervalDomain], quantiles: List[IntervalDomain]
+) -> Tuple[float, float]:
+    """Get bounds on the fraction of values contained in an interval.
+
+    Like _get_selectivity_fraction_of_interval, we only consider the quantile the interval
+    endpoint values are in. The values inside that quantile may be anywhere relative to the
+    endpoint, so each endpoint contributes up to the size of one quantile of uncertainty.
+
+    Args:
+        interval: Interval[T] defining the range of values
+        quantiles: a sorted list of N values of type T separating the values of the field
+                   into N-1 groups of almost equal size, see _get_selectivity_fraction_of_interval.
+
+    Returns:
+        tuple (lower bound, upper bound) on the fraction of the values contained in the interval.
+    """
+    if interval.is_empty():
+        return 0.0, 0.0
+
+    if len(quantiles) < 2:
+        raise AssertionError("Need at least 2 quantiles: {}".format(len(quantiles)))
+    proper_quantiles = quantiles[1:-1]
+    domain_interval_size = float(len(proper_quantiles) + 1)
+    if interval.lower_bound is None:
+        if interval.upper_bound is None:
+            lower_bound_size = upper_bound_size = domain_interval_size
+        else:
+            upper_bound_quantile = bisect.bisect_left(proper_quantiles, interval.upper_bound)
+            lower_bound_size = float(upper_bound_quantile)
+            upper_bound_size = lower_bound_size + 1.0
+    elif interval.upper_bound is None:
+        lower_bound_quantile = bisect.bisect_left(proper_quantiles, interval.lower_bound)
+        lower_bound_size = float(len(proper_quantiles) - lower_bound_quantile)
+        upper_bound_size = lower_bound_size + 1.0
+    else:
+        lower_bound_quantile = bisect.bisect_left(proper_quantiles, interval.lower_bound)
+        upper_bound_quantile = bisect.bisect_left(proper_quantiles, interval.upper_bound)
+        lower_bound_size = float(max(0, upper_bound_quantile - lower_bound_quantile - 1))
+        upper_bound_size = float(upper_bound_quantile - lower_bound_quantile + 1)
+    return (
+        lower_bound_size / domain_interval_size,
+        min(1.0, upper_bound_size / domain_interval_size),
+    )
+
+
 def filter_uses_only_runtime_parameters(filter_info: FilterInfo) -> bool:
     """Return whether the filter uses only runtime parameters."""
     for filter_argument in filter_info.args:
@@ -325,15 +630,19 @@ def get_integer_interval_for_filters_on_field(
             if not filter_uses_only_runtime_parameters(filter_info):
                 continue  # We can't reason about tagged parameters in inequality filters
 
-            parameter_values = [
-                convert_field_value_to_int(
-                    schema_info,
-                    location_name,
-                    field_name,
-                    parameters[get_parameter_name(filter_argument)],
-                )
+            argument_values = [
+                parameters[get_parameter_name(filter_argument)]
                 for filter_argument in filter_info.args
             ]
+            if any(is_nan_value(value) for value in argument_values):
+                # Backends disagree on how NaN compares to other values, so comparing to it
+                # gives no information about the range of values passing the filter.
+                continue
+
+            parameter_values = [
+                convert_field_value_to_int(schema_info, location_name, field_name, value)
+                for value in argument_values
+            ]
 
             filter_interval = _get_query_interval_of_integer_inequality_filter(
                 parameter_values, filter_info.op_name
@@ -342,13 +651,86 @@ def get_integer_interval_for_filters_on_field(
     return interval
 
 
-def get_selectivity_of_filters_at_vertex(
+def get_field_value_interval_for_filters_on_field(
+    schema_info: QueryPlanningSchemaInfo,
+    filters_on_field: Set[FilterInfo],
+    location_name: str,
+    field_name: str,
+    parameters: Dict[str, Any],
+) -> Interval[Any]:
+    """Get the interval of possible values on this field, constrained by its inequality filters.
+
+    For fields whose values can be represented as ints (see field_supports_int_conversion), the
+    interval is computed exactly in the integer domain. Values of other fields supporting range
+    reasoning, like strings and Decimals, are compared directly, and the endpoints of strict
+    inequality filters are included in the interval.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        filters_on_field: filters on the field
+        location_name: type name of the location being filtered
+        field_name: name of the filtered field
+        parameters: parameters with which query will be executed
+
+    Returns:
+        Interval of values of the field's type that pass through the filters
+    """
+    if field_supports_int_conversion(schema_info, location_name, field_name):
+        interval = get_integer_interval_for_filters_on_field(
+            schema_info, filters_on_field, location_name, field_name, parameters
+        )
+        if is_float_field_type(schema_info, location_name, field_name):
+            # The filters "> inf" and "< -inf" produce bounds just outside of the range of int
+            # representations of floats, so we clamp them to the nearest float.
+            lower_bound, upper_bound = interval.lower_bound, interval.upper_bound
+            if lower_bound is not None:
+                lower_bound = min(lower_bound, MAX_FLOAT_INT)
+            if upper_bound is not None:
+                upper_bound = max(upper_bound, MIN_FLOAT_INT)
+            interval = Interval[int](lower_bound, upper_bound)
+
+        lower_bound, upper_bound = None, None
+        if interval.lower_bound is not None:
+            lower_bound = convert_int_to_field_value(
+                schema_info, location_name, field_name, interval.lower_bound
+            )
+        if interval.upper_bound is not None:
+            upper_bound = convert_int_to_field_value(
+                schema_info, location_name, field_name, interval.upper_bound
+            )
+        return Interval(lower_bound, upper_bound)
+
+    value_interval = Interval[Any](None, None)
+    for filter_info in filters_on_field:
+        if filter_info.op_name in INEQUALITY_OPERATORS:
+            if not filter_uses_only_runtime_parameters(filter_info):
+                continue  # We can't reason about tagged parameters in inequality filters
+
+            parameter_values = [
+                parameters[get_parameter_name(filter_argument)]
+                for filter_argument in filter_info.args
+            ]
+            if any(is_nan_value(value) for value in parameter_values):
+                continue  # NaN gives no information, see get_integer_interval_for_filters_on_field
+
+            filter_interval = _get_query_interval_of_inequality_filter_on_values(
+                parameter_values, filter_info.op_name
+            )
+            value_interval = intersect_intervals(value_interval, filter_interval)
+    return value_interval
+
+
+def get_selectivity_and_bounds_of_filters_at_vertex(
     schema_info: QueryPlanningSchemaInfo,
     filter_infos: Iterable[FilterInfo],
     parameters: Dict[str, Any],
     location_name: str,
-) -> Selectivity:
-    """Get the combined selectivity of all filters at the vertex.
+) -> Tuple[Selectivity, SelectivityBounds]:
+    """Get the combined selectivity of all filters at the vertex, and the bounds on it.
+
+    The bounds account for the uncertainty of the statistics the selectivity is estimated from,
+    like sampled value counts and quantiles, and for filters whose selectivity is not estimated
+    at all. Like the selectivity, they assume that filters on different fields are independent.
 
     Args:
         schema_info: QueryPlanningSchemaInfo
@@ -357,34 +739,99 @@ def get_selectivity_of_filters_at_vertex(
         location_name: type name of the location being filtered
 
     Returns:
-        Selectivity object
+        tuple (Selectivity, SelectivityBounds)
     """
     # Group filters by field
     # TODO this is already computed in QueryPlanningAnalysis.single_field_filters
     single_field_filters: Dict[str, Set[FilterInfo]] = {}
+    # The selectivity of filters on multiple fields is not estimated, so it can be anything.
+    selectivity_bounds = []
     for filter_info in filter_infos:
         if len(filter_info.fields) == 0:
             raise AssertionError("Got filter on 0 fields {} {}".format(filter_info, location_name))
         elif len(filter_info.fields) == 1:
             single_field_filters.setdefault(filter_info.fields[0], set()).add(filter_info)
         else:
-            pass  # We don't do anything for multi-field filters yet
+            # We don't do anything for multi-field filters yet
+            selectivity_bounds.append(_get_unknown_selectivity_bounds())
+
+    # Find the values allowed by the equality filters on each field that is not uniquely indexed
+    # and has a single such filter, using a runtime parameter. The selectivity of these filters is
+    # estimated using joint statistics where available, since their fields may be correlated.
+    unique_indexes = schema_info.schema_graph.get_unique_indexes_for_class(location_name)
+    equality_collections: Dict[str, List[Any]] = {}
+    equality_selectivities: Dict[str, Selectivity] = {}
+    equality_selectivity_bounds: Dict[str, SelectivityBounds] = {}
+    for field_name, filters_on_field in six.iteritems(single_field_filters):
+        equality_filters = [
+            filter_info
+            for filter_info in filters_on_field
+            if filter_info.op_name in ("=", "in_collection")
+        ]
+        if len(equality_filters) != 1 or _are_filter_fields_uniquely_indexed(
+            (field_name,), unique_indexes
+        ):
+            continue
+        filter_argument = get_only_element_from_collection(equality_filters[0].args)
+        if not is_runtime_parameter(filter_argument):
+            continue
+        collection = parameters[get_parameter_name(filter_argument)]
+        if equality_filters[0].op_name == "=":
+            collection = [collection]
+        equality_collections[field_name] = list(collection)
+        (
+            equality_selectivities[field_name],
+            equality_selectivity_bounds[field_name],
+        ) = _estimate_filter_selectivity_of_in_collection(
+            schema_info, location_name, field_name, collection
+        )
+
+    # Greedily group the fields, trying the largest groups first
+    joint_selectivities = []
+    fields_with_joint_selectivity: Set[str] = set()
+    ungrouped_field_names = sorted(equality_collections)
+    group_size = len(ungrouped_field_names)
+    while group_size >= 2:
+        for field_group in itertools.combinations(ungrouped_field_names, group_size):
+            joint_selectivity_and_bounds = _estimate_joint_filter_selectivity_of_in_collections(
+                schema_info,
+                location_name,
+                field_group,
+                [equality_collections[field_name] for field_name in field_group],
+                [equality_selectivities[field_name] for field_name in field_group],
+                [equality_selectivity_bounds[field_name] for field_name in field_group],
+            )
+            if joint_selectivity_and_bounds is not None:
+                joint_selectivity, joint_selectivity_bounds = joint_selectivity_and_bounds
+                joint_selectivities.append(joint_selectivity)
+                selectivity_bounds.append(joint_selectivity_bounds)
+                fields_with_joint_selectivity.update(field_group)
+                ungrouped_field_names = [
+                    field_name
+                    for field_name in ungrouped_field_names
+                    if field_name not in fields_with_joint_selectivity
+                ]
+                group_size = min(group_size, len(ungrouped_field_names))
+                break
+        else:
+            group_size -= 1
 
     # Find the selectivity of filters on each field
-    selectivities = []
+    selectivities = list(joint_selectivities)
     for field_name, filters_on_field in six.iteritems(single_field_filters):
         selectivity_at_field = Selectivity(kind=FRACTIONAL_SELECTIVITY, value=1.0)
-        interval = Interval[int](None, None)
+        selectivity_bounds_at_field = _get_exact_selectivity_bounds(selectivity_at_field)
 
         # Process inequality filters
+        has_inequality_filters = any(
+            filter_info.op_name in INEQUALITY_OPERATORS for filter_info in filters_on_field
+        )
         if field_supports_range_reasoning(schema_info, location_name, field_name):
-            interval = get_integer_interval_for_filters_on_field(
-                schema_info, filters_on_field, location_name, field_name, parameters
-            )
+            if is_uuid4_type(schema_info, location_name, field_name):
+                interval = get_integer_interval_for_filters_on_field(
+                    schema_info, filters_on_field, location_name, field_name, parameters
+                )
 
-            if interval is None:
-                selectivity_at_field = Selectivity(kind=ABSOLUTE_SELECTIVITY, value=0.0)
-            elif is_uuid4_type(schema_info, location_name, field_name):
                 # uuid4 fields are uniformly distributed, so we simply divide the fraction of
                 # the domain queried with the size of the domain.
                 domain_interval = Interval[int](MIN_UUID_INT, MAX_UUID_INT)
@@ -404,22 +851,21 @@ def get_selectivity_of_filters_at_vertex(
                 selectivity_at_field = _combine_filter_selectivities(
                     [selectivity_at_field, selectivity]
                 )
+                selectivity_bounds_at_field = _get_exact_selectivity_bounds(selectivity_at_field)
             else:
                 # Get value interval
-                lower_bound, upper_bound = None, None
-                if interval.lower_bound is not None:
-                    lower_bound = convert_int_to_field_value(
-                        schema_info, location_name, field_name, interval.lower_bound
-                    )
-                if interval.upper_bound is not None:
-                    upper_bound = convert_int_to_field_value(
-                        schema_info, location_name, field_name, interval.upper_bound
-                    )
-                value_interval = Interval(lower_bound, upper_bound)
+                value_interval = get_field_value_interval_for_filters_on_field(
+                    schema_info, filters_on_field, location_name, field_name, parameters
+                )
 
                 # Compute selectivity
                 quantiles = schema_info.statistics.get_field_quantiles(location_name, field_name)
-                if quantiles is not None:
+                if value_interval.is_empty():
+                    selectivity_at_field = Selectivity(kind=ABSOLUTE_SELECTIVITY, value=0.0)
+                    selectivity_bounds_at_field = _get_exact_selectivity_bounds(
+                        selectivity_at_field
+                    )
+                elif quantiles is not None:
                     selectivity = Selectivity(
                         kind=FRACTIONAL_SELECTIVITY,
                         value=_get_selectivity_fraction_of_interval(value_interval, quantiles),
@@ -427,32 +873,91 @@ def get_selectivity_of_filters_at_vertex(
                     selectivity_at_field = _combine_filter_selectivities(
                         [selectivity_at_field, selectivity]
                     )
+                    (
+                        lower_bound_fraction,
+                        upper_bound_fraction,
+                    ) = _get_selectivity_fraction_bounds_of_interval(value_interval, quantiles)
+                    selectivity_bounds_at_field = SelectivityBounds(
+                        lower_bound=Selectivity(
+                            kind=FRACTIONAL_SELECTIVITY, value=lower_bound_fraction
+                        ),
+                        upper_bound=Selectivity(
+                            kind=FRACTIONAL_SELECTIVITY, value=upper_bound_fraction
+                        ),
+                    )
+                elif has_inequality_filters:
+                    selectivity_bounds_at_field = _get_unknown_selectivity_bounds()
+        elif has_inequality_filters:
+            selectivity_bounds_at_field = _get_unknown_selectivity_bounds()
 
         # Process in_collection and = filters
         for filter_info in filters_on_field:
             if filter_info.op_name in ("=", "in_collection"):
-                filter_argument = get_only_element_from_collection(filter_info.args)
-                filter_field = get_only_element_from_collection(filter_info.fields)
-                collection = None
-                if is_runtime_parameter(filter_argument):
-                    # TODO(bojanserafimov): Check if the filter values are in the interval selected
-                    #                       by the inequality filters.
-                    collection = parameters[get_parameter_name(filter_argument)]
-                    if filter_info.op_name == "=":
-                        collection = [collection]
-
-                selectivity = _estimate_filter_selectivity_of_in_collection(
-                    schema_info, location_name, filter_field, collection
-                )
+                if field_name in fields_with_joint_selectivity:
+                    # Already accounted for by the selectivity of the group of fields.
+                    continue
+                elif field_name in equality_selectivities:
+                    selectivity = equality_selectivities[field_name]
+                    selectivity_bounds_of_filter = equality_selectivity_bounds[field_name]
+                else:
+                    filter_argument = get_only_element_from_collection(filter_info.args)
+                    filter_field = get_only_element_from_collection(filter_info.fields)
+                    collection = None
+                    if is_runtime_parameter(filter_argument):
+                        # TODO(bojanserafimov): Check if the filter values are in the interval
+                        #                       selected by the inequality filters.
+                        collection = parameters[get_parameter_name(filter_argument)]
+                        if filter_info.op_name == "=":
+                            collection = [collection]
+
+                    (
+                        selectivity,
+                        selectivity_bounds_of_filter,
+                    ) = _estimate_filter_selectivity_of_in_collection(
+                        schema_info, location_name, filter_field, collection
+                    )
                 selectivity_at_field = _combine_filter_selectivities(
                     [selectivity_at_field, selectivity]
                 )
+                selectivity_bounds_at_field = _combine_filter_selectivity_bounds(
+                    [selectivity_bounds_at_field, selectivity_bounds_of_filter]
+                )
+            elif filter_info.op_name not in INEQUALITY_OPERATORS:
+                # The selectivity of other filters is not estimated, so it can be anything.
+                selectivity_bounds_at_field = _combine_filter_selectivity_bounds(
+                    [selectivity_bounds_at_field, _get_unknown_selectivity_bounds()]
+                )
 
         selectivities.append(selectivity_at_field)
+        selectivity_bounds.append(selectivity_bounds_at_field)
 
     # Combine selectivities
     combined_selectivity = _combine_filter_selectivities(selectivities)
-    return combined_selectivity
+    combined_selectivity_bounds = _combine_filter_selectivity_bounds(selectivity_bounds)
+    return combined_selectivity, combined_selectivity_bounds
+
+
+def get_selectivity_of_filters_at_vertex(
+    schema_info: QueryPlanningSchemaInfo,
+    filter_infos: Iterable[FilterInfo],
+    parameters: Dict[str, Any],
+    location_name: str,
+) -> Selectivity:
+    """Get the combined selectivity of all filters at the vertex.
+
+    Args:
+        schema_info: QueryPlanningSchemaInfo
+        filter_infos: filters on the location being filtered
+        parameters: parameters with which query will be executed
+        location_name: type name of the location being filtered
+
+    Returns:
+        Selectivity object
+    """
+    selectivity, _ = get_selectivity_and_bounds_of_filters_at_vertex(
+        schema_info, filter_infos, parameters, location_name
+    )
+    return selectivity
 
 
 def adjust_counts_with_selectivity(result_counts: float, selectivity: Selectivity) -> float:
@@ -1,16 +1,20 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from typing import Union
+import decimal
+import math
+from typing import Any, Union
 
 from graphql import (
+    GraphQLFloat,
     GraphQLInt,
     GraphQLInterfaceType,
     GraphQLList,
     GraphQLObjectType,
     GraphQLScalarType,
+    GraphQLString,
 )
 
 from ..global_utils import is_same_type
-from ..schema import GraphQLDate, GraphQLDateTime
+from ..schema import GraphQLDate, GraphQLDateTime, GraphQLDecimal
 from ..schema.schema_info import QueryPlanningSchemaInfo, UUIDOrdering
 
 
@@ -49,6 +53,33 @@ def is_int_field_type(
     return is_same_type(GraphQLInt, _get_property_field_type(schema_info, vertex_name, field_name))
 
 
+def is_float_field_type(
+    schema_info: QueryPlanningSchemaInfo, vertex_name: str, field_name: str
+) -> bool:
+    """Return whether the field is of type GraphQLFloat."""
+    return is_same_type(
+        GraphQLFloat, _get_property_field_type(schema_info, vertex_name, field_name)
+    )
+
+
+def is_decimal_field_type(
+    schema_info: QueryPlanningSchemaInfo, vertex_name: str, field_name: str
+) -> bool:
+    """Return whether the field is of type GraphQLDecimal."""
+    return is_same_type(
+        GraphQLDecimal, _get_property_field_type(schema_info, vertex_name, field_name)
+    )
+
+
+def is_string_field_type(
+    schema_info: QueryPlanningSchemaInfo, vertex_name: str, field_name: str
+) -> bool:
+    """Return whether the field is of type GraphQLString."""
+    return is_same_type(
+        GraphQLString, _get_property_field_type(schema_info, vertex_name, field_name)
+    )
+
+
 def is_uuid4_type(schema_info: QueryPlanningSchemaInfo, vertex_name: str, field_name: str) -> bool:
     """Return whether the field is a uniformly distributed uuid4 type."""
     return field_name in schema_info.uuid4_field_info.get(vertex_name, {})
@@ -62,3 +93,12 @@ def get_uuid_ordering(
     if ordering is None:
         raise AssertionError(f"{vertex_name}.{field_name} is not a uniform uuid4 field.")
     return ordering
+
+
+def is_nan_value(value: Any) -> bool:
+    """Return whether the value is a float or Decimal NaN, which is not ordered."""
+    if isinstance(value, float):
+        return math.isnan(value)
+    if isinstance(value, decimal.Decimal):
+        return value.is_nan()
+    return False
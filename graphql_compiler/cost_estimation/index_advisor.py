@@ -0,0 +1,254 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Recommend SQL indexes that speed up the queries the compiler emits for a query workload.
+
+The SQL emitted for a query joins each traversed vertex's table on the column specified by the
+edge's DirectJoinDescriptor, and filters each vertex's table on the columns that are filtered
+in the query. Both lookups can avoid a full scan of the table if an index whose leading columns
+are the looked-up columns exists. This module aggregates this column usage over a workload of
+queries, and ranks the indexes that would serve it, skipping the ones already present.
+
+Given a QueryPlanningSchemaInfo with statistics for the same schema, each lookup is weighted by the
+number of rows the cardinality estimator expects to reach the looked-up vertex, so that lookups on
+large tables behind selective traversals or filters are not overrated.
+"""
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine.interfaces import Dialect
+
+from ..compiler.compiler_frontend import graphql_to_ir
+from ..global_utils import QueryStringWithParameters, VertexPath
+from ..schema import is_meta_field
+from ..schema.schema_info import QueryPlanningSchemaInfo, SQLAlchemySchemaInfo
+from .analysis import analyze_query_string, get_filters, get_types
+
+
+# Filter operators whose SQL can be answered by looking up the filtered column in an index:
+# equality lookups, which may be combined across several columns of a multi-column index,
+# and range lookups, which may only use the last column of the index that is looked up.
+_EQUALITY_FILTER_OPERATORS: FrozenSet[str] = frozenset({"=", "in_collection", "is_null"})
+_RANGE_FILTER_OPERATORS: FrozenSet[str] = frozenset(
+    {"<", ">", "<=", ">=", "between", "starts_with"}
+)
+
+
+@dataclass(frozen=True)
+class IndexRecommendation:
+    """An index that would speed up the SQL emitted for some queries of a workload."""
+
+    # The table to index.
+    table: sqlalchemy.Table
+
+    # The names of the indexed columns, in order.
+    column_names: Tuple[str, ...]
+
+    # The sum of the weights of all lookups the index would serve. Each lookup is weighted by
+    # the estimated number of rows reaching the looked-up vertex when statistics are available,
+    # and by 1 otherwise.
+    score: float
+
+    # The number of queries of the workload that would use the index.
+    query_count: int
+
+    def to_sql(self, dialect: Dialect) -> str:
+        """Return the CREATE INDEX statement for the recommended index in the given dialect."""
+        preparer = dialect.identifier_preparer
+        index_name = "ix_{}_{}".format(self.table.name, "_".join(self.column_names))
+        return "CREATE INDEX {} ON {} ({})".format(
+            preparer.quote(index_name),
+            preparer.format_table(self.table),
+            ", ".join(preparer.quote(column_name) for column_name in self.column_names),
+        )
+
+
+def _get_indexed_column_name_prefixes(table: sqlalchemy.Table) -> Set[Tuple[str, ...]]:
+    """Return all column name prefixes of the table's primary key and existing indexes."""
+    indexed_column_name_lists = [[column.name for column in table.primary_key.columns]]
+    indexed_column_name_lists.extend(
+        [column.name for column in index.columns] for index in table.indexes
+    )
+    return {
+        tuple(column_names[:prefix_length])
+        for column_names in indexed_column_name_lists
+        for prefix_length in range(1, len(column_names) + 1)
+    }
+
+
+def _get_join_column_name(
+    sql_schema_info: SQLAlchemySchemaInfo, parent_type_name: str, vertex_field_name: str
+) -> Optional[str]:
+    """Return the column of the destination table the traversal of the vertex field joins on."""
+    join_descriptor = sql_schema_info.join_descriptors.get(parent_type_name, {}).get(
+        vertex_field_name
+    )
+    if join_descriptor is None:
+        return None
+    return join_descriptor.to_column
+
+
+def _get_lookup_weights(
+    query_planning_schema_info: QueryPlanningSchemaInfo, query: QueryStringWithParameters
+) -> Dict[VertexPath, float]:
+    """Return the estimated number of rows reaching each vertex of the query, before its filters.
+
+    All rows of the root vertex's table reach it. The rows reaching every other vertex are the
+    ones the SQL backend reads when traversing to it, as estimated with the cardinality estimator
+    for the execution cost of the query. A vertex reached from few rows is looked up few times,
+    however large its table.
+
+    Args:
+        query_planning_schema_info: QueryPlanningSchemaInfo with statistics for the schema
+        query: GraphQL query string and the parameters it is executed with
+
+    Returns:
+        dict mapping each vertex of the query to its estimated number of rows, or an empty dict if
+        the statistics needed to estimate them are missing
+    """
+    query_analysis = analyze_query_string(query_planning_schema_info, query)
+    if query_analysis.classes_with_missing_counts:
+        return {}
+    lookup_weights = {
+        traversal_cost.vertex_path: traversal_cost.rows_read
+        for traversal_cost in query_analysis.execution_cost_estimate.traversal_costs
+    }
+    root_location = query_analysis.metadata_table.root_location
+    root_class_count = query_planning_schema_info.statistics.get_class_count(
+        query_analysis.metadata_table.get_location_info(root_location).type.name
+    )
+    lookup_weights[root_location.query_path] = float(root_class_count)
+    return lookup_weights
+
+
+def _get_candidate_index_column_names(
+    sql_schema_info: SQLAlchemySchemaInfo, query: str
+) -> List[Tuple[str, VertexPath, Tuple[str, ...]]]:
+    """Return the vertex type name and candidate index columns for each vertex of the query.
+
+    The candidate index at each vertex starts with the column the vertex's table is joined on,
+    followed by the columns filtered with equality, and at most one column filtered by range,
+    which is the column order in which a single index lookup can serve all of them.
+
+    Args:
+        sql_schema_info: SQLAlchemySchemaInfo used to compile the query
+        query: GraphQL query string
+
+    Returns:
+        list of (vertex type name, vertex path, tuple of column names) for each vertex of the
+        query whose table lookup could be served by an index
+    """
+    ir_and_metadata = graphql_to_ir(
+        sql_schema_info.schema, query, type_equivalence_hints=sql_schema_info.type_equivalence_hints
+    )
+    query_metadata = ir_and_metadata.query_metadata_table
+    types = get_types(query_metadata)
+    filters = get_filters(query_metadata)
+
+    candidates = []
+    for vertex_path, vertex_type in sorted(types.items()):
+        table = sql_schema_info.vertex_name_to_table[vertex_type.name]
+        column_names: List[str] = []
+        if len(vertex_path) > 1:
+            parent_path: VertexPath = vertex_path[:-1]
+            join_column_name = _get_join_column_name(
+                sql_schema_info, types[parent_path].name, vertex_path[-1]
+            )
+            if join_column_name is not None:
+                column_names.append(join_column_name)
+
+        equality_column_names: Set[str] = set()
+        range_column_names: Set[str] = set()
+        for filter_info in filters.get(vertex_path, set()):
+            if len(filter_info.fields) != 1:
+                continue
+            field_name = filter_info.fields[0]
+            if is_meta_field(field_name) or field_name not in table.c:
+                continue
+            if filter_info.op_name in _EQUALITY_FILTER_OPERATORS:
+                equality_column_names.add(field_name)
+            elif filter_info.op_name in _RANGE_FILTER_OPERATORS:
+                range_column_names.add(field_name)
+
+        for column_name in sorted(equality_column_names) + sorted(range_column_names)[:1]:
+            if column_name not in column_names:
+                column_names.append(column_name)
+
+        if column_names:
+            candidates.append((vertex_type.name, vertex_path, tuple(column_names)))
+
+    return candidates
+
+
+def recommend_indexes(
+    sql_schema_info: SQLAlchemySchemaInfo,
+    queries: Iterable[QueryStringWithParameters],
+    query_planning_schema_info: Optional[QueryPlanningSchemaInfo] = None,
+) -> List[IndexRecommendation]:
+    """Return ranked recommendations of indexes that speed up the SQL emitted for the queries.
+
+    Each vertex of each query contributes one candidate index: the column its table is joined on
+    when traversing to it, followed by the columns it is filtered on in a way an index can serve.
+    Candidates already served by a prefix of the table's primary key or of an existing index are
+    skipped, and the remaining ones are aggregated over the workload and ranked by score.
+
+    Args:
+        sql_schema_info: SQLAlchemySchemaInfo the queries are compiled with
+        queries: GraphQL query strings and parameters making up the workload. Queries executed
+                 many times should be included as many times, so that they are weighted
+                 accordingly.
+        query_planning_schema_info: optional QueryPlanningSchemaInfo for the same schema. If
+                                    provided, each lookup is weighted by the estimated number of
+                                    rows reaching the looked-up vertex, before its filters are
+                                    applied, i.e. the number of rows an index saves reading.
+                                    Queries whose estimates need missing statistics weigh each
+                                    lookup by 1.
+
+    Returns:
+        list of IndexRecommendation, ordered from highest to lowest score
+    """
+    tables: Dict[str, sqlalchemy.Table] = {}
+    indexed_column_name_prefixes: Dict[str, Set[Tuple[str, ...]]] = {}
+    # Candidates are keyed by table rather than vertex type, since vertex types may share tables.
+    scores: Dict[Tuple[str, Tuple[str, ...]], float] = {}
+    query_counts: Dict[Tuple[str, Tuple[str, ...]], int] = {}
+    for query in queries:
+        lookup_weights: Dict[VertexPath, float] = {}
+        if query_planning_schema_info is not None:
+            lookup_weights = _get_lookup_weights(query_planning_schema_info, query)
+
+        used_candidates = set()
+        for vertex_type_name, vertex_path, column_names in _get_candidate_index_column_names(
+            sql_schema_info, query.query_string
+        ):
+            table = sql_schema_info.vertex_name_to_table[vertex_type_name]
+            if table.fullname not in tables:
+                tables[table.fullname] = table
+                indexed_column_name_prefixes[table.fullname] = _get_indexed_column_name_prefixes(
+                    table
+                )
+            if column_names in indexed_column_name_prefixes[table.fullname]:
+                continue
+
+            weight = lookup_weights.get(vertex_path, 1.0)
+            candidate = (table.fullname, column_names)
+            scores[candidate] = scores.get(candidate, 0.0) + weight
+            used_candidates.add(candidate)
+
+        for candidate in used_candidates:
+            query_counts[candidate] = query_counts.get(candidate, 0) + 1
+
+    recommendations = []
+    for (table_name, column_names), score in scores.items():
+        recommendations.append(
+            IndexRecommendation(
+                tables[table_name], column_names, score, query_counts[(table_name, column_names)]
+            )
+        )
+    return sorted(
+        recommendations,
+        key=lambda recommendation: (
+            -recommendation.score,
+            recommendation.table.fullname,
+            recommendation.column_names,
+        ),
+    )
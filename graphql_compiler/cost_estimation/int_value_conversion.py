@@ -9,11 +9,14 @@ computation in the integer domain, and transfer the computation back into the or
 In order to be able to reason about value intervals and successor/predecessor values, we
 make sure these mappings to integers are increasing bijective functions.
 
-This kind of mapping is easy to do for int, uuid and datetime types, but not possible for other
-types, like string. When the need for other types arises, the precise interface for range
-reasoning can be defined and implemented separately for each type.
+This kind of mapping is easy to do for int, uuid, float and datetime types, but not possible for
+types whose values are dense, like string and Decimal: there are infinitely many strings between
+"a" and "b", but only finitely many ints between any two ints. Range reasoning on fields of those
+types is done directly on their values instead, see field_supports_int_conversion.
 """
 import datetime
+import math
+import struct
 from typing import Any
 from uuid import UUID
 
@@ -23,7 +26,10 @@ from .helpers import (
     get_uuid_ordering,
     is_date_field_type,
     is_datetime_field_type,
+    is_decimal_field_type,
+    is_float_field_type,
     is_int_field_type,
+    is_string_field_type,
     is_uuid4_type,
 )
 
@@ -34,6 +40,13 @@ MIN_UUID_INT = 0
 MAX_UUID_INT = 2 ** 128 - 1
 
 
+# Floats are represented by their IEEE-754 binary representation (see convert_float_to_int), so
+# the int representations of the smallest and largest floats, -inf and inf, are the following.
+MIN_FLOAT_INT = -0x7FF0000000000000
+MAX_FLOAT_INT = 0x7FF0000000000000
+_FLOAT_SIGN_BIT = 1 << 63
+
+
 DATETIME_EPOCH_TZ_NAIVE = datetime.datetime(1970, 1, 1)
 
 
@@ -66,20 +79,84 @@ def swap_uuid_prefix_and_suffix(uuid_string: str) -> str:
     return "-".join(new_segments)
 
 
-def field_supports_range_reasoning(
+def convert_float_to_int(value: float) -> int:
+    """Return the int representation of a float, preserving the ordering of floats.
+
+    The IEEE-754 binary representation of a non-negative float, read as an unsigned int, increases
+    with the value of the float. Negative floats only differ from their absolute value in the sign
+    bit, so negating the representation of their absolute value makes the mapping increasing on
+    all floats. Both zeros are represented as 0, and consecutive floats as consecutive ints.
+
+    Args:
+        value: float, the value to represent as an int. Must not be NaN.
+
+    Returns:
+        int between MIN_FLOAT_INT and MAX_FLOAT_INT representing the value
+
+    Raises:
+        ValueError, if the value is NaN, which is not ordered with respect to any other float.
+    """
+    if math.isnan(value):
+        raise ValueError(
+            "Could not represent NaN as int, since it is not ordered with respect to any other "
+            "float. Callers reasoning about ranges of values should treat NaN as no information."
+        )
+    (bits,) = struct.unpack(">Q", struct.pack(">d", value))
+    if bits & _FLOAT_SIGN_BIT:
+        return -(bits ^ _FLOAT_SIGN_BIT)
+    return bits
+
+
+def convert_int_to_float(int_value: int) -> float:
+    """Return the float represented by the given int. Inverse of convert_float_to_int.
+
+    Args:
+        int_value: int, the int representation of the float
+
+    Returns:
+        float represented by the int
+
+    Raises:
+        ValueError, if the given int_value is not between MIN_FLOAT_INT and MAX_FLOAT_INT.
+    """
+    if not MIN_FLOAT_INT <= int_value <= MAX_FLOAT_INT:
+        raise ValueError(
+            f"Integer value {int_value} could not be converted to float, as it is not in the "
+            f"range of float representations {MIN_FLOAT_INT} - {MAX_FLOAT_INT}."
+        )
+    bits = int_value if int_value >= 0 else -int_value | _FLOAT_SIGN_BIT
+    (value,) = struct.unpack(">d", struct.pack(">Q", bits))
+    return value
+
+
+def field_supports_int_conversion(
     schema_info: QueryPlanningSchemaInfo, vertex_class: str, property_field: str
 ) -> bool:
-    """Return whether range reasoning is supported. See module docstring for definition."""
+    """Return whether the field values can be represented as ints. See module docstring."""
     if is_meta_field(property_field):
         return False
     return (
         is_uuid4_type(schema_info, vertex_class, property_field)
         or is_int_field_type(schema_info, vertex_class, property_field)
+        or is_float_field_type(schema_info, vertex_class, property_field)
         or is_datetime_field_type(schema_info, vertex_class, property_field)
         or is_date_field_type(schema_info, vertex_class, property_field)
     )
 
 
+def field_supports_range_reasoning(
+    schema_info: QueryPlanningSchemaInfo, vertex_class: str, property_field: str
+) -> bool:
+    """Return whether range reasoning is supported. See module docstring for definition."""
+    if is_meta_field(property_field):
+        return False
+    return (
+        field_supports_int_conversion(schema_info, vertex_class, property_field)
+        or is_string_field_type(schema_info, vertex_class, property_field)
+        or is_decimal_field_type(schema_info, vertex_class, property_field)
+    )
+
+
 def convert_int_to_field_value(
     schema_info: QueryPlanningSchemaInfo, vertex_class: str, property_field: str, int_value: int
 ) -> Any:
@@ -103,6 +180,8 @@ def convert_int_to_field_value(
     """
     if is_int_field_type(schema_info, vertex_class, property_field):
         return int_value
+    elif is_float_field_type(schema_info, vertex_class, property_field):
+        return convert_int_to_float(int_value)
     elif is_datetime_field_type(schema_info, vertex_class, property_field):
         return DATETIME_EPOCH_TZ_NAIVE + datetime.timedelta(microseconds=int_value)
     elif is_date_field_type(schema_info, vertex_class, property_field):
@@ -126,7 +205,7 @@ def convert_int_to_field_value(
             raise AssertionError(
                 f"Unexpected ordering for {vertex_class}.{property_field}: {ordering}"
             )
-    elif field_supports_range_reasoning(schema_info, vertex_class, property_field):
+    elif field_supports_int_conversion(schema_info, vertex_class, property_field):
         raise AssertionError(
             "Could not represent int {} as {} {}, but should be able to.".format(
                 int_value, vertex_class, property_field
@@ -144,6 +223,8 @@ def convert_field_value_to_int(
     """Return the integer representation of a property field value."""
     if is_int_field_type(schema_info, vertex_class, property_field):
         return value
+    elif is_float_field_type(schema_info, vertex_class, property_field):
+        return convert_float_to_int(value)
     elif is_datetime_field_type(schema_info, vertex_class, property_field):
         return (value.replace(tzinfo=None) - DATETIME_EPOCH_TZ_NAIVE) // datetime.timedelta(
             microseconds=1
@@ -160,7 +241,7 @@ def convert_field_value_to_int(
             raise AssertionError(
                 f"Unexpected ordering for {vertex_class}.{property_field}: {ordering}"
             )
-    elif field_supports_range_reasoning(schema_info, vertex_class, property_field):
+    elif field_supports_int_conversion(schema_info, vertex_class, property_field):
         raise AssertionError(
             "Could not represent {} {} value {} as int, but should be able to".format(
                 vertex_class, property_field, value
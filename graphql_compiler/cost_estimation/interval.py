@@ -1,10 +1,13 @@
 # Copyright 2020-present Kensho Technologies, LLC.
 from dataclasses import dataclass
 import datetime
+import decimal
 from typing import Generic, Optional, TypeVar
 
 
-IntervalDomain = TypeVar("IntervalDomain", int, str, datetime.date, datetime.datetime)
+IntervalDomain = TypeVar(
+    "IntervalDomain", int, float, decimal.Decimal, str, datetime.date, datetime.datetime
+)
 
 
 @dataclass(eq=False, frozen=True)
@@ -68,6 +71,13 @@ def _get_stronger_upper_bound(
 
 def intersect_int_intervals(interval_a: Interval[int], interval_b: Interval[int]) -> Interval[int]:
     """Return the intersection of two Intervals."""
+    return intersect_intervals(interval_a, interval_b)
+
+
+def intersect_intervals(
+    interval_a: Interval[IntervalDomain], interval_b: Interval[IntervalDomain]
+) -> Interval[IntervalDomain]:
+    """Return the intersection of two Intervals of values of the same type."""
     strong_lower_bound = _get_stronger_lower_bound(interval_a.lower_bound, interval_b.lower_bound)
     strong_upper_bound = _get_stronger_upper_bound(interval_a.upper_bound, interval_b.upper_bound)
     return Interval(strong_lower_bound, strong_upper_bound)
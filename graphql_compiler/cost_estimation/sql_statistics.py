@@ -0,0 +1,380 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Collect the statistics used for cost estimation from a live SQL database.
+
+All statistics other than class counts are computed from a bounded random sample of each table.
+Tables no larger than the sample size are read in full, and their statistics are exact. Tables are
+sampled concurrently, each on its own connection.
+
+The cost of collecting the statistics depends on the dialect:
+    - every table is counted with COUNT(*), which may scan the table or one of its indexes,
+    - PostgreSQL samples rows with TABLESAMPLE BERNOULLI, which scans the table but neither sorts
+      it nor keeps more than the sampled rows in memory,
+    - MSSQL samples pages with TABLESAMPLE SYSTEM, which only reads the sampled pages,
+    - other dialects, such as MySQL and SQLite, have no TABLESAMPLE clause. They scan and sort each
+      table by a random value, so their cost grows with the size of the database.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+
+from graphql import (
+    GraphQLFloat,
+    GraphQLInt,
+    GraphQLInterfaceType,
+    GraphQLObjectType,
+    GraphQLScalarType,
+    GraphQLString,
+)
+import pytz
+import sqlalchemy
+from sqlalchemy.dialects.mssql.base import MSDialect
+from sqlalchemy.dialects.mysql.base import MySQLDialect
+from sqlalchemy.dialects.postgresql.base import PGDialect
+from sqlalchemy.engine.base import Engine
+from sqlalchemy.engine.interfaces import Dialect
+
+from ..compiler.helpers import (
+    OUTBOUND_EDGE_DIRECTION,
+    get_edge_direction_and_name,
+    get_vertex_field_type,
+    strip_non_null_from_type,
+)
+from ..exceptions import GraphQLInvalidArgumentError
+from ..schema import GraphQLDate, GraphQLDateTime, GraphQLDecimal, is_meta_field
+from ..schema.schema_info import SQLAlchemySchemaInfo
+from .helpers import is_nan_value
+from .statistics import LocalStatistics, VertexSamplingSummary
+
+
+DEFAULT_SAMPLE_SIZE = 10000
+DEFAULT_QUANTILE_COUNT = 101
+DEFAULT_MAX_WORKERS = 4
+
+# Names of the scalar types of the fields whose quantiles are collected, i.e. those whose values
+# the cost estimator can reason about as ranges.
+_QUANTILE_FIELD_TYPE_NAMES = frozenset(
+    {
+        GraphQLInt.name,
+        GraphQLFloat.name,
+        GraphQLDecimal.name,
+        GraphQLString.name,
+        GraphQLDate.name,
+        GraphQLDateTime.name,
+    }
+)
+
+
+class _TableSample(NamedTuple):
+    # Number of rows in the table.
+    row_count: int
+
+    # Number of rows in the sample, all of them if the table is no larger than the sample size.
+    sample_size: int
+
+    # Mapping column name -> list of the column's values in the sampled rows.
+    column_values: Dict[str, List[Any]]
+
+
+def _get_random_ordering_function(dialect: Dialect) -> sqlalchemy.sql.functions.Function:
+    """Return the SQL function producing a random value for each row in the dialect."""
+    if isinstance(dialect, MSDialect):
+        return sqlalchemy.func.newid()
+    if isinstance(dialect, MySQLDialect):
+        return sqlalchemy.func.rand()
+    return sqlalchemy.func.random()
+
+
+def _get_sample_query(
+    dialect: Dialect,
+    table: sqlalchemy.Table,
+    column_names: List[str],
+    row_count: int,
+    sample_size: int,
+) -> sqlalchemy.sql.Select:
+    """Return a query selecting at most sample_size random rows of the table.
+
+    PostgreSQL samples rows with TABLESAMPLE BERNOULLI, which avoids sorting the table. MSSQL
+    samples pages with TABLESAMPLE SYSTEM, which avoids reading the pages that are not sampled, at
+    the cost of sampling rows stored on the same page together. Both return sample_size rows on
+    average. Other dialects order the rows randomly, which still only keeps the sampled rows in
+    memory.
+    """
+    if row_count <= sample_size:
+        return sqlalchemy.select([table.c[column_name] for column_name in column_names])
+
+    sample_percentage = 100.0 * sample_size / row_count
+    sampled_table: Optional[sqlalchemy.sql.expression.TableSample] = None
+    if isinstance(dialect, PGDialect):
+        sampled_table = sqlalchemy.tablesample(table, sqlalchemy.func.bernoulli(sample_percentage))
+    elif isinstance(dialect, MSDialect):
+        # MSSQL requires the sampled percentage to be a literal followed by the PERCENT keyword.
+        sampled_table = sqlalchemy.tablesample(
+            table,
+            sqlalchemy.func.system(sqlalchemy.literal_column(f"{sample_percentage!r} PERCENT")),
+        )
+
+    if sampled_table is not None:
+        return sqlalchemy.select(
+            [sampled_table.c[column_name] for column_name in column_names]
+        ).limit(sample_size)
+
+    return (
+        sqlalchemy.select([table.c[column_name] for column_name in column_names])
+        .order_by(_get_random_ordering_function(dialect))
+        .limit(sample_size)
+    )
+
+
+def _sample_table(
+    engine: Engine, table: sqlalchemy.Table, column_names: List[str], sample_size: int
+) -> _TableSample:
+    """Count the rows of the table, and sample the given columns of at most sample_size rows."""
+    with engine.connect() as connection:
+        row_count = connection.execute(
+            sqlalchemy.select([sqlalchemy.func.count()]).select_from(table)
+        ).scalar()
+        sample_query = _get_sample_query(
+            engine.dialect, table, column_names, row_count, sample_size
+        )
+        rows = connection.execute(sample_query).fetchall()
+
+    column_values = {
+        column_name: [row[column_index] for row in rows]
+        for column_index, column_name in enumerate(column_names)
+    }
+    return _TableSample(row_count=row_count, sample_size=len(rows), column_values=column_values)
+
+
+def _estimate_non_null_count(table_sample: _TableSample, column_name: str) -> float:
+    """Return the estimated number of rows of the table with a non-null value in the column."""
+    if table_sample.sample_size == 0:
+        return 0.0
+    values = table_sample.column_values[column_name]
+    non_null_sample_count = len(values) - values.count(None)
+    return float(table_sample.row_count) * non_null_sample_count / table_sample.sample_size
+
+
+def _estimate_distinct_values_count(table_sample: _TableSample, column_name: str) -> int:
+    """Return the estimated number of distinct non-null values in the column of the table.
+
+    Uses the Duj1 estimator of Haas and Stokes, "Estimating the Number of Classes in a Finite
+    Population", which is also used by PostgreSQL's ANALYZE. It scales up the number of values
+    seen exactly once in the sample, and is exact when the whole table was sampled.
+    """
+    value_counts: Dict[Any, int] = {}
+    for value in table_sample.column_values[column_name]:
+        if value is not None:
+            value_counts[value] = value_counts.get(value, 0) + 1
+    if not value_counts:
+        return 0
+
+    non_null_sample_count = sum(value_counts.values())
+    non_null_count = _estimate_non_null_count(table_sample, column_name)
+    singleton_count = sum(1 for count in value_counts.values() if count == 1)
+    estimate = (non_null_sample_count * len(value_counts)) / (
+        non_null_sample_count
+        - singleton_count
+        + singleton_count * non_null_sample_count / non_null_count
+    )
+    return int(round(min(max(estimate, len(value_counts)), non_null_count)))
+
+
+def _to_naive_utc(value: Any) -> Any:
+    """Convert tz-aware datetimes to naive datetimes in UTC, returning other values unchanged."""
+    if isinstance(value, datetime.datetime) and value.tzinfo is not None:
+        return value.astimezone(pytz.utc).replace(tzinfo=None)
+    return value
+
+
+def _get_quantiles(values: List[Any], quantile_count: int) -> Optional[List[Any]]:
+    """Return at most quantile_count quantiles of the ordered values, or None if there are none.
+
+    Null and NaN values are ignored, since they are not ordered with respect to other values.
+    """
+    sorted_values = sorted(
+        _to_naive_utc(value) for value in values if value is not None and not is_nan_value(value)
+    )
+    if not sorted_values:
+        return None
+    quantile_count = max(2, min(quantile_count, len(sorted_values)))
+    last_index = len(sorted_values) - 1
+    return [
+        sorted_values[int(round(quantile_index * last_index / (quantile_count - 1)))]
+        for quantile_index in range(quantile_count)
+    ]
+
+
+def _get_vertex_type(
+    sql_schema_info: SQLAlchemySchemaInfo, vertex_name: str
+) -> Union[GraphQLInterfaceType, GraphQLObjectType]:
+    """Return the GraphQL type of the vertex with the given name."""
+    vertex_type = sql_schema_info.schema.get_type(vertex_name)
+    if not isinstance(vertex_type, (GraphQLInterfaceType, GraphQLObjectType)):
+        raise AssertionError(
+            f"Expected {vertex_name} to be an object or interface type in the schema, but got "
+            f"{vertex_type}."
+        )
+    return vertex_type
+
+
+def _get_property_field_types(
+    vertex_type: Union[GraphQLInterfaceType, GraphQLObjectType], table: sqlalchemy.Table
+) -> Dict[str, GraphQLScalarType]:
+    """Return the scalar type of each property field of the vertex backed by a column."""
+    property_field_types = {}
+    for field_name, field in vertex_type.fields.items():
+        field_type = strip_non_null_from_type(field.type)
+        if (
+            isinstance(field_type, GraphQLScalarType)
+            and not is_meta_field(field_name)
+            and field_name in table.c
+        ):
+            property_field_types[field_name] = field_type
+    return property_field_types
+
+
+def collect_sql_statistics(
+    sql_schema_info: SQLAlchemySchemaInfo,
+    engine: Engine,
+    *,
+    sample_size: int = DEFAULT_SAMPLE_SIZE,
+    quantile_count: int = DEFAULT_QUANTILE_COUNT,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+) -> LocalStatistics:
+    """Compute LocalStatistics for the schema from the data in the database.
+
+    Collected statistics:
+        - the class count of each vertex type, counted exactly, and of each edge, estimated from
+          the samples of the joined tables assuming that every value of the column with fewer
+          distinct values joins to the other table,
+        - the vertex-edge-vertex count of each edge, equal to the edge's class count,
+        - the distinct values count of each property field, estimated from the sample,
+        - quantiles of each Int, Float, Decimal, String, Date and DateTime property field,
+          computed from the sample, ignoring NaN values and converting tz-aware datetimes to
+          naive datetimes in UTC,
+        - a VertexSamplingSummary of each vertex type, with the sampled values of each of its
+          property fields.
+
+    Args:
+        sql_schema_info: SQLAlchemySchemaInfo describing the database
+        engine: SQLAlchemy Engine connected to the database. Each table is sampled on a separate
+                connection, so the engine must not share a single connection between threads,
+                as e.g. an in-memory SQLite engine does.
+        sample_size: maximum number of rows to sample from each table
+        quantile_count: maximum number of quantiles to compute for each field, at least 2
+        max_workers: maximum number of tables to sample concurrently
+
+    Returns:
+        LocalStatistics computed from the database
+    """
+    if sample_size < 1:
+        raise GraphQLInvalidArgumentError(
+            f"Expected sample_size to be a positive integer, but got {sample_size}."
+        )
+    if quantile_count < 2:
+        raise GraphQLInvalidArgumentError(
+            f"Expected quantile_count to be at least 2, but got {quantile_count}."
+        )
+
+    vertex_names = sorted(sql_schema_info.vertex_name_to_table)
+    property_field_types: Dict[str, Dict[str, GraphQLScalarType]] = {}
+    sampled_column_names: Dict[str, Set[str]] = {}
+    for vertex_name in vertex_names:
+        table = sql_schema_info.vertex_name_to_table[vertex_name]
+        vertex_type = _get_vertex_type(sql_schema_info, vertex_name)
+        property_field_types[vertex_name] = _get_property_field_types(vertex_type, table)
+        sampled_column_names[vertex_name] = set(property_field_types[vertex_name])
+
+    # The columns joined on by edges need to be sampled too, to estimate the edge counts.
+    edges: List[Tuple[str, str, str, str, str]] = []
+    for vertex_name, join_descriptors in sorted(sql_schema_info.join_descriptors.items()):
+        vertex_type = _get_vertex_type(sql_schema_info, vertex_name)
+        for vertex_field_name, join_descriptor in sorted(join_descriptors.items()):
+            edge_direction, edge_name = get_edge_direction_and_name(vertex_field_name)
+            if edge_direction != OUTBOUND_EDGE_DIRECTION:
+                continue
+            target_vertex_name = get_vertex_field_type(vertex_type, vertex_field_name).name
+            edges.append(
+                (
+                    vertex_name,
+                    join_descriptor.from_column,
+                    edge_name,
+                    target_vertex_name,
+                    join_descriptor.to_column,
+                )
+            )
+            sampled_column_names[vertex_name].add(join_descriptor.from_column)
+            sampled_column_names[target_vertex_name].add(join_descriptor.to_column)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        sample_futures = {
+            vertex_name: executor.submit(
+                _sample_table,
+                engine,
+                sql_schema_info.vertex_name_to_table[vertex_name],
+                sorted(sampled_column_names[vertex_name]),
+                sample_size,
+            )
+            for vertex_name in vertex_names
+        }
+        table_samples = {
+            vertex_name: future.result() for vertex_name, future in sample_futures.items()
+        }
+
+    class_counts: Dict[str, int] = {}
+    distinct_field_values_counts: Dict[Tuple[str, str], int] = {}
+    field_quantiles: Dict[Tuple[str, str], List[Any]] = {}
+    sampling_summaries: Dict[str, VertexSamplingSummary] = {}
+    for vertex_name in vertex_names:
+        table_sample = table_samples[vertex_name]
+        class_counts[vertex_name] = table_sample.row_count
+        value_counts: Dict[str, Dict[Any, int]] = {}
+        for field_name, field_type in property_field_types[vertex_name].items():
+            distinct_field_values_counts[
+                (vertex_name, field_name)
+            ] = _estimate_distinct_values_count(table_sample, field_name)
+            values = table_sample.column_values[field_name]
+            if field_type.name in _QUANTILE_FIELD_TYPE_NAMES:
+                quantiles = _get_quantiles(values, quantile_count)
+                if quantiles is not None:
+                    field_quantiles[(vertex_name, field_name)] = quantiles
+            field_value_counts: Dict[Any, int] = {}
+            for value in values:
+                field_value_counts[value] = field_value_counts.get(value, 0) + 1
+            value_counts[field_name] = field_value_counts
+
+        if table_sample.sample_size > 0:
+            sampling_summaries[vertex_name] = VertexSamplingSummary(
+                vertex_name=vertex_name,
+                value_counts=value_counts,
+                sample_ratio=max(1, int(round(table_sample.row_count / table_sample.sample_size))),
+            )
+
+    vertex_edge_vertex_counts: Dict[Tuple[str, str, str], int] = {}
+    for from_vertex_name, from_column, edge_name, to_vertex_name, to_column in edges:
+        from_sample = table_samples[from_vertex_name]
+        to_sample = table_samples[to_vertex_name]
+        distinct_values_count = max(
+            _estimate_distinct_values_count(from_sample, from_column),
+            _estimate_distinct_values_count(to_sample, to_column),
+        )
+        if distinct_values_count == 0:
+            edge_count = 0
+        else:
+            edge_count = int(
+                round(
+                    _estimate_non_null_count(from_sample, from_column)
+                    * _estimate_non_null_count(to_sample, to_column)
+                    / distinct_values_count
+                )
+            )
+        vertex_edge_vertex_counts[(from_vertex_name, edge_name, to_vertex_name)] = edge_count
+        class_counts[edge_name] = class_counts.get(edge_name, 0) + edge_count
+
+    return LocalStatistics(
+        class_counts,
+        vertex_edge_vertex_counts=vertex_edge_vertex_counts,
+        distinct_field_values_counts=distinct_field_values_counts,
+        field_quantiles=field_quantiles,
+        sampling_summaries=sampling_summaries,
+    )
@@ -1,9 +1,9 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 from abc import ABCMeta, abstractmethod
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import datetime
 import math
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Collection, Dict, List, Optional, Tuple
 
 import six
 
@@ -22,6 +22,67 @@ class VertexSamplingSummary:
     # The number_of_instances / number_of_samples ratio
     sample_ratio: int
 
+    # Mapping field_names -> (field_values -> observed_count) for some groups of fields whose
+    # values are correlated, e.g. ("country", "state"). The field names of each group are sorted,
+    # and each tuple of field values lists the values of the fields in the same order.
+    joint_value_counts: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], int]] = field(
+        default_factory=dict
+    )
+
+
+def estimate_value_count_from_sample(
+    sampled_value_count: Optional[int], sample_ratio: int
+) -> float:
+    """Return the estimated number of times a value appears, given its count in a sample.
+
+    Args:
+        sampled_value_count: number of times the value appears in the sample, or None if it does
+                             not appear in it
+        sample_ratio: the number_of_instances / number_of_samples ratio of the sample
+
+    Returns:
+        estimate of the number of times the value appears in the whole population
+    """
+    if sampled_value_count is not None:
+        return sampled_value_count * sample_ratio
+    else:
+        # We want to minimize the error ratio: max(true_value/estimate, estimate/true_value).
+        # By rule of 3 (https://en.wikipedia.org/wiki/Rule_of_three_(statistics)), we have 95%
+        # confidence that the true value count is less than (3 * sample_ratio). So we have
+        # 95% confidence that the error ratio is at most math.sqrt(3 * sample_ratio). Some
+        # intuition: with a sample ratio of 1000 the error ratio bound evaluates to about
+        # sqrt(3000) ~= 55.
+        return max(1, math.sqrt(3 * sample_ratio))
+
+
+def estimate_value_count_bounds_from_sample(
+    sampled_value_count: Optional[int], sample_ratio: int
+) -> Tuple[float, float]:
+    """Return bounds on the number of times a value appears, given its count in a sample.
+
+    The bounds contain the estimate of estimate_value_count_from_sample, and hold with about 95%
+    confidence if the sample was drawn uniformly at random.
+
+    Args:
+        sampled_value_count: number of times the value appears in the sample, or None if it does
+                             not appear in it
+        sample_ratio: the number_of_instances / number_of_samples ratio of the sample
+
+    Returns:
+        tuple (lower bound, upper bound) on the number of times the value appears in the whole
+        population
+    """
+    if sampled_value_count is not None:
+        # The sampled count is approximately Poisson distributed, so its standard deviation is
+        # about its square root. The sampled instances themselves are certain to exist.
+        margin = 2 * math.sqrt(sampled_value_count)
+        lower_bound = max(sampled_value_count, (sampled_value_count - margin) * sample_ratio)
+        upper_bound = (sampled_value_count + margin) * sample_ratio
+        return float(lower_bound), float(upper_bound)
+    else:
+        # By the rule of 3, see estimate_value_count_from_sample.
+        return 0.0, float(3 * sample_ratio)
+
 
 @six.python_2_unicode_compatible
 @six.add_metaclass(ABCMeta)
@@ -84,6 +145,71 @@ class Statistics(object):
         """
         return None
 
+    def get_edge_degree_histogram(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[Dict[int, int]]:
+        """Return how many vertices have each number of edges to vertices at the other endpoint.
+
+        This statistic is optional. Without it, the estimator assumes edges are distributed evenly
+        over the vertices at each of their endpoints. When a few vertices have most of the edges,
+        as in graphs with a power-law degree distribution, this assumption misestimates traversals
+        that are optional, folded or filtered down to a few vertices.
+
+        The same inheritance rules as in get_vertex_edge_vertex_count apply.
+
+        Args:
+            vertex_source_class_name: vertex class name defined in the GraphQL schema.
+            edge_class_name: edge class name defined in the GraphQL schema.
+            vertex_target_class_name: vertex class name defined in the GraphQL schema.
+            edge_direction: "out" for the histogram of the out-degrees of vertex_source vertices,
+                            counting their edge_class edges to vertex_target vertices, and "in" for
+                            the histogram of the in-degrees of vertex_target vertices, counting
+                            their edge_class edges from vertex_source vertices.
+
+        Returns:
+            - dict mapping degree to the number of vertices with that degree, including vertices
+              with no such edges at degree 0, if the statistic exists. Degrees may be rounded,
+              e.g. to powers of two, to keep the histogram small.
+            - None otherwise.
+        """
+        return None
+
+    def get_recursive_branching_factor(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[float]:
+        """Return the average number of children of the vertices reached by recursing over an edge.
+
+        This statistic is optional. Without it, the estimator assumes the number of vertices
+        reached by @recurse grows at each level of depth by the average degree of all vertices,
+        computed from get_vertex_edge_vertex_count or get_class_count. In hierarchical data, the
+        vertices reached by recursing from typical vertices are not a uniform sample of all
+        vertices, e.g. most vertices of a tree are leaves, so this may misestimate deep recursion.
+
+        The same inheritance rules as in get_vertex_edge_vertex_count apply.
+
+        Args:
+            vertex_source_class_name: vertex class name defined in the GraphQL schema.
+            edge_class_name: edge class name defined in the GraphQL schema.
+            vertex_target_class_name: vertex class name defined in the GraphQL schema.
+            edge_direction: "out" if recursing from vertex_source vertices to vertex_target
+                            vertices, and "in" if recursing in the opposite direction, as in
+                            get_edge_degree_histogram.
+
+        Returns:
+            - float, the expected ratio of the number of vertices reached at depth k + 1 to the
+              number of vertices reached at depth k if the statistic exists.
+            - None otherwise.
+        """
+        return None
+
     def get_distinct_field_values_count(self, vertex_name, field_name):
         """Return the count of distinct values a vertex's property field has over all instances.
 
@@ -100,6 +226,25 @@ class Statistics(object):
         """
         return None
 
+    def get_joint_distinct_field_values_count(
+        self, vertex_name: str, field_names: Tuple[str, ...]
+    ) -> Optional[int]:
+        """Return the count of distinct combinations of values a group of fields has.
+
+        This statistic is optional. Without it, the selectivities of filters on different fields
+        are assumed to be independent, and are multiplied together. For correlated fields, like
+        country and state, this underestimates the number of results passing the filters.
+
+        Args:
+            vertex_name: name of a vertex defined in the GraphQL schema.
+            field_names: names of at least two property fields of the vertex, in sorted order.
+
+        Returns:
+            - int, count of distinct tuples of values of the fields if the statistic exists.
+            - None otherwise.
+        """
+        return None
+
     def get_field_quantiles(self, vertex_name, field_name):
         """Return a list dividing the field values in equally-sized groups.
 
@@ -129,6 +274,126 @@ class Statistics(object):
         """
         return None
 
+    def get_value_counts(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[List[float]]:
+        """Return the estimated number of times each of the given values appears in the database.
+
+        This is equivalent to calling get_value_count for each of the values, and is used to
+        estimate in_collection filters with large collections. Implementations that fetch
+        statistics remotely or lazily should override it to look up all values at once.
+
+        Args:
+            vertex_name: vertex on which the field is defined
+            field_name: field for which the values stand
+            values: values to be counted
+
+        Returns:
+            An estimate on how often each of the values currently appears in the given field, in
+            the same order as the values, or None if any of them is unknown. An empty list of
+            values always has an empty list of estimates.
+        """
+        value_counts = []
+        for value in values:
+            value_count = self.get_value_count(vertex_name, field_name, value)
+            if value_count is None:
+                return None
+            value_counts.append(value_count)
+        return value_counts
+
+    def get_value_counts_with_bounds(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[Tuple[List[float], Optional[List[Tuple[float, float]]]]]:
+        """Return the estimates of get_value_counts, and bounds on them if known.
+
+        The bounds are optional, and complement value counts estimated from a sample. Without
+        them, the cardinality estimator can only bound the number of times the values appear by
+        the number of vertices. Implementations that have them should override this method to
+        look up the estimates and the bounds of all values at once.
+
+        Args:
+            vertex_name: vertex on which the field is defined
+            field_name: field for which the values stand
+            values: values to be counted
+
+        Returns:
+            None if get_value_counts returns None. Otherwise, a tuple (value counts, bounds), where
+            value counts are the estimates returned by get_value_counts, and bounds are a list of
+            tuples (lower bound, upper bound) on how often each of the values currently appears in
+            the given field, in the same order as the values, or None if unknown. The bounds
+            contain the estimates.
+        """
+        value_counts = self.get_value_counts(vertex_name, field_name, values)
+        if value_counts is None:
+            return None
+        return value_counts, None
+
+    def get_joint_value_count(
+        self, vertex_name: str, field_names: Tuple[str, ...], values: Tuple[Any, ...]
+    ) -> Optional[float]:
+        """Return the estimated number of times the given values appear together in the database.
+
+        Like get_joint_distinct_field_values_count, this statistic helps estimate the selectivity
+        of filters on correlated fields.
+
+        Args:
+            vertex_name: vertex on which the fields are defined
+            field_names: names of at least two property fields of the vertex, in sorted order
+            values: values of the fields, in the same order as field_names
+
+        Returns:
+            An estimate on how often vertices currently have all the given field values, or None
+            if unknown.
+        """
+        return None
+
+    def get_joint_value_counts(
+        self,
+        vertex_name: str,
+        field_names: Tuple[str, ...],
+        values_list: Collection[Tuple[Any, ...]],
+    ) -> Optional[List[float]]:
+        """Return the estimated number of times each of the given tuples of values appears.
+
+        This is equivalent to calling get_joint_value_count for each tuple of values, and is used
+        to estimate in_collection filters on correlated fields, which may allow many combinations
+        of values. Implementations that fetch statistics remotely or lazily should override it to
+        look up all tuples at once.
+
+        Args:
+            vertex_name: vertex on which the fields are defined
+            field_names: names of at least two property fields of the vertex, in sorted order
+            values_list: tuples of values of the fields, each in the same order as field_names
+
+        Returns:
+            An estimate on how often vertices currently have each of the tuples of field values,
+            in the same order as the tuples, or None if any of them is unknown. An empty list of
+            tuples always has an empty list of estimates.
+        """
+        joint_value_counts = []
+        for values in values_list:
+            joint_value_count = self.get_joint_value_count(vertex_name, field_names, values)
+            if joint_value_count is None:
+                return None
+            joint_value_counts.append(joint_value_count)
+        return joint_value_counts
+
+    def get_cardinality_correction_factor(self, query_shape: str) -> Optional[float]:
+        """Return the factor by which to correct cardinality estimates of queries of this shape.
+
+        This statistic is optional, and is learned from the result counts of executed queries
+        rather than collected from the database, see AdaptiveStatistics.
+
+        Args:
+            query_shape: the shape of a query, as returned by get_query_shape.
+
+        Returns:
+            - float, the ratio of the actual result count to the estimated cardinality observed
+              for queries of this shape if the statistic exists.
+            - None otherwise.
+        """
+        return None
+
 
 class LocalStatistics(Statistics):
     """Statistics class that receives all statistics at initialization, storing them in-memory."""
@@ -136,7 +401,10 @@ class LocalStatistics(Statistics):
     # See __init__ docstring for definitions.
     _class_counts: Dict[str, int]
     _vertex_edge_vertex_counts: Dict[Tuple[str, str, str], int]
+    _edge_degree_histograms: Dict[Tuple[str, str, str, str], Dict[int, int]]
+    _recursive_branching_factors: Dict[Tuple[str, str, str, str], float]
     _distinct_field_values_counts: Dict[Tuple[str, str], int]
+    _joint_distinct_field_values_counts: Dict[Tuple[str, Tuple[str, ...]], int]
     _field_quantiles: Dict[Tuple[str, str], List[Any]]
     _sampling_summaries: Dict[str, VertexSamplingSummary]
 
@@ -145,7 +413,10 @@ class LocalStatistics(Statistics):
         class_counts: Dict[str, int],
         *,
         vertex_edge_vertex_counts: Optional[Dict[Tuple[str, str, str], int]] = None,
+        edge_degree_histograms: Optional[Dict[Tuple[str, str, str, str], Dict[int, int]]] = None,
+        recursive_branching_factors: Optional[Dict[Tuple[str, str, str, str], float]] = None,
         distinct_field_values_counts: Optional[Dict[Tuple[str, str], int]] = None,
+        joint_distinct_field_values_counts: Optional[Dict[Tuple[str, Tuple[str, ...]], int]] = None,
         field_quantiles: Optional[Dict[Tuple[str, str], List[Any]]] = None,
         sampling_summaries: Optional[Dict[str, VertexSamplingSummary]] = None,
     ):
@@ -158,9 +429,23 @@ class LocalStatistics(Statistics):
                                        (vertex source class name, edge class name, vertex target
                                        class name) to count of edge instances of given class
                                        connecting instances of two vertex classes.
+            edge_degree_histograms: optional dict, (str, str, str, str) -> dict, mapping tuple of
+                                    (vertex source class name, edge class name, vertex target
+                                    class name, edge direction) to the histogram of vertex
+                                    degrees. See get_edge_degree_histogram for the definition of
+                                    the edge direction and the histogram.
+            recursive_branching_factors: optional dict, (str, str, str, str) -> float, mapping
+                                         tuple of (vertex source class name, edge class name,
+                                         vertex target class name, edge direction) to the
+                                         branching factor of recursion over the edge. See
+                                         get_recursive_branching_factor for its definition.
             distinct_field_values_counts: optional dict, (str, str) -> int, mapping vertex class
                                           name and property field name to the count of distinct
                                           values of that vertex class's property field.
+            joint_distinct_field_values_counts: optional dict, (str, tuple of str) -> int,
+                                                mapping vertex class name and a sorted tuple of
+                                                at least two of its property field names to the
+                                                count of distinct tuples of values of the fields.
             field_quantiles: optional dict, (str, str) -> list, mapping vertex class name
                              and property field name to a list of N quantiles, a sorted list of
                              values separating the values of the field into N-1 groups of almost
@@ -177,14 +462,52 @@ class LocalStatistics(Statistics):
         """
         if vertex_edge_vertex_counts is None:
             vertex_edge_vertex_counts = dict()
+        if edge_degree_histograms is None:
+            edge_degree_histograms = dict()
+        if recursive_branching_factors is None:
+            recursive_branching_factors = dict()
         if distinct_field_values_counts is None:
             distinct_field_values_counts = dict()
+        if joint_distinct_field_values_counts is None:
+            joint_distinct_field_values_counts = dict()
         if field_quantiles is None:
             field_quantiles = dict()
         if sampling_summaries is None:
             sampling_summaries = dict()
 
         # Validate arguments
+        for histogram_key, degree_histogram in six.iteritems(edge_degree_histograms):
+            if histogram_key[3] not in ("in", "out"):
+                raise AssertionError(
+                    f"Expected the edge direction of degree histogram {histogram_key} to be "
+                    f"either in or out."
+                )
+            for degree, vertex_count in six.iteritems(degree_histogram):
+                if degree < 0 or vertex_count < 0:
+                    raise AssertionError(
+                        f"Found negative degree {degree} or vertex count {vertex_count} in "
+                        f"degree histogram {histogram_key}."
+                    )
+        for branching_factor_key, branching_factor in six.iteritems(recursive_branching_factors):
+            if branching_factor_key[3] not in ("in", "out") or branching_factor < 0:
+                raise AssertionError(
+                    f"Expected the edge direction of recursive branching factor "
+                    f"{branching_factor_key} to be either in or out, and its value "
+                    f"{branching_factor} to be non-negative."
+                )
+        joint_field_names = [
+            field_names for _, field_names in joint_distinct_field_values_counts
+        ] + [
+            field_names
+            for sampling_summary in six.itervalues(sampling_summaries)
+            for field_names in sampling_summary.joint_value_counts
+        ]
+        for field_names in joint_field_names:
+            if len(field_names) < 2 or list(field_names) != sorted(set(field_names)):
+                raise AssertionError(
+                    f"Expected joint statistics to be keyed by a sorted tuple of at least two "
+                    f"distinct field names, but got {field_names}."
+                )
         for (vertex_name, field_name), quantile_list in six.iteritems(field_quantiles):
             if len(quantile_list) < 2:
                 raise AssertionError(
@@ -201,7 +524,10 @@ class LocalStatistics(Statistics):
 
         self._class_counts = class_counts
         self._vertex_edge_vertex_counts = vertex_edge_vertex_counts
+        self._edge_degree_histograms = edge_degree_histograms
+        self._recursive_branching_factors = recursive_branching_factors
         self._distinct_field_values_counts = distinct_field_values_counts
+        self._joint_distinct_field_values_counts = joint_distinct_field_values_counts
         self._field_quantiles = field_quantiles
         self._sampling_summaries = sampling_summaries
 
@@ -216,11 +542,50 @@ class LocalStatistics(Statistics):
         statistic_key = (vertex_source_class_name, edge_class_name, vertex_target_class_name)
         return self._vertex_edge_vertex_counts.get(statistic_key)
 
+    def get_edge_degree_histogram(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[Dict[int, int]]:
+        """See base class."""
+        statistic_key = (
+            vertex_source_class_name,
+            edge_class_name,
+            vertex_target_class_name,
+            edge_direction,
+        )
+        return self._edge_degree_histograms.get(statistic_key)
+
+    def get_recursive_branching_factor(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[float]:
+        """See base class."""
+        statistic_key = (
+            vertex_source_class_name,
+            edge_class_name,
+            vertex_target_class_name,
+            edge_direction,
+        )
+        return self._recursive_branching_factors.get(statistic_key)
+
     def get_distinct_field_values_count(self, vertex_name, field_name):
         """See base class."""
         statistic_key = (vertex_name, field_name)
         return self._distinct_field_values_counts.get(statistic_key)
 
+    def get_joint_distinct_field_values_count(
+        self, vertex_name: str, field_names: Tuple[str, ...]
+    ) -> Optional[int]:
+        """See base class."""
+        statistic_key = (vertex_name, field_names)
+        return self._joint_distinct_field_values_counts.get(statistic_key)
+
     def get_field_quantiles(self, vertex_name, field_name):
         """See base class."""
         statistic_key = (vertex_name, field_name)
@@ -236,14 +601,95 @@ class LocalStatistics(Statistics):
         if field_sampled_value_counts is None:
             return None
 
-        sampled_value_count = field_sampled_value_counts.get(value)
-        if sampled_value_count is not None:
-            return sampled_value_count * vertex_sampling_summary.sample_ratio
-        else:
-            # We want to minimize the error ratio: max(true_value/estimate, estimate/true_value).
-            # By rule of 3 (https://en.wikipedia.org/wiki/Rule_of_three_(statistics)), we have 95%
-            # confidence that the true value count is less than (3 * sample_ratio). So we have
-            # 95% confidence that the error ratio is at most math.sqrt(3 * sample_ratio). Some
-            # intuition: with a sample ratio of 1000 the error ratio bound evaluates to about
-            # sqrt(3000) ~= 55.
-            return max(1, math.sqrt(3 * vertex_sampling_summary.sample_ratio))
+        return estimate_value_count_from_sample(
+            field_sampled_value_counts.get(value), vertex_sampling_summary.sample_ratio
+        )
+
+    def get_value_counts(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[List[float]]:
+        """See base class."""
+        if not values:
+            return []
+
+        vertex_sampling_summary = self._sampling_summaries.get(vertex_name)
+        if vertex_sampling_summary is None:
+            return None
+
+        field_sampled_value_counts = vertex_sampling_summary.value_counts.get(field_name)
+        if field_sampled_value_counts is None:
+            return None
+
+        sample_ratio = vertex_sampling_summary.sample_ratio
+        return [
+            estimate_value_count_from_sample(field_sampled_value_counts.get(value), sample_ratio)
+            for value in values
+        ]
+
+    def get_value_counts_with_bounds(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[Tuple[List[float], Optional[List[Tuple[float, float]]]]]:
+        """See base class."""
+        if not values:
+            return [], []
+
+        vertex_sampling_summary = self._sampling_summaries.get(vertex_name)
+        if vertex_sampling_summary is None:
+            return None
+
+        field_sampled_value_counts = vertex_sampling_summary.value_counts.get(field_name)
+        if field_sampled_value_counts is None:
+            return None
+
+        sample_ratio = vertex_sampling_summary.sample_ratio
+        sampled_value_counts = [field_sampled_value_counts.get(value) for value in values]
+        return (
+            [
+                estimate_value_count_from_sample(sampled_value_count, sample_ratio)
+                for sampled_value_count in sampled_value_counts
+            ],
+            [
+                estimate_value_count_bounds_from_sample(sampled_value_count, sample_ratio)
+                for sampled_value_count in sampled_value_counts
+            ],
+        )
+
+    def get_joint_value_count(
+        self, vertex_name: str, field_names: Tuple[str, ...], values: Tuple[Any, ...]
+    ) -> Optional[float]:
+        """See base class."""
+        vertex_sampling_summary = self._sampling_summaries.get(vertex_name)
+        if vertex_sampling_summary is None:
+            return None
+
+        sampled_joint_value_counts = vertex_sampling_summary.joint_value_counts.get(field_names)
+        if sampled_joint_value_counts is None:
+            return None
+
+        return estimate_value_count_from_sample(
+            sampled_joint_value_counts.get(values), vertex_sampling_summary.sample_ratio
+        )
+
+    def get_joint_value_counts(
+        self,
+        vertex_name: str,
+        field_names: Tuple[str, ...],
+        values_list: Collection[Tuple[Any, ...]],
+    ) -> Optional[List[float]]:
+        """See base class."""
+        if not values_list:
+            return []
+
+        vertex_sampling_summary = self._sampling_summaries.get(vertex_name)
+        if vertex_sampling_summary is None:
+            return None
+
+        sampled_joint_value_counts = vertex_sampling_summary.joint_value_counts.get(field_names)
+        if sampled_joint_value_counts is None:
+            return None
+
+        sample_ratio = vertex_sampling_summary.sample_ratio
+        return [
+            estimate_value_count_from_sample(sampled_joint_value_counts.get(values), sample_ratio)
+            for values in values_list
+        ]
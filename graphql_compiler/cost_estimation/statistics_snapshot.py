@@ -0,0 +1,918 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""A versioned on-disk statistics format, read lazily through a memory map.
+
+Loading large statistics into a LocalStatistics object requires deserializing every statistic up
+front, in every process that uses them. Statistics snapshots are instead read through a read-only
+memory map, so opening one only reads its header, each lookup only touches the pages it needs, and
+all processes reading the same snapshot share the same pages of the OS page cache.
+
+Snapshot layout (version 3), with all integers big-endian:
+    - header: magic bytes, format version and section count,
+    - section table: the id, offset and length of each section,
+    - sections, each an array of fixed-width records sorted by their leading key bytes, which
+      are binary searched by comparing bytes. Class names, field names, string values and values
+      that do not fit in a fixed-width record (e.g. Decimals) are stored once in a string
+      dictionary sorted by their UTF-8 encoding, and records refer to them by their index in it.
+      Groups of field names of joint statistics are stored as a single string, joining the sorted
+      field names with commas, which cannot appear in GraphQL names.
+
+Each value (e.g. each quantile) is a 9-byte record: a type tag followed by an 8-byte payload.
+Sampled joint value counts are the only records whose width varies, with the number of fields in
+their group, so the records of each group are located by their byte offset rather than index.
+"""
+import datetime
+import decimal
+import mmap
+import struct
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Set, Tuple
+
+from .statistics import (
+    Statistics,
+    VertexSamplingSummary,
+    estimate_value_count_bounds_from_sample,
+    estimate_value_count_from_sample,
+)
+
+
+SNAPSHOT_FORMAT_VERSION = 3
+
+_MAGIC = b"GQLSTATS"
+_HEADER = struct.Struct(">8sII")
+_SECTION_TABLE_ENTRY = struct.Struct(">IQQ")
+
+# Section ids.
+_STRING_OFFSETS_SECTION = 1
+_STRING_DATA_SECTION = 2
+_CLASS_COUNTS_SECTION = 3
+_VERTEX_EDGE_VERTEX_COUNTS_SECTION = 4
+_DISTINCT_FIELD_VALUES_COUNTS_SECTION = 5
+_FIELD_QUANTILES_SECTION = 6
+_VALUES_SECTION = 7
+_SAMPLING_SUMMARIES_SECTION = 8
+_SAMPLED_FIELDS_SECTION = 9
+_SAMPLED_VALUE_COUNTS_SECTION = 10
+_EDGE_DEGREE_HISTOGRAMS_SECTION = 11
+_DEGREE_COUNTS_SECTION = 12
+_RECURSIVE_BRANCHING_FACTORS_SECTION = 13
+_JOINT_DISTINCT_FIELD_VALUES_COUNTS_SECTION = 14
+_SAMPLED_JOINT_FIELDS_SECTION = 15
+_SAMPLED_JOINT_VALUE_COUNTS_SECTION = 16
+
+# Record formats of each section, each starting with the key the records are sorted by.
+_STRING_OFFSET = struct.Struct(">Q")
+# (class name id, count)
+_CLASS_COUNT_RECORD = struct.Struct(">Iq")
+# (source vertex name id, edge name id, target vertex name id, count)
+_VERTEX_EDGE_VERTEX_COUNT_RECORD = struct.Struct(">IIIq")
+# (vertex name id, field name id, count)
+_DISTINCT_FIELD_VALUES_COUNT_RECORD = struct.Struct(">IIq")
+# (vertex name id, field name id, index of the first quantile in the values section, count)
+_FIELD_QUANTILES_RECORD = struct.Struct(">IIQI")
+# (type tag, payload)
+_VALUE_RECORD = struct.Struct(">B8s")
+# (vertex name id, sample ratio, index of the first of its sampled fields, sampled field count)
+_SAMPLING_SUMMARY_RECORD = struct.Struct(">IqQI")
+# (field name id, index of the first of its sampled value counts, sampled value count)
+_SAMPLED_FIELD_RECORD = struct.Struct(">IQI")
+# (type tag, payload, count)
+_SAMPLED_VALUE_COUNT_RECORD = struct.Struct(">B8sq")
+# (source vertex name id, edge name id, target vertex name id, edge direction id, index of the
+# first of its degree counts, degree count count)
+_EDGE_DEGREE_HISTOGRAM_RECORD = struct.Struct(">IIIIQI")
+# (degree, vertex count)
+_DEGREE_COUNT_RECORD = struct.Struct(">qq")
+# (source vertex name id, edge name id, target vertex name id, edge direction id, branching factor)
+_RECURSIVE_BRANCHING_FACTOR_RECORD = struct.Struct(">IIIId")
+# (vertex name id, field name group id, count)
+_JOINT_DISTINCT_FIELD_VALUES_COUNT_RECORD = struct.Struct(">IIq")
+# (vertex name id, field name group id, byte offset of the first of its sampled joint value counts
+# in their section, sampled joint value count count)
+_SAMPLED_JOINT_FIELDS_RECORD = struct.Struct(">IIQI")
+
+_NAME_ID = struct.Struct(">I")
+_INT_PAYLOAD = struct.Struct(">q")
+_FLOAT_PAYLOAD = struct.Struct(">d")
+
+# Value type tags.
+_NONE_TAG = 0
+_BOOL_TAG = 1
+_INT_TAG = 2
+_BIG_INT_TAG = 3
+_FLOAT_TAG = 4
+_DECIMAL_TAG = 5
+_STRING_TAG = 6
+_DATETIME_TAG = 7
+_DATE_TAG = 8
+
+_MIN_INT64 = -(2 ** 63)
+_MAX_INT64 = 2 ** 63 - 1
+_DATETIME_EPOCH = datetime.datetime(1970, 1, 1)
+
+_FIELD_NAME_GROUP_SEPARATOR = ","
+
+
+def _get_field_name_group_string(field_names: Tuple[str, ...]) -> str:
+    """Return the string stored in the string dictionary to represent a group of field names."""
+    return _FIELD_NAME_GROUP_SEPARATOR.join(field_names)
+
+
+def _get_value_string(value: Any) -> Optional[str]:
+    """Return the string stored in the string dictionary to represent the value, if any."""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        if not _MIN_INT64 <= value <= _MAX_INT64:
+            return str(value)
+    return None
+
+
+def _get_value_strings(values: Iterable[Any]) -> Set[str]:
+    """Return the strings stored in the string dictionary to represent the values."""
+    value_strings = set()
+    for value in values:
+        value_string = _get_value_string(value)
+        if value_string is not None:
+            value_strings.add(value_string)
+    return value_strings
+
+
+def _encode_value(value: Any, get_string_id: Callable[[str], Optional[int]]) -> Optional[bytes]:
+    """Return the value record of the value, or None if its string is not in the dictionary.
+
+    Raises:
+        ValueError, if the value is a tz-aware datetime
+        TypeError, if the value is of an unsupported type
+    """
+    if value is None:
+        return _VALUE_RECORD.pack(_NONE_TAG, bytes(8))
+    if isinstance(value, bool):
+        return _VALUE_RECORD.pack(_BOOL_TAG, _INT_PAYLOAD.pack(int(value)))
+    if isinstance(value, int):
+        if _MIN_INT64 <= value <= _MAX_INT64:
+            return _VALUE_RECORD.pack(_INT_TAG, _INT_PAYLOAD.pack(value))
+        tag = _BIG_INT_TAG
+    elif isinstance(value, float):
+        return _VALUE_RECORD.pack(_FLOAT_TAG, _FLOAT_PAYLOAD.pack(value))
+    elif isinstance(value, decimal.Decimal):
+        tag = _DECIMAL_TAG
+    elif isinstance(value, str):
+        tag = _STRING_TAG
+    elif isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            raise ValueError(
+                f"Statistics snapshots only support naive datetimes, but got the tz-aware "
+                f"datetime {value}."
+            )
+        microseconds = (value - _DATETIME_EPOCH) // datetime.timedelta(microseconds=1)
+        return _VALUE_RECORD.pack(_DATETIME_TAG, _INT_PAYLOAD.pack(microseconds))
+    elif isinstance(value, datetime.date):
+        return _VALUE_RECORD.pack(_DATE_TAG, _INT_PAYLOAD.pack(value.toordinal()))
+    else:
+        raise TypeError(
+            f"Statistics snapshots do not support values of type {type(value).__name__}: "
+            f"{value!r}."
+        )
+
+    string_id = get_string_id(str(value))
+    if string_id is None:
+        return None
+    return _VALUE_RECORD.pack(tag, _INT_PAYLOAD.pack(string_id))
+
+
+def _get_sampled_joint_value_count_record(field_count: int) -> struct.Struct:
+    """Return the struct of the sampled joint value counts of a group of field_count fields."""
+    # (type tag, payload) of each field's value, followed by the count
+    return struct.Struct(">" + "B8s" * field_count + "q")
+
+
+def _pack_records(record_struct: struct.Struct, records: Iterable[Tuple[Any, ...]]) -> bytes:
+    """Return the records packed with the struct, sorted by their packed bytes."""
+    return b"".join(sorted(record_struct.pack(*record) for record in records))
+
+
+def write_statistics_snapshot(
+    file_path: str,
+    class_counts: Dict[str, int],
+    *,
+    vertex_edge_vertex_counts: Optional[Dict[Tuple[str, str, str], int]] = None,
+    edge_degree_histograms: Optional[Dict[Tuple[str, str, str, str], Dict[int, int]]] = None,
+    recursive_branching_factors: Optional[Dict[Tuple[str, str, str, str], float]] = None,
+    distinct_field_values_counts: Optional[Dict[Tuple[str, str], int]] = None,
+    joint_distinct_field_values_counts: Optional[Dict[Tuple[str, Tuple[str, ...]], int]] = None,
+    field_quantiles: Optional[Dict[Tuple[str, str], List[Any]]] = None,
+    sampling_summaries: Optional[Dict[str, VertexSamplingSummary]] = None,
+) -> None:
+    """Write the statistics to a snapshot file, to be read with SnapshotStatistics.
+
+    The arguments have the same meaning as those of LocalStatistics. Values of quantiles and
+    sampling summaries may be None, or of type bool, int, float, Decimal, str, date or naive
+    datetime.
+
+    Args:
+        file_path: path of the snapshot file to write, overwritten if it exists
+        class_counts: see LocalStatistics
+        vertex_edge_vertex_counts: see LocalStatistics
+        edge_degree_histograms: see LocalStatistics
+        recursive_branching_factors: see LocalStatistics
+        distinct_field_values_counts: see LocalStatistics
+        joint_distinct_field_values_counts: see LocalStatistics
+        field_quantiles: see LocalStatistics
+        sampling_summaries: see LocalStatistics
+
+    Raises:
+        ValueError, if a quantile or sampled value is a tz-aware datetime
+        TypeError, if a quantile or sampled value is of an unsupported type
+    """
+    if vertex_edge_vertex_counts is None:
+        vertex_edge_vertex_counts = dict()
+    if edge_degree_histograms is None:
+        edge_degree_histograms = dict()
+    if recursive_branching_factors is None:
+        recursive_branching_factors = dict()
+    if distinct_field_values_counts is None:
+        distinct_field_values_counts = dict()
+    if joint_distinct_field_values_counts is None:
+        joint_distinct_field_values_counts = dict()
+    if field_quantiles is None:
+        field_quantiles = dict()
+    if sampling_summaries is None:
+        sampling_summaries = dict()
+
+    for (vertex_name, field_name), quantile_list in field_quantiles.items():
+        if len(quantile_list) < 2:
+            raise AssertionError(
+                f"The number of quantiles should be at least 2. Field "
+                f"{vertex_name}.{field_name} has {len(quantile_list)}."
+            )
+    for vertex_name, summary in sampling_summaries.items():
+        for field_names, joint_value_counts in summary.joint_value_counts.items():
+            for field_values in joint_value_counts:
+                if len(field_values) != len(field_names):
+                    raise AssertionError(
+                        f"Expected each tuple of values of the joint value counts of "
+                        f"{vertex_name} fields {field_names} to have one value per field, but "
+                        f"got {field_values}."
+                    )
+
+    strings: Set[str] = set(class_counts)
+    for vertex_edge_vertex_names in vertex_edge_vertex_counts:
+        strings.update(vertex_edge_vertex_names)
+    for edge_and_direction_names in edge_degree_histograms:
+        strings.update(edge_and_direction_names)
+    for edge_and_direction_names in recursive_branching_factors:
+        strings.update(edge_and_direction_names)
+    for vertex_and_field_names in distinct_field_values_counts:
+        strings.update(vertex_and_field_names)
+    for vertex_name, field_names in joint_distinct_field_values_counts:
+        strings.add(vertex_name)
+        strings.add(_get_field_name_group_string(field_names))
+    for vertex_and_field_names, quantile_list in field_quantiles.items():
+        strings.update(vertex_and_field_names)
+        strings.update(_get_value_strings(quantile_list))
+    for vertex_name, summary in sampling_summaries.items():
+        strings.add(vertex_name)
+        for field_name, value_counts in summary.value_counts.items():
+            strings.add(field_name)
+            strings.update(_get_value_strings(value_counts))
+        for field_names, joint_value_counts in summary.joint_value_counts.items():
+            strings.add(_get_field_name_group_string(field_names))
+            for field_values in joint_value_counts:
+                strings.update(_get_value_strings(field_values))
+    # The dictionary is sorted by UTF-8 encoding, so that it can be binary searched by bytes.
+    encoded_strings = sorted(string.encode("utf-8") for string in strings)
+    string_ids = {
+        encoded_string.decode("utf-8"): string_id
+        for string_id, encoded_string in enumerate(encoded_strings)
+    }
+
+    def encode_value(value: Any) -> bytes:
+        """Return the value record of a value whose string, if any, is in the dictionary."""
+        value_record = _encode_value(value, string_ids.get)
+        if value_record is None:
+            raise AssertionError(f"Expected the string of {value} to be in the dictionary.")
+        return value_record
+
+    string_offsets = [0]
+    for encoded_string in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(encoded_string))
+
+    values: List[bytes] = []
+    field_quantiles_records = []
+    for (vertex_name, field_name), quantile_list in field_quantiles.items():
+        field_quantiles_records.append(
+            (string_ids[vertex_name], string_ids[field_name], len(values), len(quantile_list))
+        )
+        values.extend(encode_value(quantile) for quantile in quantile_list)
+
+    # Histograms are written in key order, so that the degree counts of each are contiguous.
+    edge_degree_histogram_records: List[bytes] = []
+    degree_count_records: List[bytes] = []
+    for histogram_key in sorted(
+        edge_degree_histograms, key=lambda names: [string_ids[name] for name in names]
+    ):
+        degree_histogram = edge_degree_histograms[histogram_key]
+        edge_degree_histogram_records.append(
+            _EDGE_DEGREE_HISTOGRAM_RECORD.pack(
+                *(string_ids[name] for name in histogram_key),
+                len(degree_count_records),
+                len(degree_histogram),
+            )
+        )
+        degree_count_records.extend(
+            _DEGREE_COUNT_RECORD.pack(degree, vertex_count)
+            for degree, vertex_count in sorted(degree_histogram.items())
+        )
+
+    # Sampling summaries, their fields and their value counts are each written in key order,
+    # so that the fields of a vertex, and the value counts of a field, are contiguous and sorted.
+    sampling_summary_records: List[bytes] = []
+    sampled_field_records: List[bytes] = []
+    sampled_value_count_records: List[bytes] = []
+    for vertex_name in sorted(sampling_summaries, key=string_ids.__getitem__):
+        summary = sampling_summaries[vertex_name]
+        sampling_summary_records.append(
+            _SAMPLING_SUMMARY_RECORD.pack(
+                string_ids[vertex_name],
+                summary.sample_ratio,
+                len(sampled_field_records),
+                len(summary.value_counts),
+            )
+        )
+        for field_name in sorted(summary.value_counts, key=string_ids.__getitem__):
+            value_counts = summary.value_counts[field_name]
+            sampled_field_records.append(
+                _SAMPLED_FIELD_RECORD.pack(
+                    string_ids[field_name], len(sampled_value_count_records), len(value_counts)
+                )
+            )
+            sampled_value_count_records.extend(
+                sorted(
+                    encode_value(value) + _INT_PAYLOAD.pack(count)
+                    for value, count in value_counts.items()
+                )
+            )
+
+    # The sampled joint value counts of each group of fields are contiguous and sorted.
+    sampled_joint_fields_records: List[Tuple[int, int, int, int]] = []
+    sampled_joint_value_count_records: List[bytes] = []
+    sampled_joint_value_counts_length = 0
+    for vertex_name, summary in sampling_summaries.items():
+        for field_names, joint_value_counts in summary.joint_value_counts.items():
+            sampled_joint_fields_records.append(
+                (
+                    string_ids[vertex_name],
+                    string_ids[_get_field_name_group_string(field_names)],
+                    sampled_joint_value_counts_length,
+                    len(joint_value_counts),
+                )
+            )
+            group_records = sorted(
+                b"".join(map(encode_value, field_values)) + _INT_PAYLOAD.pack(count)
+                for field_values, count in joint_value_counts.items()
+            )
+            sampled_joint_value_count_records.extend(group_records)
+            sampled_joint_value_counts_length += sum(map(len, group_records))
+
+    sections = {
+        _STRING_OFFSETS_SECTION: b"".join(map(_STRING_OFFSET.pack, string_offsets)),
+        _STRING_DATA_SECTION: b"".join(encoded_strings),
+        _CLASS_COUNTS_SECTION: _pack_records(
+            _CLASS_COUNT_RECORD,
+            ((string_ids[class_name], count) for class_name, count in class_counts.items()),
+        ),
+        _VERTEX_EDGE_VERTEX_COUNTS_SECTION: _pack_records(
+            _VERTEX_EDGE_VERTEX_COUNT_RECORD,
+            (
+                (string_ids[source_name], string_ids[edge_name], string_ids[target_name], count)
+                for (
+                    source_name,
+                    edge_name,
+                    target_name,
+                ), count in vertex_edge_vertex_counts.items()
+            ),
+        ),
+        _EDGE_DEGREE_HISTOGRAMS_SECTION: b"".join(edge_degree_histogram_records),
+        _DEGREE_COUNTS_SECTION: b"".join(degree_count_records),
+        _RECURSIVE_BRANCHING_FACTORS_SECTION: _pack_records(
+            _RECURSIVE_BRANCHING_FACTOR_RECORD,
+            (
+                (*(string_ids[name] for name in branching_factor_key), branching_factor)
+                for branching_factor_key, branching_factor in recursive_branching_factors.items()
+            ),
+        ),
+        _DISTINCT_FIELD_VALUES_COUNTS_SECTION: _pack_records(
+            _DISTINCT_FIELD_VALUES_COUNT_RECORD,
+            (
+                (string_ids[vertex_name], string_ids[field_name], count)
+                for (vertex_name, field_name), count in distinct_field_values_counts.items()
+            ),
+        ),
+        _JOINT_DISTINCT_FIELD_VALUES_COUNTS_SECTION: _pack_records(
+            _JOINT_DISTINCT_FIELD_VALUES_COUNT_RECORD,
+            (
+                (
+                    string_ids[vertex_name],
+                    string_ids[_get_field_name_group_string(field_names)],
+                    count,
+                )
+                for (vertex_name, field_names,), count in joint_distinct_field_values_counts.items()
+            ),
+        ),
+        _FIELD_QUANTILES_SECTION: _pack_records(_FIELD_QUANTILES_RECORD, field_quantiles_records),
+        _VALUES_SECTION: b"".join(values),
+        _SAMPLING_SUMMARIES_SECTION: b"".join(sampling_summary_records),
+        _SAMPLED_FIELDS_SECTION: b"".join(sampled_field_records),
+        _SAMPLED_VALUE_COUNTS_SECTION: b"".join(sampled_value_count_records),
+        _SAMPLED_JOINT_FIELDS_SECTION: _pack_records(
+            _SAMPLED_JOINT_FIELDS_RECORD, sampled_joint_fields_records
+        ),
+        _SAMPLED_JOINT_VALUE_COUNTS_SECTION: b"".join(sampled_joint_value_count_records),
+    }
+
+    section_table = []
+    offset = _HEADER.size + _SECTION_TABLE_ENTRY.size * len(sections)
+    for section_id, section_data in sections.items():
+        section_table.append(_SECTION_TABLE_ENTRY.pack(section_id, offset, len(section_data)))
+        offset += len(section_data)
+
+    with open(file_path, "wb") as snapshot_file:
+        snapshot_file.write(_HEADER.pack(_MAGIC, SNAPSHOT_FORMAT_VERSION, len(sections)))
+        snapshot_file.writelines(section_table)
+        snapshot_file.writelines(sections.values())
+
+
+class SnapshotStatistics(Statistics):
+    """Statistics read lazily from a snapshot file written by write_statistics_snapshot."""
+
+    def __init__(self, file_path: str) -> None:
+        """Memory-map the snapshot file, reading only its header.
+
+        Args:
+            file_path: path of the snapshot file
+
+        Raises:
+            ValueError, if the file is not a statistics snapshot of a supported format version
+        """
+        with open(file_path, "rb") as snapshot_file:
+            self._buffer = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._buffer.size() < _HEADER.size:
+            raise ValueError(f"File {file_path} is not a statistics snapshot.")
+        magic, version, section_count = _HEADER.unpack_from(self._buffer, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"File {file_path} is not a statistics snapshot.")
+        if version != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(
+                f"Statistics snapshot {file_path} has format version {version}, but only version "
+                f"{SNAPSHOT_FORMAT_VERSION} is supported."
+            )
+
+        # Mapping section id -> (offset, length) of the section in the file.
+        self._sections: Dict[int, Tuple[int, int]] = {}
+        for section_index in range(section_count):
+            section_id, offset, length = _SECTION_TABLE_ENTRY.unpack_from(
+                self._buffer, _HEADER.size + section_index * _SECTION_TABLE_ENTRY.size
+            )
+            self._sections[section_id] = (offset, length)
+        self._string_count = self._sections[_STRING_OFFSETS_SECTION][1] // _STRING_OFFSET.size - 1
+
+    def close(self) -> None:
+        """Close the memory map of the snapshot file."""
+        self._buffer.close()
+
+    def __str__(self) -> str:
+        """Return a human-readable unicode representation of the SnapshotStatistics object."""
+        return f"SnapshotStatistics({self._buffer.size()} bytes)"
+
+    def _get_encoded_string(self, string_id: int) -> bytes:
+        """Return the UTF-8 encoding of the string with the given id in the string dictionary."""
+        offsets_offset, _ = self._sections[_STRING_OFFSETS_SECTION]
+        data_offset, _ = self._sections[_STRING_DATA_SECTION]
+        start, end = struct.unpack_from(
+            ">QQ", self._buffer, offsets_offset + string_id * _STRING_OFFSET.size
+        )
+        return self._buffer[data_offset + start : data_offset + end]
+
+    def _find_string_id(self, string: str) -> Optional[int]:
+        """Return the id of the string in the string dictionary, or None if it is not in it."""
+        encoded_string = string.encode("utf-8")
+        low, high = 0, self._string_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._get_encoded_string(middle) < encoded_string:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._string_count and self._get_encoded_string(low) == encoded_string:
+            return low
+        return None
+
+    def _find_record(
+        self,
+        section_id: int,
+        record_struct: struct.Struct,
+        key: bytes,
+        first_index: int = 0,
+        record_count: Optional[int] = None,
+        byte_offset: int = 0,
+    ) -> Optional[Tuple[Any, ...]]:
+        """Binary search the records of the section for the one starting with the key bytes.
+
+        Args:
+            section_id: id of the section to search
+            record_struct: struct of the records of the section
+            key: the leading bytes of the record to find
+            first_index: index of the first record of the sorted range of records to search
+            record_count: number of records in the range to search, all remaining ones if None
+            byte_offset: offset within the section from which records are indexed, for sections
+                         whose records differ in width between ranges of records
+
+        Returns:
+            the unpacked record, or None if there is no record starting with the key bytes
+        """
+        section_offset, section_length = self._sections[section_id]
+        section_offset += byte_offset
+        section_length -= byte_offset
+        if record_count is None:
+            record_count = section_length // record_struct.size - first_index
+
+        def get_key(index: int) -> bytes:
+            """Return the leading key bytes of the record with the given index."""
+            record_offset = section_offset + index * record_struct.size
+            return self._buffer[record_offset : record_offset + len(key)]
+
+        low, high = first_index, first_index + record_count
+        while low < high:
+            middle = (low + high) // 2
+            if get_key(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < first_index + record_count and get_key(low) == key:
+            return record_struct.unpack_from(
+                self._buffer, section_offset + low * record_struct.size
+            )
+        return None
+
+    def _encode_name_ids(self, names: Iterable[str]) -> Optional[bytes]:
+        """Return the key bytes of the names' ids, or None if any of them is not in the snapshot."""
+        key = b""
+        for name in names:
+            string_id = self._find_string_id(name)
+            if string_id is None:
+                return None
+            key += _NAME_ID.pack(string_id)
+        return key
+
+    def _find_count(self, section_id: int, record_struct: struct.Struct, *names: str) -> Any:
+        """Return the count, or other last element, of the record keyed by the names, or None."""
+        key = self._encode_name_ids(names)
+        if key is None:
+            return None
+        record = self._find_record(section_id, record_struct, key)
+        if record is None:
+            return None
+        return record[-1]
+
+    def _decode_value(self, tag: int, payload: bytes) -> Any:
+        """Return the value of the value record with the given type tag and payload."""
+        if tag == _NONE_TAG:
+            return None
+        if tag == _FLOAT_TAG:
+            return _FLOAT_PAYLOAD.unpack(payload)[0]
+        (integer,) = _INT_PAYLOAD.unpack(payload)
+        if tag == _BOOL_TAG:
+            return bool(integer)
+        if tag == _INT_TAG:
+            return integer
+        if tag == _DATETIME_TAG:
+            return _DATETIME_EPOCH + datetime.timedelta(microseconds=integer)
+        if tag == _DATE_TAG:
+            return datetime.date.fromordinal(integer)
+
+        string = self._get_encoded_string(integer).decode("utf-8")
+        if tag == _STRING_TAG:
+            return string
+        if tag == _BIG_INT_TAG:
+            return int(string)
+        if tag == _DECIMAL_TAG:
+            return decimal.Decimal(string)
+        raise AssertionError(f"Unexpected value type tag {tag} in statistics snapshot.")
+
+    def get_class_count(self, class_name: str) -> Optional[int]:
+        """See base class."""
+        return self._find_count(_CLASS_COUNTS_SECTION, _CLASS_COUNT_RECORD, class_name)
+
+    def get_vertex_edge_vertex_count(
+        self, vertex_source_class_name: str, edge_class_name: str, vertex_target_class_name: str
+    ) -> Optional[int]:
+        """See base class."""
+        return self._find_count(
+            _VERTEX_EDGE_VERTEX_COUNTS_SECTION,
+            _VERTEX_EDGE_VERTEX_COUNT_RECORD,
+            vertex_source_class_name,
+            edge_class_name,
+            vertex_target_class_name,
+        )
+
+    def get_edge_degree_histogram(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[Dict[int, int]]:
+        """See base class."""
+        key = self._encode_name_ids(
+            (vertex_source_class_name, edge_class_name, vertex_target_class_name, edge_direction)
+        )
+        if key is None:
+            return None
+        record = self._find_record(
+            _EDGE_DEGREE_HISTOGRAMS_SECTION, _EDGE_DEGREE_HISTOGRAM_RECORD, key
+        )
+        if record is None:
+            return None
+        first_degree_count_index, degree_count_count = record[-2:]
+        degree_counts_offset, _ = self._sections[_DEGREE_COUNTS_SECTION]
+        degree_histogram: Dict[int, int] = {}
+        for index in range(first_degree_count_index, first_degree_count_index + degree_count_count):
+            degree, vertex_count = _DEGREE_COUNT_RECORD.unpack_from(
+                self._buffer, degree_counts_offset + index * _DEGREE_COUNT_RECORD.size
+            )
+            degree_histogram[degree] = vertex_count
+        return degree_histogram
+
+    def get_recursive_branching_factor(
+        self,
+        vertex_source_class_name: str,
+        edge_class_name: str,
+        vertex_target_class_name: str,
+        edge_direction: str,
+    ) -> Optional[float]:
+        """See base class."""
+        return self._find_count(
+            _RECURSIVE_BRANCHING_FACTORS_SECTION,
+            _RECURSIVE_BRANCHING_FACTOR_RECORD,
+            vertex_source_class_name,
+            edge_class_name,
+            vertex_target_class_name,
+            edge_direction,
+        )
+
+    def get_distinct_field_values_count(self, vertex_name: str, field_name: str) -> Optional[int]:
+        """See base class."""
+        return self._find_count(
+            _DISTINCT_FIELD_VALUES_COUNTS_SECTION,
+            _DISTINCT_FIELD_VALUES_COUNT_RECORD,
+            vertex_name,
+            field_name,
+        )
+
+    def get_joint_distinct_field_values_count(
+        self, vertex_name: str, field_names: Tuple[str, ...]
+    ) -> Optional[int]:
+        """See base class."""
+        return self._find_count(
+            _JOINT_DISTINCT_FIELD_VALUES_COUNTS_SECTION,
+            _JOINT_DISTINCT_FIELD_VALUES_COUNT_RECORD,
+            vertex_name,
+            _get_field_name_group_string(field_names),
+        )
+
+    def get_field_quantiles(self, vertex_name: str, field_name: str) -> Optional[List[Any]]:
+        """See base class."""
+        key = self._encode_name_ids((vertex_name, field_name))
+        if key is None:
+            return None
+        record = self._find_record(_FIELD_QUANTILES_SECTION, _FIELD_QUANTILES_RECORD, key)
+        if record is None:
+            return None
+        _, _, first_value_index, value_count = record
+        values_offset, _ = self._sections[_VALUES_SECTION]
+        return [
+            self._decode_value(
+                *_VALUE_RECORD.unpack_from(
+                    self._buffer, values_offset + value_index * _VALUE_RECORD.size
+                )
+            )
+            for value_index in range(first_value_index, first_value_index + value_count)
+        ]
+
+    def _find_sampled_field(
+        self, vertex_name: str, field_name: str
+    ) -> Optional[Tuple[int, int, int]]:
+        """Return the sample ratio and the range of sampled value count records of the field.
+
+        Args:
+            vertex_name: vertex on which the field is defined
+            field_name: field whose sampled value counts to find
+
+        Returns:
+            tuple (sample ratio, index of the first value count record, number of value count
+            records), or None if the field was not sampled
+        """
+        vertex_key = self._encode_name_ids((vertex_name,))
+        field_key = self._encode_name_ids((field_name,))
+        if vertex_key is None or field_key is None:
+            return None
+        summary_record = self._find_record(
+            _SAMPLING_SUMMARIES_SECTION, _SAMPLING_SUMMARY_RECORD, vertex_key
+        )
+        if summary_record is None:
+            return None
+        _, sample_ratio, first_field_index, field_count = summary_record
+        field_record = self._find_record(
+            _SAMPLED_FIELDS_SECTION,
+            _SAMPLED_FIELD_RECORD,
+            field_key,
+            first_index=first_field_index,
+            record_count=field_count,
+        )
+        if field_record is None:
+            return None
+        _, first_value_count_index, value_count_count = field_record
+        return sample_ratio, first_value_count_index, value_count_count
+
+    def _find_sampled_value_count(
+        self, sampled_field: Tuple[int, int, int], value: Any
+    ) -> Optional[int]:
+        """Return the sampled count of the value, given the result of _find_sampled_field."""
+        _, first_value_count_index, value_count_count = sampled_field
+        try:
+            value_key = _encode_value(value, self._find_string_id)
+        except (TypeError, ValueError):
+            # Values that cannot be written to a snapshot cannot have been sampled.
+            return None
+        if value_key is None:
+            return None
+        value_count_record = self._find_record(
+            _SAMPLED_VALUE_COUNTS_SECTION,
+            _SAMPLED_VALUE_COUNT_RECORD,
+            value_key,
+            first_index=first_value_count_index,
+            record_count=value_count_count,
+        )
+        return None if value_count_record is None else value_count_record[-1]
+
+    def get_value_count(self, vertex_name: str, field_name: str, value: Any) -> Optional[float]:
+        """See base class.
+
+        Sampled values are matched by their type as well as their value, so e.g. the int 1 does
+        not match a sampled float 1.0.
+        """
+        sampled_field = self._find_sampled_field(vertex_name, field_name)
+        if sampled_field is None:
+            return None
+        sample_ratio = sampled_field[0]
+        return estimate_value_count_from_sample(
+            self._find_sampled_value_count(sampled_field, value), sample_ratio
+        )
+
+    def get_value_counts(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[List[float]]:
+        """See base class.
+
+        The sampled field is looked up once, after which each value costs one binary search.
+        """
+        if not values:
+            return []
+        sampled_field = self._find_sampled_field(vertex_name, field_name)
+        if sampled_field is None:
+            return None
+        sample_ratio = sampled_field[0]
+        return [
+            estimate_value_count_from_sample(
+                self._find_sampled_value_count(sampled_field, value), sample_ratio
+            )
+            for value in values
+        ]
+
+    def get_value_counts_with_bounds(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[Tuple[List[float], Optional[List[Tuple[float, float]]]]]:
+        """See base class.
+
+        The sampled field is looked up once, after which each value costs one binary search.
+        """
+        if not values:
+            return [], []
+        sampled_field = self._find_sampled_field(vertex_name, field_name)
+        if sampled_field is None:
+            return None
+        sample_ratio = sampled_field[0]
+        sampled_value_counts = [
+            self._find_sampled_value_count(sampled_field, value) for value in values
+        ]
+        return (
+            [
+                estimate_value_count_from_sample(sampled_value_count, sample_ratio)
+                for sampled_value_count in sampled_value_counts
+            ],
+            [
+                estimate_value_count_bounds_from_sample(sampled_value_count, sample_ratio)
+                for sampled_value_count in sampled_value_counts
+            ],
+        )
+
+    def _find_sampled_joint_fields(
+        self, vertex_name: str, field_names: Tuple[str, ...]
+    ) -> Optional[Tuple[int, int, int]]:
+        """Return the sample ratio and the range of sampled joint value count records of the fields.
+
+        Args:
+            vertex_name: vertex on which the fields are defined
+            field_names: sorted names of the fields whose sampled joint value counts to find
+
+        Returns:
+            tuple (sample ratio, byte offset of the joint value count records within their section,
+            number of joint value count records), or None if the fields were not sampled jointly
+        """
+        vertex_key = self._encode_name_ids((vertex_name,))
+        joint_fields_key = self._encode_name_ids(
+            (vertex_name, _get_field_name_group_string(field_names))
+        )
+        if vertex_key is None or joint_fields_key is None:
+            return None
+        summary_record = self._find_record(
+            _SAMPLING_SUMMARIES_SECTION, _SAMPLING_SUMMARY_RECORD, vertex_key
+        )
+        joint_fields_record = self._find_record(
+            _SAMPLED_JOINT_FIELDS_SECTION, _SAMPLED_JOINT_FIELDS_RECORD, joint_fields_key
+        )
+        if summary_record is None or joint_fields_record is None:
+            return None
+        sample_ratio = summary_record[1]
+        _, _, byte_offset, joint_value_count_count = joint_fields_record
+        return sample_ratio, byte_offset, joint_value_count_count
+
+    def _find_sampled_joint_value_count(
+        self,
+        sampled_joint_fields: Tuple[int, int, int],
+        field_names: Tuple[str, ...],
+        values: Tuple[Any, ...],
+    ) -> Optional[int]:
+        """Return the sampled joint count of the values, given _find_sampled_joint_fields."""
+        _, byte_offset, joint_value_count_count = sampled_joint_fields
+        if len(values) != len(field_names):
+            return None
+        value_keys: List[bytes] = []
+        for value in values:
+            try:
+                value_key = _encode_value(value, self._find_string_id)
+            except (TypeError, ValueError):
+                # Values that cannot be written to a snapshot cannot have been sampled.
+                return None
+            if value_key is None:
+                return None
+            value_keys.append(value_key)
+
+        joint_value_count_record = self._find_record(
+            _SAMPLED_JOINT_VALUE_COUNTS_SECTION,
+            _get_sampled_joint_value_count_record(len(field_names)),
+            b"".join(value_keys),
+            record_count=joint_value_count_count,
+            byte_offset=byte_offset,
+        )
+        return None if joint_value_count_record is None else joint_value_count_record[-1]
+
+    def get_joint_value_count(
+        self, vertex_name: str, field_names: Tuple[str, ...], values: Tuple[Any, ...]
+    ) -> Optional[float]:
+        """See base class."""
+        sampled_joint_fields = self._find_sampled_joint_fields(vertex_name, field_names)
+        if sampled_joint_fields is None:
+            return None
+        sample_ratio = sampled_joint_fields[0]
+        return estimate_value_count_from_sample(
+            self._find_sampled_joint_value_count(sampled_joint_fields, field_names, values),
+            sample_ratio,
+        )
+
+    def get_joint_value_counts(
+        self,
+        vertex_name: str,
+        field_names: Tuple[str, ...],
+        values_list: Collection[Tuple[Any, ...]],
+    ) -> Optional[List[float]]:
+        """See base class.
+
+        The sampled fields are looked up once, after which each tuple of values costs one binary
+        search.
+        """
+        if not values_list:
+            return []
+        sampled_joint_fields = self._find_sampled_joint_fields(vertex_name, field_names)
+        if sampled_joint_fields is None:
+            return None
+        sample_ratio = sampled_joint_fields[0]
+        return [
+            estimate_value_count_from_sample(
+                self._find_sampled_joint_value_count(sampled_joint_fields, field_names, values),
+                sample_ratio,
+            )
+            for values in values_list
+        ]
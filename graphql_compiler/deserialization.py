@@ -1,7 +1,7 @@
 # Copyright 2020-present Kensho Technologies, LLC.
 """Convert values to their underlying GraphQLType."""
 from types import MappingProxyType
-from typing import Any, Callable, Mapping, Tuple, Type
+from typing import Any, Callable, FrozenSet, Mapping, Tuple, Type
 
 from graphql import (
     GraphQLBoolean,
@@ -82,6 +82,65 @@ _ALLOWED_TYPES_AND_DESERIALIZATION_FUNCTIONS: Mapping[
 )
 
 
+# For each scalar type, the python types whose values, excluding subclasses, are already
+# deserialized, and which are therefore returned unchanged by the deserialization function.
+_IDENTITY_DESERIALIZATION_PYTHON_TYPES: Mapping[str, FrozenSet[Type]] = MappingProxyType(
+    {
+        GraphQLFloat.name: frozenset({float}),
+        GraphQLInt.name: frozenset({int}),
+        GraphQLString.name: frozenset({str}),
+        GraphQLBoolean.name: frozenset({bool}),
+        GraphQLID.name: frozenset({str}),
+    }
+)
+
+
+def _make_scalar_value_deserializer(expected_type: GraphQLScalarType) -> Callable[[Any], Any]:
+    """Return a function deserializing values of the given GraphQLScalarType.
+
+    See deserialize_scalar_value for the accepted encodings of each type, and the values produced.
+    """
+    types_and_deserialization = _ALLOWED_TYPES_AND_DESERIALIZATION_FUNCTIONS.get(expected_type.name)
+    if types_and_deserialization is None:
+        raise AssertionError(
+            f"Unexpected GraphQLType {expected_type}. No deserialization function known."
+        )
+    expected_python_types, deserialization_function = types_and_deserialization
+    allows_boolean_values = is_same_type(GraphQLBoolean, expected_type)
+    identity_python_types = _IDENTITY_DESERIALIZATION_PYTHON_TYPES.get(
+        expected_type.name, frozenset()
+    )
+
+    def deserialize(value: Any) -> Any:
+        """Deserialize the value, raising ValueError if it is not appropriate for the type."""
+        if type(value) in identity_python_types:
+            return value
+
+        # Explicitly disallow passing boolean values for non-boolean types.
+        if isinstance(value, bool) and not allows_boolean_values:
+            raise ValueError(
+                f"Cannot deserialize boolean value {value} to non-GraphQLBoolean type "
+                f"{expected_type}."
+            )
+
+        # Ensure value has an appropriate type and deserialize the value.
+        if not isinstance(value, expected_python_types):
+            raise ValueError(
+                f"{value} ({type(value)} cannot be deserialized to GraphQL type {expected_type}."
+            )
+        return deserialization_function(value)
+
+    return deserialize
+
+
+_SCALAR_VALUE_DESERIALIZERS: Mapping[str, Callable[[Any], Any]] = MappingProxyType(
+    {
+        scalar_type.name: _make_scalar_value_deserializer(scalar_type)
+        for scalar_type in SUPPORTED_SCALAR_TYPES
+    }
+)
+
+
 def deserialize_scalar_value(expected_type: GraphQLScalarType, value: Any) -> Any:
     """Convert a scalar value to the appropriate type for the given GraphQLScalarType.
 
@@ -114,25 +173,50 @@ def deserialize_scalar_value(expected_type: GraphQLScalarType, value: Any) -> An
         ValueError: if the value is not appropriate for the type. ValueError is chosen because
                     it is already the base case of exceptions raised by the GraphQL parsers.
     """
-    types_and_deserialization = _ALLOWED_TYPES_AND_DESERIALIZATION_FUNCTIONS.get(expected_type.name)
-    if types_and_deserialization is None:
-        raise AssertionError(
-            f"Unexpected GraphQLType {expected_type}. No deserialization function known."
-        )
+    return make_value_deserializer(expected_type)(value)
 
-    # Explicitly disallow passing boolean values for non-boolean types.
-    if isinstance(value, bool) and not is_same_type(GraphQLBoolean, expected_type):
-        raise ValueError(
-            f"Cannot deserialize boolean value {value} to non-GraphQLBoolean type {expected_type}."
-        )
 
-    # Ensure value has an appropriate type and deserialize the value.
-    expected_python_types, deserialization_function = types_and_deserialization
-    if not isinstance(value, expected_python_types):
-        raise ValueError(
-            f"{value} ({type(value)} cannot be deserialized to GraphQL type {expected_type}."
-        )
-    return deserialization_function(value)
+def make_value_deserializer(expected_type: QueryArgumentGraphQLType) -> Callable[[Any], Any]:
+    """Return a function equivalent to deserialize_value for the given GraphQLType.
+
+    The type of the value is inspected once, when the deserializer is made, instead of each time
+    a value is deserialized. Deserializers should therefore be made once and reused, e.g. for all
+    executions of a compiled query.
+
+    Args:
+        expected_type: a GraphQLType to which values should be converted.
+
+    Returns:
+        function taking a value that can be interpreted as being of expected_type, and returning
+        the value converted to that type. It raises ValueError if the value is not appropriate
+        for the type.
+    """
+    stripped_type = strip_non_null_from_type(expected_type)
+    if isinstance(stripped_type, GraphQLList):
+        inner_stripped_type = strip_non_null_from_type(stripped_type.of_type)
+        deserialize_element = make_value_deserializer(inner_stripped_type)
+        identity_element_python_types: FrozenSet[Type] = frozenset()
+        if isinstance(inner_stripped_type, GraphQLScalarType):
+            identity_element_python_types = _IDENTITY_DESERIALIZATION_PYTHON_TYPES.get(
+                inner_stripped_type.name, frozenset()
+            )
+
+        def deserialize_list(value: Any) -> Any:
+            """Deserialize the list, raising ValueError if it is not appropriate for the type."""
+            if not isinstance(value, list):
+                raise ValueError(f"Cannot deserialize non-list value {value} to GraphQLList type.")
+            if identity_element_python_types.issuperset(map(type, value)):
+                return list(value)
+            return [deserialize_element(element) for element in value]
+
+        return deserialize_list
+    else:
+        scalar_value_deserializer = _SCALAR_VALUE_DESERIALIZERS.get(stripped_type.name)
+        if scalar_value_deserializer is None:
+            raise AssertionError(
+                f"Unexpected GraphQLType {stripped_type}. No deserialization function known."
+            )
+        return scalar_value_deserializer
 
 
 def deserialize_value(expected_type: QueryArgumentGraphQLType, value: Any) -> Any:
@@ -161,12 +245,4 @@ def deserialize_value(expected_type: QueryArgumentGraphQLType, value: Any) -> An
         ValueError: if the value is not appropriate for the type. ValueError is chosen because
                     it is already the base case of exceptions raised by the GraphQL parsers.
     """
-    stripped_type = strip_non_null_from_type(expected_type)
-    if isinstance(stripped_type, GraphQLList):
-        if not isinstance(value, list):
-            raise ValueError(f"Cannot deserialize non-list value {value} to GraphQLList type.")
-        inner_stripped_type = strip_non_null_from_type(stripped_type.of_type)
-
-        return [deserialize_scalar_value(inner_stripped_type, element) for element in value]
-    else:
-        return deserialize_scalar_value(stripped_type, value)
+    return make_value_deserializer(expected_type)(value)
@@ -0,0 +1,273 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Compact, column-oriented storage of the results of a compiled query.
+
+Storing each result row as a dict repeats every output name in every row, and stores every value
+as a separate python object. ColumnarQueryResults instead stores each output as a column: Int,
+Float and Boolean values are packed into fixed-width arrays, folded outputs are stored as an array
+of offsets into a single column holding the elements of all of their lists, and nulls are recorded
+in a per-column mask that is only allocated once the column contains a null.
+
+The fixed-width arrays support the buffer protocol, so they can be exported to NumPy without
+copying. NumPy is not a dependency of the compiler, and is only imported when exporting to it.
+"""
+from array import array
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from graphql import (
+    GraphQLBoolean,
+    GraphQLFloat,
+    GraphQLInt,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLScalarType,
+)
+
+from ..compiler.compiler_frontend import OutputMetadata
+from .result_decoding import make_scalar_value_decoder
+
+
+# The array typecode in which values of each scalar type are packed, for types whose values have
+# a fixed-width binary representation. Values of all other types are stored in lists.
+_FIXED_WIDTH_TYPECODES: Mapping[str, str] = {
+    GraphQLInt.name: "q",
+    GraphQLFloat.name: "d",
+    GraphQLBoolean.name: "B",
+}
+
+# The NumPy dtype whose binary representation matches that of each array typecode above.
+_NUMPY_DTYPES: Mapping[str, str] = {
+    "q": "int64",
+    "d": "float64",
+    "B": "bool",
+}
+
+# The value stored in fixed-width arrays in place of nulls, which are recorded in the null mask.
+_NULL_PLACEHOLDER = 0
+
+
+def _import_numpy() -> Any:
+    """Import and return the numpy module, raising a descriptive error if it is not installed."""
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError(
+            "NumPy is required to export columnar query results to NumPy arrays, but it is not "
+            "installed."
+        ) from e
+    return numpy
+
+
+class ScalarColumn:
+    """The values of a single output, or the elements of all lists of a folded output."""
+
+    def __init__(self, scalar_type: GraphQLScalarType) -> None:
+        """Create an empty column for values of the given scalar type."""
+        self.scalar_type = scalar_type
+
+        # The values of the column, with nulls replaced by a placeholder. Values are packed in an
+        # array if their type has a fixed-width binary representation, and stored in a list
+        # otherwise. Int columns fall back to a list if a value does not fit in 64 bits.
+        self.values: Union[array, List[Any]]
+        typecode = _FIXED_WIDTH_TYPECODES.get(scalar_type.name)
+        if typecode is None:
+            self.values = []
+        else:
+            self.values = array(typecode)
+
+        # One byte per value, 1 for nulls and 0 otherwise. None if the column contains no nulls.
+        self.null_mask: Optional[bytearray] = None
+
+        self._decode_value = make_scalar_value_decoder(scalar_type)
+
+    def __len__(self) -> int:
+        """Return the number of values in the column."""
+        return len(self.values)
+
+    def append(self, value: Any) -> None:
+        """Decode the value to the column's type, and append it to the column."""
+        if value is None:
+            if self.null_mask is None:
+                self.null_mask = bytearray(len(self.values))
+            self.null_mask.append(1)
+            self.values.append(_NULL_PLACEHOLDER)
+            return
+
+        value = self._decode_value(value)
+        if self.null_mask is not None:
+            self.null_mask.append(0)
+        try:
+            self.values.append(value)
+        except OverflowError:
+            if not isinstance(self.values, array):
+                raise
+            # Ints that do not fit in 64 bits cannot be packed, so store the column in a list.
+            self.values = self.values.tolist()
+            self.values.append(value)
+
+    def extend(self, values: Iterable[Any]) -> None:
+        """Decode each of the values to the column's type, and append them to the column."""
+        for value in values:
+            self.append(value)
+
+    def to_list(self) -> List[Any]:
+        """Return the column's values as python objects of the decoded type, with nulls as None."""
+        if isinstance(self.values, list):
+            values = list(self.values)
+        elif self.values.typecode == _FIXED_WIDTH_TYPECODES[GraphQLBoolean.name]:
+            values = [bool(value) for value in self.values]
+        else:
+            values = self.values.tolist()
+        if self.null_mask is None:
+            return values
+        return [None if is_null else value for value, is_null in zip(values, self.null_mask)]
+
+    def to_numpy(self) -> Any:
+        """Return the column as a NumPy array, or a NumPy masked array if it contains nulls.
+
+        Columns packed into fixed-width arrays are exported without copying, so the column must
+        not be appended to while the exported array is in use. Other columns are copied into
+        arrays of dtype object.
+        """
+        numpy = _import_numpy()
+        if isinstance(self.values, list):
+            data = numpy.empty(len(self.values), dtype=object)
+            data[:] = self.values
+        elif len(self.values) == 0:
+            data = numpy.empty(0, dtype=_NUMPY_DTYPES[self.values.typecode])
+        else:
+            data = numpy.frombuffer(self.values, dtype=_NUMPY_DTYPES[self.values.typecode])
+
+        if self.null_mask is None:
+            return data
+        return numpy.ma.MaskedArray(
+            data, mask=numpy.frombuffer(self.null_mask, dtype=bool), copy=False
+        )
+
+
+class FoldedColumn:
+    """The lists of a folded output, stored as offsets into a column of all of their elements."""
+
+    def __init__(self, element_type: GraphQLScalarType) -> None:
+        """Create an empty column for lists of values of the given scalar type."""
+        # The elements of the i-th list are elements[offsets[i]:offsets[i + 1]].
+        self.offsets = array("q", [0])
+        self.elements = ScalarColumn(element_type)
+
+        # One byte per list, 1 for null lists and 0 otherwise. None if no list is null.
+        self.null_mask: Optional[bytearray] = None
+
+    def __len__(self) -> int:
+        """Return the number of lists in the column."""
+        return len(self.offsets) - 1
+
+    def append(self, value: Optional[List[Any]]) -> None:
+        """Append the list, decoding each of its elements to the column's element type."""
+        if value is None:
+            if self.null_mask is None:
+                self.null_mask = bytearray(len(self))
+            self.null_mask.append(1)
+        else:
+            if self.null_mask is not None:
+                self.null_mask.append(0)
+            self.elements.extend(value)
+        self.offsets.append(len(self.elements))
+
+    def to_list(self) -> List[Optional[List[Any]]]:
+        """Return the column's lists as python lists of decoded values, with null lists as None."""
+        elements = self.elements.to_list()
+        offsets = self.offsets
+        lists: List[Optional[List[Any]]] = [
+            elements[offsets[index] : offsets[index + 1]] for index in range(len(self))
+        ]
+        if self.null_mask is None:
+            return lists
+        return [None if is_null else value for value, is_null in zip(lists, self.null_mask)]
+
+    def to_numpy(self) -> Tuple[Any, Any]:
+        """Return the column's offsets and elements as NumPy arrays, see ScalarColumn.to_numpy.
+
+        Null lists are represented like empty lists. Use null_mask to tell them apart.
+        """
+        numpy = _import_numpy()
+        return numpy.frombuffer(self.offsets, dtype="int64"), self.elements.to_numpy()
+
+
+class ColumnarQueryResults:
+    """The results of a compiled query, stored one output at a time."""
+
+    def __init__(
+        self,
+        output_metadata: Dict[str, OutputMetadata],
+        fold_decoders: Optional[Dict[str, Callable[[Any], List[Any]]]] = None,
+    ) -> None:
+        """Create empty results for a query with the given outputs.
+
+        Args:
+            output_metadata: mapping of output name to output metadata, e.g. the output_metadata
+                             of the CompilationResult of the query
+            fold_decoders: optional dict mapping the name of folded outputs returned by the
+                           database in a backend-specific encoding to the function decoding their
+                           values to lists, e.g. as returned by get_mssql_fold_decoders. The lists
+                           are decoded while they are appended, without storing them in result
+                           dicts first.
+        """
+        self.output_metadata = output_metadata
+        self.columns: Dict[str, Union[ScalarColumn, FoldedColumn]] = {}
+        for out_name, metadata in output_metadata.items():
+            output_type = metadata.type
+            if isinstance(output_type, GraphQLNonNull):
+                output_type = output_type.of_type
+            if isinstance(output_type, GraphQLList):
+                element_type = output_type.of_type
+                if isinstance(element_type, GraphQLNonNull):
+                    element_type = element_type.of_type
+                self.columns[out_name] = FoldedColumn(element_type)
+            elif isinstance(output_type, GraphQLScalarType):
+                self.columns[out_name] = ScalarColumn(output_type)
+            else:
+                raise AssertionError(
+                    f"Unexpected type {metadata.type} of output {out_name}, expected a scalar "
+                    f"type or a list of scalar type."
+                )
+
+        self._fold_decoders = {} if fold_decoders is None else fold_decoders
+        self._row_count = 0
+
+    def __len__(self) -> int:
+        """Return the number of result rows."""
+        return self._row_count
+
+    def append_row(self, row: Mapping[str, Any]) -> None:
+        """Append a result row, e.g. a SQLAlchemy RowProxy or a result dict, to the columns."""
+        for out_name, column in self.columns.items():
+            value = row[out_name]
+            fold_decoder = self._fold_decoders.get(out_name)
+            if fold_decoder is not None and value is not None:
+                value = fold_decoder(value)
+            column.append(value)
+        self._row_count += 1
+
+    def extend_rows(self, rows: Iterable[Mapping[str, Any]]) -> None:
+        """Append each of the result rows to the columns."""
+        for row in rows:
+            self.append_row(row)
+
+    def get_column(self, out_name: str) -> List[Any]:
+        """Return the values of the output as a list of python objects, in row order."""
+        return self.columns[out_name].to_list()
+
+    def to_numpy(self, out_name: str) -> Any:
+        """Return the output's column as NumPy arrays, without copying fixed-width values.
+
+        See ScalarColumn.to_numpy and FoldedColumn.to_numpy for the arrays returned for scalar and
+        folded outputs respectively.
+        """
+        return self.columns[out_name].to_numpy()
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Return the results as a list of result dicts, as returned when executing the query."""
+        column_values = {out_name: self.get_column(out_name) for out_name in self.columns}
+        return [
+            {out_name: values[index] for out_name, values in column_values.items()}
+            for index in range(self._row_count)
+        ]
@@ -0,0 +1,204 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Decode raw query result values to the python types of the query's outputs.
+
+Database drivers return values whose python types depend on the backend and on the driver, e.g.
+dates may be returned as ISO-8601 strings and decimals as floats. The decoders in this module
+convert them to the python types GraphQL values of the output's type are deserialized to. All
+decisions depending on the output types are made once per query, and values are decoded one
+column at a time, so that columns whose values already have the right python type are checked
+without calling any python function per value.
+"""
+import datetime
+import decimal
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Any, Callable, Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Type
+
+from graphql import (
+    GraphQLBoolean,
+    GraphQLFloat,
+    GraphQLID,
+    GraphQLInt,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLScalarType,
+    GraphQLString,
+)
+
+from ..compiler.compiler_frontend import OutputMetadata
+from ..compiler.helpers import strip_non_null_from_type
+from ..deserialization import make_value_deserializer
+from ..global_utils import assert_set_equality
+from ..schema import SUPPORTED_SCALAR_TYPES, GraphQLDate, GraphQLDateTime, GraphQLDecimal
+
+
+# The python type of the decoded values of each scalar type.
+_DECODED_PYTHON_TYPES: Mapping[str, Type] = MappingProxyType(
+    {
+        GraphQLDate.name: datetime.date,
+        GraphQLDateTime.name: datetime.datetime,
+        GraphQLFloat.name: float,
+        GraphQLDecimal.name: decimal.Decimal,
+        GraphQLInt.name: int,
+        GraphQLString.name: str,
+        GraphQLBoolean.name: bool,
+        GraphQLID.name: str,
+    }
+)
+assert_set_equality(
+    set(_DECODED_PYTHON_TYPES.keys()),
+    {graphql_type.name for graphql_type in SUPPORTED_SCALAR_TYPES},
+)
+
+# Conversions of driver values that are not valid serialized values of the scalar type,
+# but that drivers commonly return for it, e.g. for DATETIME or NUMERIC SQL columns.
+_DRIVER_VALUE_CONVERTERS: Mapping[str, Mapping[Type, Callable[[Any], Any]]] = MappingProxyType(
+    {
+        GraphQLDate.name: MappingProxyType({datetime.datetime: datetime.datetime.date}),
+        GraphQLFloat.name: MappingProxyType({decimal.Decimal: float}),
+    }
+)
+
+
+def make_scalar_value_decoder(scalar_type: GraphQLScalarType) -> Callable[[Any], Any]:
+    """Return a function decoding a single non-null result value of the given scalar type.
+
+    Values that already have the python type of the scalar type's decoded values are returned
+    unchanged. Other values raise ValueError if they cannot be decoded to the scalar type.
+    """
+    decoded_python_type = _DECODED_PYTHON_TYPES[scalar_type.name]
+    driver_value_converters = _DRIVER_VALUE_CONVERTERS.get(scalar_type.name, {})
+    deserialize = make_value_deserializer(scalar_type)
+
+    def decode(value: Any) -> Any:
+        """Decode the value, raising ValueError if it cannot be decoded to the scalar type."""
+        value_type = type(value)
+        if value_type is decoded_python_type:
+            return value
+        driver_value_converter = driver_value_converters.get(value_type)
+        if driver_value_converter is not None:
+            return driver_value_converter(value)
+        return deserialize(value)
+
+    return decode
+
+
+class _ColumnDecoder(NamedTuple):
+    # Name of the output decoded by this decoder.
+    out_name: str
+
+    # Python types of values that need no decoding, including that of None. Columns whose values
+    # all have one of these exact python types are not decoded at all. If None, every value
+    # of the column needs to be decoded.
+    decoded_python_types: Optional[FrozenSet[Type]]
+
+    # Function decoding a single value of the column.
+    decode_value: Callable[[Any], Any]
+
+
+def _make_column_decoder(out_name: str, metadata: OutputMetadata) -> _ColumnDecoder:
+    """Return the _ColumnDecoder for the output with the given name and metadata."""
+    output_type = metadata.type
+    if isinstance(output_type, GraphQLNonNull):
+        output_type = output_type.of_type
+    if isinstance(output_type, GraphQLList):
+        element_type = strip_non_null_from_type(output_type.of_type)
+        decode_element = make_scalar_value_decoder(element_type)
+        decoded_element_python_types = frozenset(
+            {_DECODED_PYTHON_TYPES[element_type.name], type(None)}
+        )
+
+        def decode_list(value: Any) -> Any:
+            """Decode each element of the list, which may contain nulls."""
+            if value is None:
+                return None
+            if not isinstance(value, list):
+                raise ValueError(
+                    f"Expected a list value for output {out_name} of type {metadata.type}, but "
+                    f"got {value} of type {type(value)}. Backend-specific encodings of folded "
+                    f"outputs, e.g. those of MSSQL and MySQL, must be post-processed first."
+                )
+            if decoded_element_python_types.issuperset(map(type, value)):
+                return value
+            return [None if element is None else decode_element(element) for element in value]
+
+        return _ColumnDecoder(out_name, None, decode_list)
+    elif isinstance(output_type, GraphQLScalarType):
+        decode_scalar = make_scalar_value_decoder(output_type)
+        return _ColumnDecoder(
+            out_name,
+            frozenset({_DECODED_PYTHON_TYPES[output_type.name], type(None)}),
+            lambda value: None if value is None else decode_scalar(value),
+        )
+    else:
+        raise AssertionError(
+            f"Unexpected type {metadata.type} of output {out_name}, expected a scalar type or a "
+            f"list of scalar type."
+        )
+
+
+class QueryResultDecoder:
+    """Decoder of the results of a compiled query, built once from the query's output metadata."""
+
+    def __init__(self, output_metadata: Dict[str, OutputMetadata]) -> None:
+        """Build the decoder of each output of a query.
+
+        Args:
+            output_metadata: mapping of output name to output metadata, e.g. the output_metadata
+                             of the CompilationResult of the query
+        """
+        self._column_decoders: List[_ColumnDecoder] = [
+            _make_column_decoder(out_name, metadata)
+            for out_name, metadata in output_metadata.items()
+        ]
+
+    def _decode_column(
+        self, column_decoder: _ColumnDecoder, values: List[Any]
+    ) -> Optional[List[Any]]:
+        """Return the decoded values of the column, or None if they need no decoding."""
+        decoded_python_types = column_decoder.decoded_python_types
+        if decoded_python_types is not None and decoded_python_types.issuperset(map(type, values)):
+            return None
+        return list(map(column_decoder.decode_value, values))
+
+    def decode_in_place(self, query_results: List[Dict[str, Any]]) -> None:
+        """Decode the values of a batch of result rows, one column at a time, in place.
+
+        Args:
+            query_results: result rows of the query, each a dict mapping output names to values.
+                           Folded outputs must already be lists, e.g. post-processed with
+                           post_process_mssql_folds for MSSQL.
+
+        Raises:
+            ValueError, if a value cannot be decoded to the type of its output
+        """
+        for column_decoder in self._column_decoders:
+            values = list(map(itemgetter(column_decoder.out_name), query_results))
+            decoded_values = self._decode_column(column_decoder, values)
+            if decoded_values is not None:
+                for query_result, decoded_value in zip(query_results, decoded_values):
+                    query_result[column_decoder.out_name] = decoded_value
+
+    def decode_to_columns(self, query_results: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+        """Decode the values of a batch of result rows into a dict of columns.
+
+        Column-oriented results avoid storing the output names in every row, and are suitable for
+        analytics consumers like dataframe libraries.
+
+        Args:
+            query_results: result rows of the query, each a dict mapping output names to values.
+                           Folded outputs must already be lists, e.g. post-processed with
+                           post_process_mssql_folds for MSSQL. The rows are not modified.
+
+        Returns:
+            dict mapping each output name to the list of its decoded values, in row order
+
+        Raises:
+            ValueError, if a value cannot be decoded to the type of its output
+        """
+        columns = {}
+        for column_decoder in self._column_decoders:
+            values = list(map(itemgetter(column_decoder.out_name), query_results))
+            decoded_values = self._decode_column(column_decoder, values)
+            columns[column_decoder.out_name] = values if decoded_values is None else decoded_values
+        return columns
@@ -1,12 +1,62 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-import html
+from functools import partial
+import json
 import re
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Match, Optional, Tuple
 
-from graphql import GraphQLList, GraphQLScalarType
+from graphql import GraphQLID, GraphQLList, GraphQLScalarType, GraphQLString
 
 from ..compiler.compiler_frontend import OutputMetadata
+from ..compiler.emit_sql import MSSQL_FOLD_JSON_VALUE_KEY
 from ..deserialization import deserialize_scalar_value
+from ..global_utils import is_same_type
+from ..schema import GraphQLDateTime
+
+
+# Some of the special characters involved in XML PATH array aggregation.
+_MSSQL_XML_PATH_DELIMITER = "|"
+_MSSQL_XML_PATH_NULL = "~"
+
+# The two-digit hexadecimal character references used by XML PATH for control characters.
+_MSSQL_XML_PATH_HEX_REFERENCE_PATTERN = re.compile("&#x([A-Fa-f0-9][A-Fa-f0-9]);")
+
+
+def _decode_hex_reference(match: Match[str]) -> str:
+    """Return the character encoded by a two-digit hexadecimal XML character reference."""
+    return chr(int(match.group(1), 16))
+
+
+def _decode_mssql_xml_path_element(element: str) -> str:
+    """Reverse the GraphQL compiler and XML escaping of a single non-null XML PATH list element.
+
+    Each replacement below is a single C-level scan of the element, which is far faster than
+    tokenizing the element in Python.
+    """
+    if "^" in element:
+        # Every "^" in the encoded element starts a caret escape sequence, so none of the
+        # escape sequences can overlap. "^e" must be decoded last, since decoding it produces
+        # new "^" characters.
+        element = element.replace("^d", "|").replace("^n", "~").replace("^e", "^")
+
+    if "&" in element:
+        if "&#" in element:
+            element = _MSSQL_XML_PATH_HEX_REFERENCE_PATTERN.sub(_decode_hex_reference, element)
+        # XML PATH only produces the "&lt;", "&gt;" and "&amp;" entity references, and every "&"
+        # in the encoded element starts a reference, so none of the references can overlap.
+        # "&amp;" must be decoded last, since decoding it produces new "&" characters.
+        element = element.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+    return element
+
+
+def _get_mssql_fold_element_converter(
+    list_entry_type: GraphQLScalarType,
+) -> Optional[Callable[[str], Any]]:
+    """Return the function converting a decoded list element to its type, or None if a no-op."""
+    if is_same_type(GraphQLString, list_entry_type) or is_same_type(GraphQLID, list_entry_type):
+        # Decoded elements are already strings.
+        return None
+    return partial(deserialize_scalar_value, list_entry_type)
 
 
 def _mssql_xml_path_string_to_list(
@@ -25,85 +75,131 @@ def _mssql_xml_path_string_to_list(
     if xml_path_result == "":
         return []
 
-    # Some of the special characters involved in XML path array aggregation.
-    delimiter = "|"
-    null = "~"
-
     # Remove the "|" from the first result in the string representation of the list.
-    if xml_path_result[0] != delimiter:
+    if xml_path_result[0] != _MSSQL_XML_PATH_DELIMITER:
         raise AssertionError(
             f"Unexpected fold result. All XML path array aggregated lists must start with a "
-            f"'{delimiter}'. Received a result beginning with '{xml_path_result[0]}': "
-            f"{xml_path_result}"
+            f"'{_MSSQL_XML_PATH_DELIMITER}'. Received a result beginning with "
+            f"'{xml_path_result[0]}': {xml_path_result}"
         )
-    xml_path_result = xml_path_result[1:]
 
-    # Split the XML path result on "|".
-    list_result: Sequence[Optional[str]] = xml_path_result.split(delimiter)
+    converter = _get_mssql_fold_element_converter(list_entry_type)
+    list_result: List[Optional[Any]] = []
+    # Escaped delimiters never contain "|", so splitting before decoding is safe.
+    for element in xml_path_result[1:].split(_MSSQL_XML_PATH_DELIMITER):
+        # Nulls must be recognized before decoding, since "^n" decodes to "~" as well.
+        if element == _MSSQL_XML_PATH_NULL:
+            list_result.append(None)
+            continue
 
-    # Convert "~" to None. Note that this must be done before "^n" -> "~".
-    list_result = [None if result == null else result for result in list_result]
+        # Most elements contain no escape sequences at all, so avoid the function call for them.
+        if "^" in element or "&" in element:
+            element = _decode_mssql_xml_path_element(element)
+        list_result.append(element if converter is None else converter(element))
 
-    # Convert "^d" to "|".
-    list_result = [
-        result.replace("^d", delimiter) if result is not None else None for result in list_result
-    ]
+    return list_result
 
-    # Convert "^n" to "~".
-    list_result = [
-        result.replace("^n", null) if result is not None else None for result in list_result
-    ]
 
-    # Convert "^e" to "^". Note that this must be done after the caret escaped characters i.e.
-    # after "^n" -> "~" and "^d" -> "|".
-    list_result = [
-        result.replace("^e", "^") if result is not None else None for result in list_result
-    ]
+def _mssql_json_path_string_to_list(
+    json_path_result: str, list_entry_type: GraphQLScalarType
+) -> List[Any]:
+    """Convert the string result produced with FOR JSON PATH for MSSQL folds to a list.
 
-    # Convert "&#x{2 digit HEX};" to unicode character.
-    new_list_result: List[Optional[str]] = []
-    for result in list_result:
-        if result is not None:
-            split_result = re.split("&#x([A-Fa-f0-9][A-Fa-f0-9]);", result)
-            new_result = split_result[0]
-            for hex_value, next_substring in zip(split_result[1::2], split_result[2::2]):
-                new_result += chr(int(hex_value, 16)) + next_substring
-            new_list_result.append(new_result)
+    Args:
+        json_path_result: str, result from a FOR JSON PATH folded output
+        list_entry_type: GraphQLScalarType, type the results should be output as
+
+    Returns:
+        list representation of the result
+    """
+    # Numbers are parsed as strings, so that they are deserialized exactly as XML PATH results,
+    # without any loss of precision.
+    json_elements = json.loads(json_path_result, parse_float=str, parse_int=str)
+
+    converter = _get_mssql_fold_element_converter(list_entry_type)
+    list_result: List[Optional[Any]] = []
+    for json_element in json_elements:
+        element = json_element[MSSQL_FOLD_JSON_VALUE_KEY]
+        if element is None or converter is None:
+            list_result.append(element)
         else:
-            new_list_result.append(None)
+            list_result.append(converter(element))
 
-    # Convert "&amp;" to "&", "&gt;" to ">", "&lt;" to "<". Note that the ampersand conversion
-    # must be done after the ampersand escaped HEX values.
-    list_result = [
-        html.unescape(result) if result is not None else None for result in new_list_result
-    ]
+    return list_result
 
-    # Convert to the appropriate return type.
-    list_result_to_return: List[Optional[Any]] = [
-        deserialize_scalar_value(list_entry_type, result) if result is not None else None
-        for result in list_result
-    ]
 
-    return list_result_to_return
+def _mssql_fold_string_to_list(fold_result: str, list_entry_type: GraphQLScalarType) -> List[Any]:
+    """Convert the string result of an MSSQL fold aggregation subquery to a list."""
+    # FOR JSON PATH results are JSON arrays, while XML PATH results are either empty or start
+    # with a delimiter.
+    if fold_result.startswith("["):
+        return _mssql_json_path_string_to_list(fold_result, list_entry_type)
+    return _mssql_xml_path_string_to_list(fold_result, list_entry_type)
+
+
+def _get_folded_list_outputs(
+    output_metadata: Dict[str, OutputMetadata]
+) -> List[Tuple[str, GraphQLScalarType]]:
+    """Return the name and list entry type of each output that needs fold post-processing."""
+    folded_list_outputs = []
+    for out_name, metadata in output_metadata.items():
+        # If this output is folded and has type GraphQLList (i.e. it is not an _x_count),
+        # the result needs to be post-processed to list form.
+        if metadata.folded and isinstance(metadata.type, GraphQLList):
+            folded_list_outputs.append((out_name, metadata.type.of_type))
+    return folded_list_outputs
+
+
+def get_mssql_fold_decoders(
+    output_metadata: Dict[str, OutputMetadata]
+) -> Dict[str, Callable[[str], List[Any]]]:
+    """Return a function converting each raw MSSQL folded output value to a list, by output name.
+
+    The functions perform the same decoding as post_process_mssql_folds, one value at a time,
+    so that the decoded lists can be written directly into results that are not stored as dicts,
+    e.g. ColumnarQueryResults.
+
+    Args:
+        output_metadata: Dict[str, OutputMetadata], mapping output name to output metadata with
+                         information about whether this output is from a fold scope
+
+    Returns:
+        dict mapping the name of each folded list output to the function decoding its values
+    """
+    return {
+        out_name: partial(_mssql_fold_string_to_list, list_entry_type=list_entry_type)
+        for out_name, list_entry_type in _get_folded_list_outputs(output_metadata)
+    }
+
+
+def _post_process_mssql_fold_row(
+    query_result: Dict[str, Any], folded_list_outputs: List[Tuple[str, GraphQLScalarType]]
+) -> None:
+    """Convert the fold results of a single result row in place."""
+    for out_name, list_entry_type in folded_list_outputs:
+        query_result[out_name] = _mssql_fold_string_to_list(query_result[out_name], list_entry_type)
 
 
 def post_process_mssql_folds(
     query_results: List[Dict[str, Any]], output_metadata: Dict[str, OutputMetadata]
 ) -> None:
-    r"""Convert XML PATH fold results from a string to a list of the appropriate type.
+    r"""Convert MSSQL fold results from a string to a list of the appropriate type.
 
-    See _get_xml_path_clause in graphql_compiler/compiler/emit_sql.py for an in-depth description
-    of the encoding process.
+    Depending on the server version, folds are aggregated either with FOR JSON PATH, producing a
+    JSON array that is decoded with a JSON parser, or with XML PATH. Folds with multiple outputs or
+    an _x_count are aggregated with STRING_AGG, producing strings decoded exactly like XML PATH
+    results. See _get_mssql_json_path_column, _get_mssql_xml_path_column and
+    _get_mssql_string_agg_column in graphql_compiler/compiler/emit_sql.py for an in-depth
+    description of the encoding processes.
 
-    Post-processing steps:
+    XML PATH post-processing steps:
         1. split on "|",
         2. convert "~" to None
-        3. convert caret escaped characters (excluding "^" itself)
-            i.e. "^d" (delimiter) to "|" and "^n" (null) to "~"
-        4. with caret escaped characters removed, convert "^e" to "^"
-        5. convert ampersand escaped characters (excluding "&" itself)
-            i.e. "&gt;" to ">", "&lt;" to "<" and "&#xHEX;" to "\xHEX"
-        6. with ampersand escaped characters removed, convert "&amp;" to "&"
+        3. convert caret escaped characters i.e. "^d" (delimiter) to "|", "^n" (null) to "~"
+            and, last, "^e" to "^"
+        4. convert ampersand escaped characters i.e. "&#xHEX;" to "\xHEX", "&gt;" to ">",
+            "&lt;" to "<" and, last, "&amp;" to "&"
+        5. convert each element to the list entry type
 
     Args:
         query_results: Dict[str, Any], results from graphql_query being run with schema_info,
@@ -112,11 +208,152 @@ def post_process_mssql_folds(
                          information about whether this output is from a fold scope
 
     """
-    for out_name, metadata in output_metadata.items():
-        # If this output is folded and has type GraphQLList (i.e. it is not an _x_count),
-        # post-process the result to list form.
-        if metadata.folded and isinstance(metadata.type, GraphQLList):
-            for query_result in query_results:
-                xml_path_result = query_result[out_name]
-                list_result = _mssql_xml_path_string_to_list(xml_path_result, metadata.type.of_type)
-                query_result[out_name] = list_result
+    folded_list_outputs = _get_folded_list_outputs(output_metadata)
+    if not folded_list_outputs:
+        return
+
+    for query_result in query_results:
+        _post_process_mssql_fold_row(query_result, folded_list_outputs)
+
+
+def post_process_mssql_folds_lazily(
+    query_results: Iterable[Dict[str, Any]], output_metadata: Dict[str, OutputMetadata]
+) -> Iterator[Dict[str, Any]]:
+    """Lazily convert MSSQL fold results from a string to a list of the appropriate type.
+
+    Unlike post_process_mssql_folds, the query results do not need to be materialized in memory:
+    each result row is decoded only when it is requested from the returned iterator. See
+    post_process_mssql_folds for a description of the decoding steps.
+
+    Args:
+        query_results: iterable of dicts, results from graphql_query being run with schema_info.
+                       Each result is mutated in place before being yielded.
+        output_metadata: Dict[str, OutputMetadata], mapping output name to output metadata with
+                         information about whether this output is from a fold scope
+
+    Yields:
+        each query result, with its folded outputs converted to lists
+    """
+    folded_list_outputs = _get_folded_list_outputs(output_metadata)
+    for query_result in query_results:
+        _post_process_mssql_fold_row(query_result, folded_list_outputs)
+        yield query_result
+
+
+def _mysql_datetime_to_iso_format(value: str) -> str:
+    """Replace the space separating the date and time in a MySQL DATETIME JSON value with "T"."""
+    return value.replace(" ", "T", 1)
+
+
+def _get_mysql_fold_element_converter(
+    list_entry_type: GraphQLScalarType,
+) -> Optional[Callable[[Any], Any]]:
+    """Return the function converting a decoded JSON list element to its type, or None if a no-op.
+
+    Numbers other than integers are decoded from JSON as strings, so that they can be converted to
+    their type, e.g. Decimal, without any loss of precision.
+    """
+    if is_same_type(GraphQLString, list_entry_type):
+        # JSON strings are already decoded to Python strings.
+        return None
+    if is_same_type(GraphQLDateTime, list_entry_type):
+        # MySQL represents DATETIME values in JSON as e.g. "2020-01-01 10:00:00.000000".
+        deserialize_datetime = partial(deserialize_scalar_value, GraphQLDateTime)
+        return lambda value: deserialize_datetime(_mysql_datetime_to_iso_format(value))
+    return partial(deserialize_scalar_value, list_entry_type)
+
+
+def _get_mysql_folded_list_output_converters(
+    output_metadata: Dict[str, OutputMetadata]
+) -> List[Tuple[str, Optional[Callable[[Any], Any]]]]:
+    """Return the name and list element converter of each output that needs post-processing."""
+    return [
+        (out_name, _get_mysql_fold_element_converter(list_entry_type))
+        for out_name, list_entry_type in _get_folded_list_outputs(output_metadata)
+    ]
+
+
+def _mysql_json_array_string_to_list(
+    json_array_result: str, converter: Optional[Callable[[Any], Any]]
+) -> List[Any]:
+    """Convert the JSON array string produced with JSON_ARRAYAGG for MySQL folds to a list."""
+    list_result = json.loads(json_array_result, parse_float=str)
+    if converter is not None:
+        list_result = [
+            element if element is None else converter(element) for element in list_result
+        ]
+    return list_result
+
+
+def get_mysql_fold_decoders(
+    output_metadata: Dict[str, OutputMetadata]
+) -> Dict[str, Callable[[str], List[Any]]]:
+    """Return a function converting each raw MySQL folded output value to a list, by output name.
+
+    The functions perform the same decoding as post_process_mysql_folds, one value at a time,
+    so that the decoded lists can be written directly into results that are not stored as dicts,
+    e.g. ColumnarQueryResults.
+
+    Args:
+        output_metadata: Dict[str, OutputMetadata], mapping output name to output metadata with
+                         information about whether this output is from a fold scope
+
+    Returns:
+        dict mapping the name of each folded list output to the function decoding its values
+    """
+    return {
+        out_name: partial(_mysql_json_array_string_to_list, converter=converter)
+        for out_name, converter in _get_mysql_folded_list_output_converters(output_metadata)
+    }
+
+
+def _post_process_mysql_fold_row(
+    query_result: Dict[str, Any],
+    folded_list_output_converters: List[Tuple[str, Optional[Callable[[Any], Any]]]],
+) -> None:
+    """Convert the JSON_ARRAYAGG fold results of a single result row in place."""
+    for out_name, converter in folded_list_output_converters:
+        query_result[out_name] = _mysql_json_array_string_to_list(query_result[out_name], converter)
+
+
+def post_process_mysql_folds(
+    query_results: List[Dict[str, Any]], output_metadata: Dict[str, OutputMetadata]
+) -> None:
+    """Convert MySQL fold results from a JSON array string to a list of the appropriate type.
+
+    Folded outputs are aggregated with JSON_ARRAYAGG when compiling to MySQL, so each one is
+    decoded with a single call to the JSON parser. Elements that are not strings or null are then
+    converted to the list entry type.
+
+    Args:
+        query_results: Dict[str, Any], results from graphql_query being run with schema_info,
+                       mutated in place
+        output_metadata: Dict[str, OutputMetadata], mapping output name to output metadata with
+                         information about whether this output is from a fold scope
+    """
+    folded_list_output_converters = _get_mysql_folded_list_output_converters(output_metadata)
+    if not folded_list_output_converters:
+        return
+
+    for query_result in query_results:
+        _post_process_mysql_fold_row(query_result, folded_list_output_converters)
+
+
+def post_process_mysql_folds_lazily(
+    query_results: Iterable[Dict[str, Any]], output_metadata: Dict[str, OutputMetadata]
+) -> Iterator[Dict[str, Any]]:
+    """Lazily convert MySQL fold results from a JSON array string to a list of the appropriate type.
+
+    Args:
+        query_results: iterable of dicts, results from graphql_query being run with schema_info.
+                       Each result is mutated in place before being yielded.
+        output_metadata: Dict[str, OutputMetadata], mapping output name to output metadata with
+                         information about whether this output is from a fold scope
+
+    Yields:
+        each query result, with its folded outputs converted to lists
+    """
+    folded_list_output_converters = _get_mysql_folded_list_output_converters(output_metadata)
+    for query_result in query_results:
+        _post_process_mysql_fold_row(query_result, folded_list_output_converters)
+        yield query_result
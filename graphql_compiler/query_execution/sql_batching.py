@@ -0,0 +1,197 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Execute many compiled SQL queries with a single round trip to the database."""
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Set, Tuple
+
+import sqlalchemy
+from sqlalchemy.engine.base import Connectable
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import BindParameter
+from sqlalchemy.sql.selectable import CTE, CompoundSelect, Select
+from sqlalchemy.sql.sqltypes import NullType
+
+from ..compiler import SQL_LANGUAGE
+from ..compiler.common import CompilationResult
+from ..exceptions import GraphQLInvalidArgumentError
+from ..query_formatting.common import validate_arguments
+from .sql_execution import post_process_sql_results_lazily
+
+
+# Name of the column identifying which of the batched queries produced each result row.
+BATCH_QUERY_INDEX_COLUMN_NAME = "__batch_query_index"
+_BATCH_OUTPUT_COLUMN_FORMAT_STRING = "__batch_output_{}"
+_BATCH_BIND_PARAMETER_FORMAT_STRING = "batch_{}_{}"
+
+
+class BatchedSqlQuery(NamedTuple):
+    # UNION ALL of all batched queries, with their arguments inserted.
+    query: CompoundSelect
+
+    # For each batched query, in order, a dict mapping each of its output names to the name of the
+    # column of the batched query holding that output.
+    output_columns: List[Dict[str, str]]
+
+
+def _insert_arguments_with_unique_names(
+    query: Select, arguments: Dict[str, Any], query_index: int
+) -> Select:
+    """Return a copy of the query with the arguments inserted, and its parameters renamed.
+
+    Different batched queries commonly use parameters with the same name but different values,
+    which would otherwise be conflated within the batched query. The arguments are inserted while
+    renaming the parameters, since SQLAlchemy cannot reliably copy a query containing a recursive
+    CTE more than once.
+    """
+
+    def visit_bind_parameter(bind_parameter: BindParameter) -> None:
+        """Insert the argument into the (already copied) bind parameter, and rename it."""
+        if bind_parameter.key in arguments:
+            bind_parameter.value = arguments[bind_parameter.key]
+            bind_parameter.required = False
+        if not bind_parameter.unique:
+            # Unique bind parameters are given distinct names when the query is compiled.
+            bind_parameter.key = _BATCH_BIND_PARAMETER_FORMAT_STRING.format(
+                query_index, bind_parameter.key
+            )
+
+    return visitors.cloned_traverse(query, {}, {"bindparam": visit_bind_parameter})
+
+
+def _contains_cte(query: Select) -> bool:
+    """Return True if the query contains any CTE, e.g. one produced by a @recurse directive."""
+    return any(isinstance(element, CTE) for element in visitors.iterate(query, {}))
+
+
+def batch_sql_queries(
+    compiled_queries: Sequence[Tuple[CompilationResult, Dict[str, Any]]]
+) -> BatchedSqlQuery:
+    """Combine many compiled SQL queries and their arguments into a single UNION ALL query.
+
+    Each query is wrapped into a subquery, and each of its outputs is given its own column in the
+    batched query. The projections of all queries are padded with NULLs for the columns of the
+    other queries, so that outputs with the same name but different types in different queries
+    never share a column. A discriminator column named BATCH_QUERY_INDEX_COLUMN_NAME records the
+    index of the query that produced each row.
+
+    Args:
+        compiled_queries: for each query to batch, the result of compiling the GraphQL query to
+                          SQL for the database, e.g. as returned by compile_graphql_to_sql, and a
+                          dict mapping argument name to its value, for every parameter the query
+                          expects
+
+    Returns:
+        BatchedSqlQuery containing the batched query and the columns of each query's outputs
+    """
+    if not compiled_queries:
+        raise GraphQLInvalidArgumentError("Expected at least one query to batch, but got none.")
+
+    # All CTEs are hoisted to the top of the batched query, so they must have distinct names.
+    # Copies of the same compiled query share the names of their CTEs, so queries containing CTEs
+    # must be compiled separately for each time they are batched.
+    batched_queries_with_ctes: Set[int] = set()
+    subqueries = []
+    output_columns: List[Dict[str, str]] = []
+    column_count = 0
+    for query_index, (compilation_result, arguments) in enumerate(compiled_queries):
+        if compilation_result.language != SQL_LANGUAGE:
+            raise GraphQLInvalidArgumentError(
+                f"Only SQL queries can be batched, but got a query compiled to "
+                f"{compilation_result.language}: {compilation_result}"
+            )
+        validate_arguments(compilation_result.input_metadata, arguments)
+        if _contains_cte(compilation_result.query):
+            if id(compilation_result.query) in batched_queries_with_ctes:
+                raise GraphQLInvalidArgumentError(
+                    f"The same compiled query containing CTEs, e.g. due to a @recurse directive, "
+                    f"cannot be batched more than once. Compile the query separately for each "
+                    f"set of arguments instead: {compilation_result.query}"
+                )
+            batched_queries_with_ctes.add(id(compilation_result.query))
+        query = _insert_arguments_with_unique_names(
+            compilation_result.query, arguments, query_index
+        )
+        subqueries.append(query.alias())
+        query_output_columns = {}
+        for output_name in compilation_result.output_metadata:
+            query_output_columns[output_name] = _BATCH_OUTPUT_COLUMN_FORMAT_STRING.format(
+                column_count
+            )
+            column_count += 1
+        output_columns.append(query_output_columns)
+
+    selects = []
+    for query_index, subquery in enumerate(subqueries):
+        projection = [
+            sqlalchemy.literal_column(str(query_index)).label(BATCH_QUERY_INDEX_COLUMN_NAME)
+        ]
+        for other_query_index, other_subquery in enumerate(subqueries):
+            for output_name, column_name in output_columns[other_query_index].items():
+                output_column = other_subquery.c[output_name]
+                if other_query_index == query_index:
+                    projection.append(output_column.label(column_name))
+                elif isinstance(output_column.type, NullType):
+                    projection.append(sqlalchemy.null().label(column_name))
+                else:
+                    # Typed NULLs ensure the types of all rows of each column are compatible.
+                    projection.append(
+                        sqlalchemy.cast(sqlalchemy.null(), output_column.type).label(column_name)
+                    )
+        selects.append(sqlalchemy.select(projection).select_from(subquery))
+
+    return BatchedSqlQuery(query=sqlalchemy.union_all(*selects), output_columns=output_columns)
+
+
+def split_batched_sql_results(
+    batched_query: BatchedSqlQuery, result_rows: Iterable[Dict[str, Any]]
+) -> List[List[Dict[str, Any]]]:
+    """Split the result rows of a batched query into the result rows of each batched query.
+
+    The results are not post-processed, e.g. MSSQL folded outputs are not decoded.
+
+    Args:
+        batched_query: BatchedSqlQuery whose results to split
+        result_rows: rows produced by executing the batched query, as dicts
+
+    Returns:
+        for each batched query, in order, the list of its result dicts
+    """
+    split_results: List[List[Dict[str, Any]]] = [[] for _ in batched_query.output_columns]
+    for row in result_rows:
+        query_index = int(row[BATCH_QUERY_INDEX_COLUMN_NAME])
+        split_results[query_index].append(
+            {
+                output_name: row[column_name]
+                for output_name, column_name in batched_query.output_columns[query_index].items()
+            }
+        )
+    return split_results
+
+
+def execute_sql_queries_batched(
+    connectable: Connectable, compiled_queries: Sequence[Tuple[CompilationResult, Dict[str, Any]]]
+) -> List[List[Dict[str, Any]]]:
+    """Execute many compiled SQL queries as one statement, and return the results of each.
+
+    Each query's results are post-processed as required by the dialect, as if it had been executed
+    on its own. The order of the result rows within each query's results is unspecified, exactly as
+    when executing the queries individually.
+
+    Args:
+        connectable: SQLAlchemy Engine or Connection for the database the queries were compiled for
+        compiled_queries: for each query, the result of compiling the GraphQL query to SQL for the
+                          database, e.g. as returned by compile_graphql_to_sql, and a dict mapping
+                          argument name to its value, for every parameter the query expects
+
+    Returns:
+        for each query, in order, the list of its result dicts
+    """
+    batched_query = batch_sql_queries(compiled_queries)
+    result_rows = (dict(row) for row in connectable.execute(batched_query.query))
+    split_results = split_batched_sql_results(batched_query, result_rows)
+    return [
+        list(
+            post_process_sql_results_lazily(
+                connectable.dialect, iter(query_results), compilation_result.output_metadata
+            )
+        )
+        for query_results, (compilation_result, _) in zip(split_results, compiled_queries)
+    ]
@@ -0,0 +1,157 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Execute compiled SQL queries, streaming their results instead of materializing them."""
+from typing import Any, Callable, Dict, Generator, Iterator, List
+
+from sqlalchemy.dialects.mssql.base import MSDialect
+from sqlalchemy.dialects.mysql.base import MySQLDialect
+from sqlalchemy.engine.base import Connectable
+from sqlalchemy.engine.default import DefaultDialect
+
+from ..compiler.common import CompilationResult
+from ..compiler.compiler_frontend import OutputMetadata
+from ..exceptions import GraphQLInvalidArgumentError
+from ..post_processing.columnar_results import ColumnarQueryResults
+from ..post_processing.sql_post_processing import (
+    get_mssql_fold_decoders,
+    get_mysql_fold_decoders,
+    post_process_mssql_folds_lazily,
+    post_process_mysql_folds_lazily,
+)
+
+
+DEFAULT_STREAMING_BATCH_SIZE = 1000
+
+
+def post_process_sql_results_lazily(
+    dialect: DefaultDialect,
+    query_results: Iterator[Dict[str, Any]],
+    output_metadata: Dict[str, OutputMetadata],
+) -> Iterator[Dict[str, Any]]:
+    """Lazily apply the post-processing required by the dialect to the query results, if any."""
+    if isinstance(dialect, MSDialect):
+        return post_process_mssql_folds_lazily(query_results, output_metadata)
+    if isinstance(dialect, MySQLDialect):
+        return post_process_mysql_folds_lazily(query_results, output_metadata)
+    return query_results
+
+
+def _get_sql_fold_decoders(
+    dialect: DefaultDialect, output_metadata: Dict[str, OutputMetadata]
+) -> Dict[str, Callable[[Any], List[Any]]]:
+    """Return the functions decoding the folded outputs of the dialect to lists, if required."""
+    if isinstance(dialect, MSDialect):
+        return get_mssql_fold_decoders(output_metadata)
+    if isinstance(dialect, MySQLDialect):
+        return get_mysql_fold_decoders(output_metadata)
+    return {}
+
+
+def _fetch_result_rows_in_batches(
+    connectable: Connectable, compilation_result: CompilationResult, batch_size: int
+) -> Generator[Dict[str, Any], None, None]:
+    """Execute the query using a server-side cursor and yield its rows as dicts, batch by batch."""
+    with connectable.connect() as connection:
+        result_proxy = connection.execution_options(stream_results=True).execute(
+            compilation_result.query
+        )
+        try:
+            while True:
+                rows = result_proxy.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            # Closing the result releases the server-side cursor even if the caller stops
+            # consuming the results before they are exhausted.
+            result_proxy.close()
+
+
+def _stream_post_processed_result_rows(
+    connectable: Connectable, compilation_result: CompilationResult, batch_size: int
+) -> Generator[Dict[str, Any], None, None]:
+    """Yield the post-processed result rows of the query, fetching them batch by batch."""
+    query_results = _fetch_result_rows_in_batches(connectable, compilation_result, batch_size)
+    # Delegating with "yield from" also forwards close() to the underlying generators, releasing
+    # the server-side cursor when the caller stops consuming the results early.
+    yield from post_process_sql_results_lazily(
+        connectable.dialect, query_results, compilation_result.output_metadata
+    )
+
+
+def execute_sql_query_streaming(
+    connectable: Connectable,
+    compilation_result: CompilationResult,
+    batch_size: int = DEFAULT_STREAMING_BATCH_SIZE,
+) -> Generator[Dict[str, Any], None, None]:
+    """Execute a compiled SQL query and lazily yield its post-processed result rows.
+
+    Results are fetched from the database with a server-side cursor, at most batch_size rows at
+    a time, so memory use is bounded by the batch size rather than the size of the result set.
+    For dialects that require it (i.e. MSSQL and MySQL), folded outputs are decoded row by row as
+    the results are consumed.
+
+    The database connection is held open until the returned generator is exhausted or closed.
+
+    Args:
+        connectable: SQLAlchemy Engine or Connection for the database the query was compiled for
+        compilation_result: result of compiling a GraphQL query to SQL, with its parameters
+                            already inserted, e.g. as returned by graphql_to_sql
+        batch_size: maximum number of rows to fetch from the database at a time
+
+    Returns:
+        generator of result dicts, mapping output name to output value
+    """
+    if batch_size < 1:
+        raise GraphQLInvalidArgumentError(
+            f"Expected batch_size to be a positive integer, but got {batch_size}."
+        )
+
+    # The batch size is validated before creating the generator, so that invalid arguments are
+    # reported when the query is executed rather than when its results are first consumed.
+    return _stream_post_processed_result_rows(connectable, compilation_result, batch_size)
+
+
+def execute_sql_query_columnar(
+    connectable: Connectable,
+    compilation_result: CompilationResult,
+    batch_size: int = DEFAULT_STREAMING_BATCH_SIZE,
+) -> ColumnarQueryResults:
+    """Execute a compiled SQL query and store its post-processed results column by column.
+
+    Results are fetched from the database with a server-side cursor, at most batch_size rows at
+    a time, and each row is written directly into the columns without being converted to a dict.
+    For dialects that require it (i.e. MSSQL and MySQL), folded outputs are decoded as they are
+    written. See ColumnarQueryResults for how the results are stored.
+
+    Args:
+        connectable: SQLAlchemy Engine or Connection for the database the query was compiled for
+        compilation_result: result of compiling a GraphQL query to SQL, with its parameters
+                            already inserted, e.g. as returned by graphql_to_sql
+        batch_size: maximum number of rows to fetch from the database at a time
+
+    Returns:
+        ColumnarQueryResults containing all result rows of the query
+    """
+    if batch_size < 1:
+        raise GraphQLInvalidArgumentError(
+            f"Expected batch_size to be a positive integer, but got {batch_size}."
+        )
+
+    output_metadata = compilation_result.output_metadata
+    results = ColumnarQueryResults(
+        output_metadata, _get_sql_fold_decoders(connectable.dialect, output_metadata)
+    )
+    with connectable.connect() as connection:
+        result_proxy = connection.execution_options(stream_results=True).execute(
+            compilation_result.query
+        )
+        try:
+            while True:
+                rows = result_proxy.fetchmany(batch_size)
+                if not rows:
+                    break
+                results.extend_rows(rows)
+        finally:
+            result_proxy.close()
+    return results
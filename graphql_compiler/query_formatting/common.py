@@ -2,7 +2,20 @@
 """Safely insert runtime arguments into compiled GraphQL queries."""
 import datetime
 import decimal
-from typing import Any, Collection, Dict, Mapping, NoReturn, Type
+import itertools
+import operator
+from typing import (
+    Any,
+    Callable,
+    Collection,
+    Dict,
+    FrozenSet,
+    Mapping,
+    NoReturn,
+    Optional,
+    Sequence,
+    Type,
+)
 
 import arrow
 from graphql import (
@@ -24,7 +37,7 @@ from ..compiler import (
     CompilationResult,
 )
 from ..compiler.helpers import strip_non_null_from_type
-from ..deserialization import deserialize_value
+from ..deserialization import deserialize_value, make_value_deserializer
 from ..exceptions import GraphQLInvalidArgumentError
 from ..global_utils import is_same_type
 from ..schema import GraphQLDate, GraphQLDateTime, GraphQLDecimal
@@ -45,6 +58,105 @@ def _raise_invalid_type_error(
     )
 
 
+def _get_valid_exact_python_types(
+    stripped_type: QueryArgumentGraphQLType,
+) -> Optional[FrozenSet[type]]:
+    """Return python types whose instances, excluding subclasses, are always valid for the type.
+
+    Args:
+        stripped_type: GraphQLType we expect, without any GraphQLNonNull type wrappers
+
+    Returns:
+        frozenset of python types, or None if the validity of values of the type cannot be
+        decided from their python type alone, e.g. for timezone aware datetime objects
+    """
+    if is_same_type(GraphQLString, stripped_type) or is_same_type(GraphQLID, stripped_type):
+        return frozenset({str})
+    elif is_same_type(GraphQLFloat, stripped_type):
+        return frozenset({float})
+    elif is_same_type(GraphQLInt, stripped_type):
+        return frozenset({int})
+    elif is_same_type(GraphQLBoolean, stripped_type):
+        return frozenset({bool})
+    elif is_same_type(GraphQLDecimal, stripped_type):
+        return frozenset({decimal.Decimal, int, float})
+    elif is_same_type(GraphQLDate, stripped_type):
+        return frozenset({datetime.date})
+    else:
+        return None
+
+
+def _make_fast_value_check(expected_type: QueryArgumentGraphQLType) -> Callable[[Any], bool]:
+    """Return a function that cheaply checks whether a value is valid for the expected type.
+
+    The returned function returns True only for values that validate_argument_type accepts,
+    but may return False for some valid values whose validation is not cheap, e.g. Decimal
+    arguments given as strings. Values it rejects must therefore be validated with
+    validate_argument_type, which also produces the appropriate error message.
+
+    Args:
+        expected_type: GraphQLType we expect. All GraphQLNonNull type wrappers are stripped.
+
+    Returns:
+        function taking a value, and returning True if the value is known to be valid
+    """
+    stripped_type = strip_non_null_from_type(expected_type)
+    valid_python_types = _get_valid_exact_python_types(stripped_type)
+    if valid_python_types is not None:
+        valid_scalar_python_types: FrozenSet[type] = valid_python_types
+        return lambda value: type(value) in valid_scalar_python_types
+    elif is_same_type(GraphQLDateTime, stripped_type):
+        # Only timezone naive datetime objects can be serialized.
+        return lambda value: type(value) is datetime.datetime and value.tzinfo is None
+    elif isinstance(stripped_type, GraphQLList):
+        inner_type = strip_non_null_from_type(stripped_type.of_type)
+        valid_python_types = _get_valid_exact_python_types(inner_type)
+        if valid_python_types is not None:
+            # Checking the set of element types avoids a python function call per element.
+            valid_element_python_types: FrozenSet[type] = valid_python_types
+            return lambda value: type(value) is list and valid_element_python_types.issuperset(
+                map(type, value)
+            )
+        check_element = _make_fast_value_check(inner_type)
+        return lambda value: type(value) is list and all(map(check_element, value))
+    else:
+        raise AssertionError(
+            "Could not safely represent the requested GraphQLType: {}".format(stripped_type)
+        )
+
+
+def _is_arguments_batch_known_valid(
+    expected_types: Mapping[str, QueryArgumentGraphQLType],
+    arguments_batch: Sequence[Mapping[str, Any]],
+) -> bool:
+    """Return True if all sets of arguments in the batch are cheaply known to be valid.
+
+    Each argument is checked for the whole batch at once, so that arguments whose validity follows
+    from their python type alone are checked without calling any python function per value.
+    Like the checks it uses, this function may return False for batches that are valid.
+    """
+    expected_names = frozenset(expected_types)
+    if not all(
+        map(
+            operator.eq,
+            map(operator.methodcaller("keys"), arguments_batch),
+            itertools.repeat(expected_names),
+        )
+    ):
+        return False
+
+    for name, expected_type in expected_types.items():
+        values = map(operator.itemgetter(name), arguments_batch)
+        valid_python_types = _get_valid_exact_python_types(strip_non_null_from_type(expected_type))
+        if valid_python_types is not None:
+            if not valid_python_types.issuperset(map(type, values)):
+                return False
+        elif not all(map(_make_fast_value_check(expected_type), values)):
+            return False
+
+    return True
+
+
 ######
 # Public API
 ######
@@ -157,6 +269,84 @@ def validate_arguments(
         validate_argument_type(name, expected_types[name], arguments[name])
 
 
+def make_arguments_validator(
+    expected_types: Mapping[str, QueryArgumentGraphQLType]
+) -> Callable[[Mapping[str, Any]], None]:
+    """Return a function equivalent to validate_arguments for the given expected types.
+
+    The type dispatch of validate_arguments is done once, when the validator is made, instead of
+    once per argument each time arguments are validated. This makes the validator much faster
+    when validating many sets of arguments for the same query.
+
+    Args:
+        expected_types: mapping of argument names to the expected GraphQL types. All GraphQLNonNull
+                        type wrappers are stripped.
+
+    Returns:
+        function taking a mapping of argument names to argument values, and raising
+        GraphQLInvalidArgumentError if any argument is missing, unexpected, or invalid
+    """
+    expected_names = frozenset(expected_types)
+
+    # Arguments whose validity follows from their python type alone are checked together,
+    # without calling any python function per argument.
+    scalar_names = []
+    scalar_valid_python_types = []
+    other_value_checks = []
+    for name, expected_type in expected_types.items():
+        valid_python_types = _get_valid_exact_python_types(strip_non_null_from_type(expected_type))
+        if valid_python_types is None:
+            other_value_checks.append((name, expected_type, _make_fast_value_check(expected_type)))
+        else:
+            scalar_names.append(name)
+            scalar_valid_python_types.append(valid_python_types)
+
+    def validate(arguments: Mapping[str, Any]) -> None:
+        """Ensure that all arguments are provided and that they are of the expected type."""
+        if arguments.keys() != expected_names:
+            ensure_arguments_are_provided(expected_types, arguments)
+        scalar_python_types = map(type, map(arguments.__getitem__, scalar_names))
+        if not all(map(frozenset.__contains__, scalar_valid_python_types, scalar_python_types)):
+            for name in scalar_names:
+                validate_argument_type(name, expected_types[name], arguments[name])
+        for name, expected_type, check_value in other_value_checks:
+            value = arguments[name]
+            if not check_value(value):
+                validate_argument_type(name, expected_type, value)
+
+    return validate
+
+
+def validate_arguments_batch(
+    expected_types: Mapping[str, QueryArgumentGraphQLType],
+    arguments_batch: Sequence[Mapping[str, Any]],
+) -> None:
+    """Ensure that each of many sets of arguments is valid for the same expected types.
+
+    Args:
+        expected_types: mapping of argument names to the expected GraphQL types. All GraphQLNonNull
+                        type wrappers are stripped.
+        arguments_batch: sequence of mappings of argument names to argument values, e.g. the
+                         arguments of many executions of the same compiled query
+
+    Raises:
+        GraphQLInvalidArgumentError, stating the index within the batch of the first invalid
+        set of arguments, and why it is invalid
+    """
+    if _is_arguments_batch_known_valid(expected_types, arguments_batch):
+        return
+
+    # Find the first invalid set of arguments, if any, and report why it is invalid.
+    validate = make_arguments_validator(expected_types)
+    for index, arguments in enumerate(arguments_batch):
+        try:
+            validate(arguments)
+        except GraphQLInvalidArgumentError as e:
+            raise GraphQLInvalidArgumentError(
+                f"Invalid arguments at index {index} of the batch: {e}"
+            ) from e
+
+
 def insert_arguments_into_query(compilation_result: CompilationResult, arguments: Dict[str, Any]):
     """Insert the arguments into the compiled GraphQL query to form a complete query.
 
@@ -191,15 +381,57 @@ def deserialize_argument(name: str, expected_type: QueryArgumentGraphQLType, val
         raise GraphQLInvalidArgumentError(f"Error parsing argument {name}: {e}")
 
 
+def make_arguments_deserializer(
+    expected_types: Mapping[str, QueryArgumentGraphQLType],
+) -> Callable[[Mapping[str, Any]], Dict[str, Any]]:
+    """Return a function equivalent to deserialize_multiple_arguments for the given types.
+
+    The deserialization function of each argument is looked up once, when the deserializer is
+    made, so the deserializer should be made once per compiled query, e.g. from its
+    input_metadata, and reused for every set of arguments the query is executed with.
+
+    Args:
+        expected_types: mapping of argument names to the expected GraphQL types
+
+    Returns:
+        function taking a mapping of argument names to serialized argument values, and returning
+        a dict mapping argument names to deserialized argument values. It raises
+        GraphQLInvalidArgumentError if any argument is missing, unexpected, or invalid.
+    """
+    expected_names = frozenset(expected_types)
+    value_deserializers = {
+        name: make_value_deserializer(expected_type)
+        for name, expected_type in expected_types.items()
+    }
+
+    def deserialize(arguments: Mapping[str, Any]) -> Dict[str, Any]:
+        """Deserialize GraphQL arguments, raising GraphQLInvalidArgumentError if any are invalid."""
+        if arguments.keys() != expected_names:
+            ensure_arguments_are_provided(expected_types, arguments)
+        try:
+            return {name: value_deserializers[name](value) for name, value in arguments.items()}
+        except (ValueError, TypeError):
+            pass
+
+        # Find the invalid argument, to report its name.
+        for name, value in arguments.items():
+            try:
+                value_deserializers[name](value)
+            except (ValueError, TypeError) as e:
+                raise GraphQLInvalidArgumentError(f"Error parsing argument {name}: {e}")
+        raise AssertionError(
+            f"Deserializing arguments {arguments} failed, but deserializing each of them "
+            f"succeeded. This should never happen."
+        )
+
+    return deserialize
+
+
 def deserialize_multiple_arguments(
     arguments: Mapping[str, Any], expected_types: Mapping[str, QueryArgumentGraphQLType],
 ) -> Dict[str, Any]:
     """Deserialize GraphQL arguments, raising GraphQLInvalidArgumentError if any are invalid."""
-    ensure_arguments_are_provided(expected_types, arguments)
-    return {
-        name: deserialize_argument(name, expected_types[name], value)
-        for name, value in arguments.items()
-    }
+    return make_arguments_deserializer(expected_types)(arguments)
 
 
 ######
@@ -1,10 +1,25 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from typing import Tuple
-
-from ..cost_estimation.analysis import QueryPlanningAnalysis, analyze_query_string
+from typing import Optional, Tuple
+
+from ..cost_estimation.admission_control import (
+    AdmissionDecision,
+    AdmissionPolicy,
+    AdmissionResult,
+    get_admission_decision,
+)
+from ..cost_estimation.analysis import (
+    QueryPlanningAnalysis,
+    QueryShapeAnalysisCache,
+    analyze_query_string,
+)
 from ..global_utils import ASTWithParameters, QueryStringWithParameters
 from ..schema.schema_info import QueryPlanningSchemaInfo
-from .pagination_planning import MissingClassCount, PaginationAdvisory, get_pagination_plan
+from .pagination_planning import (
+    MissingClassCount,
+    PaginationAdvisory,
+    get_pagination_plan,
+    get_plan_page_count,
+)
 from .parameter_generator import generate_parameters_for_vertex_partition
 from .query_parameterizer import generate_parameterized_queries
 from .typedefs import PageAndRemainder
@@ -125,7 +140,10 @@ def paginate_query_ast(
 
 
 def paginate_query(
-    schema_info: QueryPlanningSchemaInfo, query: QueryStringWithParameters, page_size: int
+    schema_info: QueryPlanningSchemaInfo,
+    query: QueryStringWithParameters,
+    page_size: int,
+    shape_analysis_cache: Optional[QueryShapeAnalysisCache] = None,
 ) -> Tuple[PageAndRemainder[QueryStringWithParameters], Tuple[PaginationAdvisory, ...]]:
     """Generate a query fetching a page of results and the remainder queries for a query string.
 
@@ -138,6 +156,8 @@ def paginate_query(
         query: QueryStringWithParameters
         parameters: dict, parameters with which query will be estimated.
         page_size: int, describes the desired number of result rows per page.
+        shape_analysis_cache: optional QueryShapeAnalysisCache for schema_info, reusing the
+                              analysis of previous queries that only differ in their parameters
 
     Returns:
         tuple containing two elements:
@@ -147,7 +167,7 @@ def paginate_query(
             - Tuple of PaginationAdvisory objects that communicate what can be done to improve
               pagination
     """
-    query_analysis = analyze_query_string(schema_info, query)
+    query_analysis = analyze_query_string(schema_info, query, shape_analysis_cache)
     ast_page_and_remainder, advisories = paginate_query_ast(query_analysis, page_size)
 
     page_query_with_parameters = QueryStringWithParameters.from_ast_with_parameters(
@@ -162,3 +182,50 @@ def paginate_query(
     )
 
     return text_page_and_remainder, advisories
+
+
+def get_admission_decision_with_pagination(
+    query_analysis: QueryPlanningAnalysis, policy: AdmissionPolicy
+) -> AdmissionResult:
+    """Decide whether to accept, paginate or reject a query, checking that it can be paginated.
+
+    Like get_admission_decision, but queries are only paginated if the pagination planner can split
+    them into the pages that paginate_query would split them into. Otherwise, they are rejected.
+
+    Args:
+        query_analysis: the query with any query analysis needed for estimating its cost
+        policy: the budget of the caller submitting the query
+
+    Returns:
+        AdmissionResult with the decision for the query
+    """
+    admission_result = get_admission_decision(query_analysis, policy)
+    if admission_result.decision != AdmissionDecision.Paginate:
+        return admission_result
+    if admission_result.page_size is None:
+        raise AssertionError(
+            f"Expected the decision to paginate the query to come with a page size: "
+            f"{admission_result}"
+        )
+
+    # Check that the query can be split into the pages paginate_query would split it into.
+    number_of_pages = _estimate_number_of_pages(
+        query_analysis.query_string_with_parameters,
+        query_analysis.cardinality_estimate,
+        admission_result.page_size,
+    )
+    pagination_plan, advisories = get_pagination_plan(query_analysis, number_of_pages)
+    number_of_splits = get_plan_page_count(pagination_plan)
+    if number_of_splits >= number_of_pages:
+        return admission_result
+
+    explanation = (
+        f"The query is estimated to return {admission_result.cardinality_estimate} rows, above "
+        f"the limit of {policy.max_cardinality} rows, but it can only be split into "
+        f"{number_of_splits} of the {number_of_pages} pages needed to paginate it within the limit."
+    )
+    if advisories:
+        explanation += " " + " ".join(advisory.message for advisory in advisories)
+    return AdmissionResult(
+        AdmissionDecision.Reject, explanation, admission_result.cardinality_estimate
+    )
@@ -79,7 +79,7 @@ class PaginationPlan:
 
 def get_plan_page_count(plan: PaginationPlan) -> int:
     """Return the number of pages that a PaginationPlan would generate."""
-    number_of_pages = 0
+    number_of_pages = 1
     for vertex_partition in plan.vertex_partitions:
         number_of_pages *= vertex_partition.number_of_splits
     return number_of_pages
@@ -5,7 +5,10 @@ from typing import Any, Iterator, List, cast
 
 from ..compiler.compiler_frontend import ast_to_ir
 from ..compiler.helpers import Location
-from ..cost_estimation.filter_selectivity_utils import get_integer_interval_for_filters_on_field
+from ..cost_estimation.filter_selectivity_utils import (
+    get_field_value_interval_for_filters_on_field,
+    get_integer_interval_for_filters_on_field,
+)
 from ..cost_estimation.helpers import is_uuid4_type
 from ..cost_estimation.int_value_conversion import (
     MAX_UUID_INT,
@@ -79,23 +82,6 @@ def _choose_parameter_values(
     )
 
 
-def _convert_int_interval_to_field_value_interval(
-    schema_info: QueryPlanningSchemaInfo, vertex_type: str, field: str, interval: Interval[int]
-) -> Interval[Any]:
-    """Convert the endpoints of an interval. See int_value_conversion for the conversion spec."""
-    lower_bound = None
-    upper_bound = None
-    if interval.lower_bound is not None:
-        lower_bound = convert_int_to_field_value(
-            schema_info, vertex_type, field, interval.lower_bound
-        )
-    if interval.upper_bound is not None:
-        upper_bound = convert_int_to_field_value(
-            schema_info, vertex_type, field, interval.upper_bound
-        )
-    return Interval(lower_bound, upper_bound)
-
-
 def _compute_parameters_for_uuid_field(
     schema_info: QueryPlanningSchemaInfo,
     integer_interval: Interval[int],
@@ -234,20 +220,20 @@ def generate_parameters_for_vertex_partition(
         filter_info for filter_info in filter_infos if filter_info.fields == (pagination_field,)
     }
 
-    # Get the value interval currently imposed by existing filters
-    integer_interval = get_integer_interval_for_filters_on_field(
-        schema_info, filters_on_field, vertex_type, pagination_field, query.parameters
-    )
-    field_value_interval = _convert_int_interval_to_field_value_interval(
-        schema_info, vertex_type, pagination_field, integer_interval
-    )
-
     # Compute parameters
     if is_uuid4_type(schema_info, vertex_type, pagination_field):
+        # Get the value interval currently imposed by existing filters, in int form
+        integer_interval = get_integer_interval_for_filters_on_field(
+            schema_info, filters_on_field, vertex_type, pagination_field, query.parameters
+        )
         return _compute_parameters_for_uuid_field(
             schema_info, integer_interval, vertex_partition, vertex_type, pagination_field
         )
     else:
+        # Get the value interval currently imposed by existing filters
+        field_value_interval = get_field_value_interval_for_filters_on_field(
+            schema_info, filters_on_field, vertex_type, pagination_field, query.parameters
+        )
         return _compute_parameters_for_non_uuid_field(
             schema_info, field_value_interval, vertex_partition, vertex_type, pagination_field
         )
@@ -22,7 +22,10 @@ from graphql.pyutils import FrozenList
 from ..ast_manipulation import get_ast_field_name, get_only_query_definition
 from ..compiler.helpers import get_parameter_name
 from ..cost_estimation.analysis import QueryPlanningAnalysis
-from ..cost_estimation.int_value_conversion import convert_field_value_to_int
+from ..cost_estimation.int_value_conversion import (
+    convert_field_value_to_int,
+    field_supports_int_conversion,
+)
 from ..exceptions import GraphQLError
 from ..global_utils import ASTWithParameters, PropertyPath, VertexPath
 from .pagination_planning import VertexPartitionPlan
@@ -87,17 +90,23 @@ def _is_new_filter_stronger(
         whether the old filter can be removed with no change in query meaning.
     """
     vertex_type = query_analysis.types[property_path.vertex_path].name
-    new_int_value = convert_field_value_to_int(
-        query_analysis.schema_info, vertex_type, property_path.field_name, new_filter_value,
-    )
-    old_int_value = convert_field_value_to_int(
-        query_analysis.schema_info, vertex_type, property_path.field_name, old_filter_value,
-    )
+    if field_supports_int_conversion(
+        query_analysis.schema_info, vertex_type, property_path.field_name
+    ):
+        new_value = convert_field_value_to_int(
+            query_analysis.schema_info, vertex_type, property_path.field_name, new_filter_value,
+        )
+        old_value = convert_field_value_to_int(
+            query_analysis.schema_info, vertex_type, property_path.field_name, old_filter_value,
+        )
+    else:
+        # Values without an int representation, like strings and Decimals, are compared directly.
+        new_value, old_value = new_filter_value, old_filter_value
 
     if operation == "<":
-        return new_int_value <= old_int_value
+        return new_value <= old_value
     elif operation == ">=":
-        return new_int_value >= old_int_value
+        return new_value >= old_value
     else:
         raise AssertionError(f"Expected operation to be < or >=, got {operation}.")
 
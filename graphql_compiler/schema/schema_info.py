@@ -4,7 +4,7 @@ from collections import namedtuple
 from dataclasses import dataclass, field
 from enum import Enum, Flag, auto, unique
 from functools import partial
-from typing import Dict, Optional
+from typing import Dict, NamedTuple, Optional
 
 from graphql.type import GraphQLSchema
 from graphql.type.definition import GraphQLInterfaceType, GraphQLObjectType
@@ -210,41 +210,54 @@ CommonSchemaInfo = namedtuple(
 # - RootSchemaQuery is a special type that does not need a corresponding table.
 # - Builtin types like __Schema, __Type, etc. don't need corresponding tables.
 # - Builtin fields like _x_count do not need corresponding columns.
-SQLAlchemySchemaInfo = namedtuple(
-    "SQLAlchemySchemaInfo",
-    (
-        # GraphQLSchema
-        "schema",
-        # optional dict of GraphQL interface or type -> GraphQL union.
-        # Used as a workaround for GraphQL's lack of support for
-        # inheritance across "types" (i.e. non-interfaces), as well as a
-        # workaround for Gremlin's total lack of inheritance-awareness.
-        # The key-value pairs in the dict specify that the "key" type
-        # is equivalent to the "value" type, i.e. that the GraphQL type or
-        # interface in the key is the most-derived common supertype
-        # of every GraphQL type in the "value" GraphQL union.
-        # Recursive expansion of type equivalence hints is not performed,
-        # and only type-level correctness of this argument is enforced.
-        # See README.md for more details on everything this parameter does.
-        # *****
-        # Be very careful with this option, as bad input here will
-        # lead to incorrect output queries being generated.
-        # *****
-        "type_equivalence_hints",
-        # sqlalchemy.engine.interfaces.Dialect, specifying the dialect we are compiling for
-        # (e.g. sqlalchemy.dialects.mssql.dialect()).
-        "dialect",
-        # dict mapping every graphql object type or interface type name in the schema to
-        # a sqlalchemy table. Column types that do not exist for this dialect are not allowed.
-        # All tables are expected to have primary keys.
-        "vertex_name_to_table",
-        # dict mapping every graphql object type or interface type name in the schema to:
-        #    dict mapping every vertex field name at that type to a DirectJoinDescriptor. The
-        #    tables the join is to be performed on are not specified. They are inferred from
-        #    the schema and the tables dictionary.
-        "join_descriptors",
-    ),
-)
+class SQLAlchemySchemaInfo(NamedTuple):
+    # GraphQLSchema
+    schema: GraphQLSchema
+
+    # optional dict of GraphQL interface or type -> GraphQL union.
+    # Used as a workaround for GraphQL's lack of support for
+    # inheritance across "types" (i.e. non-interfaces), as well as a
+    # workaround for Gremlin's total lack of inheritance-awareness.
+    # The key-value pairs in the dict specify that the "key" type
+    # is equivalent to the "value" type, i.e. that the GraphQL type or
+    # interface in the key is the most-derived common supertype
+    # of every GraphQL type in the "value" GraphQL union.
+    # Recursive expansion of type equivalence hints is not performed,
+    # and only type-level correctness of this argument is enforced.
+    # See README.md for more details on everything this parameter does.
+    # *****
+    # Be very careful with this option, as bad input here will
+    # lead to incorrect output queries being generated.
+    # *****
+    type_equivalence_hints: TypeEquivalenceHintsType
+
+    # sqlalchemy.engine.interfaces.Dialect, specifying the dialect we are compiling for
+    # (e.g. sqlalchemy.dialects.mssql.dialect()).
+    dialect: Dialect
+
+    # dict mapping every graphql object type or interface type name in the schema to
+    # a sqlalchemy table. Column types that do not exist for this dialect are not allowed.
+    # All tables are expected to have primary keys.
+    vertex_name_to_table: Dict[str, sqlalchemy.Table]
+
+    # dict mapping every graphql object type or interface type name in the schema to:
+    #    dict mapping every vertex field name at that type to a DirectJoinDescriptor. The
+    #    tables the join is to be performed on are not specified. They are inferred from
+    #    the schema and the tables dictionary.
+    join_descriptors: Dict[str, Dict[str, DirectJoinDescriptor]]
+
+    # Whether mandatory traversals whose vertices have no outputs, tags or folds, and that are
+    # therefore only used to filter results, may be emitted as correlated EXISTS subqueries
+    # instead of joins. This avoids producing intermediate rows for each matching vertex,
+    # but it means that each result is produced once regardless of the number of vertices
+    # matching such a traversal, whereas joins produce one result per matching vertex.
+    use_exists_for_output_free_traversals: bool = False
+
+    # Whether @recurse traversals produce each vertex reachable from a given starting vertex only
+    # once, instead of once per path leading to it. Each level of the recursion then only contains
+    # the distinct vertices reached at that depth, so the work needed on dense or cyclic graphs
+    # grows linearly with the depth rather than with the number of paths. Not supported on MSSQL.
+    deduplicate_recursive_traversals: bool = False
 
 
 def make_sqlalchemy_schema_info(
@@ -254,6 +267,8 @@ def make_sqlalchemy_schema_info(
     vertex_name_to_table: Dict[str, sqlalchemy.Table],
     join_descriptors: Dict[str, Dict[str, DirectJoinDescriptor]],
     validate: bool = True,
+    use_exists_for_output_free_traversals: bool = False,
+    deduplicate_recursive_traversals: bool = False,
 ) -> SQLAlchemySchemaInfo:
     """Make a SQLAlchemySchemaInfo if the input provided is valid.
 
@@ -288,6 +303,14 @@ def make_sqlalchemy_schema_info(
         validate: whether to validate that the given inputs are valid for creation of
                   a SQLAlchemySchemaInfo object. Disabling validation may improve performance for
                   particularly large schemas, at the risk of constructing an invalid schema info.
+        use_exists_for_output_free_traversals: whether traversals used only to filter results,
+                                               i.e. ones whose vertices have no outputs, tags or
+                                               folds, may be emitted as EXISTS subqueries. If
+                                               enabled, such traversals no longer produce one
+                                               result per matching vertex.
+        deduplicate_recursive_traversals: whether @recurse traversals produce each vertex reachable
+                                          from a given starting vertex only once, instead of once
+                                          per path leading to it. Not supported on MSSQL.
 
     Returns:
         SQLAlchemySchemaInfo containing the input arguments provided
@@ -330,7 +353,13 @@ def make_sqlalchemy_schema_info(
                                 )
 
     return SQLAlchemySchemaInfo(
-        schema, type_equivalence_hints, dialect, vertex_name_to_table, join_descriptors
+        schema,
+        type_equivalence_hints,
+        dialect,
+        vertex_name_to_table,
+        join_descriptors,
+        use_exists_for_output_free_traversals=use_exists_for_output_free_traversals,
+        deduplicate_recursive_traversals=deduplicate_recursive_traversals,
     )
 
 
@@ -1,5 +1,5 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from typing import Dict
+from typing import Dict, cast
 import unittest
 
 from graphql.type import GraphQLInt, GraphQLObjectType, GraphQLString
@@ -106,13 +106,13 @@ class SQLAlchemySchemaInfoGenerationTests(unittest.TestCase):
         )
 
     def test_represent_supported_fields(self) -> None:
-        table1_graphql_object = self.schema_info.schema.get_type("Table1")
+        table1_graphql_object = cast(GraphQLObjectType, self.schema_info.schema.get_type("Table1"))
         self.assertEqual(
             table1_graphql_object.fields["column_with_supported_type"].type, GraphQLString
         )
 
     def test_ignored_fields_not_supported(self) -> None:
-        table1_graphql_object = self.schema_info.schema.get_type("Table1")
+        table1_graphql_object = cast(GraphQLObjectType, self.schema_info.schema.get_type("Table1"))
         self.assertTrue("column_with_non_supported_type" not in table1_graphql_object.fields)
 
     def test_warn_when_type_is_not_supported(self) -> None:
@@ -134,12 +134,14 @@ class SQLAlchemySchemaInfoGenerationTests(unittest.TestCase):
             self.assertIsNone(graphql_type)
 
     def test_mssql_scalar_type_representation(self) -> None:
-        table1_graphql_object = self.schema_info.schema.get_type("Table1")
+        table1_graphql_object = cast(GraphQLObjectType, self.schema_info.schema.get_type("Table1"))
         self.assertEqual(table1_graphql_object.fields["column_with_mssql_type"].type, GraphQLInt)
 
     def test_direct_sql_edge_representation(self) -> None:
-        table1_graphql_object = self.schema_info.schema.get_type("Table1")
-        arbitrarily_named_graphql_object = self.schema_info.schema.get_type("ArbitraryObjectName")
+        table1_graphql_object = cast(GraphQLObjectType, self.schema_info.schema.get_type("Table1"))
+        arbitrarily_named_graphql_object = cast(
+            GraphQLObjectType, self.schema_info.schema.get_type("ArbitraryObjectName")
+        )
         self.assertEqual(
             table1_graphql_object.fields["out_test_edge"].type.of_type.name, "ArbitraryObjectName"
         )
@@ -0,0 +1,225 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+import unittest
+
+import pytest
+
+from ...cost_estimation.admission_control import (
+    AdmissionDecision,
+    AdmissionPolicy,
+    get_admission_decision,
+)
+from ...cost_estimation.analysis import analyze_query_string
+from ...cost_estimation.statistics import LocalStatistics
+from ...global_utils import QueryStringWithParameters
+from ...query_pagination import get_admission_decision_with_pagination, paginate_query
+from ...schema.schema_info import QueryPlanningSchemaInfo, UUIDOrdering
+from ...schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
+from ..test_helpers import generate_schema_graph
+
+
+# The following TestCase class uses the 'snapshot_orientdb_client' fixture
+# which pylint does not recognize as a class member.
+# pylint: disable=no-member
+@pytest.mark.slow
+class AdmissionControlTests(unittest.TestCase):
+    """Test the admission control of queries based on their estimated cost."""
+
+    def _make_schema_info(self, statistics: LocalStatistics) -> QueryPlanningSchemaInfo:
+        """Return a QueryPlanningSchemaInfo with the given statistics."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        return QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_admission_decisions(self) -> None:
+        statistics = LocalStatistics({"Animal": 1000, "Animal_ParentOf": 100000})
+        schema_info = self._make_schema_info(statistics)
+        query = QueryStringWithParameters(
+            """{
+            Animal {
+                name @output(out_name: "animal_name")
+                out_Animal_ParentOf {
+                    name @output(out_name: "child_name")
+                }
+            }
+        }""",
+            {},
+        )
+        analysis = analyze_query_string(schema_info, query)
+
+        # The query is estimated to return 1000 * 100 = 100000 rows.
+        result = get_admission_decision(analysis, AdmissionPolicy(max_cardinality=1e6))
+        self.assertEqual(AdmissionDecision.Accept, result.decision)
+        self.assertEqual(100000.0, result.cardinality_estimate)
+
+        result = get_admission_decision(analysis, AdmissionPolicy(max_cardinality=1e4))
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+
+        # The root vertex is split into 10 pages of 100 Animals each.
+        policy = AdmissionPolicy(max_cardinality=1e4, max_paginated_cardinality=1e6)
+        result = get_admission_decision(analysis, policy)
+        self.assertEqual(AdmissionDecision.Paginate, result.decision)
+        self.assertEqual(10000, result.page_size)
+        self.assertEqual(result, get_admission_decision_with_pagination(analysis, policy))
+
+        # The pagination planner can't split the 1000 Animals into 10000 pages.
+        policy = AdmissionPolicy(max_cardinality=10, max_paginated_cardinality=1e6)
+        result = get_admission_decision(analysis, policy)
+        self.assertEqual(AdmissionDecision.Paginate, result.decision)
+        result = get_admission_decision_with_pagination(analysis, policy)
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+        self.assertIsNone(result.page_size)
+
+        result = get_admission_decision(
+            analysis, AdmissionPolicy(max_cardinality=1e2, max_paginated_cardinality=1e4)
+        )
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+
+        # Each location of the query may have up to 1000 distinct Animals.
+        result = get_admission_decision(
+            analysis, AdmissionPolicy(max_cardinality=1e6, max_distinct_vertices_per_location=500)
+        )
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+        self.assertIn("('Animal',)", result.explanation)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_admission_without_statistics(self) -> None:
+        statistics = LocalStatistics({"Animal": 1000})
+        schema_info = self._make_schema_info(statistics)
+        query = QueryStringWithParameters(
+            """{
+            Animal {
+                out_Animal_LivesIn {
+                    name @output(out_name: "location_name")
+                }
+            }
+        }""",
+            {},
+        )
+        analysis = analyze_query_string(schema_info, query)
+
+        result = get_admission_decision(analysis, AdmissionPolicy(max_cardinality=1e6))
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+        self.assertIsNone(result.cardinality_estimate)
+        self.assertIn("Animal_LivesIn", result.explanation)
+
+        result = get_admission_decision(
+            analysis, AdmissionPolicy(max_cardinality=1e6, accept_without_statistics=True)
+        )
+        self.assertEqual(AdmissionDecision.Accept, result.decision)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_admission_using_cardinality_upper_bound(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000}, distinct_field_values_counts={("Animal", "name"): 500}
+        )
+        schema_info = self._make_schema_info(statistics)
+        query = QueryStringWithParameters(
+            """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: "=", value: ["$name"])
+            }
+        }""",
+            {"name": "Fido"},
+        )
+        analysis = analyze_query_string(schema_info, query)
+
+        # Names are estimated to be shared by 2 Animals each, but up to 1000 - 499 Animals may
+        # share the same name.
+        result = get_admission_decision(analysis, AdmissionPolicy(max_cardinality=100))
+        self.assertEqual(AdmissionDecision.Accept, result.decision)
+        self.assertEqual(2.0, result.cardinality_estimate)
+
+        result = get_admission_decision(
+            analysis, AdmissionPolicy(max_cardinality=100, use_cardinality_upper_bound=True)
+        )
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+        self.assertEqual(501.0, result.cardinality_estimate)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_pagination_using_cardinality_upper_bound(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000}, distinct_field_values_counts={("Animal", "name"): 10}
+        )
+        schema_info = self._make_schema_info(statistics)
+        query = QueryStringWithParameters(
+            """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: "=", value: ["$name"])
+            }
+        }""",
+            {"name": "Fido"},
+        )
+        analysis = analyze_query_string(schema_info, query)
+
+        # Names are estimated to be shared by 100 Animals each, but up to 1000 - 9 Animals may
+        # share the same name. paginate_query splits the query by the estimate of 100 rows, so
+        # pages of 10 estimated rows are needed for each page to have at most 100 rows.
+        policy = AdmissionPolicy(
+            max_cardinality=100, max_paginated_cardinality=1000, use_cardinality_upper_bound=True
+        )
+        result = get_admission_decision_with_pagination(analysis, policy)
+        self.assertEqual(AdmissionDecision.Paginate, result.decision)
+        self.assertEqual(991.0, result.cardinality_estimate)
+        self.assertEqual(10, result.page_size)
+
+        page_and_remainder, _ = paginate_query(schema_info, query, 10)
+        page_analysis = analyze_query_string(schema_info, page_and_remainder.one_page)
+        self.assertLessEqual(page_analysis.cardinality_estimate_with_bounds.upper_bound, 100.0)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_admission_using_execution_cost(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000, "Animal_ParentOf": 1000000},
+            distinct_field_values_counts={("Animal", "name"): 1000},
+        )
+        schema_info = self._make_schema_info(statistics)
+        query = QueryStringWithParameters(
+            """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: "=", value: ["$name"])
+                out_Animal_ParentOf {
+                    name @filter(op_name: "=", value: ["$child_name"])
+                }
+            }
+        }""",
+            {"name": "Fido", "child_name": "Rex"},
+        )
+        analysis = analyze_query_string(schema_info, query)
+
+        # The query returns a single row, but reads the 1000 children of the Animal named Fido.
+        result = get_admission_decision(
+            analysis, AdmissionPolicy(max_cardinality=100, max_execution_cost=1e4)
+        )
+        self.assertEqual(AdmissionDecision.Accept, result.decision)
+        self.assertEqual(1.0, result.cardinality_estimate)
+
+        result = get_admission_decision(
+            analysis, AdmissionPolicy(max_cardinality=100, max_execution_cost=100)
+        )
+        self.assertEqual(AdmissionDecision.Reject, result.decision)
+        self.assertIn("SQL", result.explanation)
+
+    def test_invalid_policies(self) -> None:
+        with self.assertRaises(AssertionError):
+            AdmissionPolicy(max_cardinality=0)
+        with self.assertRaises(AssertionError):
+            AdmissionPolicy(max_cardinality=100, max_paginated_cardinality=10)
+
+
+# pylint: enable=no-member
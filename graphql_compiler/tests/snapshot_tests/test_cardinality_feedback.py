@@ -0,0 +1,175 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+import inspect
+import os
+import tempfile
+import unittest
+
+import pytest
+
+from ...cost_estimation.analysis import analyze_query_string
+from ...cost_estimation.cardinality_estimator import get_query_shape
+from ...cost_estimation.cardinality_feedback import (
+    AdaptiveStatistics,
+    read_cardinality_corrections,
+    write_cardinality_corrections,
+)
+from ...cost_estimation.statistics import LocalStatistics, Statistics
+from ...global_utils import QueryStringWithParameters
+from ...query_pagination import paginate_query
+from ...schema.schema_info import QueryPlanningSchemaInfo, UUIDOrdering
+from ...schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
+from ..test_helpers import generate_schema_graph
+
+
+# The following TestCase class uses the 'snapshot_orientdb_client' fixture
+# which pylint does not recognize as a class member.
+# pylint: disable=no-member
+@pytest.mark.slow
+class CardinalityFeedbackTests(unittest.TestCase):
+    """Test the correction of cardinality estimates using observed result counts."""
+
+    def _make_schema_info(self, statistics: AdaptiveStatistics) -> QueryPlanningSchemaInfo:
+        """Return a QueryPlanningSchemaInfo with the given statistics."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        return QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_corrections_learned_from_result_counts(self) -> None:
+        statistics = AdaptiveStatistics(
+            LocalStatistics({"Animal": 1000, "Animal_ParentOf": 10000}), learning_rate=0.5
+        )
+        schema_info = self._make_schema_info(statistics)
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: "=", value: ["$name"])
+                out_Animal_ParentOf {
+                    name @output(out_name: "child_name")
+                }
+            }
+        }"""
+        other_query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+            }
+        }"""
+
+        # Without distinct value counts, the filter is estimated to pass every Animal.
+        analysis = analyze_query_string(
+            schema_info, QueryStringWithParameters(query, {"name": "Fido"})
+        )
+        self.assertAlmostEqual(10000.0, analysis.cardinality_estimate)
+        statistics.record_result_count(analysis, 99)
+
+        # Queries of the same shape are corrected, regardless of their parameters. Result counts
+        # and estimates are both incremented by 1 when learning the correction, which is therefore
+        # (99 + 1) / (10000 + 1).
+        analysis = analyze_query_string(
+            schema_info, QueryStringWithParameters(query, {"name": "Rex"})
+        )
+        self.assertAlmostEqual(100.0, analysis.cardinality_estimate, delta=1.0)
+        statistics.record_result_count(analysis, 9999)
+
+        # The first result counts are weighted equally, so the correction is the geometric mean of
+        # their ratios to the uncorrected estimate, about sqrt(0.01 * 1.0) = 0.1.
+        analysis = analyze_query_string(
+            schema_info, QueryStringWithParameters(query, {"name": "Rex"})
+        )
+        self.assertAlmostEqual(1000.0, analysis.cardinality_estimate, delta=1.0)
+
+        # Queries of other shapes are not corrected.
+        analysis = analyze_query_string(schema_info, QueryStringWithParameters(other_query, {}))
+        self.assertAlmostEqual(1000.0, analysis.cardinality_estimate)
+
+        # The corrections can be persisted, and used by other statistics.
+        corrections_file, corrections_path = tempfile.mkstemp(suffix=".json")
+        os.close(corrections_file)
+        self.addCleanup(os.remove, corrections_path)
+        write_cardinality_corrections(corrections_path, statistics.corrections)
+        corrections = read_cardinality_corrections(corrections_path)
+        self.assertEqual(statistics.corrections, corrections)
+
+        other_statistics = AdaptiveStatistics(
+            LocalStatistics({"Animal": 1000, "Animal_ParentOf": 10000}), corrections=corrections
+        )
+        analysis = analyze_query_string(
+            self._make_schema_info(other_statistics),
+            QueryStringWithParameters(query, {"name": "Fido"}),
+        )
+        self.assertAlmostEqual(1000.0, analysis.cardinality_estimate, delta=1.0)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_corrections_learned_from_pages(self) -> None:
+        statistics = AdaptiveStatistics(LocalStatistics({"Animal": 1000}))
+        schema_info = self._make_schema_info(statistics)
+        query = QueryStringWithParameters(
+            """{
+                Animal {
+                    name @output(out_name: "animal_name")
+                }
+            }""",
+            {},
+        )
+        analysis = analyze_query_string(schema_info, query)
+        self.assertAlmostEqual(1000.0, analysis.cardinality_estimate)
+
+        # The page adds a filter on the pagination key, which is not part of the query's shape.
+        page_and_remainder, _ = paginate_query(schema_info, query, 100)
+        page_analysis = analyze_query_string(schema_info, page_and_remainder.one_page)
+        self.assertNotEqual(query.query_string, page_and_remainder.one_page.query_string)
+        self.assertEqual(
+            get_query_shape(schema_info, analysis.metadata_table),
+            get_query_shape(schema_info, page_analysis.metadata_table),
+        )
+
+        # The result count of the page corrects the estimate of the whole query.
+        page_estimate = page_analysis.cardinality_estimate
+        statistics.record_result_count(page_analysis, 9)
+        analysis = analyze_query_string(schema_info, query)
+        self.assertAlmostEqual(
+            1000.0 * (9.0 + 1.0) / (page_estimate + 1.0), analysis.cardinality_estimate
+        )
+        self.assertLess(analysis.cardinality_estimate, 1000.0)
+
+
+# pylint: enable=no-member
+
+
+class AdaptiveStatisticsTests(unittest.TestCase):
+    """Test the statistics that AdaptiveStatistics forwards to the statistics it wraps."""
+
+    def test_all_statistics_forwarded(self) -> None:
+        # A Statistics method that AdaptiveStatistics doesn't override would return the default of
+        # the base class rather than the value of the wrapped statistics.
+        statistics_methods = {
+            method_name
+            for method_name, _ in inspect.getmembers(Statistics, inspect.isfunction)
+            if not method_name.startswith("_")
+        }
+        self.assertEqual(set(), statistics_methods - set(vars(AdaptiveStatistics)))
+
+    def test_statistics_of_wrapped_statistics(self) -> None:
+        statistics = AdaptiveStatistics(
+            LocalStatistics(
+                {"Animal": 1000},
+                distinct_field_values_counts={("Animal", "name"): 100},
+                field_quantiles={("Animal", "birthday"): [1, 2, 3]},
+            )
+        )
+        self.assertEqual(1000, statistics.get_class_count("Animal"))
+        self.assertEqual(100, statistics.get_distinct_field_values_count("Animal", "name"))
+        self.assertEqual([1, 2, 3], statistics.get_field_quantiles("Animal", "birthday"))
+        self.assertIsNone(statistics.get_class_count("Species"))
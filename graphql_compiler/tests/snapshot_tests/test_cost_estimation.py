@@ -1,7 +1,8 @@
 # Copyright 2019-present Kensho Technologies, LLC.
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 import math
-from typing import Any, Dict, List
+from typing import Any, Collection, Dict, List, Optional, Tuple
 import unittest
 
 import pytest
@@ -10,17 +11,24 @@ import pytz
 from .. import test_input_data
 from ...compiler.metadata import FilterInfo
 from ...cost_estimation.analysis import analyze_query_string
+from ...cost_estimation.cardinality_estimator import CardinalityEstimate
 from ...cost_estimation.filter_selectivity_utils import (
     ABSOLUTE_SELECTIVITY,
     FRACTIONAL_SELECTIVITY,
     Selectivity,
+    SelectivityBounds,
     _combine_filter_selectivities,
     adjust_counts_for_filters,
+    get_selectivity_and_bounds_of_filters_at_vertex,
     get_selectivity_of_filters_at_vertex,
 )
 from ...cost_estimation.int_value_conversion import (
+    MAX_FLOAT_INT,
+    MIN_FLOAT_INT,
     convert_field_value_to_int,
+    convert_float_to_int,
     convert_int_to_field_value,
+    convert_int_to_float,
     swap_uuid_prefix_and_suffix,
 )
 from ...cost_estimation.interval import Interval, intersect_int_intervals
@@ -43,6 +51,14 @@ def _intersect_and_check_int_intervals(test_case, interval_a, interval_b):
 def _make_schema_info_and_estimate_cardinality(
     schema_graph: SchemaGraph, statistics: Statistics, graphql_input: str, args: Dict[str, Any]
 ) -> float:
+    return _make_schema_info_and_estimate_cardinality_with_bounds(
+        schema_graph, statistics, graphql_input, args
+    ).value
+
+
+def _make_schema_info_and_estimate_cardinality_with_bounds(
+    schema_graph: SchemaGraph, statistics: Statistics, graphql_input: str, args: Dict[str, Any]
+) -> CardinalityEstimate:
     graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
     pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
     uuid4_field_info = {
@@ -58,7 +74,7 @@ def _make_schema_info_and_estimate_cardinality(
         uuid4_field_info=uuid4_field_info,
     )
     analysis = analyze_query_string(schema_info, QueryStringWithParameters(graphql_input, args))
-    return analysis.cardinality_estimate
+    return analysis.cardinality_estimate_with_bounds
 
 
 # The following TestCase class uses the 'snapshot_orientdb_client' fixture
@@ -352,6 +368,80 @@ class CostEstimationTests(unittest.TestCase):
 
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_optional_with_skewed_edge_degrees(self) -> None:
+        """Ensure we use the degree histogram of optional edges."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_input = """{
+            Animal {
+                out_Animal_BornAt @optional {
+                    name @output(out_name: "birth_event")
+                }
+            }
+        }"""
+
+        count_data = {
+            "Animal": 1000,
+            "Animal_BornAt": 1000,
+            "BirthEvent": 1000,
+        }
+        edge_degree_histograms = {
+            ("Animal", "Animal_BornAt", "BirthEvent", "out"): {0: 990, 100: 10},
+        }
+        uniform_statistics = LocalStatistics(count_data)
+        skewed_statistics = LocalStatistics(
+            count_data, edge_degree_histograms=edge_degree_histograms
+        )
+
+        # On average, each Animal has one out_Animal_BornAt edge.
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality(
+            schema_graph, uniform_statistics, graphql_input, dict()
+        )
+        self.assertAlmostEqual(1000.0, cardinality_estimate)
+
+        # However, only 10 Animals have any out_Animal_BornAt edges. The other 990 Animals each
+        # yield one result set with no BirthEvent, while the 10 Animals yield 100 each.
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality(
+            schema_graph, skewed_statistics, graphql_input, dict()
+        )
+        expected_cardinality_estimate = 990.0 + 10.0 * 100.0
+        self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_traverse_and_unique_filter_with_edge_degrees(self) -> None:
+        """Ensure absolute selectivities are spread over the edges given their degrees."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_input = """{
+            Animal {
+                name @output(out_name: "name")
+                out_Animal_BornAt {
+                    uuid @filter(op_name: "=", value:["$uuid"])
+                }
+            }
+        }"""
+        params = {
+            "uuid": "00000000-0000-0000-0000-000000000000",
+        }
+
+        count_data = {
+            "Animal": 1000,
+            "Animal_BornAt": 1000,
+            "BirthEvent": 1000,
+        }
+        edge_degree_histograms = {
+            ("Animal", "Animal_BornAt", "BirthEvent", "out"): {0: 990, 100: 10},
+        }
+        statistics = LocalStatistics(count_data, edge_degree_histograms=edge_degree_histograms)
+
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality(
+            schema_graph, statistics, graphql_input, params
+        )
+
+        # Only one of the 1000 BirthEvents passes the filter, and the 1000 out_Animal_BornAt
+        # edges lead to each BirthEvent once on average.
+        expected_cardinality_estimate = 1.0
+        self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
+
     @pytest.mark.usefixtures("snapshot_orientdb_client")
     def test_optional_and_traverse(self) -> None:
         """Ensure traversals inside optionals are handled correctly."""
@@ -517,9 +607,46 @@ class CostEstimationTests(unittest.TestCase):
         )
 
         # For each Animal, we expect 11.0 / 7.0 "child" Animals. Since recurse first explores
-        # depth=0, we add 1 to account for the parent. At the moment, we don't account for depths
-        # greater than 1, so we expect 7.0 * (11.0 / 7.0 + 1) results.
-        expected_cardinality_estimate = 7.0 * (11.0 / 7.0 + 1)
+        # depth=0, we add 1 to account for the parent, and each of the children is expected to
+        # have 11.0 / 7.0 children of its own at depth=2.
+        expected_cardinality_estimate = 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2)
+        self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_deep_recurse(self) -> None:
+        """Ensure the number of vertices reached grows with the depth of the recursion."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_input = """{
+            Animal {
+                out_Animal_ParentOf @recurse(depth: 5){
+                    name @output(out_name: "animal")
+                }
+            }
+        }"""
+
+        count_data = {
+            "Animal": 100,
+            "Animal_ParentOf": 300,
+        }
+        statistics = LocalStatistics(count_data)
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality(
+            schema_graph, statistics, graphql_input, dict()
+        )
+        # Each Animal has 3 children on average, so we expect 3 ** k Animals at depth=k. There
+        # are only 100 Animals, so there can't be more than 100 Animals at any depth.
+        expected_cardinality_estimate = 100.0 * (1 + 3 + 9 + 27 + 81 + 100)
+        self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
+
+        # Most Animals reached by the recursion have no children, so the branching factor of the
+        # recursion is lower than the average number of children of all Animals.
+        statistics = LocalStatistics(
+            count_data,
+            recursive_branching_factors={("Animal", "Animal_ParentOf", "Animal", "out"): 0.5,},
+        )
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality(
+            schema_graph, statistics, graphql_input, dict()
+        )
+        expected_cardinality_estimate = 100.0 * (1 + 0.5 + 0.25 + 0.125 + 0.0625 + 0.03125)
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
     @pytest.mark.usefixtures("snapshot_orientdb_client")
@@ -549,10 +676,9 @@ class CostEstimationTests(unittest.TestCase):
         )
 
         # For each Animal, we expect 11.0 / 7.0 "child" Animals. Since recurse first explores
-        # depth=0, we add 1 to account for the parent. At the moment, we don't account for depths
-        # greater than 1, so we exepct 11.0 / 7.0 + 1 total children, each of which has 13.0 / 7.0
-        # Animal_BornAt edges.
-        expected_cardinality_estimate = 7.0 * (11.0 / 7.0 + 1) * (13.0 / 7.0)
+        # depth=0, we add 1 to account for the parent, and (11.0 / 7.0) ** 2 Animals at depth=2,
+        # each of which has 13.0 / 7.0 Animal_BornAt edges.
+        expected_cardinality_estimate = 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2) * (13.0 / 7.0)
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
     @pytest.mark.usefixtures("snapshot_orientdb_client")
@@ -917,12 +1043,69 @@ class CostEstimationTests(unittest.TestCase):
             schema_graph, statistics, graphql_input, params
         )
 
-        # For each Animal, we expect 11.0 / 7.0 + 1 "child" Animals due to the recurse. Since
-        # there's a filter immediately following, we only expect 1 Animal to pass. We expect this to
-        # have 13.0 / 7.0 Animal_BornAt edges, giving a total of 7.0 * (13.0 / 7.0) results.
-        expected_cardinality_estimate = 7.0 * (11.0 / 7.0 + 1.0) * 1.0
+        # For each Animal, we expect 1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2 Animals due to the
+        # recurse, each of which has 13.0 / 7.0 Animal_BornAt edges. Since there's a filter
+        # immediately following, we only expect 1 Animal_BornAt edge per Animal to pass.
+        expected_cardinality_estimate = 7.0 * (1 + 11.0 / 7.0 + (11.0 / 7.0) ** 2) * 1.0
         self.assertAlmostEqual(expected_cardinality_estimate, cardinality_estimate)
 
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_cardinality_bounds(self) -> None:
+        """Test the bounds on the cardinality, given the uncertainty of the statistics."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_input = """{
+            Animal {
+                name @filter(op_name: "=", value: ["$name"])
+                out_Animal_ParentOf {
+                    name @output(out_name: "child_name")
+                }
+            }
+        }"""
+        count_data = {
+            "Animal": 1000,
+            "Animal_ParentOf": 10000,
+        }
+
+        # Without statistics on the name field, anything between no Animals and all of them may
+        # pass the filter, each of which has 10 children.
+        statistics = LocalStatistics(count_data)
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality_with_bounds(
+            schema_graph, statistics, graphql_input, {"name": "Fido"}
+        )
+        self.assertEqual(CardinalityEstimate(10000.0, 0.0, 10000.0), cardinality_estimate)
+
+        # Each sampled Animal stands for 10 Animals. The 4 sampled Animals named Fido stand for
+        # (4 - 2 * sqrt(4)) * 10 = 0 to (4 + 2 * sqrt(4)) * 10 = 80 Animals, but there are at least
+        # the 4 sampled ones.
+        sampling_summaries = {
+            "Animal": VertexSamplingSummary(
+                vertex_name="Animal", value_counts={"name": {"Fido": 4}}, sample_ratio=10,
+            )
+        }
+        statistics = LocalStatistics(count_data, sampling_summaries=sampling_summaries)
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality_with_bounds(
+            schema_graph, statistics, graphql_input, {"name": "Fido"}
+        )
+        self.assertEqual(CardinalityEstimate(400.0, 40.0, 800.0), cardinality_estimate)
+
+        # By the rule of 3, there are fewer than 3 * 10 Animals named Rex, since none were sampled.
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality_with_bounds(
+            schema_graph, statistics, graphql_input, {"name": "Rex"}
+        )
+        self.assertAlmostEqual(math.sqrt(30.0) * 10.0, cardinality_estimate.value)
+        self.assertEqual(0.0, cardinality_estimate.lower_bound)
+        self.assertEqual(300.0, cardinality_estimate.upper_bound)
+
+        # With 500 distinct names among 1000 Animals, the name may be shared by anything between
+        # no Animals and 1000 - 499 of them, since every other name is used at least once.
+        statistics = LocalStatistics(
+            count_data, distinct_field_values_counts={("Animal", "name"): 500}
+        )
+        cardinality_estimate = _make_schema_info_and_estimate_cardinality_with_bounds(
+            schema_graph, statistics, graphql_input, {"name": "Fido"}
+        )
+        self.assertEqual(CardinalityEstimate(20.0, 0.0, 5010.0), cardinality_estimate)
+
     @pytest.mark.usefixtures("snapshot_orientdb_client")
     def test_ast_rotation_invariance_with_inequality(self):
         """Test that rotating the query preserves the estimate."""
@@ -1046,6 +1229,55 @@ def _make_schema_info_and_get_filter_selectivity(
     )
 
 
+class _LookupCountingStatistics(LocalStatistics):
+    """LocalStatistics that count the lookups of value counts."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Initialize the LocalStatistics, with no lookups counted yet."""
+        super().__init__(*args, **kwargs)
+        self.lookup_counts: Dict[str, int] = {}
+
+    def _count_lookup(self, method_name: str) -> None:
+        """Count a lookup made with the given method."""
+        self.lookup_counts[method_name] = self.lookup_counts.get(method_name, 0) + 1
+
+    def get_value_count(self, vertex_name: str, field_name: str, value: Any) -> Optional[float]:
+        """See base class."""
+        self._count_lookup("get_value_count")
+        return super().get_value_count(vertex_name, field_name, value)
+
+    def get_value_counts(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[List[float]]:
+        """See base class."""
+        self._count_lookup("get_value_counts")
+        return super().get_value_counts(vertex_name, field_name, values)
+
+    def get_value_counts_with_bounds(
+        self, vertex_name: str, field_name: str, values: Collection[Any]
+    ) -> Optional[Tuple[List[float], Optional[List[Tuple[float, float]]]]]:
+        """See base class."""
+        self._count_lookup("get_value_counts_with_bounds")
+        return super().get_value_counts_with_bounds(vertex_name, field_name, values)
+
+    def get_joint_value_count(
+        self, vertex_name: str, field_names: Tuple[str, ...], values: Tuple[Any, ...]
+    ) -> Optional[float]:
+        """See base class."""
+        self._count_lookup("get_joint_value_count")
+        return super().get_joint_value_count(vertex_name, field_names, values)
+
+    def get_joint_value_counts(
+        self,
+        vertex_name: str,
+        field_names: Tuple[str, ...],
+        values_list: Collection[Tuple[Any, ...]],
+    ) -> Optional[List[float]]:
+        """See base class."""
+        self._count_lookup("get_joint_value_counts")
+        return super().get_joint_value_counts(vertex_name, field_names, values_list)
+
+
 @pytest.mark.slow
 class FilterSelectivityUtilsTests(unittest.TestCase):
     def test_combine_filter_selectivities(self) -> None:
@@ -1603,6 +1835,348 @@ class FilterSelectivityUtilsTests(unittest.TestCase):
         expected_counts = 32.0 * (1.5 / 3.0)
         self.assertAlmostEqual(expected_counts, result_counts)
 
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_inequality_filters_on_string(self) -> None:
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        statistics = LocalStatistics(
+            dict(),
+            field_quantiles={("Animal", "name"): ["A", "C", "F", "K", "M", "P", "S", "X", "Z"]},
+        )
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+        # Test < filter in the middle
+        filter_info_list = [FilterInfo(fields=("name",), op_name="<", args=("$name_upper",))]
+        params = {"name_upper": "G"}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        # The value "G" is in the middle of the third bucket out of eight.
+        expected_counts = 32.0 * (2.5 / 8.0)
+        self.assertAlmostEqual(expected_counts, result_counts)
+
+        # Test >= filter in the middle
+        filter_info_list = [FilterInfo(fields=("name",), op_name=">=", args=("$name_lower",))]
+        params = {"name_lower": "G"}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        expected_counts = 32.0 * (5.5 / 8.0)
+        self.assertAlmostEqual(expected_counts, result_counts)
+
+        # Test between filter
+        filter_info_list = [
+            FilterInfo(fields=("name",), op_name="between", args=("$name_lower", "$name_upper"))
+        ]
+        params = {"name_lower": "B", "name_upper": "Q"}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        # The range goes from the middle of the first to the middle of the sixth bucket.
+        expected_counts = 32.0 * (5.0 / 8.0)
+        self.assertAlmostEqual(expected_counts, result_counts)
+
+        # Test between filter with no values in range
+        params = {"name_lower": "Q", "name_upper": "B"}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        self.assertAlmostEqual(0.0, result_counts)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_selectivity_bounds_of_inequality_filters(self) -> None:
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        statistics = LocalStatistics(
+            dict(),
+            field_quantiles={("Animal", "name"): ["A", "C", "F", "K", "M", "P", "S", "X", "Z"]},
+        )
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+        # The value "G" is in the third bucket out of eight, so anything between the first two
+        # and the first three buckets may be less than it.
+        filter_info_list = [FilterInfo(fields=("name",), op_name="<", args=("$name_upper",))]
+        params = {"name_upper": "G"}
+        selectivity, selectivity_bounds = get_selectivity_and_bounds_of_filters_at_vertex(
+            schema_info, filter_info_list, params, "Animal"
+        )
+        self.assertEqual(Selectivity(kind=FRACTIONAL_SELECTIVITY, value=2.5 / 8.0), selectivity)
+        expected_selectivity_bounds = SelectivityBounds(
+            lower_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=2.0 / 8.0),
+            upper_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=3.0 / 8.0),
+        )
+        self.assertEqual(expected_selectivity_bounds, selectivity_bounds)
+
+        # The range goes from the first to the sixth bucket, which are only partially included.
+        filter_info_list = [
+            FilterInfo(fields=("name",), op_name="between", args=("$name_lower", "$name_upper"))
+        ]
+        params = {"name_lower": "B", "name_upper": "Q"}
+        selectivity, selectivity_bounds = get_selectivity_and_bounds_of_filters_at_vertex(
+            schema_info, filter_info_list, params, "Animal"
+        )
+        self.assertEqual(Selectivity(kind=FRACTIONAL_SELECTIVITY, value=5.0 / 8.0), selectivity)
+        expected_selectivity_bounds = SelectivityBounds(
+            lower_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=4.0 / 8.0),
+            upper_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=6.0 / 8.0),
+        )
+        self.assertEqual(expected_selectivity_bounds, selectivity_bounds)
+
+        # The selectivity of filters that are not estimated can be anything.
+        filter_info_list.append(
+            FilterInfo(fields=("color",), op_name="has_substring", args=("$color",))
+        )
+        params["color"] = "red"
+        selectivity, selectivity_bounds = get_selectivity_and_bounds_of_filters_at_vertex(
+            schema_info, filter_info_list, params, "Animal"
+        )
+        self.assertEqual(Selectivity(kind=FRACTIONAL_SELECTIVITY, value=5.0 / 8.0), selectivity)
+        expected_selectivity_bounds = SelectivityBounds(
+            lower_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=0.0),
+            upper_bound=Selectivity(kind=FRACTIONAL_SELECTIVITY, value=6.0 / 8.0),
+        )
+        self.assertEqual(expected_selectivity_bounds, selectivity_bounds)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_inequality_filters_on_decimal(self) -> None:
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        statistics = LocalStatistics(
+            dict(),
+            field_quantiles={
+                ("Animal", "net_worth"): [Decimal(value) for value in range(0, 1001, 100)]
+            },
+        )
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+        # Test > filter with an int parameter
+        filter_info_list = [
+            FilterInfo(fields=("net_worth",), op_name=">", args=("$net_worth_lower",))
+        ]
+        params: Dict[str, Any] = {"net_worth_lower": 250}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        # The value 250 is in the middle of the third bucket out of ten.
+        expected_counts = 32.0 * (7.5 / 10.0)
+        self.assertAlmostEqual(expected_counts, result_counts)
+
+        # Test <= filter with a Decimal parameter
+        filter_info_list = [
+            FilterInfo(fields=("net_worth",), op_name="<=", args=("$net_worth_upper",))
+        ]
+        params = {"net_worth_upper": Decimal("550.5")}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        expected_counts = 32.0 * (5.5 / 10.0)
+        self.assertAlmostEqual(expected_counts, result_counts)
+
+        # Test <= filter with a NaN parameter, which gives no information about the range
+        params = {"net_worth_upper": Decimal("NaN")}
+        result_counts = adjust_counts_for_filters(
+            schema_info, filter_info_list, params, "Animal", 32.0
+        )
+        self.assertAlmostEqual(32.0, result_counts)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_equality_filters_on_correlated_fields(self) -> None:
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        filter_info_list = [
+            FilterInfo(fields=("color",), op_name="=", args=("$color",)),
+            FilterInfo(fields=("name",), op_name="in_collection", args=("$names",)),
+            FilterInfo(fields=("birthday",), op_name="=", args=("$birthday",)),
+        ]
+        params = {
+            "color": "red",
+            "names": ["Fido", "Rex"],
+            "birthday": date(2017, 3, 22),
+        }
+        distinct_field_values_counts = {
+            ("Animal", "color"): 10,
+            ("Animal", "name"): 100,
+            ("Animal", "birthday"): 1000,
+        }
+
+        def get_result_counts(statistics: Statistics) -> float:
+            schema_info = QueryPlanningSchemaInfo(
+                schema=graphql_schema,
+                type_equivalence_hints=type_equivalence_hints,
+                schema_graph=schema_graph,
+                statistics=statistics,
+                pagination_keys=pagination_keys,
+                uuid4_field_info=uuid4_field_info,
+            )
+            return adjust_counts_for_filters(
+                schema_info, filter_info_list, params, "Animal", 100000.0
+            )
+
+        # Without joint statistics, the filters are assumed to be independent.
+        statistics = LocalStatistics(
+            dict(), distinct_field_values_counts=distinct_field_values_counts
+        )
+        expected_counts = 100000.0 * (1.0 / 10.0) * (2.0 / 100.0) * (1.0 / 1000.0)
+        self.assertAlmostEqual(expected_counts, get_result_counts(statistics))
+
+        # There are only 200 distinct (color, name) pairs, so the filters on color and name
+        # select 2 of them, and are independent of the filter on birthday.
+        statistics = LocalStatistics(
+            dict(),
+            distinct_field_values_counts=distinct_field_values_counts,
+            joint_distinct_field_values_counts={("Animal", ("color", "name")): 200},
+        )
+        expected_counts = 100000.0 * (2.0 / 200.0) * (1.0 / 1000.0)
+        self.assertAlmostEqual(expected_counts, get_result_counts(statistics))
+
+        # Filters on correlated fields are never estimated to be less selective than the most
+        # selective of them.
+        statistics = LocalStatistics(
+            dict(),
+            distinct_field_values_counts=distinct_field_values_counts,
+            joint_distinct_field_values_counts={
+                ("Animal", ("birthday", "color", "name")): 1000,
+                ("Animal", ("color", "name")): 200,
+            },
+        )
+        expected_counts = 100000.0 * (1.0 / 1000.0)
+        self.assertAlmostEqual(expected_counts, get_result_counts(statistics))
+
+        # Joint value counts take precedence over joint distinct value counts.
+        statistics = LocalStatistics(
+            dict(),
+            distinct_field_values_counts=distinct_field_values_counts,
+            joint_distinct_field_values_counts={("Animal", ("color", "name")): 200},
+            sampling_summaries={
+                "Animal": VertexSamplingSummary(
+                    vertex_name="Animal",
+                    value_counts={},
+                    sample_ratio=10,
+                    joint_value_counts={
+                        ("color", "name"): {
+                            ("red", "Fido"): 3,
+                            ("red", "Rex"): 2,
+                            ("blue", "Rex"): 7,
+                        }
+                    },
+                )
+            },
+        )
+        expected_counts = (3 + 2) * 10
+        self.assertAlmostEqual(expected_counts, get_result_counts(statistics))
+
+        # Joint statistics must be keyed by sorted field names.
+        with self.assertRaises(AssertionError):
+            LocalStatistics(
+                dict(), joint_distinct_field_values_counts={("Animal", ("name", "color")): 1}
+            )
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_in_collection_value_counts_looked_up_in_one_batch(self) -> None:
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        birthdays = [date(2019, 3, 1) + timedelta(days=day) for day in range(100)]
+        colors = ["red", "blue", "green", "yellow"]
+        statistics = _LookupCountingStatistics(
+            {"Animal": 1000000},
+            sampling_summaries={
+                "Animal": VertexSamplingSummary(
+                    vertex_name="Animal",
+                    value_counts={"birthday": {date(2019, 3, 1): 100, date(2019, 4, 6): 80}},
+                    sample_ratio=1000,
+                    joint_value_counts={
+                        ("birthday", "color"): {
+                            (date(2019, 3, 1), "red"): 60,
+                            (date(2019, 4, 6), "blue"): 50,
+                        }
+                    },
+                )
+            },
+        )
+
+        # The value counts of all 100 birthdays are looked up at once.
+        _make_schema_info_and_get_filter_selectivity(
+            schema_graph,
+            statistics,
+            FilterInfo(
+                fields=("birthday",), op_name="in_collection", args=("$birthday_collection",)
+            ),
+            {"birthday_collection": birthdays},
+            "Animal",
+        )
+        self.assertEqual({"get_value_counts_with_bounds": 1}, statistics.lookup_counts)
+
+        # So are the joint value counts of all 400 combinations of birthday and color.
+        statistics.lookup_counts.clear()
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys={
+                vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names
+            },
+            uuid4_field_info={
+                vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+                for vertex_name in schema_graph.vertex_class_names
+            },
+        )
+        selectivity = get_selectivity_of_filters_at_vertex(
+            schema_info,
+            [
+                FilterInfo(
+                    fields=("birthday",), op_name="in_collection", args=("$birthday_collection",)
+                ),
+                FilterInfo(fields=("color",), op_name="in_collection", args=("$colors",)),
+            ],
+            {"birthday_collection": birthdays, "colors": colors},
+            "Animal",
+        )
+        self.assertEqual(1, statistics.lookup_counts.get("get_joint_value_counts"))
+        self.assertNotIn("get_joint_value_count", statistics.lookup_counts)
+        self.assertEqual(ABSOLUTE_SELECTIVITY, selectivity.kind)
+
 
 # pylint: enable=no-member
 
@@ -1842,6 +2416,35 @@ class IntegerIntervalTests(unittest.TestCase):
             )
             self.assertEqual(date_value, recovered_date)
 
+    def test_int_value_conversion_float(self) -> None:
+        float_values = [
+            -math.inf,
+            -1e308,
+            -1.5,
+            -5e-324,
+            0.0,
+            5e-324,
+            1.0,
+            1.5,
+            1e308,
+            math.inf,
+        ]
+        int_values = [convert_float_to_int(float_value) for float_value in float_values]
+        self.assertEqual(sorted(set(int_values)), int_values)
+        self.assertEqual(MIN_FLOAT_INT, int_values[0])
+        self.assertEqual(MAX_FLOAT_INT, int_values[-1])
+        self.assertEqual(float_values, [convert_int_to_float(value) for value in int_values])
+
+        # Consecutive floats are represented by consecutive ints, and both zeros by 0.
+        self.assertEqual(-1, convert_float_to_int(-5e-324))
+        self.assertEqual(0, convert_float_to_int(-0.0))
+        self.assertEqual(1.0 + 2 ** -52, convert_int_to_float(convert_float_to_int(1.0) + 1))
+
+        with self.assertRaises(ValueError):
+            convert_float_to_int(math.nan)
+        with self.assertRaises(ValueError):
+            convert_int_to_float(MAX_FLOAT_INT + 1)
+
     def test_swap_uuid_prefix_and_suffix(self):
         uuid_string = "01234567-89ab-cdef-0123-456789abcdef"
         flipped_uuid = swap_uuid_prefix_and_suffix(uuid_string)
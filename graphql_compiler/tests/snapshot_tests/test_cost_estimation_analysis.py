@@ -3,10 +3,11 @@ import unittest
 
 import pytest
 
-from ...cost_estimation.analysis import analyze_query_string
+from ...cost_estimation.analysis import QueryShapeAnalysisCache, analyze_query_string
 from ...cost_estimation.filter_selectivity_utils import Selectivity
 from ...cost_estimation.interval import Interval
 from ...cost_estimation.statistics import LocalStatistics
+from ...exceptions import GraphQLInvalidArgumentError
 from ...global_utils import QueryStringWithParameters
 from ...schema.schema_info import QueryPlanningSchemaInfo, UUIDOrdering
 from ...schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
@@ -420,3 +421,65 @@ class CostEstimationAnalysisTests(unittest.TestCase):
             ("Animal", "in_Animal_ParentOf", "in_Animal_ParentOf"): 1000.0,
         }
         self.assertEqual(expected_estimates, estimates)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_shape_analysis_cache(self) -> None:
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        class_counts = {"Animal": 1000}
+        statistics = LocalStatistics(class_counts)
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+        shape_analysis_cache = QueryShapeAnalysisCache(schema_info, max_size=1)
+
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                uuid @filter(op_name: ">=", value: ["$uuid_min"])
+            }
+        }"""
+        first_analysis = analyze_query_string(
+            schema_info,
+            QueryStringWithParameters(query, {"uuid_min": "40000000-0000-0000-0000-000000000000"}),
+            shape_analysis_cache,
+        )
+        second_analysis = analyze_query_string(
+            schema_info,
+            QueryStringWithParameters(query, {"uuid_min": "c0000000-0000-0000-0000-000000000000"}),
+            shape_analysis_cache,
+        )
+
+        # The analysis passes that ignore parameters are shared, while the others are not.
+        self.assertIs(first_analysis.metadata_table, second_analysis.metadata_table)
+        self.assertIs(
+            first_analysis.fields_eligible_for_pagination,
+            second_analysis.fields_eligible_for_pagination,
+        )
+        self.assertAlmostEqual(750.0, first_analysis.cardinality_estimate, delta=1.0)
+        self.assertAlmostEqual(250.0, second_analysis.cardinality_estimate, delta=1.0)
+
+        # Queries with invalid parameters are rejected, even when their shape is cached.
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            analyze_query_string(
+                schema_info, QueryStringWithParameters(query, {}), shape_analysis_cache
+            ).metadata_table
+
+        # The least recently used query is evicted when the cache is full.
+        other_analysis = analyze_query_string(
+            schema_info,
+            QueryStringWithParameters("""{ Animal { name @output(out_name: "name") } }""", {}),
+            shape_analysis_cache,
+        )
+        self.assertIsNot(first_analysis.metadata_table, other_analysis.metadata_table)
+        self.assertEqual(1, len(shape_analysis_cache))
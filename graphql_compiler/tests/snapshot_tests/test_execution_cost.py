@@ -0,0 +1,268 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+from typing import Any, Dict
+import unittest
+
+import pytest
+
+from ...cost_estimation.analysis import analyze_query_string
+from ...cost_estimation.execution_cost import (
+    CYPHER_EXECUTION_COST_MODEL,
+    MATCH_EXECUTION_COST_MODEL,
+    SQL_EXECUTION_COST_MODEL,
+    ExecutionCostEstimate,
+    ExecutionCostModel,
+    TraversalOperator,
+)
+from ...cost_estimation.statistics import LocalStatistics
+from ...global_utils import QueryStringWithParameters
+from ...schema.schema_info import QueryPlanningSchemaInfo, UUIDOrdering
+from ...schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
+from ..test_helpers import generate_schema_graph
+
+
+# The following TestCase class uses the 'snapshot_orientdb_client' fixture
+# which pylint does not recognize as a class member.
+# pylint: disable=no-member
+@pytest.mark.slow
+class ExecutionCostTests(unittest.TestCase):
+    """Test the estimated cost of executing queries on different backends."""
+
+    def _estimate_execution_cost(
+        self,
+        statistics: LocalStatistics,
+        query: str,
+        args: Dict[str, Any],
+        execution_cost_model: ExecutionCostModel,
+    ) -> ExecutionCostEstimate:
+        """Return the estimated execution cost of the query with the given statistics."""
+        schema_graph = generate_schema_graph(self.orientdb_client)  # type: ignore  # from fixture
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+        analysis = analyze_query_string(
+            schema_info,
+            QueryStringWithParameters(query, args),
+            execution_cost_model=execution_cost_model,
+        )
+        return analysis.execution_cost_estimate
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_traversal_with_selective_filter(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000, "Animal_ParentOf": 100000},
+            distinct_field_values_counts={("Animal", "name"): 1000},
+        )
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                out_Animal_ParentOf {
+                    name @filter(op_name: "=", value: ["$child_name"])
+                }
+            }
+        }"""
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"child_name": "Fido"}, SQL_EXECUTION_COST_MODEL
+        )
+
+        # All 1000 Animals are read, and each of their 100 children is read to find the 100
+        # children named Fido among all of them.
+        root_cost, traversal_cost = execution_cost.traversal_costs
+        self.assertEqual(("Animal",), root_cost.vertex_path)
+        self.assertEqual(TraversalOperator.Scan, root_cost.operator)
+        self.assertAlmostEqual(1000.0, root_cost.rows_read)
+        self.assertAlmostEqual(2000.0, root_cost.cost)
+
+        self.assertEqual(("Animal", "out_Animal_ParentOf"), traversal_cost.vertex_path)
+        self.assertEqual(TraversalOperator.Expand, traversal_cost.operator)
+        self.assertAlmostEqual(1000.0, traversal_cost.input_row_count)
+        self.assertAlmostEqual(100000.0, traversal_cost.rows_read)
+        self.assertAlmostEqual(100.0, traversal_cost.output_row_count)
+        self.assertAlmostEqual(100100.0, traversal_cost.cost)
+
+        self.assertAlmostEqual(102100.0, execution_cost.cost)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_recursion(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000, "Animal_ParentOf": 40000},
+            distinct_field_values_counts={("Animal", "name"): 1000},
+        )
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: "=", value: ["$name"])
+                out_Animal_ParentOf @recurse(depth: 3) {
+                    name @output(out_name: "descendant_name")
+                }
+            }
+        }"""
+
+        # With 40 children per Animal, there are 1 + 40 + 40^2 + 40^3 = 65641 paths of depth at
+        # most 3 from each Animal. SQL only computes the recursion from the Animal named Fido,
+        # which the base of the recursive CTE is restricted to.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"name": "Fido"}, SQL_EXECUTION_COST_MODEL
+        )
+        recursion_cost = execution_cost.traversal_costs[1]
+        self.assertEqual(TraversalOperator.Recurse, recursion_cost.operator)
+        self.assertAlmostEqual(1.0, recursion_cost.input_row_count)
+        self.assertAlmostEqual(65641.0, recursion_cost.rows_read)
+        self.assertAlmostEqual(65641.0, recursion_cost.output_row_count)
+
+        # Cypher only recurses from the Animal named Fido.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"name": "Fido"}, CYPHER_EXECUTION_COST_MODEL
+        )
+        recursion_cost = execution_cost.traversal_costs[1]
+        self.assertAlmostEqual(65641.0, recursion_cost.rows_read)
+        self.assertAlmostEqual(65641.0, recursion_cost.output_row_count)
+
+        # MATCH reaches each of the 1000 Animals at most once per level of depth.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"name": "Fido"}, MATCH_EXECUTION_COST_MODEL
+        )
+        recursion_cost = execution_cost.traversal_costs[1]
+        self.assertAlmostEqual(2041.0, recursion_cost.rows_read)
+        self.assertAlmostEqual(2041.0, recursion_cost.output_row_count)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_recursion_after_selective_filter(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000, "Animal_ParentOf": 40000},
+            distinct_field_values_counts={("Animal", "name"): 1000},
+        )
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                out_Animal_ParentOf {
+                    name @filter(op_name: "=", value: ["$child_name"])
+                    out_Animal_ParentOf @recurse(depth: 2) {
+                        name @output(out_name: "descendant_name")
+                    }
+                }
+            }
+        }"""
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"child_name": "Fido"}, SQL_EXECUTION_COST_MODEL
+        )
+
+        # Only the 40 children named Fido among the 40000 children of all Animals are recursed
+        # from, each of which has 1 + 40 + 40^2 = 1641 paths of depth at most 2.
+        traversal_cost, recursion_cost = execution_cost.traversal_costs[1:]
+        self.assertAlmostEqual(40000.0, traversal_cost.rows_read)
+        self.assertAlmostEqual(40.0, traversal_cost.output_row_count)
+        self.assertEqual(TraversalOperator.Recurse, recursion_cost.operator)
+        self.assertAlmostEqual(40.0, recursion_cost.input_row_count)
+        self.assertAlmostEqual(65640.0, recursion_cost.rows_read)
+        self.assertAlmostEqual(65640.0, recursion_cost.output_row_count)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_fold(self) -> None:
+        statistics = LocalStatistics(
+            {"Animal": 1000, "Animal_ParentOf": 10000},
+            distinct_field_values_counts={("Animal", "name"): 1000},
+        )
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: "=", value: ["$name"])
+                out_Animal_ParentOf @fold {
+                    name @output(out_name: "child_names")
+                }
+            }
+        }"""
+
+        # SQL aggregates the children of all 1000 Animals before joining them to the Animal
+        # named Fido.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"name": "Fido"}, SQL_EXECUTION_COST_MODEL
+        )
+        fold_cost = execution_cost.traversal_costs[1]
+        self.assertEqual(TraversalOperator.Fold, fold_cost.operator)
+        self.assertAlmostEqual(1.0, fold_cost.input_row_count)
+        self.assertAlmostEqual(10000.0, fold_cost.rows_read)
+
+        # Cypher only collects the 10 children of the Animal named Fido.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {"name": "Fido"}, CYPHER_EXECUTION_COST_MODEL
+        )
+        fold_cost = execution_cost.traversal_costs[1]
+        self.assertAlmostEqual(10.0, fold_cost.rows_read)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_missing_class_count(self) -> None:
+        query = """{
+            Animal {
+                uuid @filter(op_name: "=", value: ["$uuid"])
+                name @output(out_name: "animal_name")
+            }
+        }"""
+        execution_cost = self._estimate_execution_cost(
+            LocalStatistics({}),
+            query,
+            {"uuid": "00000000-0000-0000-0000-000000000000"},
+            SQL_EXECUTION_COST_MODEL,
+        )
+
+        # Without the count of Animals, the uniquely indexed uuid still tells that one is read.
+        (root_cost,) = execution_cost.traversal_costs
+        self.assertAlmostEqual(1.0, root_cost.rows_read)
+        self.assertAlmostEqual(2.0, execution_cost.cost)
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_compound_match_query(self) -> None:
+        statistics = LocalStatistics({"Animal": 1000, "Animal_ParentOf": 1000})
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                out_Animal_ParentOf @optional {
+                    name @output(out_name: "child_name")
+                    out_Animal_ParentOf @optional {
+                        out_Animal_ParentOf {
+                            name @output(out_name: "great_grandchild_name")
+                        }
+                    }
+                }
+            }
+        }"""
+
+        # The optional traversals that expand vertex fields split the MATCH query into 3 queries,
+        # following none, the first, or both of them.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {}, MATCH_EXECUTION_COST_MODEL
+        )
+        self.assertEqual(
+            [
+                (TraversalOperator.Scan, 3),
+                (TraversalOperator.OptionalExpand, 2),
+                (TraversalOperator.OptionalExpand, 1),
+                (TraversalOperator.Expand, 1),
+            ],
+            [
+                (traversal_cost.operator, traversal_cost.execution_count)
+                for traversal_cost in execution_cost.traversal_costs
+            ],
+        )
+
+        # SQL executes a single query.
+        execution_cost = self._estimate_execution_cost(
+            statistics, query, {}, SQL_EXECUTION_COST_MODEL
+        )
+        self.assertEqual(
+            [1, 1, 1, 1],
+            [traversal_cost.execution_count for traversal_cost in execution_cost.traversal_costs],
+        )
+
+
+# pylint: enable=no-member
@@ -1,5 +1,6 @@
 # Copyright 2019-present Kensho Technologies, LLC.
 import datetime
+import decimal
 from typing import Tuple
 import unittest
 
@@ -1115,6 +1116,88 @@ class QueryPaginationTests(unittest.TestCase):
         ]
         self.assertEqual(expected_parameters, list(generated_parameters))
 
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_parameter_value_generation_string_existing_filter(self):
+        schema_graph = generate_schema_graph(self.orientdb_client)
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        pagination_keys["Species"] = "name"  # Force pagination on string field
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        class_counts = {"Species": 1000}
+        statistics = LocalStatistics(
+            class_counts,
+            field_quantiles={("Species", "name"): ["A", "C", "F", "K", "M", "P", "S", "X", "Z"]},
+        )
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+        query = """{
+            Species {
+                name @output(out_name: "species_name")
+                     @filter(op_name: ">", value: ["$name_lower"])
+            }
+        }"""
+        args = {"name_lower": "D"}
+        query_ast = safe_parse_graphql(query)
+        vertex_partition = VertexPartitionPlan(("Species",), "name", 3)
+        generated_parameters = generate_parameters_for_vertex_partition(
+            schema_info, ASTWithParameters(query_ast, args), vertex_partition
+        )
+
+        # Only the quantiles "F" through "X" are above the existing filter, and they are split
+        # into three almost equal groups.
+        expected_parameters = ["M", "S"]
+        self.assertEqual(expected_parameters, list(generated_parameters))
+
+    @pytest.mark.usefixtures("snapshot_orientdb_client")
+    def test_parameter_value_generation_decimal_existing_filter(self):
+        schema_graph = generate_schema_graph(self.orientdb_client)
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        pagination_keys = {vertex_name: "uuid" for vertex_name in schema_graph.vertex_class_names}
+        pagination_keys["Animal"] = "net_worth"  # Force pagination on Decimal field
+        uuid4_field_info = {
+            vertex_name: {"uuid": UUIDOrdering.LeftToRight}
+            for vertex_name in schema_graph.vertex_class_names
+        }
+        class_counts = {"Animal": 1000}
+        statistics = LocalStatistics(
+            class_counts,
+            field_quantiles={("Animal", "net_worth"): [decimal.Decimal(i) for i in range(101)]},
+        )
+        schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=statistics,
+            pagination_keys=pagination_keys,
+            uuid4_field_info=uuid4_field_info,
+        )
+
+        query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                net_worth @filter(op_name: "<", value: ["$net_worth_upper"])
+            }
+        }"""
+        args = {"net_worth_upper": decimal.Decimal(50)}
+        query_ast = safe_parse_graphql(query)
+        vertex_partition = VertexPartitionPlan(("Animal",), "net_worth", 3)
+        generated_parameters = generate_parameters_for_vertex_partition(
+            schema_info, ASTWithParameters(query_ast, args), vertex_partition
+        )
+
+        expected_parameters = [decimal.Decimal(17), decimal.Decimal(34)]
+        self.assertEqual(expected_parameters, list(generated_parameters))
+
     @pytest.mark.usefixtures("snapshot_orientdb_client")
     def test_parameter_value_generation_uuid(self):
         schema_graph = generate_schema_graph(self.orientdb_client)
@@ -29,7 +29,7 @@ from ..compiler import (
 from ..compiler.sqlalchemy_extensions import print_sqlalchemy_query_string
 from ..exceptions import GraphQLCompilationError, GraphQLValidationError
 from ..schema import TypeEquivalenceHintsType
-from ..schema.schema_info import CommonSchemaInfo
+from ..schema.schema_info import CommonSchemaInfo, SQLAlchemySchemaInfo
 from .test_helpers import (
     SKIP_TEST,
     compare_cypher,
@@ -81,8 +81,16 @@ def check_test_data(
     expected_mssql: Union[str, Type[NotImplementedError]],
     expected_cypher: Union[str, Type[NotImplementedError]],
     expected_postgresql: Union[str, Type[NotImplementedError]],
+    mssql_schema_info: Optional[SQLAlchemySchemaInfo] = None,
 ) -> None:
-    """Assert that the GraphQL input generates all expected output queries data."""
+    """Assert that the GraphQL input generates all expected output queries data.
+
+    The MSSQL query is compiled with the test case's MSSQL schema info, unless another one, e.g. of
+    a dialect that connected to a particular version of SQL Server, is given.
+    """
+    if mssql_schema_info is None:
+        mssql_schema_info = test_case.mssql_schema_info
+
     schema_based_type_equivalence_hints: Optional[TypeEquivalenceHintsType]
     if test_data.type_equivalence_hints:
         # For test convenience, we accept the type equivalence hints in string form.
@@ -101,12 +109,10 @@ def check_test_data(
     match_compiler_func = partial(compile_graphql_to_match, common_schema_info)
     gremlin_compiler_func = partial(compile_graphql_to_gremlin, common_schema_info)
     cypher_compiler_func = partial(compile_graphql_to_cypher, common_schema_info)
-    mssql_compiler_func = partial(compile_graphql_to_sql, test_case.mssql_schema_info)
+    mssql_compiler_func = partial(compile_graphql_to_sql, mssql_schema_info)
     postgresql_compiler_func = partial(compile_graphql_to_sql, test_case.postgresql_schema_info)
 
-    mssql_printer_func = rpartial(
-        print_sqlalchemy_query_string, test_case.mssql_schema_info.dialect
-    )
+    mssql_printer_func = rpartial(print_sqlalchemy_query_string, mssql_schema_info.dialect)
     postgresql_printer_func = rpartial(
         print_sqlalchemy_query_string, test_case.postgresql_schema_info.dialect
     )
@@ -153,6 +159,9 @@ class CompilerTests(unittest.TestCase):
         self.maxDiff = None
         self.schema = get_schema()
         self.mssql_schema_info = get_sqlalchemy_schema_info(dialect="mssql")
+        # Simulate a dialect that connected to SQL Server 2017, which supports STRING_AGG.
+        self.mssql_2017_schema_info = get_sqlalchemy_schema_info(dialect="mssql")
+        self.mssql_2017_schema_info.dialect.server_version_info = (14, 0, 3335, 7)
         self.postgresql_schema_info = get_sqlalchemy_schema_info(dialect="postgresql")
 
     def test_immediate_output(self) -> None:
@@ -1218,7 +1227,35 @@ class CompilerTests(unittest.TestCase):
             )
         """
         expected_gremlin = NotImplementedError
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Species_1].name AS species_name
+            FROM
+                db_1.schema_1.[Species] AS [Species_1]
+            LEFT OUTER JOIN db_1.schema_1.[Animal] AS [Animal_1]
+            ON [Species_1].uuid = [Animal_1].species
+            JOIN (
+                SELECT
+                    [Species_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Species] AS [Species_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        count(*) AS fold_output__x_count,
+                        [Species_3].eats AS eats
+                    FROM
+                        db_1.schema_1.[Species] AS [Species_3]
+                    GROUP BY
+                        [Species_3].eats
+                ) AS anon_1
+                ON [Species_2].uuid = anon_1.eats
+            ) AS folded_subquery_1
+            ON [Species_1].uuid = folded_subquery_1.uuid
+            WHERE
+                ([Animal_1].name = :animal_name OR [Animal_1].species IS NULL)
+                AND folded_subquery_1.fold_output__x_count >= :predators
+        """
         expected_cypher = NotImplementedError
         expected_postgresql = """
             SELECT
@@ -1249,6 +1286,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_between_filter_on_simple_scalar(self) -> None:
@@ -5573,7 +5611,68 @@ class CompilerTests(unittest.TestCase):
             ) AS folded_subquery_1
             ON "Animal_1".uuid = folded_subquery_1.uuid
         """
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS animal_name,
+                folded_subquery_1.fold_output_color AS child_color_list,
+                folded_subquery_1.fold_output_name AS child_names_list
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                    coalesce(anon_1.fold_output_color, '') AS fold_output_color
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_name,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].color, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_color
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+        """
         expected_match = SKIP_TEST
         expected_gremlin = SKIP_TEST
         expected_cypher = SKIP_TEST
@@ -5585,6 +5684,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_fold_same_edge_type_in_different_locations(self) -> None:
@@ -6337,7 +6437,68 @@ class CompilerTests(unittest.TestCase):
                 )
             ])}
         """
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS animal_name,
+                folded_subquery_1.fold_output_name AS child_names_list,
+                folded_subquery_1.fold_output_uuid AS child_uuids_list
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_uuid, '') AS fold_output_uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].uuid, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_name
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+        """
         expected_cypher = """
             MATCH (Animal___1:Animal)
             OPTIONAL MATCH (Animal___1)-[:Animal_ParentOf]->(Animal__out_Animal_ParentOf___1:Animal)
@@ -6377,6 +6538,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_multiple_outputs_in_same_fold_and_traverse(self) -> None:
@@ -6428,7 +6590,70 @@ class CompilerTests(unittest.TestCase):
                     ))
             ])}
         """
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS animal_name,
+                folded_subquery_1.fold_output_name AS sibling_and_self_names_list,
+                folded_subquery_1.fold_output_uuid AS sibling_and_self_uuids_list
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_uuid, '') AS fold_output_uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].uuid AS uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_4].uuid, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid, [Animal_4].uuid
+                        ) AS fold_output_uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_4].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid, [Animal_4].uuid
+                        ) AS fold_output_name
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    JOIN db_1.schema_1.[Animal] AS [Animal_4]
+                    ON [Animal_3].uuid = [Animal_4].parent
+                    GROUP BY
+                        [Animal_3].uuid
+                ) AS anon_1
+                ON [Animal_2].parent = anon_1.uuid
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+        """
         expected_cypher = """
             MATCH (Animal___1:Animal)
             OPTIONAL MATCH (Animal___1)<-[:Animal_ParentOf]-(Animal__in_Animal_ParentOf___1:Animal)
@@ -6478,6 +6703,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_multiple_folds(self) -> None:
@@ -6527,7 +6753,124 @@ class CompilerTests(unittest.TestCase):
                 )
             ])}
         """
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS animal_name,
+                folded_subquery_1.fold_output_name AS child_names_list,
+                folded_subquery_1.fold_output_uuid AS child_uuids_list,
+                folded_subquery_2.fold_output_name AS parent_names_list,
+                folded_subquery_2.fold_output_uuid AS parent_uuids_list
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_uuid, '') AS fold_output_uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].uuid, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_name
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+            JOIN (
+                SELECT
+                    [Animal_4].uuid AS uuid,
+                    coalesce(anon_2.fold_output_uuid, '') AS fold_output_uuid,
+                    coalesce(anon_2.fold_output_name, '') AS fold_output_name
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_4]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_5].uuid AS uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_5].uuid, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_5].uuid
+                        ) AS fold_output_uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_5].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_5].uuid
+                        ) AS fold_output_name
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_5]
+                    GROUP BY
+                        [Animal_5].uuid
+                ) AS anon_2
+                ON [Animal_4].parent = anon_2.uuid
+            ) AS folded_subquery_2
+            ON [Animal_1].uuid = folded_subquery_2.uuid
+        """
         expected_cypher = """
             MATCH (Animal___1:Animal)
             OPTIONAL MATCH (Animal___1)<-[:Animal_ParentOf]-(Animal__in_Animal_ParentOf___1:Animal)
@@ -6590,6 +6933,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_multiple_folds_and_traverse(self) -> None:
@@ -6665,7 +7009,128 @@ class CompilerTests(unittest.TestCase):
                 ))
             ])}
         """
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS animal_name,
+                folded_subquery_2.fold_output_name AS sibling_and_self_names_list,
+                folded_subquery_2.fold_output_uuid AS sibling_and_self_uuids_list,
+                folded_subquery_1.fold_output_name AS spouse_and_self_names_list,
+                folded_subquery_1.fold_output_uuid AS spouse_and_self_uuids_list
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_uuid, '') AS fold_output_uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_4].uuid, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid, [Animal_4].uuid
+                        ) AS fold_output_uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_4].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid, [Animal_4].uuid
+                        ) AS fold_output_name
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    JOIN db_1.schema_1.[Animal] AS [Animal_4]
+                    ON [Animal_3].parent = [Animal_4].uuid
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+            JOIN (
+                SELECT
+                    [Animal_5].uuid AS uuid,
+                    coalesce(anon_2.fold_output_uuid, '') AS fold_output_uuid,
+                    coalesce(anon_2.fold_output_name, '') AS fold_output_name
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_5]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_6].uuid AS uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_7].uuid, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_6].uuid, [Animal_7].uuid
+                        ) AS fold_output_uuid,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_7].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_6].uuid, [Animal_7].uuid
+                        ) AS fold_output_name
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_6]
+                    JOIN db_1.schema_1.[Animal] AS [Animal_7]
+                    ON [Animal_6].uuid = [Animal_7].parent
+                    GROUP BY
+                        [Animal_6].uuid
+                ) AS anon_2
+                ON [Animal_5].parent = anon_2.uuid
+            ) AS folded_subquery_2
+            ON [Animal_1].uuid = folded_subquery_2.uuid
+        """
         expected_cypher = """
             MATCH (Animal___1:Animal)
             OPTIONAL MATCH (Animal___1)<-[:Animal_ParentOf]-(Animal__in_Animal_ParentOf___1:Animal)
@@ -6747,6 +7212,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_fold_date_and_datetime_fields(self) -> None:
@@ -7258,7 +7724,70 @@ class CompilerTests(unittest.TestCase):
                 name: m.Animal___1.name
             ])}
         """
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                folded_subquery_1.fold_output_description AS child_descriptions,
+                folded_subquery_1.fold_output_name AS child_list,
+                [Animal_1].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                    coalesce(anon_1.fold_output_description, '') AS fold_output_description
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_name,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].description, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) WITHIN GROUP (
+                            ORDER BY [Animal_3].uuid
+                        ) AS fold_output_description
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    WHERE
+                        [Animal_3].name = :desired
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+        """
         expected_postgresql = """
             SELECT
                 coalesce(folded_subquery_1.fold_output_description, ARRAY[]::VARCHAR[])
@@ -7304,6 +7833,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_filter_on_fold_scope(self) -> None:
@@ -7667,7 +8197,49 @@ class CompilerTests(unittest.TestCase):
                 $Animal___1___out_Animal_ParentOf = Animal___1.out("Animal_ParentOf").asList()
         """
         expected_gremlin = NotImplementedError
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                folded_subquery_1.fold_output_name AS child_names,
+                [Animal_1].name AS name,
+                folded_subquery_1.fold_output__x_count AS number_of_children
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) AS fold_output_name,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+        """
         expected_postgresql = """
             SELECT
                 coalesce(folded_subquery_1.fold_output_name, ARRAY[]::VARCHAR[]) AS child_names,
@@ -7697,6 +8269,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_filter_count_with_runtime_parameter_in_fold_scope(self) -> None:
@@ -7720,7 +8293,50 @@ class CompilerTests(unittest.TestCase):
         """
         expected_gremlin = NotImplementedError
 
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                folded_subquery_1.fold_output_name AS child_names,
+                [Animal_1].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) AS fold_output_name,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+            WHERE
+                folded_subquery_1.fold_output__x_count >= :min_children
+        """
 
         expected_postgresql = """
             SELECT
@@ -7751,6 +8367,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_filter_field_with_tagged_optional_parameter_in_fold_scope(self) -> None:
@@ -7869,7 +8486,53 @@ class CompilerTests(unittest.TestCase):
             )
         """
         expected_gremlin = NotImplementedError
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                folded_subquery_1.fold_output_name AS child_names,
+                [Animal_1].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            LEFT OUTER JOIN db_1.schema_1.[Species] AS [Species_1]
+            ON [Animal_1].species = [Species_1].uuid
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) AS fold_output_name,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+            WHERE
+                [Species_1].uuid IS NULL
+                OR [Species_1].limbs <= folded_subquery_1.fold_output__x_count
+        """
         expected_postgresql = """
             SELECT
                 coalesce(folded_subquery_1.fold_output_name, ARRAY[]::VARCHAR[]) AS child_names,
@@ -7903,6 +8566,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_filter_count_with_tagged_parameter_in_fold_scope(self) -> None:
@@ -7928,7 +8592,52 @@ class CompilerTests(unittest.TestCase):
                 ($Animal___1___out_Animal_ParentOf.size() >= Animal__out_Animal_OfSpecies___1.limbs)
         """
         expected_gremlin = NotImplementedError
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                folded_subquery_1.fold_output_name AS child_names,
+                [Animal_1].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN db_1.schema_1.[Species] AS [Species_1]
+            ON [Animal_1].species = [Species_1].uuid
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        string_agg(
+                            CAST(
+                                '|' + coalesce(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE(
+                                                REPLACE([Animal_3].name, '&', '&amp;'),
+                                            '^',
+                                            '^e'),
+                                        '~',
+                                        '^n'),
+                                    '|',
+                                    '^d'),
+                                '~') AS NVARCHAR(max)),
+                            ''
+                        ) AS fold_output_name,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+            WHERE
+                [Species_1].limbs <= folded_subquery_1.fold_output__x_count
+        """
         expected_postgresql = """
             SELECT
                 coalesce(folded_subquery_1.fold_output_name, ARRAY[]::VARCHAR[]) AS child_names,
@@ -7959,6 +8668,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_filter_count_and_other_filters_in_fold_scope(self) -> None:
@@ -8020,7 +8730,51 @@ class CompilerTests(unittest.TestCase):
                 )
         """
         expected_gremlin = NotImplementedError
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            JOIN (
+                SELECT
+                    [Animal_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_3].parent AS parent,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_3]
+                    GROUP BY
+                        [Animal_3].parent
+                ) AS anon_1
+                ON [Animal_2].uuid = anon_1.parent
+            ) AS folded_subquery_1
+            ON [Animal_1].uuid = folded_subquery_1.uuid
+            JOIN (
+                SELECT
+                    [Animal_4].uuid AS uuid,
+                    coalesce(anon_2.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_4]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Entity_1].uuid AS uuid,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Entity] AS [Entity_1]
+                    GROUP BY
+                        [Entity_1].uuid
+                ) AS anon_2
+                ON [Animal_4].related_entity = anon_2.uuid
+            ) AS folded_subquery_2
+            ON [Animal_1].uuid = folded_subquery_2.uuid
+            WHERE
+                folded_subquery_1.fold_output__x_count >= :min_children
+                AND folded_subquery_2.fold_output__x_count >= :min_related
+        """
         expected_postgresql = """
             SELECT
                 "Animal_1".name AS name
@@ -8059,6 +8813,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_filter_on_count_with_nested_filter(self) -> None:
@@ -8081,7 +8836,36 @@ class CompilerTests(unittest.TestCase):
                 ($Species___1___in_Animal_OfSpecies.size() = {num_animals})
         """
         expected_gremlin = NotImplementedError
-        expected_mssql = NotImplementedError
+        expected_mssql = """
+            SELECT
+                [Species_1].name AS name
+            FROM
+                db_1.schema_1.[Species] AS [Species_1]
+            JOIN (
+                SELECT
+                    [Species_2].uuid AS uuid,
+                    coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Species] AS [Species_2]
+                LEFT OUTER JOIN (
+                    SELECT
+                        [Animal_1].species AS species,
+                        count(*) AS fold_output__x_count
+                    FROM
+                        db_1.schema_1.[Animal] AS [Animal_1]
+                    JOIN db_1.schema_1.[Location] AS [Location_1]
+                    ON [Animal_1].lives_in = [Location_1].uuid
+                    WHERE
+                        [Location_1].name = :location
+                    GROUP BY
+                        [Animal_1].species
+                ) AS anon_1
+                ON [Species_2].uuid = anon_1.species
+            ) AS folded_subquery_1
+            ON [Species_1].uuid = folded_subquery_1.uuid
+            WHERE
+                folded_subquery_1.fold_output__x_count = :num_animals
+        """
         expected_cypher = NotImplementedError
         expected_postgresql = """
             SELECT
@@ -8111,6 +8895,7 @@ class CompilerTests(unittest.TestCase):
             expected_mssql,
             expected_cypher,
             expected_postgresql,
+            mssql_schema_info=self.mssql_2017_schema_info,
         )
 
     def test_optional_and_traverse(self) -> None:
@@ -10936,3 +11721,227 @@ class CompilerTests(unittest.TestCase):
             expected_cypher,
             expected_sql,
         )
+
+
+class SQLCompilationOptionsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        """Disable max diff limits for all tests."""
+        self.maxDiff = None
+        self.mssql_schema_info = get_sqlalchemy_schema_info(dialect="mssql")
+        self.postgresql_schema_info = get_sqlalchemy_schema_info(dialect="postgresql")
+        self.mssql_exists_schema_info = self.mssql_schema_info._replace(
+            use_exists_for_output_free_traversals=True
+        )
+        self.postgresql_exists_schema_info = self.postgresql_schema_info._replace(
+            use_exists_for_output_free_traversals=True
+        )
+        self.mssql_deduplicating_schema_info = self.mssql_schema_info._replace(
+            deduplicate_recursive_traversals=True
+        )
+        self.postgresql_deduplicating_schema_info = self.postgresql_schema_info._replace(
+            deduplicate_recursive_traversals=True
+        )
+
+    def _compile_to_sql_string(self, schema_info: SQLAlchemySchemaInfo, graphql_query: str) -> str:
+        """Compile the query with the given schema info, and print the resulting SQL."""
+        query_printer_func = rpartial(print_sqlalchemy_query_string, schema_info.dialect)
+        return query_printer_func(compile_graphql_to_sql(schema_info, graphql_query).query)
+
+    def _check_sql_output(
+        self,
+        mssql_schema_info: SQLAlchemySchemaInfo,
+        postgresql_schema_info: SQLAlchemySchemaInfo,
+        graphql_query: str,
+        expected_mssql: str,
+        expected_postgresql: str,
+    ) -> None:
+        """Assert that the query compiles to the expected SQL with the given schema infos."""
+        compare_sql(
+            self, expected_mssql, self._compile_to_sql_string(mssql_schema_info, graphql_query)
+        )
+        compare_sql(
+            self,
+            expected_postgresql,
+            self._compile_to_sql_string(postgresql_schema_info, graphql_query),
+        )
+
+    def test_exists_for_output_free_traversal(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "name")
+                out_Animal_ParentOf {
+                    name @filter(op_name: "=", value: ["$child_name"])
+                }
+            }
+        }"""
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            WHERE EXISTS (
+                SELECT 1
+                FROM db_1.schema_1.[Animal] AS [Animal_2]
+                WHERE
+                    [Animal_1].uuid = [Animal_2].parent AND
+                    [Animal_2].name = :child_name
+            )
+        """
+        expected_postgresql = """
+            SELECT
+                "Animal_1".name AS name
+            FROM
+                schema_1."Animal" AS "Animal_1"
+            WHERE EXISTS (
+                SELECT 1
+                FROM schema_1."Animal" AS "Animal_2"
+                WHERE
+                    "Animal_1".uuid = "Animal_2".parent AND
+                    "Animal_2".name = %(child_name)s
+            )
+        """
+        self._check_sql_output(
+            self.mssql_exists_schema_info,
+            self.postgresql_exists_schema_info,
+            graphql_query,
+            expected_mssql,
+            expected_postgresql,
+        )
+
+    def test_exists_for_nested_output_free_traversals_with_tagged_filter(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "name") @tag(tag_name: "parent_name")
+                out_Animal_ParentOf {
+                    out_Animal_ParentOf {
+                        name @filter(op_name: "=", value: ["%parent_name"])
+                    }
+                }
+                in_Animal_ParentOf {
+                    name @output(out_name: "grandparent_name")
+                }
+            }
+        }"""
+        expected_mssql = """
+            SELECT
+                [Animal_1].name AS grandparent_name,
+                [Animal_2].name AS name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_2]
+                JOIN db_1.schema_1.[Animal] AS [Animal_1]
+                ON [Animal_2].parent = [Animal_1].uuid
+            WHERE EXISTS (
+                SELECT 1
+                FROM db_1.schema_1.[Animal] AS [Animal_3]
+                JOIN db_1.schema_1.[Animal] AS [Animal_4]
+                ON [Animal_3].uuid = [Animal_4].parent
+                WHERE
+                    [Animal_2].uuid = [Animal_3].parent AND
+                    [Animal_4].name = [Animal_2].name
+            )
+        """
+        expected_postgresql = """
+            SELECT
+                "Animal_1".name AS grandparent_name,
+                "Animal_2".name AS name
+            FROM
+                schema_1."Animal" AS "Animal_2"
+                JOIN schema_1."Animal" AS "Animal_1"
+                ON "Animal_2".parent = "Animal_1".uuid
+            WHERE EXISTS (
+                SELECT 1
+                FROM schema_1."Animal" AS "Animal_3"
+                JOIN schema_1."Animal" AS "Animal_4"
+                ON "Animal_3".uuid = "Animal_4".parent
+                WHERE
+                    "Animal_2".uuid = "Animal_3".parent AND
+                    "Animal_4".name = "Animal_2".name
+            )
+        """
+        self._check_sql_output(
+            self.mssql_exists_schema_info,
+            self.postgresql_exists_schema_info,
+            graphql_query,
+            expected_mssql,
+            expected_postgresql,
+        )
+
+    def test_no_exists_for_traversals_with_outputs_tags_or_optionals(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "name")
+                out_Animal_ParentOf {
+                    name @tag(tag_name: "child_name")
+                }
+                in_Animal_ParentOf @optional {
+                    name @filter(op_name: "=", value: ["$parent_name"])
+                }
+                out_Animal_LivesIn {
+                    name @filter(op_name: "!=", value: ["%child_name"])
+                }
+            }
+        }"""
+        # Only the traversal to the Location vertex is emitted as an EXISTS subquery.
+        for schema_info, exists_schema_info in (
+            (self.mssql_schema_info, self.mssql_exists_schema_info),
+            (self.postgresql_schema_info, self.postgresql_exists_schema_info),
+        ):
+            expected_query = self._compile_to_sql_string(schema_info, graphql_query)
+            received_query = self._compile_to_sql_string(exists_schema_info, graphql_query)
+            self.assertEqual(1, received_query.count("EXISTS"))
+            self.assertEqual(expected_query.count("JOIN") - 1, received_query.count("JOIN"))
+
+    def test_deduplicated_recursion(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "name")
+                out_Animal_ParentOf @recurse(depth: 1) {
+                    name @output(out_name: "descendant")
+                }
+            }
+        }"""
+        expected_postgresql = """
+            WITH RECURSIVE anon_2(name, parent, uuid, __cte_key, __cte_depth) AS (
+                SELECT
+                    "Animal_2".name AS name,
+                    "Animal_2".parent AS parent,
+                    "Animal_2".uuid AS uuid,
+                    "Animal_2".uuid AS __cte_key,
+                    0 AS __cte_depth
+                FROM schema_1."Animal" AS "Animal_2"
+                UNION
+                SELECT
+                    "Animal_3".name AS name,
+                    "Animal_3".parent AS parent,
+                    "Animal_3".uuid AS uuid,
+                    anon_2.__cte_key AS __cte_key,
+                    anon_2.__cte_depth + 1 AS __cte_depth
+                FROM anon_2
+                JOIN schema_1."Animal" AS "Animal_3"
+                ON anon_2.uuid = "Animal_3".parent
+                WHERE anon_2.__cte_depth < 1
+            ),
+            anon_1 AS (
+                SELECT DISTINCT
+                    anon_2.name AS name,
+                    anon_2.parent AS parent,
+                    anon_2.uuid AS uuid,
+                    anon_2.__cte_key AS __cte_key
+                FROM anon_2
+            )
+            SELECT
+                anon_1.name AS descendant,
+                "Animal_1".name AS name
+            FROM schema_1."Animal" AS "Animal_1"
+            JOIN anon_1
+            ON "Animal_1".uuid = anon_1.__cte_key
+        """
+        compare_sql(
+            self,
+            expected_postgresql,
+            self._compile_to_sql_string(self.postgresql_deduplicating_schema_info, graphql_query),
+        )
+
+        # MSSQL does not support UNION within a recursive CTE.
+        with self.assertRaises(NotImplementedError):
+            self._compile_to_sql_string(self.mssql_deduplicating_schema_info, graphql_query)
@@ -3,6 +3,7 @@ import unittest
 
 from graphql import GraphQLString
 from sqlalchemy.dialects.mssql.base import MSDialect
+from sqlalchemy.dialects.mysql.base import MySQLDialect
 
 from ..compiler import emit_cypher, emit_gremlin, emit_match, emit_sql
 from ..compiler.blocks import (
@@ -699,6 +700,7 @@ class EmitSQLTests(unittest.TestCase):
         self.schema_infos = {
             "mssql": get_sqlalchemy_schema_info("mssql"),
             "postgresql": get_sqlalchemy_schema_info("postgresql"),
+            "mysql": get_sqlalchemy_schema_info("mysql"),
         }
 
     def test_fold_subquery_builder(self) -> None:
@@ -741,3 +743,170 @@ class EmitSQLTests(unittest.TestCase):
 
         self.assertEqual({"uuid", "fold_output_name"}, set(subquery.c.keys()))
         self.assertEqual(fold_scope_location, output_location)
+
+    def test_fold_subquery_builder_for_json(self) -> None:
+        dialect = MSDialect()
+        # Simulate a dialect that connected to SQL Server 2017.
+        dialect.server_version_info = (14, 0, 3335, 7)
+        table = self.schema_infos["mssql"].vertex_name_to_table["Animal"]
+        join_descriptor = self.schema_infos["mssql"].join_descriptors["Animal"][
+            "out_Animal_ParentOf"
+        ]
+        from_alias = table.alias()
+        to_alias = table.alias()
+        fold_scope_location = Location(("Animal",)).navigate_to_fold("out_Animal_ParentOf")
+
+        builder = emit_sql.FoldSubqueryBuilder(dialect, from_alias, "uuid")
+        builder.add_traversal(join_descriptor, from_alias, to_alias)
+        builder.mark_output_location_and_fields(to_alias, fold_scope_location, {"name"})
+        subquery, output_location = builder.end_fold()
+
+        expected_mssql = """
+            SELECT
+                [Animal_1].uuid,
+                coalesce((
+                    SELECT [Animal_2].name AS v
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                WHERE
+                    [Animal_1].uuid = [Animal_2].parent
+                FOR JSON PATH, INCLUDE_NULL_VALUES
+                ), '[]') AS fold_output_name
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+        """
+        string_result = print_sqlalchemy_query_string(subquery, dialect)
+        compare_sql(self, expected_mssql, string_result)
+
+        self.assertEqual({"uuid", "fold_output_name"}, set(subquery.c.keys()))
+        self.assertEqual(fold_scope_location, output_location)
+
+    def test_fold_subquery_builder_string_agg(self) -> None:
+        dialect = MSDialect()
+        # Simulate a dialect that connected to SQL Server 2017, which supports STRING_AGG.
+        dialect.server_version_info = (14, 0, 3335, 7)
+        table = self.schema_infos["mssql"].vertex_name_to_table["Animal"]
+        join_descriptor = self.schema_infos["mssql"].join_descriptors["Animal"][
+            "out_Animal_ParentOf"
+        ]
+        from_alias = table.alias()
+        to_alias = table.alias()
+        fold_scope_location = Location(("Animal",)).navigate_to_fold("out_Animal_ParentOf")
+
+        builder = emit_sql.FoldSubqueryBuilder(dialect, from_alias, "uuid")
+        builder.add_traversal(join_descriptor, from_alias, to_alias)
+        builder.mark_output_location_and_fields(to_alias, fold_scope_location, {"name", "_x_count"})
+        subquery, output_location = builder.end_fold()
+
+        # The output and the count are aggregated by a single grouped subquery.
+        expected_mssql = """
+            SELECT
+                [Animal_1].uuid,
+                coalesce(anon_1.fold_output_name, '') AS fold_output_name,
+                coalesce(anon_1.fold_output__x_count, 0) AS fold_output__x_count
+            FROM
+                db_1.schema_1.[Animal] AS [Animal_1]
+            LEFT OUTER JOIN (
+                SELECT
+                    [Animal_2].parent AS parent,
+                    string_agg(
+                        CAST(
+                            '|' + coalesce(
+                                REPLACE(
+                                    REPLACE(
+                                        REPLACE(
+                                            REPLACE([Animal_2].name, '&', '&amp;'),
+                                        '^',
+                                        '^e'),
+                                    '~',
+                                    '^n'),
+                                '|',
+                                '^d'),
+                            '~') AS NVARCHAR(max)),
+                        ''
+                    ) AS fold_output_name,
+                    count(*) AS fold_output__x_count
+                FROM
+                    db_1.schema_1.[Animal] AS [Animal_2]
+                GROUP BY
+                    [Animal_2].parent
+            ) AS anon_1
+            ON [Animal_1].uuid = anon_1.parent
+        """
+        string_result = print_sqlalchemy_query_string(subquery, dialect)
+        compare_sql(self, expected_mssql, string_result)
+
+        self.assertEqual(
+            {"uuid", "fold_output_name", "fold_output__x_count"}, set(subquery.c.keys())
+        )
+        self.assertEqual(fold_scope_location, output_location)
+
+    def test_fold_subquery_builder_string_agg_unsupported(self) -> None:
+        dialect = MSDialect()
+        # Simulate a dialect that connected to SQL Server 2016, which has no STRING_AGG.
+        dialect.server_version_info = (13, 0, 5026, 0)
+        table = self.schema_infos["mssql"].vertex_name_to_table["Animal"]
+        join_descriptor = self.schema_infos["mssql"].join_descriptors["Animal"][
+            "out_Animal_ParentOf"
+        ]
+        from_alias = table.alias()
+        to_alias = table.alias()
+        fold_scope_location = Location(("Animal",)).navigate_to_fold("out_Animal_ParentOf")
+
+        builder = emit_sql.FoldSubqueryBuilder(dialect, from_alias, "uuid")
+        builder.add_traversal(join_descriptor, from_alias, to_alias)
+        builder.mark_output_location_and_fields(to_alias, fold_scope_location, {"name", "uuid"})
+        with self.assertRaises(NotImplementedError):
+            builder.end_fold()
+
+    def test_fold_subquery_builder_string_agg_unknown_version(self) -> None:
+        # A dialect that hasn't connected to the database doesn't know the version of SQL Server,
+        # which may not support STRING_AGG.
+        dialect = MSDialect()
+        table = self.schema_infos["mssql"].vertex_name_to_table["Animal"]
+        join_descriptor = self.schema_infos["mssql"].join_descriptors["Animal"][
+            "out_Animal_ParentOf"
+        ]
+        from_alias = table.alias()
+        to_alias = table.alias()
+        fold_scope_location = Location(("Animal",)).navigate_to_fold("out_Animal_ParentOf")
+
+        builder = emit_sql.FoldSubqueryBuilder(dialect, from_alias, "uuid")
+        builder.add_traversal(join_descriptor, from_alias, to_alias)
+        builder.mark_output_location_and_fields(to_alias, fold_scope_location, {"name", "uuid"})
+        with self.assertRaises(NotImplementedError):
+            builder.end_fold()
+
+    def test_fold_subquery_builder_mysql(self) -> None:
+        dialect = MySQLDialect()
+        table = self.schema_infos["mysql"].vertex_name_to_table["Animal"]
+        join_descriptor = self.schema_infos["mysql"].join_descriptors["Animal"][
+            "out_Animal_ParentOf"
+        ]
+        from_alias = table.alias()
+        to_alias = table.alias()
+        fold_scope_location = Location(("Animal",)).navigate_to_fold("out_Animal_ParentOf")
+
+        builder = emit_sql.FoldSubqueryBuilder(dialect, from_alias, "uuid")
+        builder.add_traversal(join_descriptor, from_alias, to_alias)
+        builder.mark_output_location_and_fields(to_alias, fold_scope_location, {"name", "_x_count"})
+        subquery, output_location = builder.end_fold()
+
+        expected_mysql = """
+            SELECT
+                `Animal_1`.uuid,
+                json_arrayagg(`Animal_2`.name) AS fold_output_name,
+                coalesce(count(*), 0) AS fold_output__x_count
+            FROM
+                schema_1.`Animal` AS `Animal_1`
+                INNER JOIN schema_1.`Animal` AS `Animal_2`
+                ON `Animal_1`.uuid = `Animal_2`.parent
+            GROUP BY `Animal_1`.uuid
+        """
+        string_result = print_sqlalchemy_query_string(subquery, dialect)
+        compare_sql(self, expected_mysql, string_result)
+
+        self.assertEqual(
+            {"uuid", "fold_output_name", "fold_output__x_count"}, set(subquery.c.keys())
+        )
+        self.assertEqual(fold_scope_location, output_location)
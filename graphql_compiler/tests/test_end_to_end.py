@@ -24,7 +24,10 @@ from ..query_formatting import insert_arguments_into_query
 from ..query_formatting.common import (
     deserialize_argument,
     deserialize_multiple_arguments,
+    make_arguments_deserializer,
+    make_arguments_validator,
     validate_argument_type,
+    validate_arguments_batch,
 )
 from ..schema import GraphQLDate, GraphQLDateTime, GraphQLDecimal, GraphQLSchemaFieldType
 from ..schema.schema_info import CommonSchemaInfo
@@ -228,11 +231,45 @@ class QueryFormattingTests(unittest.TestCase):
         )
         arbitrary_argument_name = "arbitrary_name"
         for graphql_type, valid_values, invalid_values in test_cases:
+            validate = make_arguments_validator({arbitrary_argument_name: graphql_type})
             for valid_value in valid_values:
                 validate_argument_type(arbitrary_argument_name, graphql_type, valid_value)
+                validate({arbitrary_argument_name: valid_value})
             for invalid_value in invalid_values:
                 with self.assertRaises(GraphQLInvalidArgumentError):
                     validate_argument_type(arbitrary_argument_name, graphql_type, invalid_value)
+                with self.assertRaises(GraphQLInvalidArgumentError):
+                    validate({arbitrary_argument_name: invalid_value})
+
+    def test_validate_arguments_batch(self) -> None:
+        expected_types: Dict[str, QueryArgumentGraphQLType] = {
+            "wanted_name": GraphQLString,
+            "min_worth": GraphQLDecimal,
+            "birthdays": GraphQLList(GraphQLNonNull(GraphQLDate)),
+        }
+        valid_arguments = {
+            "wanted_name": "Top Cat",
+            "min_worth": Decimal("1.5"),
+            "birthdays": [datetime.date(2007, 12, 6)],
+        }
+        validate_arguments_batch(
+            expected_types, [valid_arguments, dict(valid_arguments, min_worth="2.5", birthdays=[])],
+        )
+        validate_arguments_batch(expected_types, [])
+
+        invalid_batches = [
+            # Missing argument.
+            [valid_arguments, {"wanted_name": "Top Cat", "min_worth": 1}],
+            # Unexpected argument.
+            [valid_arguments, dict(valid_arguments, unexpected=1)],
+            # Invalid list element.
+            [valid_arguments, dict(valid_arguments, birthdays=["2007-12-06"])],
+            # Invalid value.
+            [valid_arguments, dict(valid_arguments, min_worth="not a number")],
+        ]
+        for invalid_batch in invalid_batches:
+            with self.assertRaisesRegex(GraphQLInvalidArgumentError, "at index 1 of the batch"):
+                validate_arguments_batch(expected_types, invalid_batch)
 
     def test_non_null_types_pass_validation(self) -> None:
         type_and_value: List[Tuple[QueryArgumentGraphQLType, Any]] = [
@@ -247,6 +284,9 @@ class QueryFormattingTests(unittest.TestCase):
         arbitrary_argument_name = "arbitrary_name"
         for graphql_type, value in type_and_value:
             validate_argument_type(arbitrary_argument_name, graphql_type, value)
+            make_arguments_validator({arbitrary_argument_name: graphql_type})(
+                {arbitrary_argument_name: value}
+            )
 
     def test_date_deserialization(self) -> None:
         # Invalid month
@@ -352,6 +392,63 @@ class QueryFormattingTests(unittest.TestCase):
             deserialize_multiple_arguments(serialized_arguments, expected_types),
         )
 
+    def test_reused_arguments_deserializer(self) -> None:
+        expected_types: Dict[str, QueryArgumentGraphQLType] = {
+            "amount": GraphQLInt,
+            "birthday": GraphQLDate,
+            "names": GraphQLList(GraphQLNonNull(GraphQLString)),
+            "weights": GraphQLNonNull(GraphQLList(GraphQLFloat)),
+        }
+        deserialize = make_arguments_deserializer(expected_types)
+
+        serialized_arguments_and_expected_deserializations: List[
+            Tuple[Dict[str, Any], Dict[str, Any]]
+        ] = [
+            (
+                {"amount": 5, "birthday": "2014-02-05", "names": ["a", "b"], "weights": [1.5]},
+                {
+                    "amount": 5,
+                    "birthday": datetime.date(2014, 2, 5),
+                    "names": ["a", "b"],
+                    "weights": [1.5],
+                },
+            ),
+            (
+                {"amount": "6", "birthday": "2015-03-06", "names": [], "weights": [1, "2.5"]},
+                {
+                    "amount": 6,
+                    "birthday": datetime.date(2015, 3, 6),
+                    "names": [],
+                    "weights": [1.0, 2.5],
+                },
+            ),
+        ]
+        for (
+            serialized_arguments,
+            expected_deserialization,
+        ) in serialized_arguments_and_expected_deserializations:
+            self.assertEqual(expected_deserialization, deserialize(serialized_arguments))
+            self.assertEqual(
+                expected_deserialization,
+                deserialize_multiple_arguments(serialized_arguments, expected_types),
+            )
+
+        valid_arguments = serialized_arguments_and_expected_deserializations[0][0]
+        invalid_arguments_and_invalid_names: List[Tuple[Dict[str, Any], str]] = [
+            (dict(valid_arguments, amount=True), "amount"),
+            (dict(valid_arguments, birthday="2014-14-01"), "birthday"),
+            (dict(valid_arguments, names=["a", 1]), "names"),
+            (dict(valid_arguments, weights=1.5), "weights"),
+        ]
+        for invalid_arguments, invalid_name in invalid_arguments_and_invalid_names:
+            with self.assertRaisesRegex(
+                GraphQLInvalidArgumentError, f"Error parsing argument {invalid_name}"
+            ):
+                deserialize(invalid_arguments)
+
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            deserialize({"amount": 5})
+
     def test_invalid_directive_comparison(self) -> None:
         # This test will fail if the directive types in deserialize_argument are compared by
         # their python object reference instead of by their names.
@@ -14,7 +14,7 @@ from graphql.utilities.build_ast_schema import build_ast_schema
 from pyorient.orient import OrientDB
 import six
 import sqlalchemy
-from sqlalchemy.dialects import mssql, postgresql
+from sqlalchemy.dialects import mssql, mysql, postgresql
 
 from ..compiler.compiler_entities import BasicBlock
 from ..compiler.subclass import compute_subclass_sets
@@ -840,6 +840,8 @@ def get_sqlalchemy_schema_info(dialect: str = "mssql") -> SQLAlchemySchemaInfo:
         sqlalchemy_compiler_dialect = postgresql.dialect()
     elif dialect == "mssql":
         sqlalchemy_compiler_dialect = mssql.dialect()
+    elif dialect == "mysql":
+        sqlalchemy_compiler_dialect = mysql.dialect()
     else:
         raise AssertionError("Unrecognized dialect {}".format(dialect))
     return make_sqlalchemy_schema_info(
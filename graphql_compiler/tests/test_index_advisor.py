@@ -0,0 +1,188 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+from unittest import TestCase
+
+import sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+from ..cost_estimation.index_advisor import recommend_indexes
+from ..cost_estimation.statistics import LocalStatistics
+from ..global_utils import QueryStringWithParameters
+from ..schema.schema_info import QueryPlanningSchemaInfo
+from ..schema_generation.graphql_schema import get_graphql_schema_from_schema_graph
+from ..schema_generation.sqlalchemy import get_sqlalchemy_schema_info as make_sqlalchemy_schema_info
+from ..schema_generation.sqlalchemy.edge_descriptors import DirectEdgeDescriptor
+from ..schema_generation.sqlalchemy.schema_graph_builder import get_sqlalchemy_schema_graph
+from .test_helpers import get_sqlalchemy_schema_info
+
+
+class IndexAdvisorTests(TestCase):
+    def setUp(self) -> None:
+        """Initialize the SQLAlchemySchemaInfo."""
+        self.maxDiff = None
+        self.sql_schema_info = get_sqlalchemy_schema_info("postgresql")
+
+    def test_join_and_filter_columns(self) -> None:
+        recursive_query = QueryStringWithParameters(
+            """{
+                Animal {
+                    name @output(out_name: "name")
+                         @filter(op_name: "=", value: ["$name"])
+                    out_Animal_ParentOf @recurse(depth: 2) {
+                        name @output(out_name: "descendant_name")
+                    }
+                }
+            }""",
+            {},
+        )
+        filtered_query = QueryStringWithParameters(
+            """{
+                Animal {
+                    name @output(out_name: "name")
+                    net_worth @filter(op_name: ">", value: ["$net_worth"])
+                    color @filter(op_name: "=", value: ["$color"])
+                    out_Animal_LivesIn {
+                        name @output(out_name: "location_name")
+                    }
+                    in_Animal_ParentOf @fold {
+                        name @output(out_name: "parent_names")
+                    }
+                }
+            }""",
+            {},
+        )
+
+        recommendations = recommend_indexes(
+            self.sql_schema_info, [recursive_query, recursive_query, filtered_query]
+        )
+
+        # Traversals into the primary key columns of Location and Animal need no index.
+        self.assertEqual(
+            [
+                ("Animal", ("name",), 2.0, 2),
+                ("Animal", ("parent",), 2.0, 2),
+                ("Animal", ("color", "net_worth"), 1.0, 1),
+            ],
+            [
+                (
+                    recommendation.table.name,
+                    recommendation.column_names,
+                    recommendation.score,
+                    recommendation.query_count,
+                )
+                for recommendation in recommendations
+            ],
+        )
+        self.assertEqual(
+            'CREATE INDEX "ix_Animal_color_net_worth" ON schema_1."Animal" (color, net_worth)',
+            recommendations[2].to_sql(self.sql_schema_info.dialect),
+        )
+
+    def test_weighting_by_cardinality_estimates(self) -> None:
+        metadata = sqlalchemy.MetaData()
+        vertex_name_to_table = {
+            "Company": sqlalchemy.Table(
+                "Company",
+                metadata,
+                sqlalchemy.Column("uuid", sqlalchemy.Integer, primary_key=True),
+                sqlalchemy.Column("name", sqlalchemy.String(20)),
+            ),
+            "Person": sqlalchemy.Table(
+                "Person",
+                metadata,
+                sqlalchemy.Column("uuid", sqlalchemy.Integer, primary_key=True),
+                sqlalchemy.Column("name", sqlalchemy.String(20)),
+                sqlalchemy.Column("employer", sqlalchemy.Integer),
+            ),
+        }
+        direct_edges = {
+            "Company_Employs": DirectEdgeDescriptor("Company", "uuid", "Person", "employer"),
+        }
+        sql_schema_info = make_sqlalchemy_schema_info(
+            vertex_name_to_table, direct_edges, postgresql.dialect()
+        )
+        schema_graph = get_sqlalchemy_schema_graph(vertex_name_to_table, direct_edges)
+        graphql_schema, type_equivalence_hints = get_graphql_schema_from_schema_graph(schema_graph)
+        query_planning_schema_info = QueryPlanningSchemaInfo(
+            schema=graphql_schema,
+            type_equivalence_hints=type_equivalence_hints,
+            schema_graph=schema_graph,
+            statistics=LocalStatistics(
+                {"Company": 1000, "Person": 1000000, "Company_Employs": 1000000},
+                distinct_field_values_counts={("Company", "name"): 1000},
+            ),
+            pagination_keys={"Company": "uuid", "Person": "uuid"},
+            uuid4_field_info={},
+        )
+        employee_query = QueryStringWithParameters(
+            """{
+                    Company {
+                        name @filter(op_name: "=", value: ["$company_name"])
+                        out_Company_Employs {
+                            name @output(out_name: "name")
+                                 @filter(op_name: "=", value: ["$name"])
+                        }
+                    }
+                }""",
+            {"company_name": "Acme", "name": "Alice"},
+        )
+        person_query = QueryStringWithParameters(
+            """{
+                    Person {
+                        name @output(out_name: "name")
+                             @filter(op_name: "=", value: ["$name"])
+                    }
+                }""",
+            {"name": "Alice"},
+        )
+
+        # All 1000 Companies and 1000000 Persons are looked up at the root of the queries, but
+        # only the 1000 employees of the Company named Acme are looked up by their employer.
+        recommendations = recommend_indexes(
+            sql_schema_info, [employee_query, person_query], query_planning_schema_info
+        )
+        self.assertEqual(
+            [
+                ("Person", ("name",), 1000000.0),
+                ("Company", ("name",), 1000.0),
+                ("Person", ("employer", "name"), 1000.0),
+            ],
+            [
+                (recommendation.table.name, recommendation.column_names, recommendation.score)
+                for recommendation in recommendations
+            ],
+        )
+
+        # Without statistics, each lookup weighs the same.
+        recommendations = recommend_indexes(sql_schema_info, [employee_query, person_query])
+        self.assertEqual(
+            [1.0, 1.0, 1.0], [recommendation.score for recommendation in recommendations]
+        )
+
+    def test_existing_indexes_are_skipped(self) -> None:
+        query = QueryStringWithParameters(
+            """{
+                Animal {
+                    name @output(out_name: "name")
+                         @filter(op_name: "=", value: ["$name"])
+                    color @filter(op_name: "=", value: ["$color"])
+                }
+            }""",
+            {},
+        )
+        animal_table = self.sql_schema_info.vertex_name_to_table["Animal"]
+        self.assertEqual(
+            [("color", "name")],
+            [
+                recommendation.column_names
+                for recommendation in recommend_indexes(self.sql_schema_info, [query])
+            ],
+        )
+
+        # The schema info is created for each test, so the index does not leak into other tests.
+        sqlalchemy.Index(
+            "ix_color_name_birthday",
+            animal_table.c.color,
+            animal_table.c.name,
+            animal_table.c.birthday,
+        )
+        self.assertEqual([], recommend_indexes(self.sql_schema_info, [query]))
@@ -1,16 +1,117 @@
 # Copyright 2019-present Kensho Technologies, LLC.
+from array import array
 import datetime
+import decimal
+import html
+import random
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, cast
 from unittest import TestCase
 
-from graphql import GraphQLBoolean, GraphQLFloat, GraphQLID, GraphQLInt, GraphQLList, GraphQLString
+from graphql import (
+    GraphQLBoolean,
+    GraphQLFloat,
+    GraphQLID,
+    GraphQLInt,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLScalarType,
+    GraphQLString,
+)
 
 from graphql_compiler import GraphQLDate, GraphQLDateTime, GraphQLDecimal
 
 from ..compiler.compiler_frontend import OutputMetadata
-from ..post_processing.sql_post_processing import post_process_mssql_folds
+from ..deserialization import deserialize_scalar_value
+from ..post_processing.columnar_results import ColumnarQueryResults, FoldedColumn, ScalarColumn
+from ..post_processing.result_decoding import QueryResultDecoder
+from ..post_processing.sql_post_processing import (
+    _mssql_xml_path_string_to_list,
+    get_mssql_fold_decoders,
+    get_mysql_fold_decoders,
+    post_process_mssql_folds,
+    post_process_mssql_folds_lazily,
+    post_process_mysql_folds,
+    post_process_mysql_folds_lazily,
+)
 from .test_helpers import get_sqlalchemy_schema_info
 
 
+def _reference_mssql_xml_path_encoding(values: Sequence[Optional[str]]) -> str:
+    """Encode the values as the MSSQL XML PATH fold subquery would."""
+    encoded_values = []
+    for value in values:
+        if value is None:
+            encoded_values.append("|~")
+            continue
+        # GraphQL compiler caret encoding, performed in the fold subquery.
+        encoded_value = value.replace("^", "^e").replace("~", "^n").replace("|", "^d")
+        # XML entity encoding, performed by XML PATH.
+        encoded_value = (
+            encoded_value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        )
+        encoded_value = re.sub(
+            "[\x01-\x08\x0b-\x1f]", lambda match: f"&#x{ord(match.group(0)):02X};", encoded_value,
+        )
+        encoded_values.append("|" + encoded_value)
+    return "".join(encoded_values)
+
+
+def _reference_mssql_string_agg_encoding(values: Sequence[Optional[str]]) -> str:
+    """Encode the values as the MSSQL STRING_AGG fold subquery would."""
+    encoded_values = []
+    for value in values:
+        if value is None:
+            encoded_values.append("|~")
+            continue
+        # Only "&" is escaped as an XML entity, followed by the GraphQL compiler caret encoding.
+        encoded_value = value.replace("&", "&amp;")
+        encoded_value = encoded_value.replace("^", "^e").replace("~", "^n").replace("|", "^d")
+        encoded_values.append("|" + encoded_value)
+    return "".join(encoded_values)
+
+
+def _legacy_mssql_xml_path_string_to_list(
+    xml_path_result: str, list_entry_type: GraphQLScalarType
+) -> List[Any]:
+    """Decode the XML PATH result using the original multi-pass algorithm, for comparison."""
+    if xml_path_result == "":
+        return []
+    if xml_path_result[0] != "|":
+        raise AssertionError(xml_path_result)
+    list_result: List[Optional[str]] = [
+        None if result == "~" else result for result in xml_path_result[1:].split("|")
+    ]
+    for escaped, unescaped in (("^d", "|"), ("^n", "~"), ("^e", "^")):
+        list_result = [
+            result.replace(escaped, unescaped) if result is not None else None
+            for result in list_result
+        ]
+    new_list_result: List[Optional[str]] = []
+    for result in list_result:
+        if result is not None:
+            split_result = re.split("&#x([A-Fa-f0-9][A-Fa-f0-9]);", result)
+            new_result = split_result[0]
+            for hex_value, next_substring in zip(split_result[1::2], split_result[2::2]):
+                new_result += chr(int(hex_value, 16)) + next_substring
+            new_list_result.append(new_result)
+        else:
+            new_list_result.append(None)
+    return [
+        deserialize_scalar_value(list_entry_type, html.unescape(result))
+        if result is not None
+        else None
+        for result in new_list_result
+    ]
+
+
+def _make_random_string(random_generator: random.Random) -> str:
+    """Return a random string, biased towards characters with special meaning in the encoding."""
+    alphabet = "^~|&<>;#x0Ade n\r\t\n\x01\x1f\u00e9\u4e2d\U0001f600"
+    length = random_generator.randint(0, 12)
+    return "".join(random_generator.choice(alphabet) for _ in range(length))
+
+
 class MssqlXmlPathTests(TestCase):
     def setUp(self) -> None:
         self.mssql_schema_info = get_sqlalchemy_schema_info(dialect="mssql")
@@ -464,3 +565,542 @@ class MssqlXmlPathTests(TestCase):
 
         with self.assertRaises(AssertionError):
             post_process_mssql_folds(query_output, output_metadata)
+
+    def test_convert_lazily(self):
+        """Test results are decoded one at a time when post-processed lazily.
+
+        Example query for the given results:
+        {
+            Animal {
+                name @output(out_name: "name")
+                in_Animal_ParentOf @fold {
+                    name @output(out_name: "child_names")
+                }
+            }
+        }
+        """
+        query_output = [
+            {"name": "Animal 1", "child_names": "|Animal 2|~"},
+            {"name": "Animal 2", "child_names": ""},
+        ]
+        output_metadata = {
+            "name": OutputMetadata(type=GraphQLString, optional=False, folded=False),
+            "child_names": OutputMetadata(
+                type=GraphQLList(GraphQLString), optional=False, folded=True
+            ),
+        }
+
+        results = post_process_mssql_folds_lazily(iter(query_output), output_metadata)
+        self.assertEqual({"name": "Animal 1", "child_names": ["Animal 2", None]}, next(results))
+        # The second result must not have been decoded before it was requested.
+        self.assertEqual("", query_output[1]["child_names"])
+        self.assertEqual({"name": "Animal 2", "child_names": []}, next(results))
+        with self.assertRaises(StopIteration):
+            next(results)
+
+
+class MssqlXmlPathDecodingPropertyTests(TestCase):
+    def setUp(self) -> None:
+        self.random_generator = random.Random(0)
+
+    def _assert_round_trip(
+        self,
+        values: List[Optional[Any]],
+        serialized_values: List[Optional[str]],
+        list_entry_type: GraphQLScalarType,
+    ) -> None:
+        encoded_result = _reference_mssql_xml_path_encoding(serialized_values)
+        decoded_result = _mssql_xml_path_string_to_list(encoded_result, list_entry_type)
+        self.assertEqual(values, decoded_result)
+        self.assertEqual(
+            _legacy_mssql_xml_path_string_to_list(encoded_result, list_entry_type), decoded_result
+        )
+
+    def test_string_round_trip(self) -> None:
+        for _ in range(2000):
+            values: List[Optional[Any]] = [
+                None
+                if self.random_generator.random() < 0.1
+                else _make_random_string(self.random_generator)
+                for _ in range(self.random_generator.randint(0, 6))
+            ]
+            self._assert_round_trip(values, values, GraphQLString)
+
+    def test_string_agg_string_round_trip(self) -> None:
+        for _ in range(2000):
+            values: List[Optional[Any]] = [
+                None
+                if self.random_generator.random() < 0.1
+                else _make_random_string(self.random_generator)
+                for _ in range(self.random_generator.randint(0, 6))
+            ]
+            encoded_result = _reference_mssql_string_agg_encoding(values)
+            self.assertEqual(values, _mssql_xml_path_string_to_list(encoded_result, GraphQLString))
+
+    def test_typed_round_trip(self) -> None:
+        random_generator = self.random_generator
+        base_datetime = datetime.datetime(2000, 1, 1)
+
+        def make_decimal() -> decimal.Decimal:
+            return decimal.Decimal(random_generator.randint(-(10 ** 6), 10 ** 6)).scaleb(-3)
+
+        def make_date() -> datetime.date:
+            return base_datetime.date() + datetime.timedelta(
+                days=random_generator.randint(0, 10000)
+            )
+
+        def make_datetime() -> datetime.datetime:
+            return base_datetime + datetime.timedelta(seconds=random_generator.randint(0, 10 ** 9))
+
+        value_generators: Dict[GraphQLScalarType, Callable[[], Any]] = {
+            GraphQLInt: lambda: random_generator.randint(-(10 ** 30), 10 ** 30),
+            GraphQLFloat: lambda: random_generator.uniform(-1e6, 1e6),
+            GraphQLDecimal: make_decimal,
+            GraphQLBoolean: lambda: random_generator.random() < 0.5,
+            GraphQLDate: make_date,
+            GraphQLDateTime: make_datetime,
+            GraphQLID: lambda: _make_random_string(random_generator),
+        }
+        for list_entry_type, value_generator in value_generators.items():
+            for _ in range(200):
+                values = [
+                    None if random_generator.random() < 0.1 else value_generator()
+                    for _ in range(random_generator.randint(0, 6))
+                ]
+                serialized_values = [
+                    None
+                    if value is None
+                    else (value.isoformat() if isinstance(value, datetime.date) else str(value))
+                    for value in values
+                ]
+                self._assert_round_trip(values, serialized_values, list_entry_type)
+
+
+class MssqlJsonPathTests(TestCase):
+    def test_convert_empty_list(self) -> None:
+        query_output = [{"child_names": "[]"}]
+        output_metadata = {
+            "child_names": OutputMetadata(
+                type=GraphQLList(GraphQLString), optional=False, folded=True
+            ),
+        }
+
+        post_process_mssql_folds(query_output, output_metadata)
+        self.assertEqual([{"child_names": []}], query_output)
+
+    def test_convert_strings(self) -> None:
+        query_output = [
+            {"child_names": '[{"v":"Animal 1"},{"v":null},{"v":"|~^&<>\\"\\r"},{"v":""}]'}
+        ]
+        output_metadata = {
+            "child_names": OutputMetadata(
+                type=GraphQLList(GraphQLString), optional=False, folded=True
+            ),
+        }
+
+        post_process_mssql_folds(query_output, output_metadata)
+        self.assertEqual([{"child_names": ["Animal 1", None, '|~^&<>"\r', ""]}], query_output)
+
+    def test_convert_typed_values(self) -> None:
+        query_output = [
+            {
+                "child_net_worths": '[{"v":1.10},{"v":null},{"v":100000000000000000000.000001}]',
+                "child_ages": '[{"v":3},{"v":12345678901234567890}]',
+                "child_heights": '[{"v":1.5},{"v":2}]',
+                "child_alive": '[{"v":true},{"v":false}]',
+                "child_birthdays": '[{"v":"2020-01-01"}]',
+                "child_last_fed": '[{"v":"2020-01-01T05:06:07.123"}]',
+            }
+        ]
+        output_metadata = {
+            "child_net_worths": OutputMetadata(
+                type=GraphQLList(GraphQLDecimal), optional=False, folded=True
+            ),
+            "child_ages": OutputMetadata(type=GraphQLList(GraphQLInt), optional=False, folded=True),
+            "child_heights": OutputMetadata(
+                type=GraphQLList(GraphQLFloat), optional=False, folded=True
+            ),
+            "child_alive": OutputMetadata(
+                type=GraphQLList(GraphQLBoolean), optional=False, folded=True
+            ),
+            "child_birthdays": OutputMetadata(
+                type=GraphQLList(GraphQLDate), optional=False, folded=True
+            ),
+            "child_last_fed": OutputMetadata(
+                type=GraphQLList(GraphQLDateTime), optional=False, folded=True
+            ),
+        }
+        expected_result = [
+            {
+                "child_net_worths": [
+                    decimal.Decimal("1.10"),
+                    None,
+                    decimal.Decimal("100000000000000000000.000001"),
+                ],
+                "child_ages": [3, 12345678901234567890],
+                "child_heights": [1.5, 2.0],
+                "child_alive": [True, False],
+                "child_birthdays": [datetime.date(2020, 1, 1)],
+                "child_last_fed": [datetime.datetime(2020, 1, 1, 5, 6, 7, 123000)],
+            }
+        ]
+
+        post_process_mssql_folds(query_output, output_metadata)
+        self.assertEqual(expected_result, query_output)
+
+
+class MysqlJsonArrayAggTests(TestCase):
+    def test_convert_strings(self) -> None:
+        query_output = [
+            {"child_names": '["Animal 1", null, "|~^&<>\\"\\r", ""]', "child_count": 4},
+            {"child_names": "[]", "child_count": 0},
+        ]
+        output_metadata = {
+            "child_names": OutputMetadata(
+                type=GraphQLList(GraphQLString), optional=False, folded=True
+            ),
+            "child_count": OutputMetadata(type=GraphQLInt, optional=False, folded=True),
+        }
+
+        post_process_mysql_folds(query_output, output_metadata)
+        self.assertEqual(
+            [
+                {"child_names": ["Animal 1", None, '|~^&<>"\r', ""], "child_count": 4},
+                {"child_names": [], "child_count": 0},
+            ],
+            query_output,
+        )
+
+    def test_convert_typed_values(self) -> None:
+        query_output = [
+            {
+                "child_net_worths": "[1.10, null, 100000000000000000000.000001]",
+                "child_ages": "[3, 12345678901234567890]",
+                "child_heights": "[1.5, 2]",
+                "child_alive": "[1, 0]",
+                "child_uuids": '["cfc5a9ab-2fc2-4d77-8ff2-4b4e2a7b8b52"]',
+                "child_birthdays": '["2020-01-01"]',
+                "child_last_fed": '["2020-01-01 05:06:07.123000"]',
+            }
+        ]
+        output_metadata = {
+            "child_net_worths": OutputMetadata(
+                type=GraphQLList(GraphQLDecimal), optional=False, folded=True
+            ),
+            "child_ages": OutputMetadata(type=GraphQLList(GraphQLInt), optional=False, folded=True),
+            "child_heights": OutputMetadata(
+                type=GraphQLList(GraphQLFloat), optional=False, folded=True
+            ),
+            "child_alive": OutputMetadata(
+                type=GraphQLList(GraphQLBoolean), optional=False, folded=True
+            ),
+            "child_uuids": OutputMetadata(type=GraphQLList(GraphQLID), optional=False, folded=True),
+            "child_birthdays": OutputMetadata(
+                type=GraphQLList(GraphQLDate), optional=False, folded=True
+            ),
+            "child_last_fed": OutputMetadata(
+                type=GraphQLList(GraphQLDateTime), optional=False, folded=True
+            ),
+        }
+        expected_result = [
+            {
+                "child_net_worths": [
+                    decimal.Decimal("1.10"),
+                    None,
+                    decimal.Decimal("100000000000000000000.000001"),
+                ],
+                "child_ages": [3, 12345678901234567890],
+                "child_heights": [1.5, 2.0],
+                "child_alive": [True, False],
+                "child_uuids": ["cfc5a9ab-2fc2-4d77-8ff2-4b4e2a7b8b52"],
+                "child_birthdays": [datetime.date(2020, 1, 1)],
+                "child_last_fed": [datetime.datetime(2020, 1, 1, 5, 6, 7, 123000)],
+            }
+        ]
+
+        post_process_mysql_folds(query_output, output_metadata)
+        self.assertEqual(expected_result, query_output)
+
+    def test_convert_lazily(self) -> None:
+        query_output = [{"child_names": '["Animal 1"]'}, {"child_names": '["Animal 2", null]'}]
+        output_metadata = {
+            "child_names": OutputMetadata(
+                type=GraphQLList(GraphQLString), optional=False, folded=True
+            ),
+        }
+
+        results = post_process_mysql_folds_lazily(iter(query_output), output_metadata)
+        self.assertEqual({"child_names": ["Animal 1"]}, next(results))
+        # Results are decoded only as they are consumed.
+        self.assertEqual('["Animal 2", null]', query_output[1]["child_names"])
+        self.assertEqual([{"child_names": ["Animal 2", None]}], list(results))
+
+
+class QueryResultDecodingTests(TestCase):
+    def setUp(self) -> None:
+        self.output_metadata = {
+            "name": OutputMetadata(
+                type=GraphQLNonNull(GraphQLString), optional=False, folded=False
+            ),
+            "birthday": OutputMetadata(type=GraphQLDate, optional=True, folded=False),
+            "net_worth": OutputMetadata(type=GraphQLDecimal, optional=False, folded=False),
+            "height": OutputMetadata(type=GraphQLFloat, optional=False, folded=False),
+            "child_last_fed": OutputMetadata(
+                type=GraphQLList(GraphQLDateTime), optional=False, folded=True
+            ),
+        }
+
+    def test_decode_in_place(self) -> None:
+        query_output: List[Dict[str, Any]] = [
+            {
+                "name": "Animal 1",
+                "birthday": "2020-01-01",
+                "net_worth": "1.10",
+                "height": decimal.Decimal("1.5"),
+                "child_last_fed": ["2020-01-01T05:06:07", None],
+            },
+            {
+                "name": "Animal 2",
+                "birthday": None,
+                "net_worth": decimal.Decimal("2"),
+                "height": 2,
+                "child_last_fed": [],
+            },
+            {
+                "name": "Animal 3",
+                "birthday": datetime.datetime(2020, 1, 2, 3, 4, 5),
+                "net_worth": 3,
+                "height": 3.0,
+                "child_last_fed": [datetime.datetime(2020, 1, 1)],
+            },
+        ]
+        expected_output: List[Dict[str, Any]] = [
+            {
+                "name": "Animal 1",
+                "birthday": datetime.date(2020, 1, 1),
+                "net_worth": decimal.Decimal("1.10"),
+                "height": 1.5,
+                "child_last_fed": [datetime.datetime(2020, 1, 1, 5, 6, 7), None],
+            },
+            {
+                "name": "Animal 2",
+                "birthday": None,
+                "net_worth": decimal.Decimal("2"),
+                "height": 2.0,
+                "child_last_fed": [],
+            },
+            {
+                "name": "Animal 3",
+                "birthday": datetime.date(2020, 1, 2),
+                "net_worth": decimal.Decimal("3"),
+                "height": 3.0,
+                "child_last_fed": [datetime.datetime(2020, 1, 1)],
+            },
+        ]
+
+        decoder = QueryResultDecoder(self.output_metadata)
+        decoder.decode_in_place(query_output)
+        self.assertEqual(expected_output, query_output)
+        for result, expected_result in zip(query_output, expected_output):
+            for out_name, value in result.items():
+                self.assertIs(type(expected_result[out_name]), type(value))
+
+        # Decoding already decoded values leaves them unchanged.
+        decoder.decode_in_place(query_output)
+        self.assertEqual(expected_output, query_output)
+
+    def test_decode_to_columns(self) -> None:
+        child_last_fed = [datetime.datetime(2020, 1, 1)]
+        query_output: List[Dict[str, Any]] = [
+            {
+                "name": "Animal 1",
+                "birthday": None,
+                "net_worth": decimal.Decimal("1"),
+                "height": 1.0,
+                "child_last_fed": child_last_fed,
+            },
+            {
+                "name": "Animal 2",
+                "birthday": "2020-01-01",
+                "net_worth": decimal.Decimal("2"),
+                "height": 2.0,
+                "child_last_fed": None,
+            },
+        ]
+
+        columns = QueryResultDecoder(self.output_metadata).decode_to_columns(query_output)
+        self.assertEqual(
+            {
+                "name": ["Animal 1", "Animal 2"],
+                "birthday": [None, datetime.date(2020, 1, 1)],
+                "net_worth": [decimal.Decimal("1"), decimal.Decimal("2")],
+                "height": [1.0, 2.0],
+                "child_last_fed": [child_last_fed, None],
+            },
+            columns,
+        )
+        # Lists that need no decoding are not copied, and the rows are not modified.
+        self.assertIs(child_last_fed, columns["child_last_fed"][0])
+        self.assertEqual("2020-01-01", query_output[1]["birthday"])
+
+    def test_invalid_values(self) -> None:
+        decoder = QueryResultDecoder(self.output_metadata)
+        valid_result: Dict[str, Any] = {
+            "name": "Animal 1",
+            "birthday": None,
+            "net_worth": decimal.Decimal("1"),
+            "height": 1.0,
+            "child_last_fed": [],
+        }
+        invalid_values = {
+            "name": 1,
+            "birthday": "not a date",
+            "height": True,
+            # Folded outputs must be decoded by the backend-specific post-processing first.
+            "child_last_fed": '["2020-01-01T05:06:07"]',
+        }
+        for out_name, invalid_value in invalid_values.items():
+            with self.assertRaises(ValueError):
+                decoder.decode_in_place(
+                    [valid_result, dict(valid_result, **{out_name: invalid_value})]
+                )
+
+
+class ColumnarQueryResultsTests(TestCase):
+    def setUp(self) -> None:
+        self.output_metadata = {
+            "name": OutputMetadata(
+                type=GraphQLNonNull(GraphQLString), optional=False, folded=False
+            ),
+            "age": OutputMetadata(type=GraphQLInt, optional=True, folded=False),
+            "height": OutputMetadata(type=GraphQLFloat, optional=False, folded=False),
+            "alive": OutputMetadata(type=GraphQLBoolean, optional=False, folded=False),
+            "child_birthdays": OutputMetadata(
+                type=GraphQLList(GraphQLDate), optional=False, folded=True
+            ),
+            "child_count": OutputMetadata(type=GraphQLInt, optional=False, folded=True),
+        }
+
+    def test_columnar_storage(self) -> None:
+        rows: List[Dict[str, Any]] = [
+            {
+                "name": "Animal 1",
+                "age": 3,
+                "height": 1.5,
+                "alive": True,
+                "child_birthdays": ["2020-01-01", None],
+                "child_count": 2,
+            },
+            {
+                "name": "Animal 2",
+                "age": None,
+                "height": decimal.Decimal("2.5"),
+                "alive": 0,
+                "child_birthdays": [],
+                "child_count": 0,
+            },
+            {
+                "name": "Animal 3",
+                "age": 12345678901234567890,
+                "height": 3,
+                "alive": False,
+                "child_birthdays": None,
+                "child_count": 0,
+            },
+        ]
+        results = ColumnarQueryResults(self.output_metadata)
+        results.extend_rows(rows)
+
+        self.assertEqual(3, len(results))
+        self.assertEqual(
+            [
+                {
+                    "name": "Animal 1",
+                    "age": 3,
+                    "height": 1.5,
+                    "alive": True,
+                    "child_birthdays": [datetime.date(2020, 1, 1), None],
+                    "child_count": 2,
+                },
+                {
+                    "name": "Animal 2",
+                    "age": None,
+                    "height": 2.5,
+                    "alive": False,
+                    "child_birthdays": [],
+                    "child_count": 0,
+                },
+                {
+                    "name": "Animal 3",
+                    "age": 12345678901234567890,
+                    "height": 3.0,
+                    "alive": False,
+                    "child_birthdays": None,
+                    "child_count": 0,
+                },
+            ],
+            results.to_rows(),
+        )
+        self.assertIs(bool, type(results.get_column("alive")[0]))
+
+        # Fixed-width values are packed, except for ints that do not fit in 64 bits.
+        height_column = cast(ScalarColumn, results.columns["height"])
+        age_column = cast(ScalarColumn, results.columns["age"])
+        self.assertEqual(array("d", [1.5, 2.5, 3.0]), height_column.values)
+        self.assertEqual(
+            array("q", [2, 0, 0]), cast(ScalarColumn, results.columns["child_count"]).values
+        )
+        self.assertIsInstance(age_column.values, list)
+        self.assertEqual(bytearray([0, 1, 0]), age_column.null_mask)
+        self.assertIsNone(height_column.null_mask)
+
+        child_birthdays = cast(FoldedColumn, results.columns["child_birthdays"])
+        self.assertEqual(array("q", [0, 2, 2, 2]), child_birthdays.offsets)
+        self.assertEqual(bytearray([0, 0, 1]), child_birthdays.null_mask)
+
+    def test_fold_decoders(self) -> None:
+        output_metadata = {
+            "child_names": OutputMetadata(
+                type=GraphQLList(GraphQLString), optional=False, folded=True
+            ),
+            "child_ages": OutputMetadata(type=GraphQLList(GraphQLInt), optional=False, folded=True),
+        }
+        mssql_results = ColumnarQueryResults(
+            output_metadata, get_mssql_fold_decoders(output_metadata)
+        )
+        mssql_results.extend_rows(
+            [
+                {"child_names": "|Animal 1|~|a^db", "child_ages": "|1|~|3"},
+                {"child_names": "", "child_ages": ""},
+            ]
+        )
+        mysql_results = ColumnarQueryResults(
+            output_metadata, get_mysql_fold_decoders(output_metadata)
+        )
+        mysql_results.extend_rows(
+            [
+                {"child_names": '["Animal 1", null, "a|b"]', "child_ages": "[1, null, 3]"},
+                {"child_names": "[]", "child_ages": "[]"},
+            ]
+        )
+
+        expected_rows = [
+            {"child_names": ["Animal 1", None, "a|b"], "child_ages": [1, None, 3]},
+            {"child_names": [], "child_ages": []},
+        ]
+        self.assertEqual(expected_rows, mssql_results.to_rows())
+        self.assertEqual(expected_rows, mysql_results.to_rows())
+
+    def test_invalid_values(self) -> None:
+        results = ColumnarQueryResults(self.output_metadata)
+        with self.assertRaises(ValueError):
+            results.append_row(
+                {
+                    "name": "Animal 1",
+                    "age": "not an int",
+                    "height": 1.0,
+                    "alive": True,
+                    "child_birthdays": [],
+                    "child_count": 0,
+                }
+            )
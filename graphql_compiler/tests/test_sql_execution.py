@@ -0,0 +1,262 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+from typing import Any, Dict, List, Tuple
+from unittest import TestCase
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event
+
+from .. import get_sqlalchemy_schema_info, graphql_to_sql
+from ..compiler import compile_graphql_to_sql
+from ..compiler.common import CompilationResult
+from ..exceptions import GraphQLInvalidArgumentError
+from ..query_execution.sql_batching import batch_sql_queries, execute_sql_queries_batched
+from ..query_execution.sql_execution import execute_sql_query_columnar, execute_sql_query_streaming
+from ..query_formatting.common import insert_arguments_into_query
+from .test_helpers import get_sqlalchemy_schema_info as get_test_sqlalchemy_schema_info
+
+
+class SqlStreamingExecutionTests(TestCase):
+    def setUp(self) -> None:
+        """Create an in-memory database with a single table of animals."""
+        metadata = MetaData()
+        animal_table = Table(
+            "Animal",
+            metadata,
+            Column("uuid", Integer, primary_key=True),
+            Column("name", String(20), nullable=False),
+        )
+        engine = create_engine("sqlite://")
+        # Use a single connection, since each connection to an in-memory database is independent.
+        self.connection = engine.connect()
+        metadata.create_all(self.connection)
+        self.connection.execute(
+            animal_table.insert(),
+            [{"uuid": index, "name": f"Animal {index}"} for index in range(10)],
+        )
+        self.sql_schema_info = get_sqlalchemy_schema_info(
+            {"Animal": animal_table}, {}, engine.dialect
+        )
+
+    def tearDown(self) -> None:
+        self.connection.close()
+
+    def test_streaming_results(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+                     @filter(op_name: ">=", value: ["$lower_bound"])
+            }
+        }"""
+        compilation_result = graphql_to_sql(
+            self.sql_schema_info, graphql_query, {"lower_bound": "Animal 3"}
+        )
+
+        for batch_size in (1, 3, 7, 100):
+            results = execute_sql_query_streaming(
+                self.connection, compilation_result, batch_size=batch_size
+            )
+            self.assertEqual(
+                [{"animal_name": f"Animal {index}"} for index in range(3, 10)],
+                sorted(results, key=lambda result: result["animal_name"]),
+            )
+
+    def test_partially_consumed_results(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+            }
+        }"""
+        compilation_result = graphql_to_sql(self.sql_schema_info, graphql_query, {})
+
+        results = execute_sql_query_streaming(self.connection, compilation_result, batch_size=2)
+        next(results)
+        results.close()
+
+        # The connection remains usable after the iterator is closed early.
+        self.assertEqual(
+            10, len(list(execute_sql_query_streaming(self.connection, compilation_result)))
+        )
+
+    def test_columnar_results(self) -> None:
+        graphql_query = """{
+            Animal {
+                uuid @output(out_name: "animal_uuid")
+                name @output(out_name: "animal_name")
+                     @filter(op_name: ">=", value: ["$lower_bound"])
+            }
+        }"""
+        compilation_result = graphql_to_sql(
+            self.sql_schema_info, graphql_query, {"lower_bound": "Animal 7"}
+        )
+
+        for batch_size in (1, 2, 100):
+            results = execute_sql_query_columnar(
+                self.connection, compilation_result, batch_size=batch_size
+            )
+            self.assertEqual(3, len(results))
+            self.assertEqual(
+                [{"animal_uuid": index, "animal_name": f"Animal {index}"} for index in (7, 8, 9)],
+                sorted(results.to_rows(), key=lambda result: result["animal_uuid"]),
+            )
+
+    def test_invalid_batch_size(self) -> None:
+        graphql_query = """{
+            Animal {
+                name @output(out_name: "animal_name")
+            }
+        }"""
+        compilation_result = graphql_to_sql(self.sql_schema_info, graphql_query, {})
+
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            execute_sql_query_streaming(self.connection, compilation_result, batch_size=0)
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            execute_sql_query_columnar(self.connection, compilation_result, batch_size=0)
+
+
+class SqlBatchedExecutionTests(TestCase):
+    def setUp(self) -> None:
+        """Create an in-memory database with tables of animals and locations."""
+        metadata = MetaData()
+        animal_table = Table(
+            "Animal",
+            metadata,
+            Column("uuid", Integer, primary_key=True),
+            Column("name", String(20), nullable=False),
+            Column("net_worth", Integer, nullable=False),
+        )
+        location_table = Table(
+            "Location",
+            metadata,
+            Column("uuid", Integer, primary_key=True),
+            Column("name", String(20), nullable=False),
+        )
+        self.engine = create_engine("sqlite://")
+        # Use a single connection, since each connection to an in-memory database is independent.
+        self.connection = self.engine.connect()
+        metadata.create_all(self.connection)
+        self.connection.execute(
+            animal_table.insert(),
+            [
+                {"uuid": index, "name": f"Animal {index}", "net_worth": index * 100}
+                for index in range(10)
+            ],
+        )
+        self.connection.execute(
+            location_table.insert(),
+            [{"uuid": index, "name": f"Location {index}"} for index in range(3)],
+        )
+        self.sql_schema_info = get_sqlalchemy_schema_info(
+            {"Animal": animal_table, "Location": location_table}, {}, self.engine.dialect
+        )
+
+    def tearDown(self) -> None:
+        self.connection.close()
+
+    def test_batched_results(self) -> None:
+        animal_query = """{
+            Animal {
+                name @output(out_name: "name")
+                net_worth @output(out_name: "net_worth")
+                          @filter(op_name: ">=", value: ["$lower_bound"])
+            }
+        }"""
+        location_query = """{
+            Location {
+                name @output(out_name: "name")
+                     @filter(op_name: "in_collection", value: ["$names"])
+            }
+        }"""
+        compiled_animal_query = compile_graphql_to_sql(self.sql_schema_info, animal_query)
+        compiled_location_query = compile_graphql_to_sql(self.sql_schema_info, location_query)
+        compiled_queries: List[Tuple[CompilationResult, Dict[str, Any]]] = [
+            (compiled_animal_query, {"lower_bound": 700}),
+            (compiled_location_query, {"names": ["Location 0", "Location 2"]}),
+            # Parameters with the same name as in another query must not be conflated.
+            (compiled_animal_query, {"lower_bound": 900}),
+            # Queries without any results are batched as well.
+            (compiled_location_query, {"names": []}),
+        ]
+
+        executed_statements = []
+
+        def record_statement(*args: Any) -> None:
+            executed_statements.append(args)
+
+        event.listen(self.engine, "before_cursor_execute", record_statement)
+        batched_results = execute_sql_queries_batched(self.connection, compiled_queries)
+        event.remove(self.engine, "before_cursor_execute", record_statement)
+
+        self.assertEqual(1, len(executed_statements))
+        individual_results = [
+            [
+                dict(row)
+                for row in self.connection.execute(
+                    insert_arguments_into_query(compilation_result, arguments)
+                )
+            ]
+            for compilation_result, arguments in compiled_queries
+        ]
+        expected_results = [
+            [
+                {"name": "Animal 7", "net_worth": 700},
+                {"name": "Animal 8", "net_worth": 800},
+                {"name": "Animal 9", "net_worth": 900},
+            ],
+            [{"name": "Location 0"}, {"name": "Location 2"}],
+            [{"name": "Animal 9", "net_worth": 900}],
+            [],
+        ]
+        for results in (batched_results, individual_results):
+            self.assertEqual(
+                expected_results,
+                [sorted(query_results, key=lambda row: row["name"]) for query_results in results],
+            )
+
+    def test_batching_no_queries(self) -> None:
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            execute_sql_queries_batched(self.connection, [])
+
+    def test_batching_invalid_arguments(self) -> None:
+        animal_query = """{
+            Animal {
+                name @output(out_name: "name")
+                     @filter(op_name: "=", value: ["$name"])
+            }
+        }"""
+        compiled_animal_query = compile_graphql_to_sql(self.sql_schema_info, animal_query)
+
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            execute_sql_queries_batched(self.connection, [(compiled_animal_query, {})])
+
+    def test_batching_recursive_queries(self) -> None:
+        # The names of the CTEs of each batched query must be distinct from those of the others.
+        query = """{
+            Animal {
+                name @output(out_name: "name")
+                     @filter(op_name: "=", value: ["$name"])
+                out_Animal_ParentOf @recurse(depth: 2) {
+                    name @output(out_name: "descendant_name")
+                }
+            }
+        }"""
+        for dialect in ("mssql", "postgresql"):
+            sql_schema_info = get_test_sqlalchemy_schema_info(dialect)
+            compilation_result = compile_graphql_to_sql(sql_schema_info, query)
+            with self.assertRaises(GraphQLInvalidArgumentError):
+                batch_sql_queries(
+                    [
+                        (compilation_result, {"name": "Big Bear"}),
+                        (compilation_result, {"name": "Bob"}),
+                    ]
+                )
+
+            other_compilation_result = compile_graphql_to_sql(sql_schema_info, query)
+            batched_query = batch_sql_queries(
+                [
+                    (compilation_result, {"name": "Big Bear"}),
+                    (other_compilation_result, {"name": "Bob"}),
+                ]
+            )
+            compiled_query = batched_query.query.compile(dialect=sql_schema_info.dialect)
+            self.assertEqual(
+                {"batch_0_name": "Big Bear", "batch_1_name": "Bob"}, compiled_query.params
+            )
@@ -0,0 +1,154 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+import datetime
+import decimal
+import math
+import os
+import tempfile
+from unittest import TestCase
+
+from sqlalchemy import Column, Date, Integer, MetaData, String, Table, create_engine
+from sqlalchemy.dialects import mssql, postgresql
+
+from .. import get_sqlalchemy_schema_info
+from ..cost_estimation.sql_statistics import (
+    _get_quantiles,
+    _get_sample_query,
+    collect_sql_statistics,
+)
+from ..exceptions import GraphQLInvalidArgumentError
+from ..schema_generation.sqlalchemy.edge_descriptors import DirectEdgeDescriptor
+
+
+class SqlStatisticsCollectionTests(TestCase):
+    def setUp(self) -> None:
+        """Create a file-backed SQLite database, so that each thread can connect to it."""
+        database_file, self.database_path = tempfile.mkstemp(suffix=".db")
+        os.close(database_file)
+        self.engine = create_engine(f"sqlite:///{self.database_path}")
+
+        metadata = MetaData()
+        self.location_table = Table(
+            "Location",
+            metadata,
+            Column("uuid", Integer, primary_key=True),
+            Column("name", String(20), nullable=False),
+        )
+        self.animal_table = Table(
+            "Animal",
+            metadata,
+            Column("uuid", Integer, primary_key=True),
+            Column("name", String(20), nullable=False),
+            Column("birthday", Date, nullable=True),
+            Column("color", String(20), nullable=False),
+            Column("location", Integer, nullable=True),
+        )
+        metadata.create_all(self.engine)
+        self.engine.execute(
+            self.location_table.insert(),
+            [{"uuid": index, "name": f"Location {index}"} for index in range(5)],
+        )
+        self.engine.execute(
+            self.animal_table.insert(),
+            [
+                {
+                    "uuid": index,
+                    "name": f"Animal {index}",
+                    "birthday": datetime.date(2000 + index, 1, 1) if index % 2 == 0 else None,
+                    "color": "red" if index < 15 else "blue",
+                    "location": index % 5 if index < 10 else None,
+                }
+                for index in range(20)
+            ],
+        )
+
+        direct_edges = {
+            "Animal_LivesIn": DirectEdgeDescriptor(
+                from_vertex="Animal", from_column="location", to_vertex="Location", to_column="uuid"
+            )
+        }
+        self.sql_schema_info = get_sqlalchemy_schema_info(
+            {"Animal": self.animal_table, "Location": self.location_table},
+            direct_edges,
+            self.engine.dialect,
+        )
+
+    def tearDown(self) -> None:
+        self.engine.dispose()
+        os.remove(self.database_path)
+
+    def test_exact_statistics_of_small_tables(self) -> None:
+        statistics = collect_sql_statistics(self.sql_schema_info, self.engine, quantile_count=3)
+
+        self.assertEqual(20, statistics.get_class_count("Animal"))
+        self.assertEqual(5, statistics.get_class_count("Location"))
+        # Half of the animals live in one of the locations.
+        self.assertEqual(10, statistics.get_class_count("Animal_LivesIn"))
+        self.assertEqual(
+            10, statistics.get_vertex_edge_vertex_count("Animal", "Animal_LivesIn", "Location")
+        )
+
+        self.assertEqual(20, statistics.get_distinct_field_values_count("Animal", "name"))
+        self.assertEqual(2, statistics.get_distinct_field_values_count("Animal", "color"))
+        self.assertEqual(10, statistics.get_distinct_field_values_count("Animal", "birthday"))
+        self.assertEqual(
+            [datetime.date(2000, 1, 1), datetime.date(2008, 1, 1), datetime.date(2018, 1, 1)],
+            statistics.get_field_quantiles("Animal", "birthday"),
+        )
+        self.assertEqual([0, 2, 4], statistics.get_field_quantiles("Location", "uuid"))
+        # String quantiles follow the lexicographic order of the values.
+        self.assertEqual(
+            ["Animal 0", "Animal 18", "Animal 9"], statistics.get_field_quantiles("Animal", "name")
+        )
+        self.assertEqual(5, statistics.get_distinct_field_values_count("Animal", "location"))
+
+        self.assertEqual(15, statistics.get_value_count("Animal", "color", "red"))
+
+    def test_sampled_statistics(self) -> None:
+        statistics = collect_sql_statistics(
+            self.sql_schema_info, self.engine, sample_size=10, max_workers=1
+        )
+
+        # Counts are exact, while other statistics are estimated from 10 sampled animals.
+        self.assertEqual(20, statistics.get_class_count("Animal"))
+        self.assertEqual(20, statistics.get_distinct_field_values_count("Animal", "name"))
+        color_count = statistics.get_distinct_field_values_count("Animal", "color")
+        self.assertTrue(1 <= color_count <= 20)
+        # Each sampled animal stands for two animals.
+        self.assertIn(statistics.get_value_count("Animal", "color", "red"), range(0, 21, 2))
+
+    def test_postgresql_table_sample(self) -> None:
+        sample_query = _get_sample_query(
+            postgresql.dialect(), self.animal_table, ["color", "name"], 1000, 10
+        )
+        self.assertEqual(
+            'SELECT "Animal_1".color, "Animal_1".name '
+            'FROM "Animal" AS "Animal_1" TABLESAMPLE bernoulli(%(bernoulli_1)s) '
+            "LIMIT %(param_1)s",
+            " ".join(str(sample_query.compile(dialect=postgresql.dialect())).split()),
+        )
+
+    def test_mssql_table_sample(self) -> None:
+        sample_query = _get_sample_query(
+            mssql.dialect(), self.animal_table, ["color", "name"], 1000, 10
+        )
+        self.assertEqual(
+            "SELECT TOP 10 [Animal_1].color, [Animal_1].name "
+            "FROM [Animal] AS [Animal_1] TABLESAMPLE system(1.0 PERCENT)",
+            " ".join(str(sample_query.compile(dialect=mssql.dialect())).split()),
+        )
+
+    def test_quantiles_ignore_unordered_values(self) -> None:
+        self.assertEqual(
+            [-1.5, 0.5, 2.5], _get_quantiles([2.5, math.nan, None, -1.5, 0.5, math.nan], 3),
+        )
+        self.assertEqual(
+            [decimal.Decimal("1"), decimal.Decimal("2")],
+            _get_quantiles([decimal.Decimal("NaN"), decimal.Decimal("2"), decimal.Decimal("1")], 2),
+        )
+        self.assertIsNone(_get_quantiles([math.nan, None], 2))
+
+    def test_invalid_arguments(self) -> None:
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            collect_sql_statistics(self.sql_schema_info, self.engine, sample_size=0)
+        with self.assertRaises(GraphQLInvalidArgumentError):
+            collect_sql_statistics(self.sql_schema_info, self.engine, quantile_count=1)
@@ -0,0 +1,298 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+import datetime
+import decimal
+import os
+import struct
+import tempfile
+from typing import Any, Dict, List, Tuple
+from unittest import TestCase
+
+from ..cost_estimation.statistics import LocalStatistics, Statistics, VertexSamplingSummary
+from ..cost_estimation.statistics_snapshot import (
+    SNAPSHOT_FORMAT_VERSION,
+    SnapshotStatistics,
+    write_statistics_snapshot,
+)
+
+
+class StatisticsSnapshotTests(TestCase):
+    def setUp(self) -> None:
+        snapshot_file, self.snapshot_path = tempfile.mkstemp(suffix=".stats")
+        os.close(snapshot_file)
+
+    def tearDown(self) -> None:
+        os.remove(self.snapshot_path)
+
+    def test_snapshot_matches_local_statistics(self) -> None:
+        class_counts = {"Animal": 1000, "Location": 10, "Animal_LivesIn": 900, "Événement": 3}
+        vertex_edge_vertex_counts = {("Animal", "Animal_LivesIn", "Location"): 900}
+        edge_degree_histograms = {
+            ("Animal", "Animal_LivesIn", "Location", "out"): {0: 100, 1: 900},
+            ("Animal", "Animal_LivesIn", "Location", "in"): {1: 5, 4: 2, 887: 1, 0: 2},
+        }
+        recursive_branching_factors = {("Animal", "Animal_ParentOf", "Animal", "out"): 1.5}
+        distinct_field_values_counts = {("Animal", "name"): 990, ("Location", "name"): 10}
+        joint_distinct_field_values_counts = {
+            ("Animal", ("alive", "color")): 6,
+            ("Animal", ("alive", "color", "name")): 995,
+        }
+        field_quantiles: Dict[Tuple[str, str], List[Any]] = {
+            ("Animal", "birthday"): [datetime.date(2000, 1, 1), datetime.date(2020, 1, 1)],
+            ("Animal", "last_fed"): [
+                datetime.datetime(1960, 1, 1, 1, 2, 3, 4),
+                datetime.datetime(2020, 1, 1),
+            ],
+            ("Animal", "net_worth"): [decimal.Decimal("-1.5"), decimal.Decimal("100.25")],
+            ("Animal", "age"): [-3, 12345678901234567890],
+            ("Animal", "height"): [0.5, 2.5],
+            ("Location", "name"): ["", "Zürich"],
+        }
+        sampling_summaries = {
+            "Animal": VertexSamplingSummary(
+                vertex_name="Animal",
+                value_counts={
+                    "color": {"red": 5, "blue": 2, None: 1, "": 1},
+                    "alive": {True: 7, False: 2},
+                    "age": {3: 4, 12345678901234567890: 1},
+                },
+                sample_ratio=100,
+                joint_value_counts={
+                    ("alive", "color"): {(True, "red"): 4, (False, None): 1, (True, ""): 1},
+                    ("age", "color", "name"): {(3, "red", "Fido"): 2, (4, "blue", "Rex"): 1},
+                },
+            ),
+            "Location": VertexSamplingSummary(
+                vertex_name="Location",
+                value_counts={},
+                sample_ratio=1,
+                joint_value_counts={("name", "zip"): {("Zürich", decimal.Decimal("8001")): 1}},
+            ),
+        }
+        local_statistics = LocalStatistics(
+            class_counts,
+            vertex_edge_vertex_counts=vertex_edge_vertex_counts,
+            edge_degree_histograms=edge_degree_histograms,
+            recursive_branching_factors=recursive_branching_factors,
+            distinct_field_values_counts=distinct_field_values_counts,
+            joint_distinct_field_values_counts=joint_distinct_field_values_counts,
+            field_quantiles=field_quantiles,
+            sampling_summaries=sampling_summaries,
+        )
+        write_statistics_snapshot(
+            self.snapshot_path,
+            class_counts,
+            vertex_edge_vertex_counts=vertex_edge_vertex_counts,
+            edge_degree_histograms=edge_degree_histograms,
+            recursive_branching_factors=recursive_branching_factors,
+            distinct_field_values_counts=distinct_field_values_counts,
+            joint_distinct_field_values_counts=joint_distinct_field_values_counts,
+            field_quantiles=field_quantiles,
+            sampling_summaries=sampling_summaries,
+        )
+        snapshot_statistics = SnapshotStatistics(self.snapshot_path)
+        self.addCleanup(snapshot_statistics.close)
+
+        for class_name in list(class_counts) + ["Species"]:
+            self.assertEqual(
+                local_statistics.get_class_count(class_name),
+                snapshot_statistics.get_class_count(class_name),
+            )
+        for vertex_edge_vertex_names in list(vertex_edge_vertex_counts) + [
+            ("Location", "Animal_LivesIn", "Animal")
+        ]:
+            self.assertEqual(
+                local_statistics.get_vertex_edge_vertex_count(*vertex_edge_vertex_names),
+                snapshot_statistics.get_vertex_edge_vertex_count(*vertex_edge_vertex_names),
+            )
+        for edge_and_direction_names in list(edge_degree_histograms) + [
+            ("Animal", "Animal_ParentOf", "Animal", "out")
+        ]:
+            self.assertEqual(
+                local_statistics.get_edge_degree_histogram(*edge_and_direction_names),
+                snapshot_statistics.get_edge_degree_histogram(*edge_and_direction_names),
+            )
+        for edge_and_direction_names in list(recursive_branching_factors) + [
+            ("Animal", "Animal_ParentOf", "Animal", "in")
+        ]:
+            self.assertEqual(
+                local_statistics.get_recursive_branching_factor(*edge_and_direction_names),
+                snapshot_statistics.get_recursive_branching_factor(*edge_and_direction_names),
+            )
+        for vertex_name, field_names in list(joint_distinct_field_values_counts) + [
+            ("Animal", ("color", "name")),
+            ("Location", ("alive", "color")),
+        ]:
+            self.assertEqual(
+                local_statistics.get_joint_distinct_field_values_count(vertex_name, field_names),
+                snapshot_statistics.get_joint_distinct_field_values_count(vertex_name, field_names),
+            )
+        for vertex_name, field_name in list(distinct_field_values_counts) + [("Animal", "color")]:
+            self.assertEqual(
+                local_statistics.get_distinct_field_values_count(vertex_name, field_name),
+                snapshot_statistics.get_distinct_field_values_count(vertex_name, field_name),
+            )
+        for vertex_name, field_name in list(field_quantiles) + [("Animal", "color")]:
+            local_quantiles = local_statistics.get_field_quantiles(vertex_name, field_name)
+            snapshot_quantiles = snapshot_statistics.get_field_quantiles(vertex_name, field_name)
+            self.assertEqual(local_quantiles, snapshot_quantiles)
+            if snapshot_quantiles is not None:
+                self.assertEqual(
+                    [type(quantile) for quantile in local_quantiles],
+                    [type(quantile) for quantile in snapshot_quantiles],
+                )
+
+        value_count_lookups = [
+            ("Animal", "color", "red"),
+            ("Animal", "color", None),
+            ("Animal", "color", ""),
+            ("Animal", "color", "green"),
+            ("Animal", "alive", False),
+            ("Animal", "age", 12345678901234567890),
+            ("Animal", "age", 4),
+            ("Animal", "name", "Animal 1"),
+            ("Location", "name", "Zürich"),
+            ("Animal", "color", ("red",)),
+            ("Animal", "age", datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)),
+        ]
+        for vertex_name, field_name, value in value_count_lookups:
+            self.assertEqual(
+                local_statistics.get_value_count(vertex_name, field_name, value),
+                snapshot_statistics.get_value_count(vertex_name, field_name, value),
+            )
+
+        joint_value_count_lookups: List[Tuple[str, Tuple[str, ...], Tuple[Any, ...]]] = [
+            ("Animal", ("alive", "color"), (True, "red")),
+            ("Animal", ("alive", "color"), (False, None)),
+            ("Animal", ("alive", "color"), (True, "")),
+            ("Animal", ("alive", "color"), (False, "red")),
+            ("Animal", ("alive", "color"), (True, "green")),
+            ("Animal", ("alive", "color"), (True, ("red",))),
+            ("Animal", ("alive", "color"), (True,)),
+            ("Animal", ("age", "color", "name"), (3, "red", "Fido")),
+            ("Animal", ("age", "color", "name"), (4, "blue", "Rex")),
+            ("Animal", ("age", "color", "name"), (3, "blue", "Rex")),
+            ("Animal", ("age", "color"), (3, "red")),
+            ("Location", ("name", "zip"), ("Zürich", decimal.Decimal("8001"))),
+            ("Location", ("name", "zip"), ("Zürich", decimal.Decimal("8002"))),
+            ("Species", ("alive", "color"), (True, "red")),
+        ]
+        for vertex_name, field_names, field_values in joint_value_count_lookups:
+            self.assertEqual(
+                local_statistics.get_joint_value_count(vertex_name, field_names, field_values),
+                snapshot_statistics.get_joint_value_count(vertex_name, field_names, field_values),
+            )
+
+        # Batched lookups match the per-value lookups of the base class.
+        batched_value_count_lookups: List[Tuple[str, str, List[Any]]] = [
+            ("Animal", "color", ["red", None, "green"]),
+            ("Animal", "age", [4, 4, 5]),
+            ("Animal", "uuid", [1]),
+            ("Species", "name", []),
+        ]
+        for vertex_name, field_name, values in batched_value_count_lookups:
+            expected_value_counts = Statistics.get_value_counts(
+                local_statistics, vertex_name, field_name, values
+            )
+            self.assertEqual(
+                expected_value_counts,
+                local_statistics.get_value_counts(vertex_name, field_name, values),
+            )
+            self.assertEqual(
+                expected_value_counts,
+                snapshot_statistics.get_value_counts(vertex_name, field_name, values),
+            )
+            local_value_counts_with_bounds = local_statistics.get_value_counts_with_bounds(
+                vertex_name, field_name, values
+            )
+            self.assertEqual(
+                expected_value_counts,
+                None
+                if local_value_counts_with_bounds is None
+                else local_value_counts_with_bounds[0],
+            )
+            self.assertEqual(
+                local_value_counts_with_bounds,
+                snapshot_statistics.get_value_counts_with_bounds(vertex_name, field_name, values),
+            )
+
+        batched_joint_value_count_lookups: List[
+            Tuple[str, Tuple[str, ...], List[Tuple[Any, ...]]]
+        ] = [
+            ("Animal", ("alive", "color"), [(True, "red"), (False, None), (True, "green")]),
+            ("Animal", ("alive", "color"), [(True, "red"), (True,)]),
+            ("Animal", ("age", "color", "name"), [(3, "red", "Fido"), (4, "blue", "Rex")]),
+            ("Animal", ("age", "color"), [(3, "red")]),
+            ("Species", ("alive", "color"), []),
+        ]
+        for vertex_name, field_names, values_list in batched_joint_value_count_lookups:
+            expected_joint_value_counts = Statistics.get_joint_value_counts(
+                local_statistics, vertex_name, field_names, values_list
+            )
+            self.assertEqual(
+                expected_joint_value_counts,
+                local_statistics.get_joint_value_counts(vertex_name, field_names, values_list),
+            )
+            self.assertEqual(
+                expected_joint_value_counts,
+                snapshot_statistics.get_joint_value_counts(vertex_name, field_names, values_list),
+            )
+
+    def test_empty_snapshot(self) -> None:
+        write_statistics_snapshot(self.snapshot_path, {})
+        snapshot_statistics = SnapshotStatistics(self.snapshot_path)
+        self.addCleanup(snapshot_statistics.close)
+        self.assertIsNone(snapshot_statistics.get_class_count("Animal"))
+        self.assertIsNone(snapshot_statistics.get_field_quantiles("Animal", "birthday"))
+        self.assertIsNone(snapshot_statistics.get_value_count("Animal", "color", "red"))
+
+    def test_invalid_snapshots(self) -> None:
+        with open(self.snapshot_path, "wb") as snapshot_file:
+            snapshot_file.write(b"not a statistics snapshot")
+        with self.assertRaises(ValueError):
+            SnapshotStatistics(self.snapshot_path)
+
+        write_statistics_snapshot(self.snapshot_path, {"Animal": 1})
+        with open(self.snapshot_path, "r+b") as snapshot_file:
+            # Overwrite the format version following the magic bytes.
+            snapshot_file.seek(8)
+            snapshot_file.write(struct.pack(">I", SNAPSHOT_FORMAT_VERSION + 1))
+        with self.assertRaises(ValueError):
+            SnapshotStatistics(self.snapshot_path)
+
+    def test_unsupported_values(self) -> None:
+        with self.assertRaises(ValueError):
+            write_statistics_snapshot(
+                self.snapshot_path,
+                {"Animal": 1},
+                field_quantiles={
+                    ("Animal", "last_fed"): [
+                        datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc),
+                        datetime.datetime(2021, 1, 1, tzinfo=datetime.timezone.utc),
+                    ]
+                },
+            )
+        with self.assertRaises(TypeError):
+            write_statistics_snapshot(
+                self.snapshot_path,
+                {"Animal": 1},
+                sampling_summaries={
+                    "Animal": VertexSamplingSummary(
+                        vertex_name="Animal",
+                        value_counts={"birthday": {datetime.time(12): 1}},
+                        sample_ratio=1,
+                    )
+                },
+            )
+        with self.assertRaises(TypeError):
+            write_statistics_snapshot(
+                self.snapshot_path,
+                {"Animal": 1},
+                sampling_summaries={
+                    "Animal": VertexSamplingSummary(
+                        vertex_name="Animal",
+                        value_counts={},
+                        sample_ratio=1,
+                        joint_value_counts={("alive", "birthday"): {(True, datetime.time(12)): 1}},
+                    )
+                },
+            )
@@ -0,0 +1,86 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Benchmark the decoding of MSSQL XML PATH fold results.
+
+The current decoder is compared against the original multi-pass decoder kept in the post-processing
+tests. Each payload is the encoded result of a fold over the given number of elements.
+
+Run it from the root of the repository:
+
+    python -m scripts.benchmark_mssql_fold_decoding
+"""
+import argparse
+import random
+import sys
+import timeit
+from typing import List, Optional, Tuple
+
+from graphql import GraphQLInt, GraphQLScalarType, GraphQLString
+
+from graphql_compiler.post_processing.sql_post_processing import _mssql_xml_path_string_to_list
+from graphql_compiler.tests.test_post_processing import (
+    _legacy_mssql_xml_path_string_to_list,
+    _make_random_string,
+    _reference_mssql_xml_path_encoding,
+)
+
+
+def _make_payloads(
+    num_elements: int, random_generator: random.Random
+) -> List[Tuple[str, str, GraphQLScalarType]]:
+    """Return the name, encoded fold result and element type of each benchmarked payload."""
+    plain_strings: List[Optional[str]] = [
+        f"name_{random_generator.randint(0, 10 ** 6)}" for _ in range(num_elements)
+    ]
+    escaped_strings: List[Optional[str]] = [
+        _make_random_string(random_generator) for _ in range(num_elements)
+    ]
+    ints: List[Optional[str]] = [
+        str(random_generator.randint(-(10 ** 9), 10 ** 9)) for _ in range(num_elements)
+    ]
+    return [
+        ("plain strings", _reference_mssql_xml_path_encoding(plain_strings), GraphQLString),
+        ("escaped strings", _reference_mssql_xml_path_encoding(escaped_strings), GraphQLString),
+        ("ints", _reference_mssql_xml_path_encoding(ints), GraphQLInt),
+    ]
+
+
+def _time_decoding(
+    payload: str, list_entry_type: GraphQLScalarType, legacy: bool, repetitions: int
+) -> float:
+    """Return the best time in milliseconds needed to decode the payload once."""
+    decoder = _legacy_mssql_xml_path_string_to_list if legacy else _mssql_xml_path_string_to_list
+    number = 10
+    timings = timeit.repeat(
+        lambda: decoder(payload, list_entry_type), number=number, repeat=repetitions
+    )
+    return min(timings) / number * 1000
+
+
+def main() -> None:
+    """Print the time needed by the legacy and current decoders to decode each payload."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-elements", type=int, default=1000)
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random_generator = random.Random(args.seed)
+    sys.stdout.write(f"Fold results of {args.num_elements} elements, time per payload.\n\n")
+    sys.stdout.write(
+        f"{'payload':<16}  {'legacy (ms)':>12}  {'current (ms)':>12}  {'speedup':>8}\n"
+    )
+    for name, payload, list_entry_type in _make_payloads(args.num_elements, random_generator):
+        # Both decoders must agree before their timings are worth comparing.
+        legacy_result = _legacy_mssql_xml_path_string_to_list(payload, list_entry_type)
+        if legacy_result != _mssql_xml_path_string_to_list(payload, list_entry_type):
+            raise AssertionError(f"The decoders disagree on the {name} payload.")
+        legacy_ms = _time_decoding(payload, list_entry_type, True, args.repetitions)
+        current_ms = _time_decoding(payload, list_entry_type, False, args.repetitions)
+        sys.stdout.write(
+            f"{name:<16}  {legacy_ms:>12.3f}  {current_ms:>12.3f}  "
+            f"{legacy_ms / current_ms:>7.1f}x\n"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# Copyright 2020-present Kensho Technologies, LLC.
+"""Benchmark the SQL emitted for @recurse, with and without deduplicate_recursive_traversals.
+
+The benchmark runs against an in-memory SQLite database holding a dense graph: the vertices are
+split into groups, and a self-edge joins each vertex to every vertex of its group, itself included.
+Each query recurses from every vertex, or from a single one, so the number of paths grows
+exponentially with the depth, while the number of distinct vertices reached at each depth stays the
+same.
+
+Run it from the root of the repository:
+
+    python -m scripts.benchmark_recursive_traversals
+"""
+import argparse
+import sys
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import sqlalchemy
+
+from graphql_compiler import compile_graphql_to_sql
+from graphql_compiler.schema.schema_info import SQLAlchemySchemaInfo
+from graphql_compiler.schema_generation.sqlalchemy import get_sqlalchemy_schema_info
+from graphql_compiler.schema_generation.sqlalchemy.edge_descriptors import DirectEdgeDescriptor
+
+
+QUERY_TEMPLATE = """{
+    Vertex {
+        uuid @output(out_name: "uuid") %(filter)s
+        out_Vertex_Adjacent @recurse(depth: %(depth)d) {
+            uuid @output(out_name: "reached_uuid")
+        }
+    }
+}"""
+
+
+def _make_database(
+    num_groups: int, group_size: int
+) -> Tuple[sqlalchemy.engine.Engine, SQLAlchemySchemaInfo]:
+    """Create and populate the in-memory database, and return it with its schema info."""
+    metadata = sqlalchemy.MetaData()
+    vertex_table = sqlalchemy.Table(
+        "Vertex",
+        metadata,
+        sqlalchemy.Column("uuid", sqlalchemy.Integer, primary_key=True),
+        sqlalchemy.Column("group_id", sqlalchemy.Integer, index=True, nullable=False),
+    )
+    vertex_name_to_table = {"Vertex": vertex_table}
+    direct_edges = {
+        "Vertex_Adjacent": DirectEdgeDescriptor("Vertex", "group_id", "Vertex", "group_id"),
+    }
+
+    engine = sqlalchemy.create_engine("sqlite://")
+    metadata.create_all(engine)
+    engine.execute(
+        vertex_table.insert(),
+        [{"uuid": uuid, "group_id": uuid // group_size} for uuid in range(num_groups * group_size)],
+    )
+
+    return engine, get_sqlalchemy_schema_info(vertex_name_to_table, direct_edges, engine.dialect)
+
+
+def _time_query(
+    engine: sqlalchemy.engine.Engine,
+    sql_schema_info: SQLAlchemySchemaInfo,
+    depth: int,
+    start_vertex: Optional[int],
+    repetitions: int,
+) -> Tuple[int, float]:
+    """Return the number of result rows and the best running time in milliseconds."""
+    query_filter = ""
+    parameters: Dict[str, Any] = {}
+    if start_vertex is not None:
+        query_filter = '@filter(op_name: "=", value: ["$uuid"])'
+        parameters["uuid"] = start_vertex
+    query = compile_graphql_to_sql(
+        sql_schema_info, QUERY_TEMPLATE % {"depth": depth, "filter": query_filter}
+    ).query
+    best_time = float("inf")
+    num_rows = 0
+    for _ in range(repetitions):
+        start_time = time.perf_counter()
+        num_rows = len(engine.execute(query, parameters).fetchall())
+        best_time = min(best_time, time.perf_counter() - start_time)
+    return num_rows, best_time * 1000
+
+
+def main() -> None:
+    """Print the number of result rows and running time of @recurse queries at each depth."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--num-groups", type=int, default=10)
+    parser.add_argument("--group-size", type=int, default=20)
+    parser.add_argument("--max-depth", type=int, default=10)
+    parser.add_argument(
+        "--start-vertex",
+        type=int,
+        default=None,
+        help="the uuid of the vertex to recurse from, instead of recursing from every vertex",
+    )
+    parser.add_argument(
+        "--max-default-depth",
+        type=int,
+        default=2,
+        help="the largest depth to run without deduplication, whose cost grows exponentially",
+    )
+    parser.add_argument("--repetitions", type=int, default=3)
+    args = parser.parse_args()
+
+    engine, sql_schema_info = _make_database(args.num_groups, args.group_size)
+    deduplicating_schema_info = sql_schema_info._replace(deduplicate_recursive_traversals=True)
+
+    sys.stdout.write(
+        f"{args.num_groups * args.group_size} vertices in {args.num_groups} groups of "
+        f"{args.group_size}, recursing from "
+        f"{'every vertex' if args.start_vertex is None else f'vertex {args.start_vertex}'}.\n\n"
+    )
+    sys.stdout.write(f"{'depth':>5}  {'default (rows, ms)':>24}  {'deduplicated (rows, ms)':>24}\n")
+    for depth in range(1, args.max_depth + 1):
+        default_result = ""
+        if depth <= args.max_default_depth:
+            num_rows, elapsed_ms = _time_query(
+                engine, sql_schema_info, depth, args.start_vertex, args.repetitions
+            )
+            default_result = f"{num_rows:>10}, {elapsed_ms:>9.1f}"
+        num_rows, elapsed_ms = _time_query(
+            engine, deduplicating_schema_info, depth, args.start_vertex, args.repetitions
+        )
+        deduplicated_result = f"{num_rows:>10}, {elapsed_ms:>9.1f}"
+        sys.stdout.write(f"{depth:>5}  {default_result:>24}  {deduplicated_result:>24}\n")
+
+
+if __name__ == "__main__":
+    main()